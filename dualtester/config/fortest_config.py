@@ -26,6 +26,27 @@ FORTEST_ABORT_TEST_COIL = 0x14
 FORTEST_STATUS_REGISTER = 0x0030
 FORTEST_STATUS_REGISTER_COUNT = 32
 
+# Statusalueen sanat (indeksi registers-listassa)
+FORTEST_STATUS_WORD_ERRORS = 0
+FORTEST_STATUS_WORD_STATUS = 1
+FORTEST_STATUS_WORD_SUB_STATUS = 2
+FORTEST_STATUS_WORD_PROGRAM = 5
+FORTEST_STATUS_WORD_TIME_REMAINING_HIGH = 11
+FORTEST_STATUS_WORD_TIME_REMAINING_LOW = 12
+FORTEST_STATUS_WORD_PRESSURE_SIGN = 15
+FORTEST_STATUS_WORD_PRESSURE_HIGH = 16
+FORTEST_STATUS_WORD_PRESSURE_LOW = 17
+FORTEST_STATUS_WORD_PRESSURE_UNIT = 18
+FORTEST_STATUS_WORD_PRESSURE_DECIMALS = 19
+FORTEST_STATUS_WORD_DECAY_SIGN = 20
+FORTEST_STATUS_WORD_DECAY_HIGH = 21
+FORTEST_STATUS_WORD_DECAY_LOW = 22
+FORTEST_STATUS_WORD_DECAY_UNIT = 23
+FORTEST_STATUS_WORD_DECAY_DECIMALS = 24
+
+# Etumerkkisanan arvo negatiiviselle luvulle
+FORTEST_NEGATIVE_SIGN = 255
+
 # Testitulosten alue
 FORTEST_RESULTS_REGISTER = 0x0040
 FORTEST_RESULTS_REGISTER_COUNT = 32
@@ -36,4 +57,68 @@ FORTEST_RESULTS_REGISTER_COUNT = 32
 # ------------------------------------------------------------
 
 # ForTest-ohjelman valinta
-FORTEST_PROGRAM_REGISTER = 0x0060
\ No newline at end of file
+FORTEST_PROGRAM_REGISTER = 0x0060
+
+# Ohjelmanvaihdon vahvistus: kirjoituksen jälkeen statusalueen
+# ohjelmanumeroa luetaan, kunnes se vastaa kirjoitettua ohjelmaa.
+FORTEST_PROGRAM_VERIFY_ATTEMPTS = 5
+FORTEST_PROGRAM_VERIFY_INTERVAL_S = 0.1
+
+
+# ------------------------------------------------------------
+# ForTest ohjelmataulukko (TST-parametrit ja nimet)
+# ------------------------------------------------------------
+
+# Ohjelman n parametrit alkavat osoitteesta
+# FORTEST_PROGRAM_PARAM_BASE + n * FORTEST_PROGRAM_PARAM_STRIDE.
+# Jokainen parametri vie kaksi rekisteriä (HIGH, LOW).
+FORTEST_PROGRAM_PARAM_BASE = 0x3322
+FORTEST_PROGRAM_PARAM_STRIDE = 0x40
+FORTEST_PROGRAM_PARAM_WORDS = 2
+
+# Parametrien rekisterisiirtymät ohjelman alusta.
+FORTEST_PARAM_KIND_OF_TEST = 0x00
+FORTEST_PARAM_FILLING_PRESSURE = 0x02
+FORTEST_PARAM_PRESSURE_TOLERANCE = 0x04
+FORTEST_PARAM_KIND_OF_FILLING = 0x06
+FORTEST_PARAM_FILLING_TIME = 0x08
+FORTEST_PARAM_SETTLING_TIME = 0x0A
+FORTEST_PARAM_TEST_TIME = 0x0C
+FORTEST_PARAM_DISCHARGE_TIME = 0x0E
+FORTEST_PARAM_MEASUREMENT_TYPE = 0x10
+FORTEST_PARAM_MAXIMUM_DECAY = 0x12
+FORTEST_PARAM_PIECE_VOLUME = 0x14
+FORTEST_PARAM_DECAY_OFFSET = 0x16
+
+# Ohjelmasta luetaan parametrit Kind of test ... Offset on the decay.
+FORTEST_PROGRAM_PARAM_READ_COUNT = 0x18
+
+# Ohjelman n nimi: oma merkkijono-osoite FORTEST_PROGRAM_NAME_BASE + n,
+# 16 merkkiä = 8 rekisteriä. Nimet on luettava yksi kerrallaan.
+FORTEST_PROGRAM_NAME_BASE = 0xEA74
+FORTEST_PROGRAM_NAME_REGISTER_COUNT = 8
+
+# Ohjelmat 1...299 (ohjelma 0 ei ole käytössä ohjelmatiedostoissa)
+FORTEST_PROGRAM_FIRST_ID = 1
+FORTEST_PROGRAM_LAST_ID = 299
+
+# Modbus RTU sallii enintään 125 rekisteriä yhdessä luvussa.
+FORTEST_MAX_READ_REGISTERS = 125
+
+# Koko taulukon haku kestää 19200 baudilla kymmeniä sekunteja, joten
+# se luetaan näin monen parametrilohkon (2 ohjelmaa + nimet) paloina.
+# Palojen välissä worker käsittelee jonoon tulleet status-, START- ja
+# STOP-kutsut.
+FORTEST_PROGRAM_TABLE_BLOCKS_PER_CHUNK = 1
+
+# Haku keskeytetään, jos statusluku näyttää testin olevan käynnissä
+# (testi, autozero, purku).
+FORTEST_PROGRAM_TABLE_ABORT_STATUSES = (1, 2, 3)
+
+# ------------------------------------------------------------
+# Painekäyrän tallennus
+# ------------------------------------------------------------
+
+# Testin aikana (status 1/2/3) statusalue luetaan tiheämmin ja
+# paine / vuoto tallennetaan käyräksi tuloksen yhteyteen.
+FORTEST_PRESSURE_CURVE_CAPTURE_ENABLED = True
@@ -11,13 +11,17 @@ Huom:
 - ForTest 2 käyttää myöhemmin omaa väylää.
 - Raspberry Pi:n suorat GPIO:t eivät käytä sarjaporttia.
 - Porttinimet kannattaa myöhemmin muuttaa pysyviksi udev-nimiksi.
+- Portit voi ohittaa ympäristömuuttujilla (DUALTESTER_OPTA_PORT,
+  DUALTESTER_FORTEST1_PORT, DUALTESTER_FORTEST2_PORT), esim. kun
+  sovellusta ajetaan tools/modbus_simulator.py:n pty-portteja vasten.
 """
+import os
 
 # ------------------------------------------------------------
 # Arduino Opta / yhteinen RS485 Modbus RTU
 # ------------------------------------------------------------
 
-OPTA_MODBUS_PORT = "/dev/opta"
+OPTA_MODBUS_PORT = os.environ.get("DUALTESTER_OPTA_PORT", "/dev/opta")
 OPTA_MODBUS_BAUDRATE = 19200
 
 
@@ -25,6 +29,6 @@ OPTA_MODBUS_BAUDRATE = 19200
 # ForTest-laitteet
 # ------------------------------------------------------------
 
-FORTEST_1_PORT = "/dev/fortest1"
-FORTEST_2_PORT = "/dev/fortest2"
+FORTEST_1_PORT = os.environ.get("DUALTESTER_FORTEST1_PORT", "/dev/fortest1")
+FORTEST_2_PORT = os.environ.get("DUALTESTER_FORTEST2_PORT", "/dev/fortest2")
 FORTEST_BAUDRATE = 19200
\ No newline at end of file
@@ -1,4 +1,5 @@
 # controllers/application_cleanup_controller.py
+from utils.event_log import event_log, EVENT_SUBSYSTEM_APP
 
 
 class ApplicationCleanupController:
@@ -19,7 +20,10 @@ class ApplicationCleanupController:
         window = self.main_window
 
         try:
+            # Vahtikoira pysäytetään ensin: sulkemisen odotukset eivät
+            # ole jumeja.
             cleanup_order = [
+                "gui_stall_watchdog",
                 "top_bar_controller",
                 "navigation_controller",
                 "fortest_result_controller",
@@ -43,6 +47,7 @@ class ApplicationCleanupController:
                 "environment_status_bar",
                 "manual_screen",
                 "main_screen",
+                "diagnostics_screen",
             ]
 
             for attr_name in cleanup_widgets:
@@ -50,10 +55,19 @@ class ApplicationCleanupController:
                 if obj and hasattr(obj, "cleanup"):
                     obj.cleanup()
 
+            # ResultStorageService suljetaan viimeisenä: sen cleanup
+            # kirjoittaa tallennusjonossa odottavat tulokset levylle.
+            # Tapahtumaloki sen jälkeen, jotta sulkemisen viestit
+            # ehtivät tiedostoon.
             cleanup_services = [
-                "result_storage_service",
+                "result_query_service",
+                "program_manager_1",
+                "program_manager_2",
                 "fortest_service",
                 "hardware_service",
+                "bus_recorder",
+                "result_storage_service",
+                "event_log",
             ]
 
             for attr_name in cleanup_services:
@@ -62,4 +76,4 @@ class ApplicationCleanupController:
                     obj.cleanup()
 
         except Exception as e:
-            print(f"Virhe sovelluksen sulkemisessa: {e}")
+            event_log.error(EVENT_SUBSYSTEM_APP, f"Virhe sovelluksen sulkemisessa: {e}")
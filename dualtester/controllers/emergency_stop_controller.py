@@ -3,6 +3,7 @@
 from PyQt5.QtCore import QTimer
 
 from ui.components.emergency_stop_dialog import EmergencyStopDialog
+from utils.event_log import event_log, EVENT_SUBSYSTEM_HARDWARE
 
 
 class EmergencyStopController:
@@ -61,7 +62,7 @@ class EmergencyStopController:
                 self.open_emergency_dialog()
 
         except Exception as e:
-            print(f"Virhe hätäseistilan tarkistuksessa: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_HARDWARE, f"Virhe hätäseistilan tarkistuksessa: {e}")
             self.stop()
 
     def open_emergency_dialog(self):
@@ -114,7 +115,7 @@ class EmergencyStopController:
                 station.refresh_station_state()
 
             except Exception as e:
-                print(f"Virhe testin pysäytyksessä asemalla {station_id}: {e}")
+                event_log.error(EVENT_SUBSYSTEM_HARDWARE, f"Virhe testin pysäytyksessä asemalla {station_id}: {e}")
 
     def close_emergency_dialog(self):
         if self._emergency_dialog is not None:
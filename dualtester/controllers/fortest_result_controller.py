@@ -1,4 +1,6 @@
 # controllers/fortest_result_controller.py
+from utils.event_log import event_log, EVENT_SUBSYSTEM_FORTEST
+from utils.fortest_program_table import get_station_program_convention
 
 
 class ForTestResultController:
@@ -8,8 +10,11 @@ class ForTestResultController:
     Vastuu:
     - hakee oikean StationControllerin station_id:n perusteella
     - näyttää ForTest-virheet oikealla asemalla
+    - reitittää ohjelmanvaihdon vahvistuksen StationControllerille
     - reitittää statusrekisterit StationControllerille
     - reitittää tulosrekisterit StationControllerille
+    - reitittää yhdessä luetut status- ja tulosrekisterit samalla kertaa
+    - päivittää laitteelta haetun ohjelmataulukon aseman ProgramManageriin
 
     Tämä luokka ei päätä aseman ajotilaa.
     Aseman tila kuuluu StationControllerille.
@@ -17,19 +22,32 @@ class ForTestResultController:
 
     OP_START_ACK = 1
     OP_ABORT_ACK = 2
+    OP_PROGRAM_WRITE = 5
     OP_STATUS_READ = 3
     OP_RESULTS_READ = 4
+    OP_STATUS_AND_RESULTS_READ = 6
+    OP_PROGRAM_TABLE_READ = 7
     OP_CONNECTION_ERROR = 999
 
-    def __init__(self, station_controllers):
+    def __init__(self, station_controllers, program_managers=None, settings_screen=None):
         self.station_controllers = station_controllers
+        self.program_managers = program_managers or {}
+        self.settings_screen = settings_screen
 
     def handle_result(self, station_id, result, op_code, error_msg):
+        if op_code == self.OP_PROGRAM_TABLE_READ:
+            self.handle_program_table(station_id, result, error_msg)
+            return
+
         station = self.station_controllers.get(station_id)
 
         if not station:
             return
 
+        if op_code == self.OP_PROGRAM_WRITE:
+            station.handle_program_change_result(result, error_msg)
+            return
+
         if op_code == self.OP_CONNECTION_ERROR:
             station.update_status(error_msg, "WARNING")
             station.refresh_station_state()
@@ -58,5 +76,42 @@ class ForTestResultController:
             station.update_test_results(result)
             return
 
+        if op_code == self.OP_STATUS_AND_RESULTS_READ:
+            station.update_status_and_results_from_fortest(
+                getattr(result, "status", None),
+                getattr(result, "results", None),
+            )
+            return
+
+    def handle_program_table(self, station_id, program_table, error_msg):
+        program_manager = self.program_managers.get(station_id)
+
+        if error_msg or program_table is None or not program_manager:
+            if not error_msg:
+                error_msg = "ohjelmataulukkoa ei saatu luettua"
+
+            event_log.warning(EVENT_SUBSYSTEM_FORTEST, f"ForTest {station_id}: {error_msg}")
+            self._show_program_import_result(station_id, None, None, error_msg)
+            return
+
+        changed_ids = []
+
+        if program_table.programs:
+            changed_ids = program_manager.apply_downloaded_programs(
+                program_table.programs,
+                get_station_program_convention(station_id),
+            )
+
+        self._show_program_import_result(station_id, program_table, changed_ids, "")
+
+    def _show_program_import_result(self, station_id, program_table, changed_ids, error_msg):
+        if self.settings_screen and hasattr(self.settings_screen, "show_program_import_result"):
+            self.settings_screen.show_program_import_result(
+                station_id,
+                program_table,
+                changed_ids,
+                error_msg,
+            )
+
     def cleanup(self):
         pass
@@ -3,13 +3,17 @@
 from config.modbus_config import EMERGENCY_RESET_REGISTER
 
 
+# 2 = yksittäinen rekisterikirjoitus, 4 = monirekisterikirjoitus (FC16)
+WRITE_OP_CODES = (2, 4)
+
+
 class ModbusResultController:
     """
     Modbus-tulosten käsittely.
 
     Nykyinen vastuu:
     - hätäseisrekisterin kirjoitustulos ohitetaan
-    - hätäseisdialogin aikana op_code 2 ohitetaan
+    - hätäseisdialogin aikana kirjoitusten tulokset ohitetaan
     - virheilmoitus näytetään station 1:llä
     - onnistuneita yleisiä Modbus-kirjoituksia ei näytetä etusivun tilapaneelissa
     - epäonnistunut kirjoitus näyttää virheen
@@ -42,12 +46,12 @@ class ModbusResultController:
         if not result:
             return
 
-        if op_code == 2:
+        if op_code in WRITE_OP_CODES:
             self._handle_write_result(station, result)
 
     def _is_emergency_reset_write_result(self, result, op_code):
         return (
-            op_code == 2
+            op_code in WRITE_OP_CODES
             and hasattr(result, "address")
             and result.address == EMERGENCY_RESET_REGISTER
         )
@@ -59,7 +63,7 @@ class ModbusResultController:
         if not self.emergency_stop_controller.is_emergency_dialog_active():
             return False
 
-        return op_code == 2
+        return op_code in WRITE_OP_CODES
 
     def _handle_write_result(self, station, result):
         if not station:
@@ -11,6 +11,7 @@ class NavigationController:
     - päänäkymään palaaminen
     - käsikäytön avaaminen
     - asetussivun avaaminen
+    - diagnostiikkasivun avaaminen
     - ohjelmanvalinnan avaaminen
     - ESC-näppäimen navigointilogiikka
     """
@@ -24,6 +25,7 @@ class NavigationController:
         program_selection_screen,
         environment_status_bar,
         program_selection_controller,
+        diagnostics_screen=None,
     ):
         self.main_window = main_window
         self.main_screen = main_screen
@@ -32,12 +34,18 @@ class NavigationController:
         self.program_selection_screen = program_selection_screen
         self.environment_status_bar = environment_status_bar
         self.program_selection_controller = program_selection_controller
+        self.diagnostics_screen = diagnostics_screen
+
+    def _hide_diagnostics(self):
+        if self.diagnostics_screen:
+            self.diagnostics_screen.hide()
 
     def show_testing(self):
         self.environment_status_bar.hide()
         self.manual_screen.hide()
         self.settings_screen.hide()
         self.program_selection_screen.hide()
+        self._hide_diagnostics()
         self.main_screen.show()
         self.main_window.update_top_bar_status()
 
@@ -46,6 +54,7 @@ class NavigationController:
         self.environment_status_bar.hide()
         self.settings_screen.hide()
         self.program_selection_screen.hide()
+        self._hide_diagnostics()
 
         if hasattr(self.manual_screen, "refresh"):
             self.manual_screen.refresh()
@@ -57,12 +66,24 @@ class NavigationController:
         self.environment_status_bar.hide()
         self.manual_screen.hide()
         self.program_selection_screen.hide()
+        self._hide_diagnostics()
 
         if hasattr(self.settings_screen, "refresh"):
             self.settings_screen.refresh()
 
         self.settings_screen.show()
 
+    def show_diagnostics(self):
+        if not self.diagnostics_screen:
+            return
+
+        self.main_screen.hide()
+        self.environment_status_bar.hide()
+        self.manual_screen.hide()
+        self.settings_screen.hide()
+        self.program_selection_screen.hide()
+        self.diagnostics_screen.show()
+
     def show_program_selection(self, station_id=None):
         self.program_selection_controller.open_for_station(station_id)
 
@@ -71,6 +92,7 @@ class NavigationController:
             self.manual_screen.isVisible()
             or self.settings_screen.isVisible()
             or self.program_selection_screen.isVisible()
+            or (self.diagnostics_screen and self.diagnostics_screen.isVisible())
         ):
             if self.program_selection_screen.isVisible():
                 self.program_selection_controller.cancel_selection()
@@ -9,6 +9,7 @@ from config.gpio_config import (
     STATION_LIGHT_OUTPUTS,
     SPARE_BUTTONS,
 )
+from utils.event_log import event_log, EVENT_SUBSYSTEM_HARDWARE
 
 
 class PhysicalButtonController(QObject):
@@ -70,16 +71,16 @@ class PhysicalButtonController(QObject):
             return
 
         if button_name in self.spare_buttons:
-            print(f"Vara-/lisänappi painettu: {button_name}")
+            event_log.info(EVENT_SUBSYSTEM_HARDWARE, f"Vara-/lisänappi painettu: {button_name}")
             return
 
-        print(f"Tuntematon fyysinen nappi: {button_name}")
+        event_log.warning(EVENT_SUBSYSTEM_HARDWARE, f"Tuntematon fyysinen nappi: {button_name}")
 
     def toggle_station(self, station_id):
         station = self.station_controllers.get(station_id)
 
         if not station:
-            print(f"Fyysinen nappi: asemaa {station_id} ei löydy")
+            event_log.warning(EVENT_SUBSYSTEM_HARDWARE, f"Fyysinen nappi: asemaa {station_id} ei löydy")
             return
 
         if hasattr(station, "handle_physical_button_press"):
@@ -102,7 +103,7 @@ class PhysicalButtonController(QObject):
                         "ERROR",
                     )
                 except Exception as e:
-                    print(f"Hätäseis-napin käsittely epäonnistui asemalla {station_id}: {e}")
+                    event_log.error(EVENT_SUBSYSTEM_HARDWARE, f"Hätäseis-napin käsittely epäonnistui asemalla {station_id}: {e}")
 
     def _is_blink_mode(self, light_mode):
         return light_mode in [
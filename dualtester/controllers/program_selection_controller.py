@@ -1,4 +1,6 @@
 # controllers/program_selection_controller.py
+from utils.event_log import event_log, EVENT_SUBSYSTEM_UI
+
 
 class ProgramSelectionController:
     """
@@ -10,6 +12,7 @@ class ProgramSelectionController:
     - välittää ohjelma oikealle StationControllerille
     - palauttaa päänäkymään
     - estää ohjelman valinta ilman aktiivista asemaa
+    - päivittää avoimen listan, kun aseman ohjelmatiedosto muuttuu
     """
 
     def __init__(self, main_window, program_selection_screen, station_controllers):
@@ -21,13 +24,32 @@ class ProgramSelectionController:
 
         self.program_selection_screen.program_selected.connect(self.on_program_selected)
 
+        for station_id, attr_name in ((1, "program_manager_1"), (2, "program_manager_2")):
+            program_manager = getattr(self.main_window, attr_name, None)
+
+            if program_manager and hasattr(program_manager, "programs_changed"):
+                program_manager.programs_changed.connect(
+                    lambda changed_ids, sid=station_id: self.on_programs_changed(sid, changed_ids)
+                )
+
+    def on_programs_changed(self, station_id, changed_ids):
+        """
+        Päivitä ohjelmalista, jos se on auki muuttuneen aseman ohjelmille.
+        Asemalle jo valittua ohjelmaa ei vaihdeta.
+        """
+        if self.active_station_id != station_id:
+            return
+
+        if self.program_selection_screen.isVisible():
+            self.program_selection_screen.update_program_list()
+
     def open_for_station(self, station_id):
         """
         Avaa ohjelmanvalinnan tietylle asemalle.
         """
 
         if station_id not in self.station_controllers:
-            print(f"Ohjelmanvalintaa ei avattu: tuntematon asema {station_id}")
+            event_log.warning(EVENT_SUBSYSTEM_UI, f"Ohjelmanvalintaa ei avattu: tuntematon asema {station_id}")
             self.active_station_id = None
             self.main_window.show_testing()
             return
@@ -40,6 +62,10 @@ class ProgramSelectionController:
             self.program_selection_screen.program_manager = self.main_window.program_manager_2
 
         self.program_selection_screen.current_page = 0
+
+        if hasattr(self.program_selection_screen, "clear_search"):
+            self.program_selection_screen.clear_search()
+
         self.program_selection_screen.update_program_list()
 
         self.main_window.manual_screen.hide()
@@ -59,14 +85,14 @@ class ProgramSelectionController:
         """
 
         if self.active_station_id is None:
-            print("Ohjelmaa ei asetettu: aktiivista asemaa ei ole")
+            event_log.warning(EVENT_SUBSYSTEM_UI, "Ohjelmaa ei asetettu: aktiivista asemaa ei ole")
             self.main_window.show_testing()
             return
 
         station = self.station_controllers.get(self.active_station_id)
 
         if not station:
-            print(f"Ohjelmaa ei asetettu: asemaa {self.active_station_id} ei löydy")
+            event_log.warning(EVENT_SUBSYSTEM_UI, f"Ohjelmaa ei asetettu: asemaa {self.active_station_id} ei löydy")
             self.active_station_id = None
             self.main_window.show_testing()
             return
@@ -1,10 +1,24 @@
 # controllers/station_controller.py
-from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
 
 from controllers.station_result_handler import StationResultHandler
 from controllers.station_status_handler import StationStatusHandler
+from controllers.station_poll_rate_handler import StationPollRateHandler
+from controllers.station_pressure_curve_handler import StationPressureCurveHandler
+from controllers.station_program_change_handler import StationProgramChangeHandler
+from controllers.station_cycle_timing_handler import (
+    StationCycleTimingHandler,
+    CYCLE_PHASE_START_PRESSED,
+    CYCLE_PHASE_START_SENT,
+    CYCLE_PHASE_TEST_ACTIVE,
+    CYCLE_PHASE_TEST_FINISHED,
+)
 from controllers.test_valve_controller import TestValveController
 
+from ui.components.result_history_dialog import ResultHistoryDialog
+
+from utils.event_log import event_log
+
 from config.modbus_config import (
     JIG_SEQUENCE_STATUS_IDLE,
     JIG_SEQUENCE_STATUS_RUNNING,
@@ -40,6 +54,9 @@ AUTO_PHASE_FAIL_REMOVE = "FAIL_REMOVE"
 class StationController(QObject):
     """Yhden ForTest-aseman pääohjain."""
 
+    # ohjelma, vahvistettu, viive valinnasta vahvistukseen (ms)
+    program_change_finished = pyqtSignal(int, bool, float)
+
     def __init__(
         self,
         station_id,
@@ -59,17 +76,22 @@ class StationController(QObject):
         self.hardware_service = hardware_service
         self.dev_mode_fortest = dev_mode_fortest
 
+        # Luodaan ennen auto_cycle_phase-asetusta, joka kirjaa vaiheen.
+        self.cycle_timing_handler = StationCycleTimingHandler(self)
+
         self.selected_program = None
         self.program_number = 0
         self.program_written_to_fortest = False
 
         self.is_running = False
         self.results_started = False
-        self.results_read_counter = 0
 
         self.test_has_reached_active_status = False
         self.waiting_result_from_finished_test = False
 
+        self.bundled_fortest_results = None
+        self.bundled_fortest_results_requested = False
+
         self.auto_part_change_enabled = False
         self.auto_part_change_in_progress = False
         self.auto_cycle_started_by_user = False
@@ -79,12 +101,15 @@ class StationController(QObject):
         self.test_valve_controller = TestValveController(self.hardware_service)
         self.result_handler = StationResultHandler(self)
         self.status_handler = StationStatusHandler(self)
+        self.poll_rate_handler = StationPollRateHandler(self)
+        self.pressure_curve_handler = StationPressureCurveHandler(self)
+        self.program_change_handler = StationProgramChangeHandler(self)
 
         self._connect_ui()
 
         self.fortest_timer = QTimer(self)
         self.fortest_timer.timeout.connect(self.update_fortest_data)
-        self.fortest_timer.start(1000)
+        self.fortest_timer.start(self.poll_rate_handler.get_interval_ms())
 
         self.auto_jig_timer = QTimer(self)
         self.auto_jig_timer.timeout.connect(self.poll_auto_part_change_state)
@@ -93,6 +118,23 @@ class StationController(QObject):
         self.open_test_valve()
         self.refresh_station_state()
 
+    @property
+    def auto_cycle_phase(self):
+        return self._auto_cycle_phase
+
+    @auto_cycle_phase.setter
+    def auto_cycle_phase(self, phase):
+        # Jokainen vaiheen vaihto kirjataan kiertoajan mittaukseen.
+        previous_phase = getattr(self, "_auto_cycle_phase", None)
+        self._auto_cycle_phase = phase
+        self.cycle_timing_handler.handle_auto_phase(phase)
+
+        if phase != previous_phase:
+            event_log.jig_phase(self.station_id, previous_phase, phase)
+
+    def get_cycle_timing_summary(self):
+        return self.cycle_timing_handler.get_summary()
+
     def _connect_ui(self):
         self.station_widget.select_program_button.clicked.connect(self.request_program_selection)
         self.station_widget.start_button.clicked.connect(self.start_test)
@@ -118,6 +160,9 @@ class StationController(QObject):
                 self.toggle_auto_part_change
             )
 
+        if hasattr(self.station_widget, "history_button"):
+            self.station_widget.history_button.clicked.connect(self.show_result_history)
+
         if hasattr(self.station_widget, "dev_result_button"):
             self.station_widget.dev_result_button.clicked.connect(self.show_dev_fortest_result)
             self.station_widget.dev_result_button.setVisible(self.dev_mode_fortest)
@@ -126,6 +171,22 @@ class StationController(QObject):
         if hasattr(self.main_window, "register_test_activity"):
             self.main_window.register_test_activity()
 
+    def show_result_history(self):
+        query_service = getattr(self.main_window, "result_query_service", None)
+
+        if query_service is None:
+            return
+
+        self.register_test_activity()
+
+        dialog = ResultHistoryDialog(
+            station_id=self.station_id,
+            query_service=query_service,
+            row_formatter=self.result_handler.format_history_row,
+            parent=self.main_window,
+        )
+        dialog.exec_()
+
     def request_program_selection(self):
         if hasattr(self.main_window, "show_program_selection"):
             self.main_window.show_program_selection(self.station_id)
@@ -139,6 +200,9 @@ class StationController(QObject):
 
         self.disable_auto_part_change("AUTOMAATTI POIS: OHJELMA VAIHDETTU", show_message=False)
 
+        # Uusi valinta ohittaa edellisen vahvistamattoman vaihdon.
+        self.program_change_handler.cancel()
+
         if program_number <= 0:
             self.selected_program = None
             self.program_number = 0
@@ -160,9 +224,14 @@ class StationController(QObject):
                 return
 
             self.update_status(f"VAIHDETAAN OHJELMAAN {program_number}...", "INFO")
+
+            # write_program vain jonottaa kirjoituksen; ohjelma merkitään
+            # kirjoitetuksi vasta, kun worker on lukenut sen statusalueesta.
+            self.program_change_handler.begin(program_number)
             result = self.fortest_service.write_program(self.station_id, program_number)
 
             if not result:
+                self.program_change_handler.cancel()
                 self.selected_program = None
                 self.program_number = 0
                 self.program_written_to_fortest = False
@@ -170,8 +239,6 @@ class StationController(QObject):
                 self.update_jig_controls_visibility()
                 self.refresh_station_state()
                 return
-
-            self.program_written_to_fortest = True
         else:
             self.program_written_to_fortest = True
 
@@ -207,10 +274,25 @@ class StationController(QObject):
             decay_text=decay_text,
         )
 
-        self.update_status("OHJELMA VALITTU", "SUCCESS")
+        if hasattr(self.station_widget, "set_trend_decay_limit"):
+            try:
+                decay_limit = float(decay_value)
+            except (TypeError, ValueError):
+                decay_limit = None
+
+            self.station_widget.set_trend_decay_limit(decay_limit)
+
+        if self.program_change_handler.is_pending():
+            self.update_status(f"VAHVISTETAAN OHJELMAA {program_number}...", "INFO")
+        else:
+            self.update_status("OHJELMA VALITTU", "SUCCESS")
+
         self.update_jig_controls_visibility()
         self.refresh_station_state()
 
+    def handle_program_change_result(self, change, error_msg=""):
+        self.program_change_handler.handle_result(change, error_msg)
+
     def has_selected_program(self):
         return (
             self.program_number > 0
@@ -797,6 +879,7 @@ class StationController(QObject):
             self.refresh_station_state()
             return
 
+        self.cycle_timing_handler.mark(CYCLE_PHASE_START_PRESSED)
         valve_ok = self.close_test_valve()
 
         if not valve_ok:
@@ -812,6 +895,9 @@ class StationController(QObject):
         self.test_has_reached_active_status = False
         self.waiting_result_from_finished_test = False
         self.is_running = True
+        self.poll_rate_handler.handle_test_started()
+        self.pressure_curve_handler.handle_test_started()
+        self.cycle_timing_handler.mark(CYCLE_PHASE_START_SENT)
 
         self.update_status("TESTI KÄYNNISTETTY", "INFO")
 
@@ -832,6 +918,7 @@ class StationController(QObject):
         self.results_started = False
         self.test_has_reached_active_status = False
         self.waiting_result_from_finished_test = False
+        self.poll_rate_handler.handle_test_stopped()
         self.update_status("TESTI PYSÄYTETTY", "INFO")
 
         if not self.dev_mode_fortest:
@@ -845,6 +932,7 @@ class StationController(QObject):
         self.results_started = False
         self.test_has_reached_active_status = False
         self.waiting_result_from_finished_test = False
+        self.poll_rate_handler.handle_test_stopped()
         self.open_test_valve()
 
         if status_message:
@@ -862,24 +950,83 @@ class StationController(QObject):
             self.refresh_station_state()
             return
 
-        self.fortest_service.read_status(self.station_id)
+        if self.poll_rate_handler.should_read_results_with_status():
+            # Tulosalue luetaan statuksen kanssa samassa worker-kutsussa
+            # vain testin lopun lähellä ja tulosta odotettaessa, myös
+            # painekäyrää tallennettaessa: käyrän näyte otetaan saman
+            # kutsun statuksesta. Muulloin testin aikana luetaan pelkkä
+            # status; jos päättyminen huomataan statusluvussa, tulos
+            # pyydetään heti erikseen.
+            if self.waiting_result_from_finished_test:
+                self.poll_rate_handler.mark_result_read()
+
+            self.fortest_service.read_status_and_results(self.station_id)
+        else:
+            self.fortest_service.read_status(self.station_id)
 
-        if self.waiting_result_from_finished_test:
-            self.results_read_counter += 1
+        self.refresh_station_state()
 
-            if self.results_read_counter >= 2:
-                self.fortest_service.read_results(self.station_id)
-                self.results_read_counter = 0
+    def request_fortest_results(self):
+        self.poll_rate_handler.mark_result_read()
 
-        self.refresh_station_state()
+        if self.bundled_fortest_results is not None:
+            # Tulos luettiin jo samassa kutsussa statuksen kanssa.
+            self.bundled_fortest_results_requested = True
+            return
+
+        self.fortest_service.read_results(self.station_id)
+
+    def set_fortest_poll_interval(self, interval_ms):
+        if self.fortest_timer:
+            self.fortest_timer.setInterval(interval_ms)
+
+    def get_fortest_poll_rate(self):
+        """
+        Palauttaa aseman ForTest-pollauksen tilan:
+        {"mode": "FAST"/"SLOW", "interval_ms": ..., "achieved_hz": ...}
+        """
+        return self.poll_rate_handler.get_poll_rate()
 
     def update_status_from_fortest(self, result):
+        has_registers = result and hasattr(result, "registers") and len(result.registers) >= 2
+
+        # Käyrä suljetaan ennen statuksen käsittelyä, jotta se on valmis,
+        # kun päättymisen tulos tallennetaan.
+        if has_registers:
+            self.pressure_curve_handler.handle_status(result.registers)
+
         self.status_handler.update_status_from_fortest(result)
+
+        if has_registers:
+            self.poll_rate_handler.handle_status(result.registers[1])
+
         self.refresh_station_state()
 
+    def update_status_and_results_from_fortest(self, status_result, results_result):
+        """
+        Käsittele samalla kierroksella luetut status ja tulokset.
+
+        Status käsitellään ensin. Jos status tulkitaan testin
+        päättymiseksi, tulos käsitellään heti perään ilman uutta lukua.
+        """
+        self.bundled_fortest_results = results_result
+        self.bundled_fortest_results_requested = False
+
+        try:
+            self.update_status_from_fortest(status_result)
+        finally:
+            self.bundled_fortest_results = None
+
+        # Tulos käsitellään, jos status päätti testin juuri nyt tai jos
+        # tulosta jo odotettiin (uusintaluku statuksen mukana).
+        if self.bundled_fortest_results_requested or self.waiting_result_from_finished_test:
+            self.bundled_fortest_results_requested = False
+            self.update_test_results(results_result)
+
     def mark_test_active_status_seen(self):
         if self.is_running:
             self.test_has_reached_active_status = True
+            self.cycle_timing_handler.mark(CYCLE_PHASE_TEST_ACTIVE)
 
     def mark_test_finished_and_allow_result_read(self):
         if not self.test_has_reached_active_status:
@@ -888,7 +1035,7 @@ class StationController(QObject):
         self.is_running = False
         self.results_started = True
         self.waiting_result_from_finished_test = True
-        self.results_read_counter = 0
+        self.cycle_timing_handler.mark(CYCLE_PHASE_TEST_FINISHED)
 
     def update_test_results(self, result):
         if not self.waiting_result_from_finished_test:
@@ -0,0 +1,238 @@
+# controllers/station_cycle_timing_handler.py
+import time
+from collections import deque
+
+from utils.rolling_histogram import RollingHistogram
+
+
+# ------------------------------------------------------------
+# Testikierron vaiheet
+# ------------------------------------------------------------
+
+CYCLE_PHASE_START_PRESSED = "start_pressed"
+CYCLE_PHASE_START_SENT = "start_sent"
+CYCLE_PHASE_TEST_ACTIVE = "test_active"
+CYCLE_PHASE_TEST_FINISHED = "test_finished"
+CYCLE_PHASE_RESULT_DECODED = "result_decoded"
+CYCLE_PHASE_DB_COMMITTED = "db_committed"
+
+# (avain, näyttöteksti, alkuvaihe, loppuvaihe)
+CYCLE_INTERVALS = (
+    ("valve_delay", "START -> FORTEST START", CYCLE_PHASE_START_PRESSED, CYCLE_PHASE_START_SENT),
+    ("start_to_active", "FORTEST START -> TILA 1", CYCLE_PHASE_START_SENT, CYCLE_PHASE_TEST_ACTIVE),
+    ("test", "TESTI (TILA 1 -> 0)", CYCLE_PHASE_TEST_ACTIVE, CYCLE_PHASE_TEST_FINISHED),
+    ("result_read", "TILA 0 -> TULOS", CYCLE_PHASE_TEST_FINISHED, CYCLE_PHASE_RESULT_DECODED),
+    ("db_commit", "TULOS -> TIETOKANTA", CYCLE_PHASE_RESULT_DECODED, CYCLE_PHASE_DB_COMMITTED),
+    ("start_to_result", "START -> TULOS", CYCLE_PHASE_START_PRESSED, CYCLE_PHASE_RESULT_DECODED),
+)
+
+CYCLE_INTERVAL_CYCLE = "cycle"
+CYCLE_INTERVAL_CYCLE_LABEL = "KIERTOAIKA (START -> START)"
+
+# Jig-automatiikan vaiheen kesto tallennetaan avaimella "auto:<vaihe>".
+CYCLE_AUTO_PHASE_PREFIX = "auto:"
+
+# Pidempi tauko kahden startin välillä ei ole kiertoaikaa vaan seisokki.
+CYCLE_MAX_GAP_S = 600
+
+# Kappalemäärä lasketaan tämän ikkunan tuloksista.
+CYCLE_THROUGHPUT_WINDOW_S = 3600
+
+
+class StationCycleTimingHandler:
+    """
+    Yhden aseman testikierron ajoitus.
+
+    Tämä luokka:
+    - aikaleimaa kierron vaiheet (start, ForTest start, tila 1,
+      tila 0, tulos, tietokanta) time.monotonic()-kellolla
+    - laskee vaiheiden väliset ajat liukuviin histogrammeihin
+    - mittaa jig-automatiikan AUTO_PHASE_*-vaiheiden kestot
+    - laskee kappalemäärän viimeisen tunnin tuloksista
+
+    Tietokannan commit kuitataan tallennussäikeestä. Kuittaus vain
+    lisätään jonoon, ja se käsitellään GUI-säikeessä seuraavan
+    vaiheen tai yhteenvedon yhteydessä.
+    """
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.histograms = {}
+        self.timeline = {}
+        self.result_times = deque()
+
+        self.auto_phase = None
+        self.auto_phase_started = None
+
+        # (kierron aikajana, commit-aika) tallennussäikeestä
+        self.pending_commits = deque()
+
+    def _get_histogram(self, key):
+        histogram = self.histograms.get(key)
+
+        if histogram is None:
+            histogram = RollingHistogram()
+            self.histograms[key] = histogram
+
+        return histogram
+
+    # ------------------------------------------------------------
+    # Vaiheet
+    # ------------------------------------------------------------
+
+    def mark(self, phase, now=None):
+        """
+        Aikaleimaa kierron vaihe. Sama vaihe kirjataan kierrossa vain
+        ensimmäisellä kerralla. Start aloittaa uuden kierron.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        self.drain_commits()
+
+        if phase == CYCLE_PHASE_START_PRESSED:
+            previous_start = self.timeline.get(CYCLE_PHASE_START_PRESSED)
+
+            if (
+                previous_start is not None
+                and CYCLE_PHASE_RESULT_DECODED in self.timeline
+                and now - previous_start <= CYCLE_MAX_GAP_S
+            ):
+                self._get_histogram(CYCLE_INTERVAL_CYCLE).add((now - previous_start) * 1000.0)
+
+            self.timeline = {}
+
+        if phase in self.timeline:
+            return
+
+        self.timeline[phase] = now
+        self._record_intervals(self.timeline, phase)
+
+        if phase == CYCLE_PHASE_RESULT_DECODED:
+            self.result_times.append(now)
+            self._trim_result_times(now)
+
+    def _record_intervals(self, timeline, end_phase):
+        for key, _label, start_phase, interval_end_phase in CYCLE_INTERVALS:
+            if interval_end_phase != end_phase or start_phase not in timeline:
+                continue
+
+            self._get_histogram(key).add(
+                (timeline[end_phase] - timeline[start_phase]) * 1000.0
+            )
+
+    def get_elapsed_ms(self, start_phase, end_phase):
+        timeline = self.timeline
+
+        if start_phase not in timeline or end_phase not in timeline:
+            return None
+
+        return (timeline[end_phase] - timeline[start_phase]) * 1000.0
+
+    def handle_auto_phase(self, phase, now=None):
+        """
+        Kirjaa edellisen jig-vaiheen kesto, kun vaihe vaihtuu.
+        """
+        if phase == self.auto_phase:
+            return
+
+        if now is None:
+            now = time.monotonic()
+
+        if self.auto_phase is not None and self.auto_phase_started is not None:
+            self._get_histogram(f"{CYCLE_AUTO_PHASE_PREFIX}{self.auto_phase}").add(
+                (now - self.auto_phase_started) * 1000.0
+            )
+
+        self.auto_phase = phase
+        self.auto_phase_started = now
+
+    # ------------------------------------------------------------
+    # Tietokannan commit
+    # ------------------------------------------------------------
+
+    def make_commit_callback(self):
+        """
+        Palauttaa kuittausfunktion ResultStorageServicelle. Funktio
+        kutsutaan tallennussäikeessä, joten se vain lisää jonoon.
+        """
+        timeline = self.timeline
+
+        def on_committed(committed_at):
+            self.pending_commits.append((timeline, committed_at))
+
+        return on_committed
+
+    def drain_commits(self):
+        while self.pending_commits:
+            timeline, committed_at = self.pending_commits.popleft()
+
+            if CYCLE_PHASE_DB_COMMITTED in timeline:
+                continue
+
+            timeline[CYCLE_PHASE_DB_COMMITTED] = committed_at
+            self._record_intervals(timeline, CYCLE_PHASE_DB_COMMITTED)
+
+    # ------------------------------------------------------------
+    # Yhteenveto
+    # ------------------------------------------------------------
+
+    def _trim_result_times(self, now):
+        while self.result_times and now - self.result_times[0] > CYCLE_THROUGHPUT_WINDOW_S:
+            self.result_times.popleft()
+
+    def get_parts_per_hour(self):
+        """
+        Palauttaa (viimeisen tunnin kappaleet, arvio kiertoajasta / h).
+        """
+        self._trim_result_times(time.monotonic())
+
+        cycle_mean_ms = None
+        histogram = self.histograms.get(CYCLE_INTERVAL_CYCLE)
+
+        if histogram:
+            cycle_mean_ms = histogram.get_mean_ms()
+
+        estimate = 3600000.0 / cycle_mean_ms if cycle_mean_ms else None
+        return len(self.result_times), estimate
+
+    def get_summary(self):
+        """
+        Palauttaa aseman ajoitukset diagnostiikkanäkymälle:
+        {
+            "parts_last_hour": int,
+            "parts_per_hour_estimate": float tai None,
+            "intervals": [(avain, teksti, RollingHistogram.get_summary()), ...],
+        }
+        """
+        self.drain_commits()
+
+        parts_last_hour, estimate = self.get_parts_per_hour()
+
+        intervals = []
+        labels = [(CYCLE_INTERVAL_CYCLE, CYCLE_INTERVAL_CYCLE_LABEL)]
+        labels.extend((key, label) for key, label, _start, _end in CYCLE_INTERVALS)
+        labels.extend(
+            (key, key[len(CYCLE_AUTO_PHASE_PREFIX):])
+            for key in sorted(self.histograms)
+            if key.startswith(CYCLE_AUTO_PHASE_PREFIX)
+        )
+
+        for key, label in labels:
+            histogram = self.histograms.get(key)
+
+            if histogram is not None:
+                intervals.append((key, label, histogram.get_summary()))
+
+        return {
+            "parts_last_hour": parts_last_hour,
+            "parts_per_hour_estimate": estimate,
+            "intervals": intervals,
+        }
+
+    def reset(self):
+        self.histograms = {}
+        self.timeline = {}
+        self.result_times.clear()
+        self.pending_commits.clear()
@@ -0,0 +1,212 @@
+# controllers/station_poll_rate_handler.py
+import time
+from collections import deque
+
+
+# ------------------------------------------------------------
+# ForTest-statuksen pollausvälit
+# ------------------------------------------------------------
+
+# Testin aikana ja heti käynnistyksen jälkeen statusta luetaan tiheästi,
+# jotta testin päättyminen (1/2/3 -> 0) huomataan heti.
+FORTEST_POLL_FAST_INTERVAL_MS = 100
+
+# Painekäyrää tallennettaessa statusta luetaan vielä tiheämmin.
+# Väylä ei välttämättä ehdi tähän; ForTestManager ei jonota
+# päällekkäisiä lukuja, joten toteutuva tahti on väylän maksimi.
+FORTEST_POLL_CAPTURE_INTERVAL_MS = 50
+
+# Lepotilassa riittää harva luku yhteyden ja tilan seurantaan.
+FORTEST_POLL_SLOW_INTERVAL_MS = 1000
+
+# Käynnistyksen jälkeen ForTest voi vielä hetken näyttää tilaa 0.
+# Tämän ajan pidetään tiheä pollaus päällä, vaikka aktiivista tilaa
+# ei ole vielä nähty.
+FORTEST_POLL_FAST_HOLD_AFTER_START_MS = 3000
+
+# Tuloksen uusintaluku, jos ensimmäinen luku ei vielä antanut tulosta.
+FORTEST_RESULT_RETRY_INTERVAL_MS = 500
+
+# Tulosalue luetaan statuksen kanssa samassa worker-kutsussa vasta, kun
+# ohjelman aikojen mukainen testin loppu on tätä lähempänä. Muuten
+# testin aikana luetaan pelkkä status.
+FORTEST_RESULT_PREFETCH_WINDOW_MS = 1000
+
+# Saavutetun pollaustaajuuden laskentaan käytettävät näytteet.
+FORTEST_POLL_RATE_SAMPLES = 20
+
+FORTEST_ACTIVE_STATUSES = (1, 2, 3)
+
+POLL_MODE_CAPTURE = "CAPTURE"
+POLL_MODE_FAST = "FAST"
+POLL_MODE_SLOW = "SLOW"
+
+
+class StationPollRateHandler:
+    """
+    Yhden ForTest-aseman adaptiivinen statuspollaus.
+
+    Tämä luokka:
+    - valitsee pollausvälin aseman tilan perusteella
+    - pitää tiheän pollauksen päällä testin käynnistyksen jälkeen
+    - ajoittaa tuloksen uusintaluvut
+    - arvioi ohjelman aikojen perusteella, milloin testin loppu on
+      lähellä ja tulos kannattaa lukea statuksen kanssa
+    - mittaa toteutuneen statuslukujen taajuuden
+    """
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.mode = POLL_MODE_SLOW
+        self.fast_hold_until = 0.0
+        self.last_result_read_at = 0.0
+
+        # Ohjelman aikojen mukainen testin loppu (monotonic) tai None.
+        self.expected_end_at = None
+
+        self.status_sample_times = deque(maxlen=FORTEST_POLL_RATE_SAMPLES)
+
+    def get_interval_ms(self):
+        if self.mode == POLL_MODE_CAPTURE:
+            return FORTEST_POLL_CAPTURE_INTERVAL_MS
+
+        if self.mode == POLL_MODE_FAST:
+            return FORTEST_POLL_FAST_INTERVAL_MS
+
+        return FORTEST_POLL_SLOW_INTERVAL_MS
+
+    def _set_mode(self, mode):
+        if mode == self.mode:
+            return
+
+        self.mode = mode
+        self.controller.set_fortest_poll_interval(self.get_interval_ms())
+
+    # ------------------------------------------------------------
+    # Tilamuutokset
+    # ------------------------------------------------------------
+
+    def handle_test_started(self):
+        self.fast_hold_until = time.monotonic() + FORTEST_POLL_FAST_HOLD_AFTER_START_MS / 1000.0
+        self.expected_end_at = None
+        self._set_mode(POLL_MODE_FAST)
+
+    def handle_status(self, status_value):
+        self.status_sample_times.append(time.monotonic())
+
+        if status_value in FORTEST_ACTIVE_STATUSES:
+            if self.expected_end_at is None and self.controller.is_running:
+                self.expected_end_at = self._get_expected_end_at()
+
+            if self._is_capture_enabled():
+                self._set_mode(POLL_MODE_CAPTURE)
+            else:
+                self._set_mode(POLL_MODE_FAST)
+            return
+
+        self.expected_end_at = None
+
+        if self.mode == POLL_MODE_CAPTURE:
+            self._set_mode(POLL_MODE_FAST)
+
+        if self.controller.waiting_result_from_finished_test:
+            return
+
+        if time.monotonic() < self.fast_hold_until:
+            return
+
+        self._set_mode(POLL_MODE_SLOW)
+
+    def _is_capture_enabled(self):
+        pressure_curve_handler = getattr(self.controller, "pressure_curve_handler", None)
+        return bool(pressure_curve_handler and pressure_curve_handler.enabled)
+
+    def handle_test_stopped(self):
+        self.fast_hold_until = 0.0
+        self.expected_end_at = None
+        self._set_mode(POLL_MODE_SLOW)
+
+    def _get_expected_end_at(self):
+        """
+        Testin arvioitu loppu ensimmäisestä aktiivisesta statuksesta:
+        täyttö + tasaantuminen + testi + purku. None, jos ohjelmassa ei
+        ole aikoja.
+        """
+        program = getattr(self.controller, "selected_program", None) or {}
+        duration_s = 0.0
+
+        for key in ("fill_time_s", "settle_time_s", "test_time_s", "discharge_time_s"):
+            try:
+                duration_s += max(0.0, float(program.get(key) or 0))
+            except (TypeError, ValueError):
+                pass
+
+        if duration_s <= 0:
+            return None
+
+        return time.monotonic() + duration_s
+
+    # ------------------------------------------------------------
+    # Tulosten luku
+    # ------------------------------------------------------------
+
+    def mark_result_read(self):
+        self.last_result_read_at = time.monotonic()
+
+    def should_retry_result_read(self):
+        elapsed_ms = (time.monotonic() - self.last_result_read_at) * 1000.0
+        return elapsed_ms >= FORTEST_RESULT_RETRY_INTERVAL_MS
+
+    def is_test_end_near(self):
+        if self.expected_end_at is None:
+            return False
+
+        remaining_ms = (self.expected_end_at - time.monotonic()) * 1000.0
+        return remaining_ms <= FORTEST_RESULT_PREFETCH_WINDOW_MS
+
+    def should_read_results_with_status(self):
+        """
+        Luetaanko tällä pollauksella tulosalue statuksen kanssa.
+
+        - tulosta odotetaan: uusintaluvun välein
+        - testi käynnissä: vain, kun arvioitu loppu on lähellä, jolloin
+          päättymisen huomaava luku tuo tuloksen mukanaan
+        """
+        if self.controller.waiting_result_from_finished_test:
+            return self.should_retry_result_read()
+
+        return self.controller.is_running and self.is_test_end_near()
+
+    # ------------------------------------------------------------
+    # Mittaus
+    # ------------------------------------------------------------
+
+    def get_achieved_rate_hz(self):
+        """
+        Toteutunut statuslukujen taajuus viimeisistä näytteistä.
+
+        Palauttaa 0.0, jos näytteitä on liian vähän tai viimeisin
+        luku on vanhempi kuin kaksi hidasta pollausväliä.
+        """
+        if len(self.status_sample_times) < 2:
+            return 0.0
+
+        newest = self.status_sample_times[-1]
+
+        if time.monotonic() - newest > 2 * FORTEST_POLL_SLOW_INTERVAL_MS / 1000.0:
+            return 0.0
+
+        span_s = newest - self.status_sample_times[0]
+
+        if span_s <= 0:
+            return 0.0
+
+        return (len(self.status_sample_times) - 1) / span_s
+
+    def get_poll_rate(self):
+        return {
+            "mode": self.mode,
+            "interval_ms": self.get_interval_ms(),
+            "achieved_hz": self.get_achieved_rate_hz(),
+        }
@@ -0,0 +1,66 @@
+# controllers/station_pressure_curve_handler.py
+import time
+
+from config.fortest_config import (
+    FORTEST_PRESSURE_CURVE_CAPTURE_ENABLED,
+    FORTEST_STATUS_WORD_STATUS,
+)
+from utils.pressure_curve import PressureCurveBuffer
+
+
+FORTEST_CAPTURE_STATUSES = (1, 2, 3)
+
+
+class StationPressureCurveHandler:
+    """
+    Yhden ForTest-aseman painekäyrän tallennus.
+
+    Tämä luokka:
+    - aloittaa käyrän, kun status siirtyy testin aikaiseen tilaan (1/2/3)
+    - lisää jokaisesta statusluvusta näytteen puskuriin
+    - pakkaa käyrän, kun status palaa nollaan
+    - antaa pakatun käyrän tuloksen tallennukselle
+    """
+
+    def __init__(self, controller, enabled=FORTEST_PRESSURE_CURVE_CAPTURE_ENABLED):
+        self.controller = controller
+        self.enabled = bool(enabled)
+
+        self.buffer = PressureCurveBuffer()
+        self.capturing = False
+        self.started_at = 0.0
+        self.finished_curve = None
+
+    def handle_test_started(self):
+        self.buffer.reset()
+        self.capturing = False
+        self.finished_curve = None
+
+    def handle_status(self, registers):
+        if not self.enabled:
+            return
+
+        status_value = registers[FORTEST_STATUS_WORD_STATUS]
+
+        if status_value in FORTEST_CAPTURE_STATUSES:
+            if not self.capturing:
+                self.buffer.reset()
+                self.capturing = True
+                self.started_at = time.monotonic()
+                self.finished_curve = None
+
+            elapsed_ms = (time.monotonic() - self.started_at) * 1000.0
+            self.buffer.append_status(registers, elapsed_ms)
+            return
+
+        if self.capturing:
+            self.capturing = False
+            self.finished_curve = self.buffer.pack()
+
+    def take_finished_curve(self):
+        """
+        Palauttaa viimeksi päättyneen testin pakatun käyrän kerran.
+        """
+        curve = self.finished_curve
+        self.finished_curve = None
+        return curve
@@ -0,0 +1,96 @@
+# controllers/station_program_change_handler.py
+import time
+
+from utils.event_log import event_log, EVENT_SUBSYSTEM_FORTEST
+
+
+class StationProgramChangeHandler:
+    """
+    Yhden ForTest-aseman ohjelmanvaihdon vahvistus.
+
+    Tämä luokka:
+    - muistaa, mitä ohjelmaa odotetaan vahvistetuksi
+    - hylkää vanhentuneet vahvistukset, jos ohjelma on vaihdettu välissä
+    - merkitsee ohjelman kirjoitetuksi vasta ForTestin vahvistettua sen
+    - mittaa vaihdon kokonaisviiveen valinnasta vahvistukseen
+
+    Start pysyy estettynä, kunnes vahvistus on saatu, koska
+    StationController.has_selected_program() vaatii
+    program_written_to_fortest-lipun.
+    """
+
+    def __init__(self, controller):
+        self.controller = controller
+
+        self.pending_program = 0
+        self.started = None
+
+        self.last_bus_latency_ms = None
+        self.last_round_trip_ms = None
+
+    def is_pending(self):
+        return self.pending_program > 0
+
+    def begin(self, program_number):
+        self.pending_program = program_number
+        self.started = time.monotonic()
+
+    def cancel(self):
+        self.pending_program = 0
+        self.started = None
+
+    def handle_result(self, change, error_msg=""):
+        controller = self.controller
+        requested = getattr(change, "requested", None)
+
+        if not self.is_pending() or requested != self.pending_program:
+            return
+
+        round_trip_ms = (time.monotonic() - self.started) * 1000.0
+        self.cancel()
+
+        confirmed = bool(getattr(change, "is_confirmed", False)) and not error_msg
+
+        self.last_bus_latency_ms = getattr(change, "latency_ms", None)
+        self.last_round_trip_ms = round_trip_ms
+
+        event_log.info(
+            EVENT_SUBSYSTEM_FORTEST,
+            f"ForTest {controller.station_id}: ohjelma {requested} "
+            f"{'vahvistettu' if confirmed else 'EI vahvistettu'}, "
+            f"väylä {self.last_bus_latency_ms or 0:.0f} ms, "
+            f"yhteensä {round_trip_ms:.0f} ms, "
+            f"luvut {getattr(change, 'attempts', 0)}",
+            station_id=controller.station_id,
+            program=requested,
+            confirmed=confirmed,
+            bus_ms=self.last_bus_latency_ms,
+            round_trip_ms=round_trip_ms,
+        )
+
+        if confirmed:
+            controller.program_written_to_fortest = True
+            controller.update_status(
+                f"OHJELMA {requested} VAHVISTETTU ({round_trip_ms:.0f} ms)",
+                "SUCCESS",
+            )
+        else:
+            controller.selected_program = None
+            controller.program_number = 0
+            controller.program_written_to_fortest = False
+
+            if error_msg:
+                message = error_msg
+            elif not getattr(change, "written", False):
+                message = "OHJELMAN VAIHTO EPÄONNISTUI"
+            elif getattr(change, "confirmed", None) is None:
+                message = f"OHJELMAA {requested} EI VOITU VAHVISTAA"
+            else:
+                message = f"FORTEST JÄI OHJELMAAN {change.confirmed}"
+
+            controller.update_status(message, "ERROR")
+
+        controller.program_change_finished.emit(requested, confirmed, round_trip_ms)
+
+        controller.update_jig_controls_visibility()
+        controller.refresh_station_state()
@@ -3,6 +3,12 @@ from datetime import datetime
 from types import SimpleNamespace
 import random
 
+from controllers.station_cycle_timing_handler import (
+    CYCLE_PHASE_START_PRESSED,
+    CYCLE_PHASE_RESULT_DECODED,
+)
+from utils.event_log import event_log
+
 
 class StationResultHandler:
     """
@@ -86,7 +92,7 @@ class StationResultHandler:
         year = result.registers[5]
 
         timestamp = f"{day:02d}.{month:02d}.{year} {hours:02d}:{minutes:02d}:{seconds:02d}"
-        result_id = f"{timestamp}-{test_result}-{result.registers[6]}-{result.registers[21]}"
+        result_id = self.get_result_id(result.registers)
 
         if self.last_result_id == result_id:
             return None
@@ -94,12 +100,27 @@ class StationResultHandler:
         self.last_result_id = result_id
         self.last_test_result = test_result
 
+        cycle_timing_handler = getattr(controller, "cycle_timing_handler", None)
+
+        if cycle_timing_handler:
+            cycle_timing_handler.mark(CYCLE_PHASE_RESULT_DECODED)
+
         result_status = self.RESULT_TEXTS.get(test_result, f"TULOS: {test_result}")
         result_color = self._get_result_color(test_result)
 
         formatted_decay, decay_unit = self._parse_decay_value(result.registers)
         environment_snapshot = self._get_environment_snapshot(result)
 
+        event_log.result(
+            controller.station_id,
+            program=result.registers[6],
+            result_code=test_result,
+            result_text=result_status,
+            decay=formatted_decay,
+            decay_unit=decay_unit,
+            timestamp=timestamp,
+        )
+
         program_text = self._get_program_text(result)
         room_temp_text = self._get_room_temp_text(environment_snapshot)
         part_temp_text = self._get_part_temp_text(environment_snapshot)
@@ -114,6 +135,12 @@ class StationResultHandler:
             part_temp_text=part_temp_text,
         )
 
+        if hasattr(controller.station_widget, "add_trend_point"):
+            controller.station_widget.add_trend_point(
+                self._safe_float(formatted_decay),
+                self._safe_float(environment_snapshot.get("part_temperature_c")),
+            )
+
         self._store_result_to_database(
             result=result,
             test_result=test_result,
@@ -131,6 +158,48 @@ class StationResultHandler:
 
         return test_result
 
+    @staticmethod
+    def get_result_id(registers):
+        """
+        Tuloksen tunniste (aika, tulos, ohjelma, vuoto). Samaa tunnistetta
+        ei käsitellä kahdesti.
+        """
+        hours, minutes, seconds, day, month, year = registers[0:6]
+        timestamp = f"{day:02d}.{month:02d}.{year} {hours:02d}:{minutes:02d}:{seconds:02d}"
+
+        return f"{timestamp}-{registers[9]}-{registers[6]}-{registers[21]}"
+
+    def format_history_row(self, row):
+        """
+        Muunna tietokannan historiarivi tulostaulukon riviksi.
+
+        Sama esitys kuin add_result_row(), mutta aikaan lisätään päivä.
+        """
+        date_text = row.get("date") or ""
+        time_text = row.get("time") or ""
+        display_time = f"{date_text[8:10]}.{date_text[5:7]}. {time_text[:5]}"
+
+        program_text = row.get("program_name") or ""
+
+        if row.get("program_number"):
+            program_text = f"{row['program_number']}. {program_text}"
+
+        decay_value = row.get("decay_value")
+        decay_text = ""
+
+        if decay_value is not None:
+            decay_text = f"{decay_value:g} {row.get('decay_unit') or ''}".strip()
+
+        return {
+            "display_time": display_time,
+            "program_text": program_text,
+            "decay_text": decay_text,
+            "result_text": row.get("result_text") or "",
+            "result_color": self._get_result_color(row.get("result_code")),
+            "room_temp_text": self._get_room_temp_text(row),
+            "part_temp_text": self._get_part_temp_text(row),
+        }
+
     def _get_result_color(self, test_result):
         if test_result == 1:
             return "#00FF00"
@@ -346,7 +415,22 @@ class StationResultHandler:
             },
         }
 
-        storage_service.save_test_result(data)
+        pressure_curve_handler = getattr(controller, "pressure_curve_handler", None)
+
+        if pressure_curve_handler:
+            data["pressure_curve_blob"] = pressure_curve_handler.take_finished_curve()
+
+        on_committed = None
+        cycle_timing_handler = getattr(controller, "cycle_timing_handler", None)
+
+        if cycle_timing_handler:
+            data["cycle_time_ms"] = cycle_timing_handler.get_elapsed_ms(
+                CYCLE_PHASE_START_PRESSED,
+                CYCLE_PHASE_RESULT_DECODED,
+            )
+            on_committed = cycle_timing_handler.make_commit_callback()
+
+        storage_service.save_test_result(data, on_committed=on_committed)
 
     def create_dev_result(self):
         controller = self.controller
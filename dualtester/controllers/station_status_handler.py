@@ -1,4 +1,5 @@
 # controllers/station_status_handler.py
+from utils.event_log import event_log
 
 
 class StationStatusHandler:
@@ -31,6 +32,14 @@ class StationStatusHandler:
 
         status_value = result.registers[1]
 
+        if status_value != self.last_status:
+            event_log.status_transition(
+                controller.station_id,
+                self.last_status,
+                status_value,
+                sub_status=result.registers[2] if len(result.registers) > 2 else None,
+            )
+
         controller.update_test_valve_from_fortest_status(status_value)
 
         # 1/2/3 = ForTest on oikeasti testin aikaisessa tilassa.
@@ -43,7 +52,8 @@ class StationStatusHandler:
         if status_value == 0 and self.last_status in [1, 2, 3]:
             controller.mark_test_finished_and_allow_result_read()
             controller.open_test_valve()
-            controller.fortest_service.read_results(controller.station_id)
+            # Tulos luetaan samalla kierroksella, kun päättyminen huomataan.
+            controller.request_fortest_results()
             controller.refresh_station_state()
 
         self.last_status = status_value
@@ -3,6 +3,7 @@
 from PyQt5.QtCore import QTimer
 
 from utils.sen0332_handler import SEN0332Manager
+from utils.event_log import event_log, EVENT_SUBSYSTEM_SENSORS
 
 
 class TopBarController:
@@ -48,7 +49,7 @@ class TopBarController:
                 self.environment_status_bar.show_room_sensor_error
             )
         except Exception as e:
-            print(f"Varoitus: SEN0332-huoneanturin alustus epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_SENSORS, f"Varoitus: SEN0332-huoneanturin alustus epäonnistui: {e}")
             self.sen0332_manager = None
 
     def update_environment_sensors(self):
@@ -2,6 +2,7 @@
 from PyQt5.QtCore import QObject
 
 from utils.fortest_manager import ForTestManager
+from utils.event_log import event_log, EVENT_SUBSYSTEM_FORTEST
 
 
 class ForTestService(QObject):
@@ -73,7 +74,7 @@ class ForTestService(QObject):
                 self.fortest_managers[station_id] = fortest_manager
 
             except Exception as e:
-                print(f"Varoitus: ForTest {station_id} alustus epäonnistui portissa {fortest_port}: {e}")
+                event_log.warning(EVENT_SUBSYSTEM_FORTEST, f"Varoitus: ForTest {station_id} alustus epäonnistui portissa {fortest_port}: {e}")
 
     # ------------------------------------------------------------
     # ForTest-managerien haku
@@ -94,7 +95,7 @@ class ForTestService(QObject):
             return fortest_manager
 
         if not self.dev_mode_fortest:
-            print(f"ForTest {station_id}: ei manageria operaatiolle {operation_name}")
+            event_log.warning(EVENT_SUBSYSTEM_FORTEST, f"ForTest {station_id}: ei manageria operaatiolle {operation_name}")
 
         return None
 
@@ -135,7 +136,7 @@ class ForTestService(QObject):
             fortest_manager.write_program(program_number)
             return True
         except Exception as e:
-            print(f"Virhe ForTest {station_id} ohjelmanvaihdossa: {e}")
+            event_log.error(EVENT_SUBSYSTEM_FORTEST, f"Virhe ForTest {station_id} ohjelmanvaihdossa: {e}")
             return False
 
     # ------------------------------------------------------------
@@ -170,6 +171,21 @@ class ForTestService(QObject):
         if fortest_manager:
             fortest_manager.read_results()
 
+    def read_status_and_results(self, station_id):
+        fortest_manager = self._get_fortest_manager_or_warn(station_id, "read_status_and_results")
+
+        if fortest_manager:
+            fortest_manager.read_status_and_results()
+
+    def read_program_table(self, station_id):
+        fortest_manager = self._get_fortest_manager_or_warn(station_id, "read_program_table")
+
+        if not fortest_manager:
+            return False
+
+        fortest_manager.read_program_table()
+        return True
+
     # ------------------------------------------------------------
     # Sulkeminen
     # ------------------------------------------------------------
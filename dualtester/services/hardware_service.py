@@ -1,9 +1,11 @@
 # services/hardware_service.py
-from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtCore import QObject
 
 from config.modbus_config import (
     SHUTDOWN_REQUEST_REGISTER,
     EMERGENCY_RESET_REGISTER,
+    EMERGENCY_STATUS_REGISTER,
+    EMERGENCY_STATUS_REGISTER_COUNT,
     JIG_SEQUENCE_COMMAND_REGISTER,
     JIG_SEQUENCE_START_REGISTER,
     JIG_SEQUENCE_STOP_REGISTER,
@@ -18,10 +20,20 @@ from config.modbus_config import (
     JIG_SEQUENCE_ERROR_NONE,
 )
 
-from utils.modbus_manager import ModbusManager
+from utils.modbus_manager import ModbusManager, BUS_PRIORITY_EMERGENCY
+from utils.opta_register_poller import OptaRegisterPoller, OptaRegisterSnapshot
 from utils.gpio_handler import GPIOHandler
 from utils.gpio_input_handler import GPIOInputHandler
 from utils.dfr0558_handler import DFR0558Manager
+from utils.event_log import event_log, EVENT_SUBSYSTEM_HARDWARE
+
+
+# Vanhempaa snapshot-arvoa ei hyväksytä tilaksi, vaan palautetaan None
+# kuten epäonnistuneessa luvussa.
+EMERGENCY_STATUS_MAX_AGE_S = 3.0
+JIG_SEQUENCE_STATE_MAX_AGE_S = 2.0
+
+EMERGENCY_RESET_PULSE_MS = 300
 
 
 class HardwareService(QObject):
@@ -44,6 +56,9 @@ class HardwareService(QObject):
 
     ForTest-laitteet eivät kuulu tähän serviceen.
     ForTest 1 ja ForTest 2 kuuluvat ForTestServiceen.
+
+    Optan tilarekisterit (hätäseis, jig-sekvenssi) luetaan yhteisellä
+    OptaRegisterPollerilla. Controllerit lukevat vain sen snapshotia.
     """
 
     def __init__(
@@ -67,6 +82,7 @@ class HardwareService(QObject):
         self.opta_modbus_port = modbus_port
         self.opta_modbus_baudrate = modbus_baudrate
         self.opta_modbus_manager = None
+        self.opta_register_poller = None
 
         self.raspberry_gpio_output_handler = None
         self.raspberry_gpio_input_handler = None
@@ -103,9 +119,33 @@ class HardwareService(QObject):
                     self.parent_window.handle_modbus_result
                 )
 
+            self._init_opta_register_poller()
+
         except Exception as e:
-            print(f"Varoitus: Opta Modbus -alustus epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_HARDWARE, f"Varoitus: Opta Modbus -alustus epäonnistui: {e}")
             self.opta_modbus_manager = None
+            self.opta_register_poller = None
+
+    def _init_opta_register_poller(self):
+        self.opta_register_poller = OptaRegisterPoller(
+            self.opta_modbus_manager,
+            parent=self,
+        )
+
+        self.opta_register_poller.add_range(
+            "emergency_status",
+            EMERGENCY_STATUS_REGISTER,
+            EMERGENCY_STATUS_REGISTER_COUNT,
+            BUS_PRIORITY_EMERGENCY,
+        )
+
+        self.opta_register_poller.add_range(
+            "jig_sequence_state",
+            JIG_SEQUENCE_STATUS_REGISTER,
+            JIG_SEQUENCE_STATE_REGISTER_COUNT,
+        )
+
+        self.opta_register_poller.start()
 
     def _init_raspberry_gpio_outputs(self):
         if self.dev_mode_gpio:
@@ -114,7 +154,7 @@ class HardwareService(QObject):
         try:
             self.raspberry_gpio_output_handler = GPIOHandler()
         except Exception as e:
-            print(f"Varoitus: Raspberry GPIO-outputtien alustus epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_HARDWARE, f"Varoitus: Raspberry GPIO-outputtien alustus epäonnistui: {e}")
             self.raspberry_gpio_output_handler = None
 
     def _init_raspberry_gpio_inputs(self):
@@ -130,7 +170,7 @@ class HardwareService(QObject):
                 )
 
         except Exception as e:
-            print(f"Varoitus: Raspberry GPIO-inputtien alustus epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_HARDWARE, f"Varoitus: Raspberry GPIO-inputtien alustus epäonnistui: {e}")
             self.raspberry_gpio_input_handler = None
 
     def _init_part_temperature_sensor(self):
@@ -149,7 +189,7 @@ class HardwareService(QObject):
                 )
 
         except Exception as e:
-            print(f"Varoitus: DFR0558-anturin alustus epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_HARDWARE, f"Varoitus: DFR0558-anturin alustus epäonnistui: {e}")
             self.dfr0558_manager = None
 
     # ------------------------------------------------------------
@@ -202,54 +242,74 @@ class HardwareService(QObject):
 
         return opta_modbus_manager.write_register(address, value)
 
-    def read_registers_direct(self, address, count=1):
+    def write_registers(self, address, values):
         """
-        Synkroninen Opta-rekisteriluku HardwareServicen sisäiseen käyttöön.
+        Kirjoita peräkkäiset Opta-rekisterit yhtenä FC16-transaktiona.
 
-        Tätä käytetään automaattisyklin tilan lukemiseen.
-        Ei käytetä ForTest-väylälle.
+        Palauttaa transaktiotunnisteen (DEV-tilassa True) tai None.
         """
         if self.dev_mode_modbus:
-            return None
+            return True
 
         opta_modbus_manager = self._get_opta_modbus_manager_or_none()
 
         if not opta_modbus_manager:
             return None
 
-        if not hasattr(opta_modbus_manager, "modbus_handler"):
-            return None
+        return opta_modbus_manager.write_registers(address, values)
 
-        modbus_handler = opta_modbus_manager.modbus_handler
+    def get_register_snapshot(self):
+        """
+        Palauttaa Optan tilarekisterien viimeisimmän snapshotin.
 
-        if not modbus_handler or not modbus_handler.connected:
-            return None
+        Ei odota väylää. DEV-tilassa ja ilman yhteyttä palautetaan tyhjä
+        snapshot.
+        """
+        if self.dev_mode_modbus or not self.opta_register_poller:
+            return OptaRegisterSnapshot()
 
-        try:
-            return modbus_handler.read_holding_registers(address, count)
-        except Exception:
+        return self.opta_register_poller.get_snapshot()
+
+    def get_bus_statistics(self):
+        """
+        Palauttaa Opta-väylän jono- ja viivetilastot tai None.
+        """
+        opta_modbus_manager = self._get_opta_modbus_manager_or_none()
+
+        if not opta_modbus_manager:
             return None
 
+        return opta_modbus_manager.get_bus_statistics()
+
     def request_system_shutdown(self):
         try:
             return self.write_register(SHUTDOWN_REQUEST_REGISTER, 1)
         except Exception as e:
-            print(f"Varoitus: sammutusrekisterin kirjoitus epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_HARDWARE, f"Varoitus: sammutusrekisterin kirjoitus epäonnistui: {e}")
             return None
 
     def reset_emergency_stop(self):
-        try:
-            result = self.write_register(EMERGENCY_RESET_REGISTER, 1)
+        if self.dev_mode_modbus:
+            return True
 
-            QTimer.singleShot(
-                300,
-                lambda: self.write_register(EMERGENCY_RESET_REGISTER, 0),
-            )
+        opta_modbus_manager = self._get_opta_modbus_manager_or_none()
 
-            return result
+        if not opta_modbus_manager:
+            return None
+
+        try:
+            # Opta tunnistaa kuittauksen nousevasta reunasta, joten sama
+            # rekisteri kirjoitetaan 1 -> 0 yhtenä pulssitransaktiona.
+            return opta_modbus_manager.pulse_register(
+                EMERGENCY_RESET_REGISTER,
+                on_value=1,
+                off_value=0,
+                pulse_ms=EMERGENCY_RESET_PULSE_MS,
+                priority=BUS_PRIORITY_EMERGENCY,
+            )
 
         except Exception as e:
-            print(f"Hätäseis-kuittaus epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_HARDWARE, f"Hätäseis-kuittaus epäonnistui: {e}")
             return None
 
     # ------------------------------------------------------------
@@ -261,9 +321,12 @@ class HardwareService(QObject):
         Käynnistää Optan jig-sekvenssin.
 
         Dualtest ei aja ajoituksia.
-        Dualtest vain lähettää Optalle:
+        Dualtest vain lähettää Optalle yhdellä FC16-kirjoituksella:
         19200 = command
         19201 = 1
+
+        Opta käynnistää sekvenssin, kun 19201 != 0, joten käsky ja
+        käynnistysbitti kirjoitetaan samassa kehyksessä.
         """
         if self.dev_mode_modbus:
             self.dev_jig_sequence_status = JIG_SEQUENCE_STATUS_DONE
@@ -277,21 +340,28 @@ class HardwareService(QObject):
             return False, "Opta ModbusManager ei ole käytössä"
 
         try:
-            self.write_register(
+            self._invalidate_jig_sequence_state()
+
+            transaction_id = self.write_registers(
                 JIG_SEQUENCE_COMMAND_REGISTER,
-                command,
+                [command, 1],
             )
 
-            self.write_register(
-                JIG_SEQUENCE_START_REGISTER,
-                1,
-            )
+            if not transaction_id:
+                return False, f"{sequence_name} -sekvenssin käynnistys epäonnistui: ei Modbus-yhteyttä"
 
             return True, f"{sequence_name} -SEKVENSSI KÄYNNISTETTY"
 
         except Exception as e:
             return False, f"{sequence_name} -sekvenssin käynnistys epäonnistui: {e}"
 
+    def _invalidate_jig_sequence_state(self):
+        if self.opta_register_poller:
+            self.opta_register_poller.invalidate_range(
+                JIG_SEQUENCE_STATUS_REGISTER,
+                JIG_SEQUENCE_STATE_REGISTER_COUNT,
+            )
+
     def start_jig_part_clamp_sequence(self):
         return self._start_jig_sequence(
             JIG_SEQUENCE_COMMAND_PART_CLAMP,
@@ -329,6 +399,7 @@ class HardwareService(QObject):
             return False, "Opta ModbusManager ei ole käytössä"
 
         try:
+            self._invalidate_jig_sequence_state()
             self.write_register(JIG_SEQUENCE_STOP_REGISTER, 1)
             return True, "JIG-SEKVENSSI KESKEYTETTY"
 
@@ -355,33 +426,39 @@ class HardwareService(QObject):
                 "error": self.dev_jig_sequence_error,
             }
 
-        result = self.read_registers_direct(
+        registers = self.get_register_snapshot().get_range(
             JIG_SEQUENCE_STATUS_REGISTER,
             JIG_SEQUENCE_STATE_REGISTER_COUNT,
+            max_age_s=JIG_SEQUENCE_STATE_MAX_AGE_S,
         )
 
-        if not result or not hasattr(result, "registers"):
-            return None
-
-        if len(result.registers) < 3:
+        if not registers or len(registers) < 3:
             return None
 
         return {
-            "status": result.registers[0],
-            "step": result.registers[1],
-            "error": result.registers[2],
+            "status": registers[0],
+            "step": registers[1],
+            "error": registers[2],
         }
 
     def read_emergency_stop_status(self):
         if self.dev_mode_modbus:
             return self.dev_emergency_stop_status
 
-        opta_modbus_manager = self._get_opta_modbus_manager_or_none()
+        return self.get_register_snapshot().get(
+            EMERGENCY_STATUS_REGISTER,
+            max_age_s=EMERGENCY_STATUS_MAX_AGE_S,
+        )
 
-        if opta_modbus_manager:
-            return opta_modbus_manager.read_emergency_stop_status()
+    def request_emergency_stop_status(self):
+        """
+        Pyydä tuore hätäseistilan luku ilman odottamista.
+        """
+        if self.dev_mode_modbus:
+            return
 
-        return None
+        if self.opta_register_poller:
+            self.opta_register_poller.poll_now()
 
     def get_connection_status_text(self):
         """
@@ -469,6 +546,9 @@ class HardwareService(QObject):
     # ------------------------------------------------------------
 
     def cleanup(self):
+        if self.opta_register_poller:
+            self.opta_register_poller.cleanup()
+
         if self.opta_modbus_manager:
             self.opta_modbus_manager.cleanup()
 
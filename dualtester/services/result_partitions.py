@@ -0,0 +1,284 @@
+# services/result_partitions.py
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+from datetime import date
+
+from utils.event_log import event_log, EVENT_SUBSYSTEM_STORAGE
+
+
+# ------------------------------------------------------------
+# Osiointi
+# ------------------------------------------------------------
+
+# DUALTESTER_DATA_DIR ohittaa hakemiston, esim. benchmark-ajoissa.
+RESULT_DATABASE_DIRECTORY = os.environ.get(
+    "DUALTESTER_DATA_DIR",
+    "/home/akiriik/painetesteri_hmi/data",
+)
+RESULT_ARCHIVE_DIRECTORY_NAME = "archive"
+
+# Vanha yksittäinen tietokanta. Siihen ei enää kirjoiteta, mutta se
+# luetaan kyselyissä mukaan, kunnes se on siirretty osioihin.
+RESULT_LEGACY_DATABASE_NAME = "test_results.db"
+RESULT_LEGACY_PARTITION_KEY = "legacy"
+
+RESULT_PARTITION_PREFIX = "test_results_"
+RESULT_PARTITION_SUFFIX = ".db"
+RESULT_ARCHIVE_SUFFIX = ".db.gz"
+
+PARTITION_PERIOD_MONTH = "month"
+PARTITION_PERIOD_YEAR = "year"
+RESULT_PARTITION_PERIOD = PARTITION_PERIOD_MONTH
+
+# Osiot, joiden koko jakso on tätä vanhempi, pakataan arkistoon.
+# Kuukausiosioilla 24 = kaksi vuotta aktiivisena tiedostona.
+RESULT_RETENTION_MONTHS = 24
+
+PARTITION_KEY_PATTERNS = {
+    PARTITION_PERIOD_MONTH: re.compile(r"^\d{4}-\d{2}$"),
+    PARTITION_PERIOD_YEAR: re.compile(r"^\d{4}$"),
+}
+
+
+def get_partition_key(date_text, period=RESULT_PARTITION_PERIOD):
+    """
+    "2026-03-14" -> "2026-03" (kuukausi) tai "2026" (vuosi).
+    """
+    if period == PARTITION_PERIOD_YEAR:
+        return date_text[:4]
+
+    return date_text[:7]
+
+
+def get_partition_date_range(partition_key):
+    """
+    Palauttaa osion ensimmäisen ja viimeisen päivän ISO-muodossa.
+    """
+    if len(partition_key) == 4:
+        return f"{partition_key}-01-01", f"{partition_key}-12-31"
+
+    return f"{partition_key}-01", f"{partition_key}-31"
+
+
+def _months_between(older, newer):
+    return (newer.year - older.year) * 12 + newer.month - older.month
+
+
+class ResultPartitionLayout:
+    """
+    Tulostietokannan osiotiedostojen sijainnit.
+
+    data/
+        test_results_2026-03.db       aktiivinen kuukausiosio
+        test_results_2026-04.db
+        test_results.db               vanha yksittäinen tietokanta
+        archive/
+            test_results_2024-01.db.gz   pakattu, vain luku
+    """
+
+    def __init__(
+        self,
+        directory=RESULT_DATABASE_DIRECTORY,
+        period=RESULT_PARTITION_PERIOD,
+        retention_months=RESULT_RETENTION_MONTHS,
+    ):
+        self.directory = directory
+        self.period = period
+        self.retention_months = retention_months
+        self.archive_directory = os.path.join(directory, RESULT_ARCHIVE_DIRECTORY_NAME)
+
+    # ------------------------------------------------------------
+    # Polut
+    # ------------------------------------------------------------
+
+    def get_partition_key(self, date_text):
+        return get_partition_key(date_text, self.period)
+
+    def get_partition_path(self, partition_key):
+        if partition_key == RESULT_LEGACY_PARTITION_KEY:
+            return self.get_legacy_path()
+
+        return os.path.join(
+            self.directory,
+            f"{RESULT_PARTITION_PREFIX}{partition_key}{RESULT_PARTITION_SUFFIX}",
+        )
+
+    def get_archive_path(self, partition_key):
+        return os.path.join(
+            self.archive_directory,
+            f"{RESULT_PARTITION_PREFIX}{partition_key}{RESULT_ARCHIVE_SUFFIX}",
+        )
+
+    def get_legacy_path(self):
+        return os.path.join(self.directory, RESULT_LEGACY_DATABASE_NAME)
+
+    def has_legacy_database(self):
+        return os.path.exists(self.get_legacy_path())
+
+    # ------------------------------------------------------------
+    # Listaus
+    # ------------------------------------------------------------
+
+    def _list_keys(self, directory, suffix):
+        pattern = PARTITION_KEY_PATTERNS[self.period]
+        keys = []
+
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return keys
+
+        for name in names:
+            if not name.startswith(RESULT_PARTITION_PREFIX) or not name.endswith(suffix):
+                continue
+
+            key = name[len(RESULT_PARTITION_PREFIX):-len(suffix)]
+
+            if pattern.match(key):
+                keys.append(key)
+
+        return sorted(keys)
+
+    def list_partitions(self):
+        """
+        Aktiiviset osiot vanhimmasta uusimpaan.
+        """
+        return self._list_keys(self.directory, RESULT_PARTITION_SUFFIX)
+
+    def list_archives(self):
+        return self._list_keys(self.archive_directory, RESULT_ARCHIVE_SUFFIX)
+
+    def get_partitions_for_range(self, date_from=None, date_to=None, keys=None):
+        """
+        Osiot, joiden jakso osuu annetulle välille, uusimmasta vanhimpaan.
+        """
+        if keys is None:
+            keys = self.list_partitions()
+
+        selected = []
+
+        for key in keys:
+            first_day, last_day = get_partition_date_range(key)
+
+            if date_from and last_day < date_from:
+                continue
+
+            if date_to and first_day > date_to:
+                continue
+
+            selected.append(key)
+
+        return sorted(selected, reverse=True)
+
+    # ------------------------------------------------------------
+    # Arkistointi
+    # ------------------------------------------------------------
+
+    def get_expired_partitions(self, today=None):
+        """
+        Osiot, joiden koko jakso on vanhempi kuin säilytysaika.
+        """
+        if today is None:
+            today = date.today()
+
+        expired = []
+
+        for key in self.list_partitions():
+            _first_day, last_day = get_partition_date_range(key)
+            last_month = date(int(last_day[:4]), int(last_day[5:7]), 1)
+
+            if _months_between(last_month, today) > self.retention_months:
+                expired.append(key)
+
+        return expired
+
+    def archive_partition(self, partition_key):
+        """
+        Pakkaa osio arkistoon ja poista aktiivinen tiedosto.
+
+        Osio kirjoitetaan ensin tiiviiksi VACUUM INTO -kopioksi, joten
+        aktiivisen tiedoston WAL- ja tyhjät sivut eivät päädy arkistoon.
+        Arkisto on gzip-pakattu SQLite-tiedosto, jonka oikeudet ovat
+        vain luku. Palauttaa True onnistuessaan.
+        """
+        source_path = self.get_partition_path(partition_key)
+        archive_path = self.get_archive_path(partition_key)
+        compact_path = f"{archive_path}.compact"
+        temp_archive_path = f"{archive_path}.tmp"
+
+        if not os.path.exists(source_path):
+            return False
+
+        os.makedirs(self.archive_directory, exist_ok=True)
+
+        try:
+            for path in (compact_path, temp_archive_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            connection = sqlite3.connect(source_path, timeout=30)
+
+            try:
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                connection.execute("VACUUM INTO ?", (compact_path,))
+            finally:
+                connection.close()
+
+            with open(compact_path, "rb") as source_file:
+                with gzip.open(temp_archive_path, "wb", compresslevel=6) as archive_file:
+                    shutil.copyfileobj(source_file, archive_file)
+
+            with open(temp_archive_path, "rb") as archive_file:
+                os.fsync(archive_file.fileno())
+
+            os.replace(temp_archive_path, archive_path)
+            os.chmod(archive_path, 0o444)
+
+        except Exception as e:
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Osion {partition_key} arkistointi epäonnistui: {e}")
+
+            for path in (compact_path, temp_archive_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+            return False
+
+        os.remove(compact_path)
+
+        for suffix in ("", "-wal", "-shm"):
+            path = source_path + suffix
+
+            if os.path.exists(path):
+                os.remove(path)
+
+        event_log.info(EVENT_SUBSYSTEM_STORAGE, f"Osio {partition_key} arkistoitu: {archive_path}")
+        return True
+
+    def extract_archive(self, partition_key, target_directory):
+        """
+        Pura arkisto luettavaksi tiedostoksi target_directoryyn.
+
+        Palauttaa puretun tiedoston polun tai None.
+        """
+        archive_path = self.get_archive_path(partition_key)
+        target_path = os.path.join(
+            target_directory,
+            f"{RESULT_PARTITION_PREFIX}{partition_key}{RESULT_PARTITION_SUFFIX}",
+        )
+
+        if os.path.exists(target_path):
+            return target_path
+
+        try:
+            with gzip.open(archive_path, "rb") as archive_file:
+                with open(target_path, "wb") as target_file:
+                    shutil.copyfileobj(archive_file, target_file)
+
+            return target_path
+
+        except Exception as e:
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Arkiston {partition_key} purku epäonnistui: {e}")
+            return None
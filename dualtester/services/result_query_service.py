@@ -0,0 +1,732 @@
+# services/result_query_service.py
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+
+from services.result_partitions import (
+    ResultPartitionLayout,
+    RESULT_LEGACY_PARTITION_KEY,
+    get_partition_date_range,
+)
+from utils.pressure_curve import unpack_pressure_curve
+from utils.raw_result_codec import decode_raw_result
+from utils.event_log import event_log, EVENT_SUBSYSTEM_STORAGE
+
+
+# ------------------------------------------------------------
+# Kyselyasetukset
+# ------------------------------------------------------------
+
+RESULT_HISTORY_DEFAULT_PAGE_SIZE = 50
+RESULT_HISTORY_MAX_PAGE_SIZE = 500
+
+DEFAULT_DECAY_PERCENTILES = (50, 90, 95, 99)
+
+# Yhtä aikaa liitettyjen (ATTACH) osioiden enimmäismäärä. SQLiten
+# oletusraja on 10 liitettyä tietokantaa.
+RESULT_QUERY_MAX_ATTACHED = 8
+
+HISTORY_COLUMNS = (
+    "id",
+    "timestamp",
+    "date",
+    "time",
+    "station_id",
+    "tester_name",
+    "program_number",
+    "program_name",
+    "product_name",
+    "result_code",
+    "result_text",
+    "result_ok",
+    "pressure_mbar",
+    "decay_value",
+    "decay_unit",
+    "leak_value",
+    "leak_unit",
+    "room_temperature_c",
+    "room_humidity_percent",
+    "tank_temperature_c",
+    "tank_humidity_percent",
+    "tank_pressure_bar",
+    "part_temperature_c",
+)
+
+# Saantokyselyn ryhmittelyt: nimi -> yhteenvetotaulun sarake
+YIELD_GROUP_COLUMNS = {
+    "program": "program_number",
+    "station": "station_id",
+    "day": "date",
+}
+
+
+def get_percentile_ranks(count, percentile):
+    """
+    Persentiilin interpoloinnin järjestysnumerot (alempi, ylempi,
+    osuus) count arvon järjestetyssä joukossa.
+    """
+    position = (count - 1) * percentile / 100.0
+    lower = int(position)
+    upper = min(lower + 1, count - 1)
+    return lower, upper, position - lower
+
+
+def calculate_percentile(sorted_values, percentile):
+    """
+    Lineaarisesti interpoloitu persentiili järjestetystä listasta.
+    """
+    if not sorted_values:
+        return None
+
+    lower, upper, fraction = get_percentile_ranks(len(sorted_values), percentile)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+def _partition_sort_key(partition_key):
+    # Vanha yksittäinen tietokanta on vanhempi kuin mikään osio.
+    if partition_key == RESULT_LEGACY_PARTITION_KEY:
+        return ""
+
+    return partition_key
+
+
+class ResultQueryService:
+    """
+    Testitulosten lukurajapinta raportteja ja historiaa varten.
+
+    Kirjoitukset kuuluvat ResultStorageServicelle. Tämä luokka lukee
+    osiotiedostoja vain luku -tilassa ja lukee:
+    - sivutettua historiaa (avainsivutus timestamp + osio + id)
+    - saantoa ohjelmittain / asemittain / päivittäin
+      test_result_daily_summary-yhteenvetotauluista
+    - vuotoarvon persentiilejä kattavista indekseistä
+    - raakatulosrekistereitä tallennusmuodosta riippumatta
+
+    Osiot liitetään muistitietokantaan ATTACHilla vasta, kun kysely
+    tarvitsee niitä. Kysely ajetaan vain niihin osioihin, joiden jakso
+    osuu aikavälille, ja tulokset yhdistetään. Vanha yksittäinen
+    tietokanta luetaan mukaan vanhimpana osiona. include_archives=True
+    lukee myös pakatut arkistot purkamalla ne väliaikaishakemistoon.
+
+    Päivämäärät annetaan ISO-muodossa "YYYY-MM-DD", ja rajat sisältyvät
+    väliin.
+    """
+
+    def __init__(self, parent=None, partition_layout=None, include_archives=False):
+        self.parent = parent
+        self.partition_layout = partition_layout or ResultPartitionLayout()
+        self.include_archives = include_archives
+        self.connection = None
+        self.attached = OrderedDict()
+        self.archive_cache_directory = None
+        self.lock = threading.Lock()
+
+    def _get_connection(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect(
+                "file::memory:",
+                uri=True,
+                timeout=5,
+                check_same_thread=False,
+                # Autocommit: luku ei jätä avointa transaktiota, joka
+                # jäädyttäisi osioiden näkymän ja estäisi kirjoittajan
+                # WAL-checkpointit.
+                isolation_level=None,
+            )
+            self.connection.row_factory = sqlite3.Row
+
+        return self.connection
+
+    # ------------------------------------------------------------
+    # Osiot
+    # ------------------------------------------------------------
+
+    def _get_query_partitions(self, date_from=None, date_to=None):
+        """
+        Kyselyyn osuvat osiot uusimmasta vanhimpaan.
+        """
+        layout = self.partition_layout
+        keys = layout.list_partitions()
+
+        if self.include_archives:
+            keys = sorted(set(keys) | set(layout.list_archives()))
+
+        partitions = layout.get_partitions_for_range(date_from, date_to, keys)
+
+        if layout.has_legacy_database():
+            partitions.append(RESULT_LEGACY_PARTITION_KEY)
+
+        return partitions
+
+    def _get_partition_file(self, partition_key):
+        path = self.partition_layout.get_partition_path(partition_key)
+
+        if os.path.exists(path):
+            return path
+
+        if not self.include_archives:
+            return None
+
+        if self.archive_cache_directory is None:
+            self.archive_cache_directory = tempfile.mkdtemp(prefix="result_archives_")
+
+        return self.partition_layout.extract_archive(
+            partition_key,
+            self.archive_cache_directory,
+        )
+
+    def _attach_partition(self, connection, partition_key):
+        """
+        Liitä osio tarvittaessa ja palauta sen skeeman nimi tai None.
+        """
+        schema = self.attached.get(partition_key)
+
+        if schema is not None:
+            self.attached.move_to_end(partition_key)
+            return schema
+
+        path = self._get_partition_file(partition_key)
+
+        if path is None:
+            return None
+
+        while len(self.attached) >= RESULT_QUERY_MAX_ATTACHED:
+            _oldest_key, oldest_schema = self.attached.popitem(last=False)
+            connection.execute(f"DETACH DATABASE {oldest_schema}")
+
+        schema = "p_" + partition_key.replace("-", "_")
+        connection.execute(
+            f"ATTACH DATABASE ? AS {schema}",
+            (f"file:{path}?mode=ro",),
+        )
+        self.attached[partition_key] = schema
+        return schema
+
+    def _fetch_partition(self, partition_key, sql, parameters):
+        """
+        Aja kysely yhteen osioon. sql:ssä {schema} korvataan osion nimellä.
+        """
+        with self.lock:
+            try:
+                connection = self._get_connection()
+                schema = self._attach_partition(connection, partition_key)
+
+                if schema is None:
+                    return []
+
+                return connection.execute(sql.format(schema=schema), parameters).fetchall()
+            except sqlite3.Error as e:
+                event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Tuloskysely epäonnistui (osio {partition_key}): {e}")
+                self._close_connection()
+                return []
+
+    def _build_filters(
+        self,
+        date_from=None,
+        date_to=None,
+        station_id=None,
+        program_number=None,
+        result_ok=None,
+    ):
+        clauses = []
+        parameters = []
+
+        if date_from:
+            clauses.append("date >= ?")
+            parameters.append(date_from)
+
+        if date_to:
+            clauses.append("date <= ?")
+            parameters.append(date_to)
+
+        if station_id is not None:
+            clauses.append("station_id = ?")
+            parameters.append(station_id)
+
+        if program_number is not None:
+            clauses.append("program_number = ?")
+            parameters.append(program_number)
+
+        if result_ok is not None:
+            clauses.append("result_ok = ?")
+            parameters.append(1 if result_ok else 0)
+
+        return clauses, parameters
+
+    # ------------------------------------------------------------
+    # Historia
+    # ------------------------------------------------------------
+
+    def get_history_page(
+        self,
+        page_size=RESULT_HISTORY_DEFAULT_PAGE_SIZE,
+        cursor=None,
+        date_from=None,
+        date_to=None,
+        station_id=None,
+        program_number=None,
+        result_ok=None,
+    ):
+        """
+        Palauttaa yhden historiasivun uusimmasta vanhimpaan.
+
+        cursor = edellisen sivun next_cursor tai None ensimmäiselle sivulle.
+        Rivien "partition" kertoo osion, josta rivi luettiin.
+        Palauttaa:
+        {
+            "rows": [dict, ...],
+            "next_cursor": (timestamp, osio, id) tai None, jos sivuja ei ole
+            enempää
+        }
+        """
+        page_size = max(1, min(int(page_size), RESULT_HISTORY_MAX_PAGE_SIZE))
+
+        clauses, parameters = self._build_filters(
+            date_from,
+            date_to,
+            station_id,
+            program_number,
+            result_ok,
+        )
+
+        partitions = self._get_query_partitions(date_from, date_to)
+
+        if cursor:
+            cursor_timestamp, cursor_partition, cursor_id = cursor
+            cursor_sort_key = _partition_sort_key(cursor_partition)
+
+        rows = []
+        limit = page_size + 1
+
+        for partition_key in partitions:
+            sort_key = _partition_sort_key(partition_key)
+
+            if cursor and sort_key > cursor_sort_key:
+                # Uudempi osio kuin kursori: vain vanhemmat aikaleimat.
+                if partition_key != RESULT_LEGACY_PARTITION_KEY:
+                    first_day, _last_day = get_partition_date_range(partition_key)
+
+                    if first_day > cursor_timestamp[:10]:
+                        continue
+
+            if len(rows) >= limit and partition_key != RESULT_LEGACY_PARTITION_KEY:
+                # Osio on kokonaan vanhempi kuin sivun vanhin rivi.
+                _first_day, last_day = get_partition_date_range(partition_key)
+                rows.sort(key=self._history_sort_key, reverse=True)
+                rows = rows[:limit]
+
+                if last_day < rows[-1]["date"]:
+                    break
+
+            partition_clauses = list(clauses)
+            partition_parameters = list(parameters)
+
+            if cursor:
+                if sort_key < cursor_sort_key:
+                    partition_clauses.append("timestamp <= ?")
+                    partition_parameters.append(cursor_timestamp)
+                elif sort_key > cursor_sort_key:
+                    partition_clauses.append("timestamp < ?")
+                    partition_parameters.append(cursor_timestamp)
+                else:
+                    partition_clauses.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+                    partition_parameters.extend([cursor_timestamp, cursor_timestamp, cursor_id])
+
+            where_sql = f"WHERE {' AND '.join(partition_clauses)}" if partition_clauses else ""
+
+            for row in self._fetch_partition(
+                partition_key,
+                f"""
+                SELECT {", ".join(HISTORY_COLUMNS)}
+                FROM {{schema}}.test_results
+                {where_sql}
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+                """,
+                partition_parameters + [limit],
+            ):
+                row = dict(row)
+                row["partition"] = partition_key
+                rows.append(row)
+
+        rows.sort(key=self._history_sort_key, reverse=True)
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        next_cursor = None
+
+        if has_more and rows:
+            next_cursor = (rows[-1]["timestamp"], rows[-1]["partition"], rows[-1]["id"])
+
+        return {
+            "rows": rows,
+            "next_cursor": next_cursor,
+        }
+
+    def _history_sort_key(self, row):
+        return (row["timestamp"], _partition_sort_key(row["partition"]), row["id"])
+
+    def get_history_count(
+        self,
+        date_from=None,
+        date_to=None,
+        station_id=None,
+        program_number=None,
+    ):
+        """
+        Rivimäärä suodattimilla. Luetaan yhteenvetotaulusta.
+        """
+        clauses, parameters = self._build_filters(
+            date_from,
+            date_to,
+            station_id,
+            program_number,
+        )
+
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        total_count = 0
+
+        for partition_key in self._get_query_partitions(date_from, date_to):
+            rows = self._fetch_partition(
+                partition_key,
+                f"""
+                SELECT IFNULL(SUM(total_count), 0) AS total_count
+                FROM {{schema}}.test_result_daily_summary
+                {where_sql}
+                """,
+                parameters,
+            )
+
+            if rows:
+                total_count += rows[0]["total_count"]
+
+        return total_count
+
+    def get_raw_result(self, result_id, partition):
+        """
+        Palauttaa tuloksen raw_resultin ({"registers": [...]}) tai None.
+
+        partition = historiarivin "partition". Purkaa sekä vanhan
+        JSON-muodon että pakatun BLOB-muodon.
+        """
+        rows = self._fetch_partition(
+            partition,
+            """
+            SELECT raw_result_json, raw_result_blob
+            FROM {schema}.test_results
+            WHERE id = ?
+            """,
+            [result_id],
+        )
+
+        if not rows:
+            return None
+
+        return decode_raw_result(rows[0]["raw_result_json"], rows[0]["raw_result_blob"])
+
+    def get_pressure_curve(self, result_id, partition):
+        """
+        Palauttaa tuloksen painekäyrän (unpack_pressure_curve) tai None.
+        """
+        rows = self._fetch_partition(
+            partition,
+            """
+            SELECT pressure_curve_blob
+            FROM {schema}.test_results
+            WHERE id = ?
+            """,
+            [result_id],
+        )
+
+        if not rows or rows[0]["pressure_curve_blob"] is None:
+            return None
+
+        try:
+            return unpack_pressure_curve(rows[0]["pressure_curve_blob"])
+        except Exception as e:
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Painekäyrän purku epäonnistui: {e}")
+            return None
+
+    # ------------------------------------------------------------
+    # Saanto
+    # ------------------------------------------------------------
+
+    def get_yield(
+        self,
+        group_by="program",
+        date_from=None,
+        date_to=None,
+        station_id=None,
+        program_number=None,
+    ):
+        """
+        Saanto ryhmittäin yhteenvetotaulusta.
+
+        group_by = "program", "station" tai "day"
+        Palauttaa listan:
+        {
+            "key": ohjelma / asema / päivä,
+            "total": testien määrä,
+            "ok": OK-testien määrä,
+            "yield_percent": OK-osuus prosentteina,
+            "decay_avg": vuotoarvon keskiarvo tai None,
+            "decay_min": ...,
+            "decay_max": ...,
+        }
+        """
+        group_column = YIELD_GROUP_COLUMNS.get(group_by)
+
+        if group_column is None:
+            raise ValueError(f"Tuntematon ryhmittely: {group_by}")
+
+        clauses, parameters = self._build_filters(
+            date_from,
+            date_to,
+            station_id,
+            program_number,
+        )
+
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        groups = {}
+
+        for partition_key in self._get_query_partitions(date_from, date_to):
+            rows = self._fetch_partition(
+                partition_key,
+                f"""
+                SELECT
+                    {group_column} AS key,
+                    SUM(total_count) AS total,
+                    SUM(ok_count) AS ok,
+                    SUM(decay_count) AS decay_count,
+                    SUM(decay_sum) AS decay_sum,
+                    MIN(decay_min) AS decay_min,
+                    MAX(decay_max) AS decay_max
+                FROM {{schema}}.test_result_daily_summary
+                {where_sql}
+                GROUP BY {group_column}
+                """,
+                parameters,
+            )
+
+            # Sama ryhmä voi löytyä useasta osiosta (ohjelma, asema).
+            for row in rows:
+                group = groups.setdefault(row["key"], {
+                    "total": 0,
+                    "ok": 0,
+                    "decay_count": 0,
+                    "decay_sum": 0.0,
+                    "decay_min": None,
+                    "decay_max": None,
+                })
+
+                group["total"] += row["total"] or 0
+                group["ok"] += row["ok"] or 0
+                group["decay_count"] += row["decay_count"] or 0
+                group["decay_sum"] += row["decay_sum"] or 0.0
+
+                if row["decay_min"] is not None:
+                    if group["decay_min"] is None or row["decay_min"] < group["decay_min"]:
+                        group["decay_min"] = row["decay_min"]
+
+                if row["decay_max"] is not None:
+                    if group["decay_max"] is None or row["decay_max"] > group["decay_max"]:
+                        group["decay_max"] = row["decay_max"]
+
+        yield_rows = []
+
+        for key in sorted(groups):
+            group = groups[key]
+            total = group["total"]
+            ok = group["ok"]
+            decay_count = group["decay_count"]
+
+            yield_rows.append({
+                "key": key,
+                "total": total,
+                "ok": ok,
+                "yield_percent": (100.0 * ok / total) if total else None,
+                "decay_avg": (group["decay_sum"] / decay_count) if decay_count else None,
+                "decay_min": group["decay_min"],
+                "decay_max": group["decay_max"],
+            })
+
+        return yield_rows
+
+    # ------------------------------------------------------------
+    # Vuotojakauma
+    # ------------------------------------------------------------
+
+    def get_decay_percentiles(
+        self,
+        date_from=None,
+        date_to=None,
+        station_id=None,
+        program_number=None,
+        percentiles=DEFAULT_DECAY_PERCENTILES,
+    ):
+        """
+        Vuotoarvon persentiilit aikaväliltä.
+
+        Ensin lasketaan osioittain COUNT(*) kattavasta indeksistä (date,
+        station_id, program_number, decay_value) tai ohjelmakohtaisesti
+        (program_number, date, decay_value). Sitten suodatetut arvot
+        järjestetään SQLitessä kerran, ja tarvittavat järjestysnumerot
+        luetaan siitä. Arvoja ei lueta Pythoniin.
+        Palauttaa {"count": n, "percentiles": {50: arvo, ...}}.
+        """
+        clauses, parameters = self._build_filters(
+            date_from,
+            date_to,
+            station_id,
+            program_number,
+        )
+        clauses.append("decay_value IS NOT NULL")
+        where_sql = f"WHERE {' AND '.join(clauses)}"
+
+        partition_keys = []
+        count = 0
+
+        for partition_key in self._get_query_partitions(date_from, date_to):
+            rows = self._fetch_partition(
+                partition_key,
+                f"""
+                SELECT COUNT(*)
+                FROM {{schema}}.test_results
+                {where_sql}
+                """,
+                parameters,
+            )
+            partition_count = rows[0][0] if rows else 0
+
+            if partition_count:
+                partition_keys.append(partition_key)
+                count += partition_count
+
+        if count == 0:
+            return {
+                "count": 0,
+                "percentiles": {percentile: None for percentile in percentiles},
+            }
+
+        percentile_ranks = {
+            percentile: get_percentile_ranks(count, percentile)
+            for percentile in percentiles
+        }
+        ranks = sorted({
+            rank
+            for lower, upper, _fraction in percentile_ranks.values()
+            for rank in (lower, upper)
+        })
+
+        values = self._select_decay_ranks(partition_keys, where_sql, parameters, ranks)
+
+        result = {}
+
+        for percentile, (lower, upper, fraction) in percentile_ranks.items():
+            lower_value = values.get(lower)
+            upper_value = values.get(upper)
+
+            if lower_value is None or upper_value is None:
+                result[percentile] = None
+            else:
+                result[percentile] = lower_value + (upper_value - lower_value) * fraction
+
+        return {
+            "count": count,
+            "percentiles": result,
+        }
+
+    def _select_decay_ranks(self, partition_keys, where_sql, parameters, ranks):
+        """
+        Järjestysnumeroiden vuotoarvot osioiden yhteisestä
+        järjestyksestä: {rank: arvo}.
+
+        Osioiden indeksit eivät ole decay_value-järjestyksessä, joten
+        arvot kopioidaan SQLitessä muistitietokannan väliaikaiseen
+        tauluun ja järjestetään yhdellä indeksin luonnilla. Jokainen
+        järjestysnumero luetaan sitten indeksistä (LIMIT 1 OFFSET ?).
+        Osiot liitetään yksi kerrallaan (RESULT_QUERY_MAX_ATTACHED).
+        """
+        values = {}
+
+        with self.lock:
+            try:
+                connection = self._get_connection()
+                connection.execute("DROP TABLE IF EXISTS temp.decay_selection")
+                connection.execute("CREATE TEMP TABLE decay_selection (decay_value REAL NOT NULL)")
+
+                for partition_key in partition_keys:
+                    schema = self._attach_partition(connection, partition_key)
+
+                    if schema is None:
+                        continue
+
+                    connection.execute(
+                        f"""
+                        INSERT INTO temp.decay_selection (decay_value)
+                        SELECT decay_value
+                        FROM {schema}.test_results
+                        {where_sql}
+                        """,
+                        parameters,
+                    )
+
+                connection.execute(
+                    "CREATE INDEX temp.idx_decay_selection ON decay_selection(decay_value)"
+                )
+
+                for rank in ranks:
+                    row = connection.execute(
+                        """
+                        SELECT decay_value
+                        FROM temp.decay_selection
+                        ORDER BY decay_value
+                        LIMIT 1 OFFSET ?
+                        """,
+                        (rank,),
+                    ).fetchone()
+
+                    if row is not None:
+                        values[rank] = row[0]
+
+            except sqlite3.Error as e:
+                event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Vuotojakauman kysely epäonnistui: {e}")
+                self._close_connection()
+                return {}
+            finally:
+                if self.connection is not None:
+                    try:
+                        self.connection.execute("DROP TABLE IF EXISTS temp.decay_selection")
+                    except sqlite3.Error:
+                        pass
+
+        return values
+
+    # ------------------------------------------------------------
+    # Siivous
+    # ------------------------------------------------------------
+
+    def _close_connection(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+
+            self.connection = None
+
+        self.attached.clear()
+
+    def cleanup(self):
+        with self.lock:
+            self._close_connection()
+
+            if self.archive_cache_directory is not None:
+                shutil.rmtree(self.archive_cache_directory, ignore_errors=True)
+                self.archive_cache_directory = None
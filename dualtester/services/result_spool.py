@@ -0,0 +1,364 @@
+# services/result_spool.py
+import base64
+import json
+import os
+import struct
+import threading
+import zlib
+from datetime import datetime
+
+from utils.event_log import event_log, EVENT_SUBSYSTEM_STORAGE
+
+
+# ------------------------------------------------------------
+# Spool-tiedoston tietuemuoto
+# ------------------------------------------------------------
+
+# Jokainen tietue:
+#   2 tavua  magic  b"RB" (binäärinen) tai b"RS" (vanha JSON)
+#   4 tavua  payloadin pituus (big endian)
+#   4 tavua  payloadin CRC32 (big endian)
+#   N tavua  payload
+#
+# Binäärinen payload:
+#   1 tavu   kenttien määrä
+#   kentät RESULT_SPOOL_COLUMNS-järjestyksessä, jokainen:
+#     1 tavu   tyyppi (RESULT_SPOOL_TYPE_*)
+#     arvo     int64 / float64 little endian, tai uint32-pituus + tavut
+#
+# Rivi on sama sanakirja, joka menee test_results-tauluun, joten siinä
+# ovat mukana raakatulosrekisterit ja ympäristön mittaukset.
+# Raakatulos on raw_result_blob-kentässä valmiiksi pakattuna
+# uint16-taulukkona (utils/raw_result_codec.py), ja se kirjoitetaan
+# tietueeseen sellaisenaan. Katkennut viimeinen tietue tunnistetaan
+# pituudesta ja CRC:stä.
+#
+# Vanhat JSON-tietueet (b"RS", BLOBit base64-muodossa
+# {"__bytes__": "..."}) luetaan edelleen, joten päivitystä edeltävä
+# spool ajetaan normaalisti tietokantaan.
+RESULT_SPOOL_MAGIC = b"RB"
+RESULT_SPOOL_MAGIC_JSON = b"RS"
+RESULT_SPOOL_HEADER = struct.Struct(">2sII")
+
+# Suurempaa tietuetta ei hyväksytä; pituuskenttä on silloin rikki.
+RESULT_SPOOL_MAX_RECORD_BYTES = 1024 * 1024
+
+# Kenttien järjestys tietueessa. Uudet sarakkeet lisätään vain
+# loppuun: vanhemmasta tietueesta puuttuvat loppupään kentät.
+RESULT_SPOOL_COLUMNS = (
+    "timestamp",
+    "date",
+    "time",
+    "station_id",
+    "tester_name",
+    "program_number",
+    "program_name",
+    "product_name",
+    "result_code",
+    "result_text",
+    "result_ok",
+    "pressure_mbar",
+    "decay_value",
+    "decay_unit",
+    "leak_value",
+    "leak_unit",
+    "room_temperature_c",
+    "room_humidity_percent",
+    "tank_temperature_c",
+    "tank_humidity_percent",
+    "tank_pressure_bar",
+    "part_temperature_c",
+    "raw_result_json",
+    "raw_result_blob",
+    "pressure_curve_blob",
+    "cycle_time_ms",
+)
+
+RESULT_SPOOL_TYPE_NONE = 0
+RESULT_SPOOL_TYPE_INT = 1
+RESULT_SPOOL_TYPE_FLOAT = 2
+RESULT_SPOOL_TYPE_TEXT = 3
+RESULT_SPOOL_TYPE_BYTES = 4
+
+RESULT_SPOOL_FIELD_COUNT = struct.Struct("<B")
+RESULT_SPOOL_FIELD_TYPE = struct.Struct("<B")
+RESULT_SPOOL_INT = struct.Struct("<q")
+RESULT_SPOOL_FLOAT = struct.Struct("<d")
+RESULT_SPOOL_LENGTH = struct.Struct("<I")
+
+
+def _encode_field(value):
+    if value is None:
+        return RESULT_SPOOL_FIELD_TYPE.pack(RESULT_SPOOL_TYPE_NONE)
+
+    if isinstance(value, (bool, int)):
+        return RESULT_SPOOL_FIELD_TYPE.pack(RESULT_SPOOL_TYPE_INT) + RESULT_SPOOL_INT.pack(int(value))
+
+    if isinstance(value, float):
+        return RESULT_SPOOL_FIELD_TYPE.pack(RESULT_SPOOL_TYPE_FLOAT) + RESULT_SPOOL_FLOAT.pack(value)
+
+    if isinstance(value, str):
+        data = value.encode("utf-8")
+        field_type = RESULT_SPOOL_TYPE_TEXT
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        field_type = RESULT_SPOOL_TYPE_BYTES
+    else:
+        raise TypeError(f"Tyyppiä {type(value).__name__} ei voi tallentaa spooliin")
+
+    return RESULT_SPOOL_FIELD_TYPE.pack(field_type) + RESULT_SPOOL_LENGTH.pack(len(data)) + data
+
+
+def _decode_fields(payload):
+    (count,) = RESULT_SPOOL_FIELD_COUNT.unpack_from(payload, 0)
+
+    if count > len(RESULT_SPOOL_COLUMNS):
+        raise ValueError(f"Spool-tietueessa liikaa kenttiä: {count}")
+
+    offset = RESULT_SPOOL_FIELD_COUNT.size
+    row = {}
+
+    for column in RESULT_SPOOL_COLUMNS[:count]:
+        (field_type,) = RESULT_SPOOL_FIELD_TYPE.unpack_from(payload, offset)
+        offset += RESULT_SPOOL_FIELD_TYPE.size
+
+        if field_type == RESULT_SPOOL_TYPE_NONE:
+            value = None
+        elif field_type == RESULT_SPOOL_TYPE_INT:
+            (value,) = RESULT_SPOOL_INT.unpack_from(payload, offset)
+            offset += RESULT_SPOOL_INT.size
+        elif field_type == RESULT_SPOOL_TYPE_FLOAT:
+            (value,) = RESULT_SPOOL_FLOAT.unpack_from(payload, offset)
+            offset += RESULT_SPOOL_FLOAT.size
+        elif field_type in (RESULT_SPOOL_TYPE_TEXT, RESULT_SPOOL_TYPE_BYTES):
+            (length,) = RESULT_SPOOL_LENGTH.unpack_from(payload, offset)
+            offset += RESULT_SPOOL_LENGTH.size
+            data = payload[offset:offset + length]
+
+            if len(data) != length:
+                raise ValueError("Spool-tietueen kenttä katkesi")
+
+            offset += length
+            value = data.decode("utf-8") if field_type == RESULT_SPOOL_TYPE_TEXT else bytes(data)
+        else:
+            raise ValueError(f"Tuntematon spool-kentän tyyppi: {field_type}")
+
+        row[column] = value
+
+    if offset != len(payload):
+        raise ValueError("Spool-tietueen lopussa ylimääräistä dataa")
+
+    return row
+
+
+def _decode_json_object(obj):
+    if set(obj.keys()) == {"__bytes__"}:
+        return base64.b64decode(obj["__bytes__"])
+
+    return obj
+
+
+class ResultSpool:
+    """
+    Tulosten hätävarasto, kun SQLite-kirjoitus ei onnistu.
+
+    Tiedostoon vain lisätään. Yksi append()-kutsu kirjoittaa kaikki
+    annetut rivit ja tekee yhden fsyncin. replay() lukee ehjät tietueet,
+    antaa ne tallennusfunktiolle ja jättää tiedostoon vain ne rivit,
+    joita ei saatu tallennettua.
+
+    Lukko suojaa vain tiedosto-operaatioita. Tallennusfunktiota ei
+    kutsuta lukon sisällä, joten append() ei jää odottamaan
+    tietokantaa.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def _encode_record(self, row):
+        unknown = set(row.keys()) - set(RESULT_SPOOL_COLUMNS)
+
+        if unknown:
+            raise ValueError(f"Spool ei tunne kenttiä: {', '.join(sorted(unknown))}")
+
+        payload = RESULT_SPOOL_FIELD_COUNT.pack(len(RESULT_SPOOL_COLUMNS)) + b"".join(
+            _encode_field(row.get(column))
+            for column in RESULT_SPOOL_COLUMNS
+        )
+
+        return RESULT_SPOOL_HEADER.pack(
+            RESULT_SPOOL_MAGIC,
+            len(payload),
+            zlib.crc32(payload) & 0xFFFFFFFF,
+        ) + payload
+
+    def _encode_records(self, rows):
+        return b"".join(self._encode_record(row) for row in rows)
+
+    def append(self, rows):
+        """
+        Lisää rivit spooliin ja synkronoi ne levylle.
+
+        Palauttaa True, jos kaikki rivit on kirjoitettu.
+        """
+        if not rows:
+            return True
+
+        try:
+            data = self._encode_records(rows)
+
+            with self.lock:
+                directory = os.path.dirname(self.path)
+
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+
+                with open(self.path, "ab") as spool_file:
+                    spool_file.write(data)
+                    spool_file.flush()
+                    os.fsync(spool_file.fileno())
+
+            return True
+
+        except Exception as e:
+            event_log.error(EVENT_SUBSYSTEM_STORAGE, f"Tulosten kirjoitus spool-tiedostoon epäonnistui: {e}")
+            return False
+
+    def has_records(self):
+        try:
+            return os.path.getsize(self.path) > 0
+        except OSError:
+            return False
+
+    def _read_data(self):
+        with open(self.path, "rb") as spool_file:
+            return spool_file.read()
+
+    def _decode_records(self, data):
+        """
+        Palauttaa (rivit, ehjä).
+
+        ehjä = False, jos datasta löytyi rikkinäinen tietue.
+        Lukeminen loppuu ensimmäiseen rikkinäiseen tietueeseen.
+        """
+        rows = []
+        offset = 0
+
+        while offset < len(data):
+            header_end = offset + RESULT_SPOOL_HEADER.size
+
+            if header_end > len(data):
+                return rows, False
+
+            magic, length, crc = RESULT_SPOOL_HEADER.unpack_from(data, offset)
+
+            if magic not in (RESULT_SPOOL_MAGIC, RESULT_SPOOL_MAGIC_JSON):
+                return rows, False
+
+            if length > RESULT_SPOOL_MAX_RECORD_BYTES:
+                return rows, False
+
+            payload = data[header_end:header_end + length]
+
+            if len(payload) != length or zlib.crc32(payload) & 0xFFFFFFFF != crc:
+                return rows, False
+
+            try:
+                if magic == RESULT_SPOOL_MAGIC:
+                    rows.append(_decode_fields(payload))
+                else:
+                    rows.append(
+                        json.loads(
+                            payload.decode("utf-8"),
+                            object_hook=_decode_json_object,
+                        )
+                    )
+            except Exception:
+                return rows, False
+
+            offset = header_end + length
+
+        return rows, True
+
+    def replay(self, store_rows):
+        """
+        Aja spoolin rivit store_rows(rows)-funktiolle.
+
+        store_rows palauttaa listan riveistä, joita ei saatu tallennettua
+        (tyhjä lista = kaikki onnistui). Vain epäonnistuneet rivit jäävät
+        spooliin, joten jo tallennettuja rivejä ei ajeta uudelleen. Jos
+        tiedostossa oli rikkinäinen kohta, se siirretään talteen käsin
+        tarkistettavaksi.
+
+        Tiedosto luetaan lukon sisällä, mutta store_rows ajetaan lukon
+        ulkopuolella. Sillä välin lisätyt tietueet säilyvät tiedoston
+        lopussa.
+        Palauttaa tallennettujen rivien määrän.
+        """
+        with self.lock:
+            if not self.has_records():
+                return 0
+
+            try:
+                data = self._read_data()
+            except Exception as e:
+                event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Spool-tiedoston luku epäonnistui: {e}")
+                return 0
+
+        rows, clean = self._decode_records(data)
+        failed_rows = store_rows(rows) if rows else []
+
+        if rows and len(failed_rows) == len(rows):
+            return 0
+
+        with self.lock:
+            try:
+                appended = self._read_data()[len(data):]
+            except Exception as e:
+                event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Spool-tiedoston luku epäonnistui: {e}")
+                appended = b""
+
+            if not clean:
+                self._quarantine(data)
+
+            try:
+                remaining = self._encode_records(failed_rows) + appended
+            except Exception as e:
+                event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Spool-tiedoston uudelleenkirjoitus epäonnistui: {e}")
+                remaining = appended
+
+            self._rewrite(remaining)
+
+        return len(rows) - len(failed_rows)
+
+    def _rewrite(self, data):
+        """
+        Korvaa spool-tiedosto datalla. Väliaikainen tiedosto vaihdetaan
+        paikalleen vasta fsyncin jälkeen, joten katkos ei hävitä rivejä.
+        """
+        temp_path = f"{self.path}.tmp"
+
+        try:
+            with open(temp_path, "wb") as spool_file:
+                spool_file.write(data)
+                spool_file.flush()
+                os.fsync(spool_file.fileno())
+
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Spool-tiedoston uudelleenkirjoitus epäonnistui: {e}")
+
+    def _quarantine(self, data):
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        bad_path = f"{self.path}.bad_{stamp}"
+
+        try:
+            with open(bad_path, "wb") as bad_file:
+                bad_file.write(data)
+                bad_file.flush()
+                os.fsync(bad_file.fileno())
+
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Varoitus: spool-tiedostossa rikkinäinen tietue, talletettu: {bad_path}")
+        except Exception as e:
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Rikkinäisen spool-tiedoston talletus epäonnistui: {e}")
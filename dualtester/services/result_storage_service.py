@@ -1,125 +1,540 @@
 # services/result_storage_service.py
-import json
 import os
+import queue
 import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
 from datetime import datetime
 
+from services.result_partitions import ResultPartitionLayout, RESULT_LEGACY_PARTITION_KEY
+from services.result_spool import ResultSpool
+from utils.raw_result_codec import encode_raw_result
+from utils.event_log import event_log, EVENT_SUBSYSTEM_STORAGE
 
-DEFAULT_DATABASE_PATH = "/home/akiriik/painetesteri_hmi/data/test_results.db"
+
+# ------------------------------------------------------------
+# Kirjoitussäikeen asetukset
+# ------------------------------------------------------------
+
+# Jonoon mahtuvien tallentamattomien tulosten enimmäismäärä.
+# Normaalisti jonossa on 0-2 tulosta; raja suojaa muistia, jos
+# SD-kortti jumittuu pitkäksi aikaa.
+RESULT_WRITE_QUEUE_MAX_SIZE = 1000
+
+# Täyden jonon ohi kirjoitussäikeelle annettavien tulosten enimmäismäärä.
+# GUI-säie ei kirjoita spooliin itse; kirjoitussäie tyhjentää tämän
+# puskurin jokaisella kierroksella.
+RESULT_WRITE_OVERFLOW_MAX_SIZE = 200
+
+# Yhteen transaktioon kerättävien tulosten enimmäismäärä.
+RESULT_WRITE_BATCH_MAX_SIZE = 50
+
+# Kuinka kauan sulkeminen odottaa jonon tyhjenemistä.
+RESULT_WRITE_FLUSH_TIMEOUT_S = 10.0
+
+# Spool-tiedosto osioiden vieressä. Sinne menevät rivit, joita ei
+# saatu tietokantaan (levy täynnä, lukko, rikkinäinen yhteys).
+RESULT_SPOOL_FILE_NAME = "test_results.db.spool"
+
+# Kuinka usein tietokantaa yritetään uudelleen, kun spoolissa on rivejä
+# tai yhteys puuttuu.
+RESULT_SPOOL_RETRY_INTERVAL_S = 30.0
+
+# Raakatulosrekisterien tallennusmuoto.
+# "blob" = uint16-taulukko raw_result_blob-sarakkeeseen
+# "json" = JSON-teksti raw_result_json-sarakkeeseen (vanha muoto)
+# Lukijat purkavat molemmat, joten muotoa voi vaihtaa milloin tahansa.
+RAW_RESULT_FORMAT_BLOB = "blob"
+RAW_RESULT_FORMAT_JSON = "json"
+RAW_RESULT_STORAGE_FORMAT = RAW_RESULT_FORMAT_BLOB
+
+# Kirjoitussäie pitää auki enintään näin monta osiota (yleensä kuluva
+# ja edellinen kuukausi). Suljettava osio checkpointataan.
+RESULT_MAX_OPEN_PARTITIONS = 2
+
+# WAL-tiedosto katkaistaan checkpointin jälkeen tähän kokoon, joten
+# checkpointin kesto pysyy rajattuna.
+RESULT_WAL_SIZE_LIMIT_BYTES = 4 * 1024 * 1024
+
+# Arkistointi ajetaan kirjoitussäikeessä joutoaikana, enintään yksi
+# osio kerrallaan.
+RESULT_MAINTENANCE_INTERVAL_S = 6 * 60 * 60
+RESULT_MAINTENANCE_START_DELAY_S = 60.0
+
+INSERT_TEST_RESULT_SQL = """
+INSERT INTO test_results (
+    timestamp,
+    date,
+    time,
+    station_id,
+    tester_name,
+    program_number,
+    program_name,
+    product_name,
+    result_code,
+    result_text,
+    result_ok,
+    pressure_mbar,
+    decay_value,
+    decay_unit,
+    leak_value,
+    leak_unit,
+    room_temperature_c,
+    room_humidity_percent,
+    tank_temperature_c,
+    tank_humidity_percent,
+    tank_pressure_bar,
+    part_temperature_c,
+    raw_result_json,
+    raw_result_blob,
+    pressure_curve_blob,
+    cycle_time_ms
+) VALUES (
+    :timestamp,
+    :date,
+    :time,
+    :station_id,
+    :tester_name,
+    :program_number,
+    :program_name,
+    :product_name,
+    :result_code,
+    :result_text,
+    :result_ok,
+    :pressure_mbar,
+    :decay_value,
+    :decay_unit,
+    :leak_value,
+    :leak_unit,
+    :room_temperature_c,
+    :room_humidity_percent,
+    :tank_temperature_c,
+    :tank_humidity_percent,
+    :tank_pressure_bar,
+    :part_temperature_c,
+    :raw_result_json,
+    :raw_result_blob,
+    :pressure_curve_blob,
+    :cycle_time_ms
+)
+"""
+
+
+# ------------------------------------------------------------
+# Tietokannan skeema
+# ------------------------------------------------------------
+
+def connect_result_database(database_path):
+    directory = os.path.dirname(database_path)
+
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    connection = sqlite3.connect(database_path, timeout=5)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(f"PRAGMA journal_size_limit={RESULT_WAL_SIZE_LIMIT_BYTES}")
+    return connection
+
+
+def ensure_result_database(database_path):
+    """
+    Luo tai päivitä test_results-skeema annettuun tiedostoon.
+    """
+    connection = connect_result_database(database_path)
+
+    try:
+        create_result_schema(connection)
+    finally:
+        connection.close()
+
+
+def create_result_schema(connection):
+    with connection:
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS test_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+                timestamp TEXT NOT NULL,
+                date TEXT NOT NULL,
+                time TEXT NOT NULL,
+
+                station_id INTEGER NOT NULL,
+                tester_name TEXT NOT NULL,
+
+                program_number INTEGER,
+                program_name TEXT,
+                product_name TEXT,
+
+                result_code INTEGER,
+                result_text TEXT,
+                result_ok INTEGER,
+
+                pressure_mbar REAL,
+                decay_value REAL,
+                decay_unit TEXT,
+                leak_value REAL,
+                leak_unit TEXT,
+
+                room_temperature_c REAL,
+                room_humidity_percent REAL,
+                tank_temperature_c REAL,
+                tank_humidity_percent REAL,
+                tank_pressure_bar REAL,
+                part_temperature_c REAL,
+
+                raw_result_json TEXT,
+                raw_result_blob BLOB,
+                pressure_curve_blob BLOB,
+                cycle_time_ms REAL,
+
+                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_test_results_timestamp
+            ON test_results(timestamp)
+            """
+        )
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_test_results_date
+            ON test_results(date)
+            """
+        )
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_test_results_station
+            ON test_results(station_id)
+            """
+        )
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_test_results_program
+            ON test_results(program_number, program_name)
+            """
+        )
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_test_results_result_ok
+            ON test_results(result_ok)
+            """
+        )
+
+        _add_missing_result_columns(connection)
+
+        # Kattavat indeksit vuotojakaumalle: aikavälin kysely lukee
+        # vain indeksiä, ei taulun rivejä.
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_test_results_date_decay
+            ON test_results(date, station_id, program_number, decay_value)
+            """
+        )
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_test_results_program_date_decay
+            ON test_results(program_number, date, decay_value)
+            """
+        )
+
+        # Sivutettu historia asema- tai ohjelmasuodattimella: indeksi
+        # antaa rivit valmiiksi aikajärjestyksessä.
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_test_results_station_timestamp
+            ON test_results(station_id, timestamp)
+            """
+        )
+        connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_test_results_program_timestamp
+            ON test_results(program_number, timestamp)
+            """
+        )
+
+        _create_result_summary_schema(connection)
+
+
+def _add_missing_result_columns(connection):
+    """
+    Lisää vanhaan tietokantaan myöhemmin tulleet sarakkeet.
+    """
+    columns = {
+        row[1]
+        for row in connection.execute("PRAGMA table_info(test_results)")
+    }
+
+    if "raw_result_blob" not in columns:
+        connection.execute("ALTER TABLE test_results ADD COLUMN raw_result_blob BLOB")
+
+    if "pressure_curve_blob" not in columns:
+        connection.execute("ALTER TABLE test_results ADD COLUMN pressure_curve_blob BLOB")
+
+    if "cycle_time_ms" not in columns:
+        connection.execute("ALTER TABLE test_results ADD COLUMN cycle_time_ms REAL")
+
+
+def _create_result_summary_schema(connection):
+    """
+    Päiväkohtainen yhteenvetotaulu saannolle ja vuotojakaumalle.
+
+    Triggerit pitävät taulun ajan tasalla jokaisen lisäyksen ja
+    poiston yhteydessä, joten raportti lukee kuukaudesta vain
+    muutamia satoja rivejä. decay_min / decay_max eivät pienene
+    poistoissa; rebuild_summary() laskee ne uudelleen.
+    """
+    summary_exists = connection.execute(
+        """
+        SELECT 1 FROM sqlite_master
+        WHERE type = 'table' AND name = 'test_result_daily_summary'
+        """
+    ).fetchone()
+
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS test_result_daily_summary (
+            date TEXT NOT NULL,
+            station_id INTEGER NOT NULL,
+            program_number INTEGER NOT NULL,
+
+            total_count INTEGER NOT NULL DEFAULT 0,
+            ok_count INTEGER NOT NULL DEFAULT 0,
+
+            decay_count INTEGER NOT NULL DEFAULT 0,
+            decay_sum REAL NOT NULL DEFAULT 0,
+            decay_min REAL,
+            decay_max REAL,
+
+            PRIMARY KEY (date, station_id, program_number)
+        ) WITHOUT ROWID
+        """
+    )
+
+    connection.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_test_results_summary_insert
+        AFTER INSERT ON test_results
+        BEGIN
+            INSERT OR IGNORE INTO test_result_daily_summary (
+                date, station_id, program_number
+            ) VALUES (
+                NEW.date, NEW.station_id, IFNULL(NEW.program_number, 0)
+            );
+
+            UPDATE test_result_daily_summary SET
+                total_count = total_count + 1,
+                ok_count = ok_count + (IFNULL(NEW.result_ok, 0) = 1),
+                decay_count = decay_count + (NEW.decay_value IS NOT NULL),
+                decay_sum = decay_sum + IFNULL(NEW.decay_value, 0),
+                decay_min = CASE
+                    WHEN NEW.decay_value IS NULL THEN decay_min
+                    WHEN decay_min IS NULL OR NEW.decay_value < decay_min THEN NEW.decay_value
+                    ELSE decay_min
+                END,
+                decay_max = CASE
+                    WHEN NEW.decay_value IS NULL THEN decay_max
+                    WHEN decay_max IS NULL OR NEW.decay_value > decay_max THEN NEW.decay_value
+                    ELSE decay_max
+                END
+            WHERE date = NEW.date
+              AND station_id = NEW.station_id
+              AND program_number = IFNULL(NEW.program_number, 0);
+        END
+        """
+    )
+
+    connection.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_test_results_summary_delete
+        AFTER DELETE ON test_results
+        BEGIN
+            UPDATE test_result_daily_summary SET
+                total_count = total_count - 1,
+                ok_count = ok_count - (IFNULL(OLD.result_ok, 0) = 1),
+                decay_count = decay_count - (OLD.decay_value IS NOT NULL),
+                decay_sum = decay_sum - IFNULL(OLD.decay_value, 0)
+            WHERE date = OLD.date
+              AND station_id = OLD.station_id
+              AND program_number = IFNULL(OLD.program_number, 0);
+
+            DELETE FROM test_result_daily_summary
+            WHERE date = OLD.date
+              AND station_id = OLD.station_id
+              AND program_number = IFNULL(OLD.program_number, 0)
+              AND total_count <= 0;
+        END
+        """
+    )
+
+    if not summary_exists:
+        # Vanha tietokanta: täytä yhteenveto olemassa olevista riveistä.
+        rebuild_result_summary(connection)
+
+
+def rebuild_result_summary(connection):
+    connection.execute("DELETE FROM test_result_daily_summary")
+    connection.execute(
+        """
+        INSERT INTO test_result_daily_summary (
+            date,
+            station_id,
+            program_number,
+            total_count,
+            ok_count,
+            decay_count,
+            decay_sum,
+            decay_min,
+            decay_max
+        )
+        SELECT
+            date,
+            station_id,
+            IFNULL(program_number, 0),
+            COUNT(*),
+            SUM(IFNULL(result_ok, 0) = 1),
+            COUNT(decay_value),
+            IFNULL(SUM(decay_value), 0),
+            MIN(decay_value),
+            MAX(decay_value)
+        FROM test_results
+        GROUP BY date, station_id, IFNULL(program_number, 0)
+        """
+    )
 
 
 class ResultStorageService:
     """
     Testitulosten pysyvä SQLite-tallennus.
 
-    Tietokanta on yksi paikallinen tiedosto Raspberryllä.
-    Jokainen hyväksytty uusi ForTest-tulos tallennetaan omaksi rivikseen.
+    Tulokset tallennetaan jaksoittaisiin osiotiedostoihin
+    (oletuksena kuukausi, ResultPartitionLayout). Rivi menee osioon
+    oman päivämääränsä perusteella. Käynnistyksessä alustetaan vain
+    kuluvan jakson osio, joten käynnistys ei hidastu historian
+    kasvaessa.
+
+    save_test_result() ei kirjoita levylle GUI-säikeessä. Se vain lisää
+    rivin rajattuun jonoon. Oma kirjoitussäie pitää osioiden yhteydet
+    auki ja tallentaa jonossa olevat rivit yhdellä commitilla osiota
+    kohden. cleanup() kirjoittaa jonon loppuun ennen sulkemista.
+
+    Jos jono on täynnä, rivi annetaan kirjoitussäikeelle rajatun
+    ylivuotopuskurin kautta; GUI-säie ei koskaan kirjoita levylle. Jos
+    commit epäonnistuu, kirjoitussäie kirjoittaa rivit ResultSpooliin.
+    Spool ajetaan tietokantaan heti, kun tietokanta toimii taas.
+
+    Säilytysajan ylittäneet osiot pakataan joutoaikana vain luku
+    -arkistoiksi.
     """
 
-    def __init__(self, parent=None, database_path=DEFAULT_DATABASE_PATH):
+    def __init__(
+        self,
+        parent=None,
+        partition_layout=None,
+        raw_result_format=RAW_RESULT_STORAGE_FORMAT,
+    ):
         self.parent = parent
-        self.database_path = database_path
-        self._ensure_database()
-
-    def _connect(self):
-        os.makedirs(os.path.dirname(self.database_path), exist_ok=True)
-        connection = sqlite3.connect(self.database_path, timeout=5)
-        connection.execute("PRAGMA journal_mode=WAL")
-        connection.execute("PRAGMA synchronous=NORMAL")
-        return connection
+        self.partition_layout = partition_layout or ResultPartitionLayout()
+        self.raw_result_format = raw_result_format
+        self.spool = ResultSpool(
+            os.path.join(self.partition_layout.directory, RESULT_SPOOL_FILE_NAME)
+        )
 
-    def _ensure_database(self):
-        with self._connect() as connection:
-            connection.execute(
-                """
-                CREATE TABLE IF NOT EXISTS test_results (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-
-                    timestamp TEXT NOT NULL,
-                    date TEXT NOT NULL,
-                    time TEXT NOT NULL,
+        try:
+            ensure_result_database(self._get_current_partition_path())
+        except Exception as e:
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Varoitus: tulostietokannan alustus epäonnistui: {e}")
 
-                    station_id INTEGER NOT NULL,
-                    tester_name TEXT NOT NULL,
+        self.connections = OrderedDict()
 
-                    program_number INTEGER,
-                    program_name TEXT,
-                    product_name TEXT,
+        # id(rivi) -> on_committed. Rivi-dict kulkee samana objektina
+        # jonosta commitiin, joten id pysyy yksilöllisenä siihen asti.
+        self.commit_callbacks = {}
+        self.commit_callbacks_lock = threading.Lock()
 
-                    result_code INTEGER,
-                    result_text TEXT,
-                    result_ok INTEGER,
+        self.write_queue = queue.Queue(maxsize=RESULT_WRITE_QUEUE_MAX_SIZE)
 
-                    pressure_mbar REAL,
-                    decay_value REAL,
-                    decay_unit TEXT,
-                    leak_value REAL,
-                    leak_unit TEXT,
+        # Täyden jonon ohi tulleet rivit. deque.append/popleft ovat
+        # säieturvallisia, joten GUI-säie ei odota lukkoa eikä levyä.
+        self.overflow_rows = deque()
+        self.metrics_lock = threading.Lock()
+        self.metrics = {
+            "queue_length": 0,
+            "max_queue_length": 0,
+            "queued": 0,
+            "committed": 0,
+            "dropped": 0,
+            "overflowed": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "failed_commits": 0,
+            "commits": 0,
+            "last_batch_size": 0,
+            "last_commit_ms": 0.0,
+            "avg_commit_ms": 0.0,
+            "max_commit_ms": 0.0,
+            "archived_partitions": 0,
+        }
 
-                    room_temperature_c REAL,
-                    room_humidity_percent REAL,
-                    tank_temperature_c REAL,
-                    tank_humidity_percent REAL,
-                    tank_pressure_bar REAL,
-                    part_temperature_c REAL,
+        self.writer_thread = threading.Thread(
+            target=self._writer_loop,
+            name="ResultStorageWriter",
+            daemon=True,
+        )
+        self.writer_thread.start()
 
-                    raw_result_json TEXT,
+    def _get_current_partition_path(self):
+        today = datetime.now().date().isoformat()
+        return self.partition_layout.get_partition_path(
+            self.partition_layout.get_partition_key(today)
+        )
 
-                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
-                )
-                """
+    def rebuild_summary(self):
+        """
+        Laske päiväyhteenvedot uudelleen kaikista aktiivisista osioista.
+        """
+        for partition_key in self.partition_layout.list_partitions():
+            connection = connect_result_database(
+                self.partition_layout.get_partition_path(partition_key)
             )
 
-            connection.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_test_results_timestamp
-                ON test_results(timestamp)
-                """
-            )
-            connection.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_test_results_date
-                ON test_results(date)
-                """
-            )
-            connection.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_test_results_station
-                ON test_results(station_id)
-                """
-            )
-            connection.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_test_results_program
-                ON test_results(program_number, program_name)
-                """
-            )
-            connection.execute(
-                """
-                CREATE INDEX IF NOT EXISTS idx_test_results_result_ok
-                ON test_results(result_ok)
-                """
-            )
+            try:
+                with connection:
+                    rebuild_result_summary(connection)
+            finally:
+                connection.close()
+
+    def save_test_result(self, data, on_committed=None):
+        """
+        Lisää tulos tallennusjonoon.
 
-    def save_test_result(self, data):
+        on_committed(monotonic_s) kutsutaan kirjoitussäikeessä, kun rivi
+        on commitoitu tietokantaan. Spooliin päätyneestä rivistä ei
+        kutsuta.
+        """
         if not isinstance(data, dict):
             return False
 
         timestamp = data.get("timestamp") or datetime.now().isoformat(timespec="seconds")
         date = data.get("date") or timestamp[:10]
-        time = data.get("time") or timestamp[11:19]
+        time_text = data.get("time") or timestamp[11:19]
 
         raw_result = data.get("raw_result")
 
-        try:
-            raw_result_json = json.dumps(raw_result, ensure_ascii=False)
-        except Exception:
-            raw_result_json = None
+        raw_result_json, raw_result_blob = encode_raw_result(
+            raw_result,
+            use_blob=self.raw_result_format == RAW_RESULT_FORMAT_BLOB,
+        )
 
         values = {
             "timestamp": timestamp,
             "date": date,
-            "time": time,
+            "time": time_text,
             "station_id": data.get("station_id"),
             "tester_name": data.get("tester_name"),
             "program_number": data.get("program_number"),
@@ -140,70 +555,371 @@ class ResultStorageService:
             "tank_pressure_bar": data.get("tank_pressure_bar"),
             "part_temperature_c": data.get("part_temperature_c"),
             "raw_result_json": raw_result_json,
+            "raw_result_blob": raw_result_blob,
+            "pressure_curve_blob": data.get("pressure_curve_blob"),
+            "cycle_time_ms": data.get("cycle_time_ms"),
         }
 
         try:
-            with self._connect() as connection:
-                connection.execute(
-                    """
-                    INSERT INTO test_results (
-                        timestamp,
-                        date,
-                        time,
-                        station_id,
-                        tester_name,
-                        program_number,
-                        program_name,
-                        product_name,
-                        result_code,
-                        result_text,
-                        result_ok,
-                        pressure_mbar,
-                        decay_value,
-                        decay_unit,
-                        leak_value,
-                        leak_unit,
-                        room_temperature_c,
-                        room_humidity_percent,
-                        tank_temperature_c,
-                        tank_humidity_percent,
-                        tank_pressure_bar,
-                        part_temperature_c,
-                        raw_result_json
-                    ) VALUES (
-                        :timestamp,
-                        :date,
-                        :time,
-                        :station_id,
-                        :tester_name,
-                        :program_number,
-                        :program_name,
-                        :product_name,
-                        :result_code,
-                        :result_text,
-                        :result_ok,
-                        :pressure_mbar,
-                        :decay_value,
-                        :decay_unit,
-                        :leak_value,
-                        :leak_unit,
-                        :room_temperature_c,
-                        :room_humidity_percent,
-                        :tank_temperature_c,
-                        :tank_humidity_percent,
-                        :tank_pressure_bar,
-                        :part_temperature_c,
-                        :raw_result_json
-                    )
-                    """,
-                    values,
-                )
+            if on_committed is not None:
+                with self.commit_callbacks_lock:
+                    self.commit_callbacks[id(values)] = on_committed
+
+            self.write_queue.put_nowait(values)
+        except queue.Full:
+            # Kirjoitussäie on jumissa. Rivi annetaan sille jonon ohi;
+            # jos sekin puskuri on täynnä, tulos menetetään.
+            if len(self.overflow_rows) >= RESULT_WRITE_OVERFLOW_MAX_SIZE:
+                self._pop_commit_callbacks([values])
+
+                with self.metrics_lock:
+                    self.metrics["dropped"] += 1
+
+                event_log.error(EVENT_SUBSYSTEM_STORAGE, "VIRHE: tulos menetettiin, tallennusjono ja ylivuotopuskuri täynnä")
+                return False
+
+            self.overflow_rows.append(values)
+
+            with self.metrics_lock:
+                self.metrics["overflowed"] += 1
 
             return True
 
+        with self.metrics_lock:
+            self.metrics["queued"] += 1
+            self.metrics["max_queue_length"] = max(
+                self.metrics["max_queue_length"],
+                self.write_queue.qsize(),
+            )
+
+        return True
+
+    # ------------------------------------------------------------
+    # Kirjoitussäie
+    # ------------------------------------------------------------
+
+    def _writer_loop(self):
+        last_retry_at = 0.0
+        next_maintenance_at = time.monotonic() + RESULT_MAINTENANCE_START_DELAY_S
+        stop_requested = False
+
+        try:
+            self._prepare_legacy_database()
+
+            while not stop_requested:
+                timeout_s = max(
+                    0.1,
+                    min(
+                        RESULT_SPOOL_RETRY_INTERVAL_S,
+                        next_maintenance_at - time.monotonic(),
+                    ),
+                )
+
+                if self.overflow_rows:
+                    timeout_s = 0.1
+
+                batch = self._get_next_batch(timeout_s)
+
+                if None in batch:
+                    stop_requested = True
+
+                rows = [values for values in batch if values is not None]
+                rows += self._take_overflow_rows()
+
+                now = time.monotonic()
+                retry_due = now - last_retry_at >= RESULT_SPOOL_RETRY_INTERVAL_S
+                committed = False
+
+                if rows:
+                    committed = self._commit_rows(rows)
+
+                    if not committed:
+                        last_retry_at = now
+                        retry_due = False
+
+                if self.spool.has_records():
+                    if committed or retry_due or stop_requested:
+                        last_retry_at = now
+                        self._replay_spool()
+
+                for _ in batch:
+                    self.write_queue.task_done()
+
+                if not batch and now >= next_maintenance_at:
+                    next_maintenance_at = now + RESULT_MAINTENANCE_INTERVAL_S
+                    self._run_maintenance()
+
+        finally:
+            for partition_key in list(self.connections.keys()):
+                self._close_partition(partition_key)
+
+    def _take_overflow_rows(self):
+        rows = []
+
+        while self.overflow_rows:
+            rows.append(self.overflow_rows.popleft())
+
+        return rows
+
+    def _get_next_batch(self, timeout_s):
+        try:
+            batch = [self.write_queue.get(timeout=timeout_s)]
+        except queue.Empty:
+            return []
+
+        while len(batch) < RESULT_WRITE_BATCH_MAX_SIZE:
+            try:
+                batch.append(self.write_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    # ------------------------------------------------------------
+    # Osiot
+    # ------------------------------------------------------------
+
+    def _prepare_legacy_database(self):
+        """
+        Päivitä vanhan yksittäisen tietokannan skeema kyselyitä varten.
+
+        Ajetaan kirjoitussäikeessä, koska yhteenvetotaulun täyttö voi
+        kestää isossa tietokannassa.
+        """
+        if not self.partition_layout.has_legacy_database():
+            return
+
+        try:
+            ensure_result_database(self.partition_layout.get_legacy_path())
         except Exception as e:
-            print(f"Tuloksen tallennus epäonnistui SQLiteen: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Varoitus: vanhan tulostietokannan päivitys epäonnistui: {e}")
+
+    def _get_partition_connection(self, partition_key):
+        connection = self.connections.get(partition_key)
+
+        if connection is not None:
+            self.connections.move_to_end(partition_key)
+            return connection
+
+        try:
+            connection = connect_result_database(
+                self.partition_layout.get_partition_path(partition_key)
+            )
+            create_result_schema(connection)
+        except Exception as e:
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Tulostietokannan osion {partition_key} avaus epäonnistui: {e}")
+            return None
+
+        self.connections[partition_key] = connection
+
+        while len(self.connections) > RESULT_MAX_OPEN_PARTITIONS:
+            oldest_key = next(iter(self.connections))
+            self._close_partition(oldest_key)
+
+        return connection
+
+    def _close_partition(self, partition_key):
+        connection = self.connections.pop(partition_key, None)
+
+        if connection is None:
+            return
+
+        try:
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except Exception:
+            pass
+
+        connection.close()
+
+    def _commit_rows(self, rows):
+        """
+        Tallenna rivit osioihinsa. Epäonnistuneet rivit menevät spooliin.
+
+        Palauttaa True, jos kaikki rivit saatiin tietokantaan.
+        """
+        failed_rows = self._store_rows(rows)
+
+        if failed_rows:
+            self._spool_rows(failed_rows)
             return False
 
+        return True
+
+    def _store_rows(self, rows):
+        """
+        Palauttaa listan riveistä, joita ei saatu tallennettua.
+        """
+        rows_by_partition = OrderedDict()
+
+        for row in rows:
+            partition_key = self.partition_layout.get_partition_key(row["date"])
+            rows_by_partition.setdefault(partition_key, []).append(row)
+
+        failed_rows = []
+
+        for partition_key, partition_rows in rows_by_partition.items():
+            connection = self._get_partition_connection(partition_key)
+
+            if connection is None or not self._commit_batch(connection, partition_rows):
+                failed_rows.extend(partition_rows)
+                self._pop_commit_callbacks(partition_rows)
+                continue
+
+            committed_at = time.monotonic()
+
+            for callback in self._pop_commit_callbacks(partition_rows):
+                try:
+                    callback(committed_at)
+                except Exception as e:
+                    event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Commit-kuittauksen virhe: {e}")
+
+        return failed_rows
+
+    def _pop_commit_callbacks(self, rows):
+        if not self.commit_callbacks:
+            return []
+
+        with self.commit_callbacks_lock:
+            callbacks = [
+                self.commit_callbacks.pop(id(row), None)
+                for row in rows
+            ]
+
+        return [callback for callback in callbacks if callback is not None]
+
+    def _run_maintenance(self):
+        """
+        Arkistoi yksi säilytysajan ylittänyt osio.
+
+        Yksi osio kerrallaan pitää VACUUM- ja pakkausajan rajattuna.
+        """
+        expired = self.partition_layout.get_expired_partitions()
+
+        if not expired:
+            return
+
+        partition_key = expired[0]
+
+        if partition_key == RESULT_LEGACY_PARTITION_KEY:
+            return
+
+        self._close_partition(partition_key)
+
+        if self.partition_layout.archive_partition(partition_key):
+            with self.metrics_lock:
+                self.metrics["archived_partitions"] += 1
+
+    def _commit_batch(self, connection, batch):
+        started_at = time.monotonic()
+
+        try:
+            with connection:
+                connection.executemany(INSERT_TEST_RESULT_SQL, batch)
+
+            failed = False
+
+        except Exception as e:
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Tuloksen tallennus epäonnistui SQLiteen: {e}")
+            failed = True
+
+        commit_ms = (time.monotonic() - started_at) * 1000.0
+
+        with self.metrics_lock:
+            metrics = self.metrics
+
+            if failed:
+                metrics["failed_commits"] += 1
+                return False
+
+            metrics["commits"] += 1
+            metrics["committed"] += len(batch)
+            metrics["last_batch_size"] = len(batch)
+            metrics["last_commit_ms"] = commit_ms
+            metrics["avg_commit_ms"] += (commit_ms - metrics["avg_commit_ms"]) / metrics["commits"]
+            metrics["max_commit_ms"] = max(metrics["max_commit_ms"], commit_ms)
+
+        return True
+
+    # ------------------------------------------------------------
+    # Spool
+    # ------------------------------------------------------------
+
+    def _spool_rows(self, rows):
+        if self.spool.append(rows):
+            with self.metrics_lock:
+                self.metrics["spooled"] += len(rows)
+
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"{len(rows)} tulosta talletettu spooliin")
+            return True
+
+        with self.metrics_lock:
+            self.metrics["dropped"] += len(rows)
+
+        event_log.error(EVENT_SUBSYSTEM_STORAGE, f"VIRHE: {len(rows)} tulosta menetettiin, tietokanta ja spool eivät käytettävissä")
+        return False
+
+    def _with_default_columns(self, row):
+        # Vanhemmassa spoolissa ei ole myöhemmin lisättyjä sarakkeita.
+        row = dict(row)
+        row.setdefault("raw_result_blob", None)
+        row.setdefault("pressure_curve_blob", None)
+        row.setdefault("cycle_time_ms", None)
+        return row
+
+    def _replay_spool(self):
+        replayed = self.spool.replay(
+            lambda rows: self._store_rows(
+                [self._with_default_columns(row) for row in rows]
+            )
+        )
+
+        if replayed:
+            with self.metrics_lock:
+                self.metrics["replayed"] += replayed
+
+            event_log.info(EVENT_SUBSYSTEM_STORAGE, f"Spoolista siirretty tietokantaan {replayed} tulosta")
+
+    def get_metrics(self):
+        """
+        Palauttaa kopion tallennusjonon ja commitien mittareista.
+        """
+        with self.metrics_lock:
+            metrics = dict(self.metrics)
+
+        metrics["queue_length"] = self.write_queue.qsize()
+        metrics["spool_pending"] = self.spool.has_records()
+        return metrics
+
+    def flush(self, timeout_s=RESULT_WRITE_FLUSH_TIMEOUT_S):
+        """
+        Odota, että jonossa olevat tulokset on kirjoitettu.
+
+        Palauttaa True, jos jono tyhjeni aikarajan sisällä.
+        """
+        deadline = time.monotonic() + timeout_s
+
+        while self.write_queue.unfinished_tasks or self.overflow_rows:
+            if not self.writer_thread.is_alive():
+                return False
+
+            if time.monotonic() >= deadline:
+                return False
+
+            time.sleep(0.01)
+
+        return True
+
     def cleanup(self):
-        pass
+        if not self.writer_thread.is_alive():
+            return
+
+        try:
+            self.write_queue.put(None, timeout=RESULT_WRITE_FLUSH_TIMEOUT_S)
+        except queue.Full:
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, "Tulosjonon sulkeminen epäonnistui: jono täynnä")
+            return
+
+        self.writer_thread.join(RESULT_WRITE_FLUSH_TIMEOUT_S)
+
+        if self.writer_thread.is_alive():
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Varoitus: tulosjonoon jäi {self.write_queue.qsize()} tallentamatonta tulosta")
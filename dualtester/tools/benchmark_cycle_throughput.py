@@ -0,0 +1,671 @@
+# tools/benchmark_cycle_throughput.py
+"""
+Testikiertojen läpäisykyvyn mittaus koko HMI-pinolla ilman laitteita.
+
+Ajetaan dualtester-hakemistosta:
+
+    python -m tools.benchmark_cycle_throughput --cycles 50
+    python -m tools.benchmark_cycle_throughput --mode auto --time-scale 0.1 --output bench.json
+
+Ajo käynnistää tools/modbus_simulator.py:n laitemallit samaan
+prosessiin (pty-portit), luo MainWindow'n offscreen-alustalla ja ajaa
+molempia StationControllereita N kiertoa:
+
+- manual: ajuri painaa STARTia --operator-delay-ms tuloksen jälkeen
+- auto:   jakotukkiohjelma ja automaattinen kappaleenvaihto, jolloin
+          AUTO_*_DELAY_MS-viiveet ja jig-sekvenssit ovat mukana.
+          Ajuri painaa fyysistä nappia vain odotustiloissa.
+
+Raportti (JSON) sisältää vaiheiden ja koko kierron persentiilit,
+kappaleet / h, väylien käyttöasteen, GUI-säikeen jumit (kutsupaikat
+GuiStallWatchdogilta) ja tietokannan commit-viiveen. Raportit ovat
+vertailukelpoisia versioiden välillä, kun --time-scale, --cycles ja
+--mode pidetään samoina.
+
+GPIO ja I2C-anturit ajetaan dev-tilassa; RPi.GPIO- ja smbus-moduulien
+pitää silti olla importattavissa, koska HardwareService tuo ne.
+Tulostietokanta, tapahtumaloki ja ohjelmatiedostojen kopiot luodaan
+väliaikaiseen työhakemistoon.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime
+
+
+BENCHMARK_REPORT_VERSION = 1
+
+BENCHMARK_MONITOR_INTERVAL_MS = 20
+BENCHMARK_HEARTBEAT_INTERVAL_MS = 10
+
+# GUI-säikeen viive, joka lasketaan jumiksi.
+BENCHMARK_STALL_THRESHOLD_MS = 50
+
+# Ajon lopussa odotetaan tallennusjonon tyhjenemistä enintään näin kauan.
+BENCHMARK_DRAIN_TIMEOUT_S = 5.0
+
+BENCHMARK_MODE_MANUAL = "manual"
+BENCHMARK_MODE_AUTO = "auto"
+
+BENCHMARK_PERCENTILES = (50, 90, 95, 99)
+
+
+def summarize_ms(values):
+    """
+    {"count", "mean_ms", "min_ms", "p50_ms", "p90_ms", "p95_ms",
+     "p99_ms", "max_ms"} tai pelkkä {"count": 0}.
+    """
+    values = sorted(value for value in values if value is not None)
+    count = len(values)
+
+    if not count:
+        return {"count": 0}
+
+    summary = {
+        "count": count,
+        "mean_ms": round(sum(values) / count, 2),
+        "min_ms": round(values[0], 2),
+    }
+
+    for percentile in BENCHMARK_PERCENTILES:
+        index = min(count - 1, int(round(percentile / 100.0 * (count - 1))))
+        summary[f"p{percentile}_ms"] = round(values[index], 2)
+
+    summary["max_ms"] = round(values[-1], 2)
+    return summary
+
+
+def get_git_revision(directory):
+    try:
+        return subprocess.check_output(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=directory,
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def parse_args():
+    dualtester_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    project_config_dir = os.path.join(dualtester_dir, "..", "config")
+
+    parser = argparse.ArgumentParser(description="Testikiertojen läpäisykyvyn mittaus simulaattoria vasten")
+    parser.add_argument("--cycles", type=int, default=50, help="kierrokset / asema")
+    parser.add_argument("--mode", choices=(BENCHMARK_MODE_MANUAL, BENCHMARK_MODE_AUTO), default=BENCHMARK_MODE_MANUAL)
+    parser.add_argument("--stations", default="1,2")
+    parser.add_argument("--program", type=int, default=1, help="ohjelma manual-tilassa")
+    parser.add_argument("--time-scale", type=float, default=0.05, help="ForTest- ja jig-aikojen kerroin")
+    parser.add_argument("--fail-rate", type=float, default=0.1)
+    parser.add_argument("--operator-delay-ms", type=int, default=300)
+    parser.add_argument("--cycle-timeout-s", type=float, default=120.0)
+    parser.add_argument("--max-duration-s", type=float, default=3600.0)
+    parser.add_argument("--no-bus-delay", action="store_true")
+    parser.add_argument("--programs1", default=os.path.join(project_config_dir, "programs1.json"))
+    parser.add_argument("--programs2", default=os.path.join(project_config_dir, "programs2.json"))
+    parser.add_argument("--work-dir", default=None, help="oletus: väliaikainen hakemisto")
+    parser.add_argument("--output", default=None, help="raportin polku (oletus benchmark-<aika>.json)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    args.dualtester_dir = dualtester_dir
+    args.station_ids = [int(value) for value in args.stations.split(",") if value.strip()]
+    args.output = os.path.abspath(
+        args.output or f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+
+    return args
+
+
+def prepare_environment(args):
+    """
+    Ympäristö asetetaan ennen sovellusmoduulien importtia, koska
+    port_config ja result_partitions lukevat sen import-hetkellä.
+    """
+    work_dir = os.path.abspath(args.work_dir or tempfile.mkdtemp(prefix="dualtester-bench-"))
+    ports_dir = os.path.join(work_dir, "ports")
+    config_dir = os.path.join(work_dir, "config")
+
+    os.makedirs(ports_dir, exist_ok=True)
+    os.makedirs(config_dir, exist_ok=True)
+
+    for station_id, source in ((1, args.programs1), (2, args.programs2)):
+        target = os.path.join(config_dir, f"programs{station_id}.json")
+
+        if source and os.path.exists(source):
+            shutil.copyfile(source, target)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ["DUALTESTER_DATA_DIR"] = os.path.join(work_dir, "data")
+    os.environ["DUALTESTER_LOG_DIR"] = os.path.join(work_dir, "logs")
+    os.environ["DUALTESTER_OPTA_PORT"] = os.path.join(ports_dir, "opta")
+    os.environ["DUALTESTER_FORTEST1_PORT"] = os.path.join(ports_dir, "fortest1")
+    os.environ["DUALTESTER_FORTEST2_PORT"] = os.path.join(ports_dir, "fortest2")
+
+    if args.dualtester_dir not in sys.path:
+        sys.path.insert(0, args.dualtester_dir)
+
+    # MainWindow lataa config/programsN.json työhakemistosta.
+    os.chdir(work_dir)
+    return work_dir
+
+
+def run_benchmark(args):
+    import random
+
+    from PyQt5.QtCore import QObject, QTimer, Qt
+    from PyQt5.QtWidgets import QApplication
+
+    import ui.main_window as main_window_module
+    from config.port_config import OPTA_MODBUS_BAUDRATE, FORTEST_BAUDRATE
+    from controllers.station_controller import (
+        AUTO_PHASE_IDLE,
+        AUTO_PHASE_WAIT_MISSING_PART_CLAMP,
+        AUTO_PHASE_WAIT_FAIL_REMOVE,
+        AUTO_POST_TEST_PRESSURE_RELEASE_DELAY_MS,
+        AUTO_RESTART_AFTER_CLAMP_DELAY_MS,
+        FORTEST_RESULT_OK,
+    )
+    from controllers.station_cycle_timing_handler import (
+        CYCLE_INTERVALS,
+        CYCLE_INTERVAL_CYCLE,
+        CYCLE_AUTO_PHASE_PREFIX,
+        CYCLE_PHASE_START_PRESSED,
+        CYCLE_PHASE_RESULT_DECODED,
+        CYCLE_PHASE_DB_COMMITTED,
+    )
+    from controllers.station_poll_rate_handler import (
+        FORTEST_POLL_FAST_INTERVAL_MS,
+        FORTEST_POLL_CAPTURE_INTERVAL_MS,
+        FORTEST_POLL_SLOW_INTERVAL_MS,
+    )
+    from tools.modbus_simulator import ForTestSimulator, OptaSimulator, load_simulator_programs
+    from utils.modbus_rtu_slave import PtyModbusSlave
+    from utils.opta_register_poller import OPTA_POLL_INTERVAL_MS
+
+    class GuiStallMonitor(QObject):
+        """
+        GUI-säikeen sydämenlyönti: tarkka QTimer, jonka myöhästyminen
+        on aika, jonka tapahtumasilmukka oli varattuna.
+        """
+
+        def __init__(self, parent=None):
+            super().__init__(parent)
+            self.lateness_ms = array("f")
+            self.last_tick = None
+            self.stalled_ms = 0.0
+            self.stalls = 0
+
+            self.timer = QTimer(self)
+            self.timer.setTimerType(Qt.PreciseTimer)
+            self.timer.setInterval(BENCHMARK_HEARTBEAT_INTERVAL_MS)
+            self.timer.timeout.connect(self.tick)
+
+        def start(self):
+            self.last_tick = time.monotonic()
+            self.timer.start()
+
+        def stop(self):
+            self.timer.stop()
+
+        def tick(self):
+            now = time.monotonic()
+            lateness = max(0.0, (now - self.last_tick) * 1000.0 - BENCHMARK_HEARTBEAT_INTERVAL_MS)
+            self.last_tick = now
+            self.lateness_ms.append(lateness)
+
+            if lateness >= BENCHMARK_STALL_THRESHOLD_MS:
+                self.stalls += 1
+                self.stalled_ms += lateness
+
+        def get_report(self):
+            report = summarize_ms(self.lateness_ms)
+            report["stall_threshold_ms"] = BENCHMARK_STALL_THRESHOLD_MS
+            report["stalls"] = self.stalls
+            report["stalled_s"] = round(self.stalled_ms / 1000.0, 3)
+            return report
+
+    class CycleBenchmarkDriver(QObject):
+        """
+        Ajaa asemia kuin operaattori: valitsee ohjelman, painaa STARTia
+        tai fyysistä nappia ja kirjaa jokaisen kierron aikajanan.
+        """
+
+        def __init__(self, main_window, parent=None):
+            super().__init__(parent)
+
+            self.main_window = main_window
+            self.stations = {
+                station_id: main_window.station_controllers[station_id]
+                for station_id in args.station_ids
+            }
+
+            self.timelines = {station_id: [] for station_id in self.stations}
+            self.result_counts = {station_id: {"ok": 0, "nok": 0} for station_id in self.stations}
+            self.timeouts = {station_id: 0 for station_id in self.stations}
+            self.errors = {station_id: [] for station_id in self.stations}
+            self.last_progress = {}
+            self.first_start_sent = set()
+            self.pending_action = set()
+            self.done = set()
+
+            self.started_at = None
+            self.finished_at = None
+            self.finished = False
+
+            self.monitor_timer = QTimer(self)
+            self.monitor_timer.setInterval(BENCHMARK_MONITOR_INTERVAL_MS)
+            self.monitor_timer.timeout.connect(self.monitor)
+
+            for station in self.stations.values():
+                station.program_change_finished.connect(
+                    lambda program, confirmed, _latency_ms, sid=station.station_id:
+                    self.handle_program_change(sid, program, confirmed)
+                )
+
+        def get_program_number(self, station):
+            if args.mode == BENCHMARK_MODE_AUTO:
+                return station.get_jakotukki_program_number()
+
+            return args.program
+
+        def start(self):
+            self.started_at = time.monotonic()
+
+            for station_id, station in self.stations.items():
+                program_number = self.get_program_number(station)
+                manager = getattr(self.main_window, f"program_manager_{station_id}", None)
+                program = manager.get_program_by_id(program_number) if manager else None
+
+                self.last_progress[station_id] = time.monotonic()
+                station.set_program(program or {"id": program_number, "name": f"Ohjelma {program_number}"})
+
+            self.monitor_timer.start()
+
+        def handle_program_change(self, station_id, program, confirmed):
+            if confirmed:
+                self.last_progress[station_id] = time.monotonic()
+                return
+
+            self.errors[station_id].append(f"ohjelmaa {program} ei vahvistettu")
+            self.done.add(station_id)
+
+        # ------------------------------------------------------------
+        # Operaattori
+        # ------------------------------------------------------------
+
+        def schedule(self, station_id, action):
+            if station_id in self.pending_action:
+                return
+
+            self.pending_action.add(station_id)
+
+            def run():
+                self.pending_action.discard(station_id)
+
+                if station_id not in self.done:
+                    action()
+
+            QTimer.singleShot(args.operator_delay_ms, run)
+
+        def drive_station(self, station_id, station):
+            if not station.has_selected_program():
+                return
+
+            if args.mode == BENCHMARK_MODE_MANUAL:
+                if station.check_ready_to_start():
+                    self.schedule(station_id, station.start_test)
+                return
+
+            if not station.auto_part_change_enabled and station_id not in self.first_start_sent:
+                station.set_auto_part_change_enabled(True)
+                return
+
+            if station.auto_cycle_phase in (AUTO_PHASE_WAIT_MISSING_PART_CLAMP, AUTO_PHASE_WAIT_FAIL_REMOVE):
+                self.schedule(station_id, station.handle_physical_button_press)
+                return
+
+            # Ensimmäinen testi käynnistetään käsin; sen jälkeen
+            # automaatti käynnistää kierrot itse.
+            if (
+                station_id not in self.first_start_sent
+                and station.auto_cycle_phase == AUTO_PHASE_IDLE
+                and station.check_ready_to_start()
+            ):
+                self.first_start_sent.add(station_id)
+                self.schedule(station_id, station.start_test)
+
+        # ------------------------------------------------------------
+        # Seuranta
+        # ------------------------------------------------------------
+
+        def monitor(self):
+            now = time.monotonic()
+
+            for station_id, station in self.stations.items():
+                if station_id in self.done:
+                    continue
+
+                timeline = station.cycle_timing_handler.timeline
+                recorded = self.timelines[station_id]
+
+                if CYCLE_PHASE_RESULT_DECODED in timeline and (not recorded or recorded[-1] is not timeline):
+                    self.record_cycle(station_id, station, timeline)
+                    continue
+
+                if now - self.last_progress[station_id] > args.cycle_timeout_s:
+                    # Kierto jumittui: kirjataan ja yritetään jatkaa.
+                    self.timeouts[station_id] += 1
+                    self.last_progress[station_id] = now
+
+                    if station.is_running:
+                        station.stop_test()
+
+                    self.first_start_sent.discard(station_id)
+
+                self.drive_station(station_id, station)
+
+            if now - self.started_at > args.max_duration_s:
+                for station_id in self.stations:
+                    if station_id not in self.done:
+                        self.errors[station_id].append("ajon enimmäisaika ylittyi")
+
+                self.done.update(self.stations)
+
+            if len(self.done) == len(self.stations):
+                self.finish()
+
+        def record_cycle(self, station_id, station, timeline):
+            self.timelines[station_id].append(timeline)
+            self.last_progress[station_id] = time.monotonic()
+
+            if station.result_handler.last_test_result == FORTEST_RESULT_OK:
+                self.result_counts[station_id]["ok"] += 1
+            else:
+                self.result_counts[station_id]["nok"] += 1
+
+            if len(self.timelines[station_id]) >= args.cycles:
+                self.done.add(station_id)
+
+                if station.auto_part_change_enabled:
+                    station.disable_auto_part_change(show_message=False)
+
+        def finish(self):
+            if self.finished:
+                return
+
+            self.finished = True
+            self.finished_at = time.monotonic()
+            self.monitor_timer.stop()
+
+            storage = self.main_window.result_storage_service
+            deadline = time.monotonic() + BENCHMARK_DRAIN_TIMEOUT_S
+
+            def wait_for_storage():
+                if storage.get_metrics().get("queue_length") and time.monotonic() < deadline:
+                    QTimer.singleShot(100, wait_for_storage)
+                    return
+
+                QApplication.instance().quit()
+
+            wait_for_storage()
+
+    # ------------------------------------------------------------
+    # Simulaattorit
+    # ------------------------------------------------------------
+
+    rng = random.Random(args.seed)
+    opta = OptaSimulator(time_scale=args.time_scale)
+    fortests = {
+        station_id: ForTestSimulator(
+            f"fortest{station_id}",
+            programs=load_simulator_programs(os.path.join("config", f"programs{station_id}.json")),
+            time_scale=args.time_scale,
+            fail_rate=args.fail_rate,
+            rng=random.Random(rng.random()),
+        )
+        for station_id in (1, 2)
+    }
+
+    slaves = {
+        "opta": (
+            PtyModbusSlave(
+                opta,
+                link_path=os.environ["DUALTESTER_OPTA_PORT"],
+                name="opta",
+                baudrate=None if args.no_bus_delay else OPTA_MODBUS_BAUDRATE,
+            ),
+            OPTA_MODBUS_BAUDRATE,
+        ),
+    }
+
+    for station_id, fortest in fortests.items():
+        slaves[fortest.name] = (
+            PtyModbusSlave(
+                fortest,
+                link_path=os.environ[f"DUALTESTER_FORTEST{station_id}_PORT"],
+                name=fortest.name,
+                baudrate=None if args.no_bus_delay else FORTEST_BAUDRATE,
+            ),
+            FORTEST_BAUDRATE,
+        )
+
+    for slave, _baudrate in slaves.values():
+        slave.start()
+
+    # ------------------------------------------------------------
+    # Sovellus
+    # ------------------------------------------------------------
+
+    # Väylät oikeaa Modbus-polkua pitkin; GPIO ja I2C ilman laitteita.
+    main_window_module.DEV_MODE_FORTEST = False
+    main_window_module.DEV_MODE_MODBUS = False
+    main_window_module.DEV_MODE_GPIO = True
+
+    app = QApplication(sys.argv[:1])
+    main_window = main_window_module.MainWindow()
+
+    stall_monitor = GuiStallMonitor()
+    driver = CycleBenchmarkDriver(main_window)
+
+    started_wall = datetime.now()
+    bus_started = time.monotonic()
+
+    stall_monitor.start()
+    QTimer.singleShot(0, driver.start)
+    app.exec_()
+    stall_monitor.stop()
+
+    bus_elapsed_s = time.monotonic() - bus_started
+    storage_metrics = main_window.result_storage_service.get_metrics()
+    opta_bus_statistics = main_window.hardware_service.get_bus_statistics()
+    event_log_statistics = main_window.event_log.get_statistics()
+    watchdog = getattr(main_window, "gui_stall_watchdog", None)
+    stall_call_sites = watchdog.get_summary()["call_sites"] if watchdog else []
+    poll_rates = {
+        station_id: station.get_fortest_poll_rate()
+        for station_id, station in driver.stations.items()
+    }
+
+    main_window.close()
+
+    for slave, _baudrate in slaves.values():
+        slave.close()
+
+    # ------------------------------------------------------------
+    # Raportti
+    # ------------------------------------------------------------
+
+    stations_report = {}
+
+    for station_id, station in driver.stations.items():
+        handler = station.cycle_timing_handler
+        handler.drain_commits()
+        timelines = driver.timelines[station_id]
+
+        intervals = {}
+
+        for key, _label, start_phase, end_phase in CYCLE_INTERVALS:
+            intervals[key] = summarize_ms(
+                (timeline[end_phase] - timeline[start_phase]) * 1000.0
+                for timeline in timelines
+                if start_phase in timeline and end_phase in timeline
+            )
+
+        starts = [
+            timeline[CYCLE_PHASE_START_PRESSED]
+            for timeline in timelines
+            if CYCLE_PHASE_START_PRESSED in timeline
+        ]
+        intervals[CYCLE_INTERVAL_CYCLE] = summarize_ms(
+            (later - earlier) * 1000.0 for earlier, later in zip(starts, starts[1:])
+        )
+
+        auto_phases = {
+            key[len(CYCLE_AUTO_PHASE_PREFIX):]: histogram.get_summary()
+            for key, histogram in handler.histograms.items()
+            if key.startswith(CYCLE_AUTO_PHASE_PREFIX)
+        }
+
+        for summary in auto_phases.values():
+            summary.pop("buckets", None)
+
+        cycles_per_hour = None
+
+        if len(starts) >= 2:
+            last_result = timelines[-1].get(CYCLE_PHASE_RESULT_DECODED, starts[-1])
+            span_s = last_result - starts[0]
+
+            if span_s > 0:
+                cycles_per_hour = round(len(timelines) / span_s * 3600.0, 1)
+
+        stations_report[str(station_id)] = {
+            "cycles": len(timelines),
+            "results": driver.result_counts[station_id],
+            "cycles_per_hour": cycles_per_hour,
+            "intervals": intervals,
+            "auto_phases": auto_phases,
+            "timeouts": driver.timeouts[station_id],
+            "errors": driver.errors[station_id],
+            "poll_rate": poll_rates.get(station_id),
+        }
+
+    bus_report = {}
+
+    for name, (slave, baudrate) in slaves.items():
+        bus_time_s = slave.get_bus_time_s(baudrate)
+        bus_report[name] = {
+            "baudrate": baudrate,
+            "statistics": dict(slave.statistics),
+            "bus_time_s": round(bus_time_s, 3),
+            "utilisation": round(bus_time_s / bus_elapsed_s, 4) if bus_elapsed_s > 0 else None,
+        }
+
+    bus_report["opta_manager"] = opta_bus_statistics
+
+    commit_latencies = []
+
+    for station_id in driver.stations:
+        for timeline in driver.timelines[station_id]:
+            committed = timeline.get(CYCLE_PHASE_DB_COMMITTED)
+            decoded = timeline.get(CYCLE_PHASE_RESULT_DECODED)
+
+            if committed is not None and decoded is not None:
+                commit_latencies.append((committed - decoded) * 1000.0)
+
+    report = {
+        "tool": "benchmark_cycle_throughput",
+        "report_version": BENCHMARK_REPORT_VERSION,
+        "revision": get_git_revision(args.dualtester_dir),
+        "started_at": started_wall.isoformat(timespec="seconds"),
+        "duration_s": round((driver.finished_at or time.monotonic()) - (driver.started_at or bus_started), 3),
+        "config": {
+            "mode": args.mode,
+            "cycles": args.cycles,
+            "stations": args.station_ids,
+            "program": args.program if args.mode == BENCHMARK_MODE_MANUAL else None,
+            "time_scale": args.time_scale,
+            "fail_rate": args.fail_rate,
+            "operator_delay_ms": args.operator_delay_ms,
+            "bus_delay": not args.no_bus_delay,
+            "constants": {
+                "AUTO_POST_TEST_PRESSURE_RELEASE_DELAY_MS": AUTO_POST_TEST_PRESSURE_RELEASE_DELAY_MS,
+                "AUTO_RESTART_AFTER_CLAMP_DELAY_MS": AUTO_RESTART_AFTER_CLAMP_DELAY_MS,
+                "FORTEST_POLL_FAST_INTERVAL_MS": FORTEST_POLL_FAST_INTERVAL_MS,
+                "FORTEST_POLL_CAPTURE_INTERVAL_MS": FORTEST_POLL_CAPTURE_INTERVAL_MS,
+                "FORTEST_POLL_SLOW_INTERVAL_MS": FORTEST_POLL_SLOW_INTERVAL_MS,
+                "OPTA_POLL_INTERVAL_MS": OPTA_POLL_INTERVAL_MS,
+            },
+        },
+        "stations": stations_report,
+        "bus": bus_report,
+        "gui": dict(stall_monitor.get_report(), call_sites=stall_call_sites),
+        "storage": {
+            "commit_latency": summarize_ms(commit_latencies),
+            "metrics": storage_metrics,
+        },
+        "event_log": event_log_statistics,
+    }
+
+    return report
+
+
+def print_summary(report):
+    print()
+    print(f"{'asema':<6} {'kierrot':>7} {'OK':>4} {'NOK':>4} {'kpl/h':>7} {'kierto P50':>11} {'P95':>8} {'jumit':>6}")
+
+    for station_id, station in report["stations"].items():
+        cycle = station["intervals"].get("cycle", {})
+        p50 = cycle.get("p50_ms")
+        p95 = cycle.get("p95_ms")
+
+        print(
+            f"{station_id:<6} {station['cycles']:>7} "
+            f"{station['results']['ok']:>4} {station['results']['nok']:>4} "
+            f"{station['cycles_per_hour'] or 0:>7.1f} "
+            f"{(p50 or 0) / 1000.0:>10.2f}s {(p95 or 0) / 1000.0:>7.2f}s "
+            f"{station['timeouts']:>6}"
+        )
+
+    for name, bus in report["bus"].items():
+        if "utilisation" in bus:
+            print(f"väylä {name:<9} käyttöaste {bus['utilisation'] or 0:.1%}")
+
+    gui = report["gui"]
+    commit = report["storage"]["commit_latency"]
+
+    print(
+        f"GUI: P99 {gui.get('p99_ms', 0):.1f} ms, max {gui.get('max_ms', 0):.1f} ms, "
+        f"jumeja {gui['stalls']} ({gui['stalled_s']:.2f} s)"
+    )
+    print(f"Tietokanta: commit P95 {commit.get('p95_ms', 0):.1f} ms, max {commit.get('max_ms', 0):.1f} ms")
+
+
+def main():
+    args = parse_args()
+    work_dir = prepare_environment(args)
+
+    print(f"Työhakemisto: {work_dir}")
+
+    report = run_benchmark(args)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    print_summary(report)
+    print(f"Raportti: {args.output}")
+
+    if not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
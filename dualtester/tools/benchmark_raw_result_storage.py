@@ -0,0 +1,196 @@
+# tools/benchmark_raw_result_storage.py
+"""
+Vertaa raakatulosten JSON- ja BLOB-tallennusta.
+
+Ajetaan dualtester-hakemistosta:
+
+    python -m tools.benchmark_raw_result_storage
+    python -m tools.benchmark_raw_result_storage --rows 200000
+
+Jokaiselle muodolle luodaan oma väliaikainen tietokanta samalla
+skeemalla kuin ResultStorageService käyttää. Mitataan:
+- tiedoston koko
+- lisäysnopeus (koodaus + executemany, yksi commit / erä)
+- yhden päivän raakatulosten luku ja purku
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from services.result_storage_service import INSERT_TEST_RESULT_SQL, ensure_result_database
+from utils.raw_result_codec import decode_raw_result, encode_raw_result
+
+
+BENCHMARK_INSERT_BATCH_SIZE = 50
+
+BENCHMARK_FORMATS = (
+    ("json", False, False),
+    ("blob", True, False),
+    ("blob+zlib", True, True),
+)
+
+
+def create_sample_registers(result_datetime, program_number):
+    decay = random.randint(5, 450)
+
+    registers = [0] * 25
+    registers[0] = result_datetime.hour
+    registers[1] = result_datetime.minute
+    registers[2] = result_datetime.second
+    registers[3] = result_datetime.day
+    registers[4] = result_datetime.month
+    registers[5] = result_datetime.year
+    registers[6] = program_number
+    registers[8] = 1
+    registers[9] = 1 if decay < 200 else 2
+    registers[11] = 0
+    registers[12] = random.randint(100, 400)
+    registers[16] = 0
+    registers[17] = random.randint(1900, 2100)
+    registers[21] = decay
+    registers[23] = 20
+    registers[24] = 1
+
+    return registers
+
+
+def create_sample_rows(row_count):
+    started = datetime(2026, 1, 1, 6, 0, 0)
+    rows = []
+
+    for index in range(row_count):
+        result_datetime = started + timedelta(seconds=45 * index)
+        timestamp = result_datetime.isoformat(timespec="seconds")
+        program_number = random.randint(1, 40)
+
+        rows.append({
+            "timestamp": timestamp,
+            "date": timestamp[:10],
+            "time": timestamp[11:19],
+            "station_id": 1 + index % 2,
+            "tester_name": f"ForTest {1 + index % 2}",
+            "program_number": program_number,
+            "program_name": f"Ohjelma {program_number}",
+            "product_name": f"Ohjelma {program_number}",
+            "result_code": 1,
+            "result_text": "OK",
+            "result_ok": 1,
+            "pressure_mbar": 2000.0,
+            "decay_value": random.uniform(0.5, 45.0),
+            "decay_unit": "mbar/s",
+            "leak_value": None,
+            "leak_unit": None,
+            "room_temperature_c": 21.5,
+            "room_humidity_percent": 35.0,
+            "tank_temperature_c": 20.0,
+            "tank_humidity_percent": 30.0,
+            "tank_pressure_bar": 6.0,
+            "part_temperature_c": 22.0,
+            "raw_result": {"registers": create_sample_registers(result_datetime, program_number)},
+        })
+
+    return rows
+
+
+def run_format(directory, name, use_blob, compress, sample_rows):
+    database_path = os.path.join(directory, f"{name.replace('+', '_')}.db")
+    ensure_result_database(database_path)
+
+    connection = sqlite3.connect(database_path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+
+    started_at = time.perf_counter()
+
+    for start in range(0, len(sample_rows), BENCHMARK_INSERT_BATCH_SIZE):
+        batch = []
+
+        for sample in sample_rows[start:start + BENCHMARK_INSERT_BATCH_SIZE]:
+            row = dict(sample)
+            raw_result = row.pop("raw_result")
+            row["raw_result_json"], row["raw_result_blob"] = encode_raw_result(
+                raw_result,
+                use_blob=use_blob,
+                compress=compress,
+            )
+            row["pressure_curve_blob"] = None
+            row["cycle_time_ms"] = None
+            batch.append(row)
+
+        with connection:
+            connection.executemany(INSERT_TEST_RESULT_SQL, batch)
+
+    insert_s = time.perf_counter() - started_at
+
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    query_date = sample_rows[len(sample_rows) // 2]["date"]
+    started_at = time.perf_counter()
+
+    decoded = [
+        decode_raw_result(raw_result_json, raw_result_blob)
+        for raw_result_json, raw_result_blob in connection.execute(
+            """
+            SELECT raw_result_json, raw_result_blob
+            FROM test_results
+            WHERE date = ?
+            """,
+            (query_date,),
+        )
+    ]
+
+    query_ms = (time.perf_counter() - started_at) * 1000.0
+
+    raw_bytes = connection.execute(
+        """
+        SELECT IFNULL(SUM(LENGTH(raw_result_json)), 0) + IFNULL(SUM(LENGTH(raw_result_blob)), 0)
+        FROM test_results
+        """
+    ).fetchone()[0]
+
+    connection.close()
+
+    return {
+        "name": name,
+        "file_mb": os.path.getsize(database_path) / 1e6,
+        "raw_bytes_per_row": raw_bytes / len(sample_rows),
+        "insert_rows_per_s": len(sample_rows) / insert_s,
+        "day_query_ms": query_ms,
+        "day_rows": len(decoded),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raakatulosten tallennusmuotojen vertailu")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    sample_rows = create_sample_rows(args.rows)
+
+    print(f"{args.rows} riviä, {BENCHMARK_INSERT_BATCH_SIZE} riviä / commit")
+    print(f"{'muoto':<10} {'koko MB':>9} {'raw B/rivi':>11} {'lisäys rivi/s':>14} {'päivä ms':>9} {'rivejä':>7}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, use_blob, compress in BENCHMARK_FORMATS:
+            result = run_format(directory, name, use_blob, compress, sample_rows)
+
+            print(
+                f"{result['name']:<10} "
+                f"{result['file_mb']:>9.1f} "
+                f"{result['raw_bytes_per_row']:>11.1f} "
+                f"{result['insert_rows_per_s']:>14.0f} "
+                f"{result['day_query_ms']:>9.1f} "
+                f"{result['day_rows']:>7}"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
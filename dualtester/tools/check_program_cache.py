@@ -0,0 +1,114 @@
+# tools/check_program_cache.py
+"""
+Ohjelmatiedostojen koodauksen kierrostarkistus.
+
+Ajetaan dualtester-hakemistosta:
+
+    python -m tools.check_program_cache
+    python -m tools.check_program_cache --programs1 ../config/programs1.json --programs2 ../config/programs2.json
+
+Jokainen välimuistin ohjelma koodataan parametrirekistereiksi
+(encode_program) ja puretaan takaisin samalla tavalla kuin
+"HAE OHJELMAT TESTERILTÄ" purkaa laitteelta luetun ohjelman
+(ProgramManager.apply_downloaded_programs). Jos laite palauttaisi
+tiedostossa jo olevat arvot, yhdenkään ohjelman ei pitäisi näkyä
+muuttuneena.
+
+Lisäksi ohjelma koodataan ilman raw-arvoja, jolloin tekstiarvot
+(paine, testityyppi, mittaustapa) muunnetaan esitystavan kautta.
+
+Paluuarvo on 1, jos jokin ohjelma ei kestä kierrosta.
+"""
+import argparse
+import json
+import os
+
+from utils.fortest_program_table import (
+    decode_program,
+    encode_program,
+    get_station_program_convention,
+    infer_program_convention,
+    program_differs,
+    read_program_raw,
+)
+
+
+# Virheellisiä ohjelmia tulostetaan enintään näin monta tiedostoa kohden.
+CHECK_MAX_REPORTED = 10
+
+
+def get_differing_fields(cached, decoded):
+    return sorted(
+        key
+        for key, value in decoded.items()
+        if program_differs(cached, {key: value})
+    )
+
+
+def check_program_file(path, station_id):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    programs = [
+        program
+        for program in data.get("programs", [])
+        if isinstance(program, dict) and isinstance(program.get("raw"), dict)
+    ]
+
+    file_convention = infer_program_convention(programs, get_station_program_convention(station_id))
+    failures = []
+
+    for program in programs:
+        program_convention = infer_program_convention([program], file_convention)
+        program_id = program.get("id")
+
+        raw = read_program_raw(encode_program(program, file_convention))
+        decoded = decode_program(program_id, raw, None, program_convention)
+        differing = get_differing_fields(program, decoded)
+
+        without_raw = {key: value for key, value in program.items() if key != "raw"}
+        raw = read_program_raw(encode_program(without_raw, program_convention))
+        decoded = decode_program(program_id, raw, None, program_convention)
+        decoded.pop("raw")
+        differing += [f"{key} (ilman raw)" for key in get_differing_fields(program, decoded)]
+
+        if differing:
+            failures.append((program_id, differing))
+
+    return len(programs), failures
+
+
+def parse_args():
+    dualtester_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    project_config_dir = os.path.join(dualtester_dir, "..", "config")
+
+    parser = argparse.ArgumentParser(description="Ohjelmatiedostojen kierrostarkistus")
+    parser.add_argument("--programs1", default=os.path.join(project_config_dir, "programs1.json"))
+    parser.add_argument("--programs2", default=os.path.join(project_config_dir, "programs2.json"))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    failed = False
+
+    for station_id, path in ((1, args.programs1), (2, args.programs2)):
+        if not os.path.exists(path):
+            print(f"Asema {station_id}: {path} puuttuu")
+            failed = True
+            continue
+
+        checked, failures = check_program_file(path, station_id)
+        print(f"Asema {station_id}: {path}: {checked} ohjelmaa, muuttuneita {len(failures)}")
+
+        for program_id, fields in failures[:CHECK_MAX_REPORTED]:
+            print(f"  ohjelma {program_id}: {', '.join(fields)}")
+
+        if failures:
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
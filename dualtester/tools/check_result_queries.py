@@ -0,0 +1,168 @@
+# tools/check_result_queries.py
+"""
+Tulosraporttikyselyjen tarkistus väliaikaisilla osioilla.
+
+Ajetaan dualtester-hakemistosta:
+
+    python -m tools.check_result_queries
+    python -m tools.check_result_queries --rows 5000
+
+Tulokset kirjoitetaan ResultStorageServicellä kolmen kuukauden
+osioihin. Sen jälkeen tarkistetaan, että:
+- get_decay_percentiles vastaa Pythonissa järjestetyn listan
+  persentiilejä (yksi osio, useampi osio, tyhjä väli)
+- kyselyn jälkeen kyselypalvelun yhteydellä ei ole avointa
+  transaktiota
+- kyselyn jälkeen tallennettu rivi näkyy samalla palvelulla
+  get_history_countissa
+- ResultStorageService.cleanup ei jää odottamaan checkpointia
+
+Paluuarvo on 1, jos jokin tarkistus epäonnistuu.
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+from services.result_partitions import ResultPartitionLayout
+from services.result_query_service import ResultQueryService, calculate_percentile
+from services.result_storage_service import ResultStorageService
+
+
+CHECK_MONTHS = ("2026-08", "2026-09", "2026-10")
+CHECK_PERCENTILES = (50, 90, 95, 99)
+
+# Tuloksia tallennetaan kerralla enintään näin monta, jotta jono ei
+# täyty.
+CHECK_SAVE_BATCH = 500
+
+# Sulkemisen pitää onnistua selvästi lukon odotusaikaa (5 s) nopeammin.
+CHECK_CLEANUP_MAX_S = 2.0
+
+
+def create_result(date_text, station_id, decay_value):
+    return {
+        "timestamp": f"{date_text}T10:00:00",
+        "station_id": station_id,
+        "tester_name": "tarkistus",
+        "program_number": 7,
+        "program_name": "Tarkistus",
+        "result_ok": 1,
+        "decay_value": decay_value,
+        "decay_unit": "Pa",
+    }
+
+
+def get_expected(results, date_from, date_to, station_id):
+    values = sorted(
+        result["decay_value"]
+        for result in results
+        if result["decay_value"] is not None
+        and (not date_from or result["timestamp"][:10] >= date_from)
+        and (not date_to or result["timestamp"][:10] <= date_to)
+        and (station_id is None or result["station_id"] == station_id)
+    )
+
+    return len(values), {
+        percentile: calculate_percentile(values, percentile)
+        for percentile in CHECK_PERCENTILES
+    }
+
+
+def is_same(value, expected):
+    if value is None or expected is None:
+        return value is None and expected is None
+
+    return abs(value - expected) < 1e-9
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tulosraporttikyselyjen tarkistus")
+    parser.add_argument("--rows", type=int, default=1000, help="tuloksia kuukautta kohden")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    random.seed(args.seed)
+
+    directory = tempfile.mkdtemp(prefix="check_result_queries_")
+    layout = ResultPartitionLayout(directory=directory)
+    storage = ResultStorageService(partition_layout=layout)
+    query = ResultQueryService(partition_layout=layout)
+    failures = []
+
+    try:
+        results = []
+
+        for month in CHECK_MONTHS:
+            for index in range(args.rows):
+                decay_value = round(random.gauss(5.0, 2.0), 3) if index % 10 else None
+                results.append(create_result(
+                    f"{month}-{random.randint(1, 28):02d}",
+                    random.choice((1, 2)),
+                    decay_value,
+                ))
+
+        for start in range(0, len(results), CHECK_SAVE_BATCH):
+            for result in results[start:start + CHECK_SAVE_BATCH]:
+                storage.save_test_result(result)
+
+            if not storage.flush(60.0):
+                failures.append("tallennusjono ei tyhjentynyt")
+                break
+
+        cases = (
+            (None, None, None),
+            ("2026-09-01", "2026-09-30", None),
+            ("2026-09-10", "2026-10-10", 2),
+            ("2027-01-01", None, None),
+        )
+
+        for date_from, date_to, station_id in cases:
+            report = query.get_decay_percentiles(date_from, date_to, station_id)
+            count, expected = get_expected(results, date_from, date_to, station_id)
+            case_text = f"{date_from}..{date_to} asema {station_id}"
+
+            if report["count"] != count:
+                failures.append(f"{case_text}: määrä {report['count']} != {count}")
+
+            for percentile in CHECK_PERCENTILES:
+                if not is_same(report["percentiles"][percentile], expected[percentile]):
+                    failures.append(f"{case_text}: p{percentile} {report['percentiles'][percentile]} != {expected[percentile]}")
+
+            if query.connection is not None and query.connection.in_transaction:
+                failures.append(f"{case_text}: kyselyyhteydelle jäi avoin transaktio")
+
+        count_before = query.get_history_count()
+        storage.save_test_result(create_result("2026-10-15", 1, 1.0))
+        storage.flush(10.0)
+        count_after = query.get_history_count()
+
+        if count_after != count_before + 1:
+            failures.append(f"uusi rivi ei näy kyselyssä: {count_before} -> {count_after}")
+
+        started_at = time.monotonic()
+        storage.cleanup()
+        cleanup_s = time.monotonic() - started_at
+
+        if cleanup_s > CHECK_CLEANUP_MAX_S:
+            failures.append(f"tallennuksen sulkeminen kesti {cleanup_s:.1f} s")
+
+        print(f"Tarkistettu {len(results)} tulosta, {len(cases)} persentiilikyselyä, sulkeminen {cleanup_s:.2f} s")
+
+    finally:
+        storage.cleanup()
+        query.cleanup()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for failure in failures:
+        print(f"  VIRHE: {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
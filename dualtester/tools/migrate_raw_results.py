@@ -0,0 +1,167 @@
+# tools/migrate_raw_results.py
+"""
+Muuntaa vanhat raw_result_json-rivit pakattuun raw_result_blob-muotoon.
+
+Ajetaan dualtester-hakemistosta, kun sovellus ei ole käynnissä:
+
+    python -m tools.migrate_raw_results
+    python -m tools.migrate_raw_results --database /polku/test_results_2026-03.db --vacuum
+
+Ilman --databasea käsitellään kaikki tulososiot ja vanha
+test_results.db hakemistosta --directory.
+
+Rivit käsitellään id-järjestyksessä erissä. Jokainen erä on oma
+transaktionsa, joten keskeytetty ajo voidaan aloittaa uudelleen.
+Rivejä, joiden raw_result ei ole muotoa {"registers": [...]}, ei muuteta.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from services.result_partitions import ResultPartitionLayout, RESULT_DATABASE_DIRECTORY
+from services.result_storage_service import ensure_result_database
+from utils.raw_result_codec import pack_raw_registers
+
+
+MIGRATION_BATCH_SIZE = 2000
+
+
+def migrate_raw_results(database_path, batch_size=MIGRATION_BATCH_SIZE, compress=False):
+    """
+    Palauttaa (muunnetut, ohitetut) rivimäärät.
+    """
+    # Varmistaa raw_result_blob-sarakkeen vanhassa tietokannassa.
+    ensure_result_database(database_path)
+
+    connection = sqlite3.connect(database_path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+
+    converted = 0
+    skipped = 0
+    last_id = 0
+
+    try:
+        while True:
+            rows = connection.execute(
+                """
+                SELECT id, raw_result_json
+                FROM test_results
+                WHERE id > ?
+                  AND raw_result_blob IS NULL
+                  AND raw_result_json IS NOT NULL
+                ORDER BY id
+                LIMIT ?
+                """,
+                (last_id, batch_size),
+            ).fetchall()
+
+            if not rows:
+                break
+
+            updates = []
+
+            for result_id, raw_result_json in rows:
+                last_id = result_id
+
+                try:
+                    raw_result = json.loads(raw_result_json)
+                except Exception:
+                    skipped += 1
+                    continue
+
+                if not isinstance(raw_result, dict) or set(raw_result.keys()) != {"registers"}:
+                    skipped += 1
+                    continue
+
+                blob = pack_raw_registers(raw_result["registers"], compress=compress)
+
+                if blob is None:
+                    skipped += 1
+                    continue
+
+                updates.append((blob, result_id))
+
+            with connection:
+                connection.executemany(
+                    """
+                    UPDATE test_results
+                    SET raw_result_blob = ?, raw_result_json = NULL
+                    WHERE id = ?
+                    """,
+                    updates,
+                )
+
+            converted += len(updates)
+            print(f"Muunnettu {converted} riviä (viimeisin id {last_id})")
+
+    finally:
+        connection.close()
+
+    return converted, skipped
+
+
+def vacuum_database(database_path):
+    connection = sqlite3.connect(database_path, timeout=30)
+
+    try:
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+
+
+def get_database_paths(directory):
+    layout = ResultPartitionLayout(directory=directory)
+    paths = [layout.get_partition_path(key) for key in layout.list_partitions()]
+
+    if layout.has_legacy_database():
+        paths.append(layout.get_legacy_path())
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Muunna raw_result_json -> raw_result_blob")
+    parser.add_argument("--database", help="yksittäinen tietokanta; oletuksena kaikki osiot")
+    parser.add_argument("--directory", default=RESULT_DATABASE_DIRECTORY)
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument("--compress", action="store_true", help="kokeile zlib-pakkausta riveittäin")
+    parser.add_argument("--vacuum", action="store_true", help="pienennä tiedosto lopuksi (VACUUM)")
+    args = parser.parse_args()
+
+    if args.database:
+        database_paths = [args.database]
+    else:
+        database_paths = get_database_paths(args.directory)
+
+    missing = [path for path in database_paths if not os.path.exists(path)]
+
+    if not database_paths or missing:
+        print(f"Tietokantaa ei löydy: {', '.join(missing) or args.directory}")
+        return 1
+
+    for database_path in database_paths:
+        size_before = os.path.getsize(database_path)
+        started_at = time.monotonic()
+
+        converted, skipped = migrate_raw_results(
+            database_path,
+            batch_size=args.batch_size,
+            compress=args.compress,
+        )
+
+        if args.vacuum:
+            vacuum_database(database_path)
+
+        size_after = os.path.getsize(database_path)
+
+        print(f"{database_path}: {converted} muunnettu, {skipped} ohitettu, {time.monotonic() - started_at:.1f} s")
+        print(f"Tiedoston koko: {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
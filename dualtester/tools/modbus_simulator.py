@@ -0,0 +1,771 @@
+# tools/modbus_simulator.py
+"""
+Modbus RTU -simulaattori ForTest 1:lle, ForTest 2:lle ja Optalle.
+
+Ajetaan dualtester-hakemistosta:
+
+    python -m tools.modbus_simulator
+    python -m tools.modbus_simulator --time-scale 0.1 --fail-rate 0.2
+
+Jokaiselle laitteelle luodaan pty-pari ja symlinkki --link-dir
+-hakemistoon (opta, fortest1, fortest2). Sovellus ohjataan niihin
+ympäristömuuttujilla, jolloin oikea ModbusHandler / pymodbus -polku
+on käytössä ilman laitteita:
+
+    DUALTESTER_OPTA_PORT=/tmp/dualtester-sim/opta \\
+    DUALTESTER_FORTEST1_PORT=/tmp/dualtester-sim/fortest1 \\
+    DUALTESTER_FORTEST2_PORT=/tmp/dualtester-sim/fortest2 \\
+    python main.py
+
+ForTest-malli:
+- status-, tulos- ja ohjelmanvalinta-alueet sekä coilit 0x0A / 0x14
+- testi etenee täyttö -> tasaantuminen -> testi -> purku ohjelman
+  aikojen mukaan (--time-scale skaalaa ajat)
+- TST-parametrit ja ohjelmien nimet ohjelmatiedostosta
+
+Opta-malli:
+- hätäseispiiri: SIGUSR1 = hätäseis painettu, SIGUSR2 = vapautettu.
+  Tila palaa OK:ksi vasta kuittauspulssilla (19099 0 -> 1).
+- testiventtiili- ja rele-rekisterit
+- jig-sekvenssit: käsky + käynnistys samassa kehyksessä, askeleet
+  ja valmis-tila
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import time
+from datetime import datetime
+
+from config.fortest_config import (
+    FORTEST_START_TEST_COIL,
+    FORTEST_ABORT_TEST_COIL,
+    FORTEST_STATUS_REGISTER,
+    FORTEST_STATUS_REGISTER_COUNT,
+    FORTEST_STATUS_WORD_STATUS,
+    FORTEST_STATUS_WORD_SUB_STATUS,
+    FORTEST_STATUS_WORD_PROGRAM,
+    FORTEST_STATUS_WORD_TIME_REMAINING_HIGH,
+    FORTEST_STATUS_WORD_TIME_REMAINING_LOW,
+    FORTEST_STATUS_WORD_PRESSURE_SIGN,
+    FORTEST_STATUS_WORD_PRESSURE_HIGH,
+    FORTEST_STATUS_WORD_PRESSURE_LOW,
+    FORTEST_STATUS_WORD_PRESSURE_UNIT,
+    FORTEST_STATUS_WORD_PRESSURE_DECIMALS,
+    FORTEST_STATUS_WORD_DECAY_SIGN,
+    FORTEST_STATUS_WORD_DECAY_HIGH,
+    FORTEST_STATUS_WORD_DECAY_LOW,
+    FORTEST_STATUS_WORD_DECAY_UNIT,
+    FORTEST_STATUS_WORD_DECAY_DECIMALS,
+    FORTEST_NEGATIVE_SIGN,
+    FORTEST_RESULTS_REGISTER,
+    FORTEST_RESULTS_REGISTER_COUNT,
+    FORTEST_PROGRAM_REGISTER,
+    FORTEST_PROGRAM_PARAM_BASE,
+    FORTEST_PROGRAM_PARAM_STRIDE,
+    FORTEST_PROGRAM_NAME_BASE,
+    FORTEST_PROGRAM_NAME_REGISTER_COUNT,
+    FORTEST_PROGRAM_LAST_ID,
+)
+from config.modbus_config import (
+    SHUTDOWN_REQUEST_REGISTER,
+    EMERGENCY_RESET_REGISTER,
+    EMERGENCY_STATUS_REGISTER,
+    FORTEST1_TEST_VALVE_REGISTER,
+    FORTEST2_TEST_VALVE_REGISTER,
+    JIG_SEQUENCE_COMMAND_REGISTER,
+    JIG_SEQUENCE_START_REGISTER,
+    JIG_SEQUENCE_STOP_REGISTER,
+    JIG_SEQUENCE_STATUS_REGISTER,
+    JIG_SEQUENCE_STEP_REGISTER,
+    JIG_SEQUENCE_ERROR_REGISTER,
+    JIG_SEQUENCE_COMMAND_PART_CLAMP,
+    JIG_SEQUENCE_COMMAND_PART_CHANGE,
+    JIG_SEQUENCE_COMMAND_PART_RELEASE,
+    JIG_SEQUENCE_COMMAND_PART_REMOVE,
+    JIG_SEQUENCE_COMMAND_AUTO_PART_CHANGE,
+    JIG_SEQUENCE_STATUS_IDLE,
+    JIG_SEQUENCE_STATUS_RUNNING,
+    JIG_SEQUENCE_STATUS_DONE,
+    JIG_SEQUENCE_STATUS_ERROR,
+    JIG_SEQUENCE_ERROR_NONE,
+    JIG_SEQUENCE_ERROR_EMERGENCY_STOP,
+    JIG_SEQUENCE_ERROR_UNKNOWN_COMMAND,
+)
+from config.port_config import OPTA_MODBUS_BAUDRATE, FORTEST_BAUDRATE
+from utils.fortest_program_table import encode_program, encode_program_name, infer_program_convention
+from utils.modbus_rtu_slave import (
+    ModbusSlaveDevice,
+    ModbusSlaveError,
+    PtyModbusSlave,
+    MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS,
+    MODBUS_EXCEPTION_ILLEGAL_DATA_VALUE,
+    MODBUS_EXCEPTION_SLAVE_DEVICE_BUSY,
+)
+
+
+SIMULATOR_DEFAULT_LINK_DIR = "/tmp/dualtester-sim"
+
+# ------------------------------------------------------------
+# ForTest-malli
+# ------------------------------------------------------------
+
+# Status- ja alitilakoodit ForTestin Modbus-manuaalin taulukoista
+# "Status", "Sub status" ja "Phase of test".
+SIM_FORTEST_STATUS_WAITING = 0
+SIM_FORTEST_STATUS_TEST = 1
+SIM_FORTEST_STATUS_DISCHARGE = 3
+
+SIM_FORTEST_PHASE_FILLING = 11
+SIM_FORTEST_PHASE_SETTLING = 14
+SIM_FORTEST_PHASE_TEST = 26
+SIM_FORTEST_SUB_STATUS_DISCHARGE = 1
+
+SIM_FORTEST_RESULT_NONE = 0
+SIM_FORTEST_RESULT_OK = 1
+SIM_FORTEST_RESULT_FAIL = 2
+
+# Tulosalueen sanat. Vuotoarvo sanassa 21 kuten
+# StationResultHandler sen lukee.
+SIM_RESULT_WORD_PROGRAM = 6
+SIM_RESULT_WORD_KIND_OF_TEST = 8
+SIM_RESULT_WORD_RESULT = 9
+SIM_RESULT_WORD_PHASE = 10
+SIM_RESULT_WORD_TEST_TIME_HIGH = 11
+SIM_RESULT_WORD_TEST_TIME_LOW = 12
+SIM_RESULT_WORD_TIME_UNIT = 13
+SIM_RESULT_WORD_TIME_DECIMALS = 14
+SIM_RESULT_WORD_PRESSURE_SIGN = 15
+SIM_RESULT_WORD_PRESSURE_HIGH = 16
+SIM_RESULT_WORD_PRESSURE_LOW = 17
+SIM_RESULT_WORD_PRESSURE_UNIT = 18
+SIM_RESULT_WORD_PRESSURE_DECIMALS = 19
+SIM_RESULT_WORD_DECAY_SIGN = 20
+SIM_RESULT_WORD_DECAY = 21
+SIM_RESULT_WORD_DECAY_UNIT = 23
+SIM_RESULT_WORD_DECAY_DECIMALS = 24
+
+SIM_STATUS_WORD_TIME_UNIT = 13
+SIM_STATUS_WORD_TIME_DECIMALS = 14
+
+SIM_UNIT_MBAR = 0
+SIM_UNIT_PA = 3
+SIM_UNIT_SECONDS = 60
+SIM_UNIT_CC_MIN = 41
+
+SIM_PRESSURE_DECIMALS = 1
+SIM_DECAY_DECIMALS = 2
+SIM_TIME_DECIMALS = 1
+
+# Ohjelma ilman aikoja (tai ohjelmatiedosto puuttuu).
+SIM_DEFAULT_PROGRAM = {
+    "pressure_mbar": 3000.0,
+    "fill_time_s": 3.0,
+    "settle_time_s": 3.0,
+    "test_time_s": 5.0,
+    "discharge_time_s": 1.0,
+    "max_decay": {"value": 50.0, "unit": "Pa", "mode": "decay"},
+}
+
+# Keskeytetyn testin purku.
+SIM_ABORT_DISCHARGE_S = 0.5
+
+# Ohjelmanvaihto näkyy statusalueessa vasta tämän viiveen jälkeen,
+# jotta sovelluksen vahvistusluenta tulee testatuksi.
+SIM_PROGRAM_SWITCH_DELAY_S = 0.15
+
+SIM_FORTEST_PARAM_AREA_COUNT = (FORTEST_PROGRAM_LAST_ID + 1) * FORTEST_PROGRAM_PARAM_STRIDE
+
+
+def load_simulator_programs(path):
+    """
+    Lataa ohjelmatiedoston ohjelmat {id: ohjelma}. Puuttuva tiedosto
+    ei ole virhe: simulaattori käyttää oletusaikoja.
+    """
+    if not path or not os.path.exists(path):
+        print(f"Simulaattori: ohjelmatiedostoa {path} ei löydy, käytetään oletusaikoja")
+        return {}
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        print(f"Simulaattori: ohjelmatiedoston {path} luku epäonnistui: {e}")
+        return {}
+
+    programs = {}
+
+    for program in data.get("programs", []) if isinstance(data, dict) else []:
+        if isinstance(program, dict) and isinstance(program.get("id"), int):
+            programs[program["id"]] = program
+
+    return programs
+
+
+def _split_u32(value):
+    value = int(value) & 0xFFFFFFFF
+    return value >> 16, value & 0xFFFF
+
+
+class ForTestSimulator(ModbusSlaveDevice):
+    """
+    Yhden ForTest-laitteen rekisterikartta.
+
+    ForTest palauttaa alueen luvun alkuosoitteen mukaan: statusalue
+    (0x30, 32 sanaa) ja tulosalue (0x40) menevät osittain päällekkäin,
+    ja jokaisella ohjelmanimellä on oma merkkijono-osoitteensa.
+    Siksi luku valitaan alkuosoitteen perusteella, ei litteästä
+    muistista.
+    """
+
+    def __init__(self, name, programs=None, time_scale=1.0, fail_rate=0.1, rng=None):
+        self.name = name
+        self.programs = programs or {}
+        self.program_convention = infer_program_convention(self.programs.values())
+        self.param_words = {}
+        self.time_scale = max(0.001, float(time_scale))
+        self.fail_rate = fail_rate
+        self.rng = rng or random.Random()
+
+        self.status = [0] * FORTEST_STATUS_REGISTER_COUNT
+        self.results = [0] * FORTEST_RESULTS_REGISTER_COUNT
+
+        self.program_number = 1
+        self.pending_program = None
+        self.pending_program_at = 0.0
+
+        # [(loppuaika, status, alitila, nimi)]
+        self.timeline = []
+        self.test_started = 0.0
+        self.test_program = None
+        self.planned_decay = 0.0
+        self.planned_result = SIM_FORTEST_RESULT_NONE
+        self.results_written = False
+
+        self.tests_started = 0
+        self.tests_finished = 0
+
+        self.status[FORTEST_STATUS_WORD_PROGRAM] = self.program_number
+        self.status[FORTEST_STATUS_WORD_PRESSURE_UNIT] = SIM_UNIT_MBAR
+        self.status[FORTEST_STATUS_WORD_PRESSURE_DECIMALS] = SIM_PRESSURE_DECIMALS
+        self.status[FORTEST_STATUS_WORD_DECAY_DECIMALS] = SIM_DECAY_DECIMALS
+        self.status[SIM_STATUS_WORD_TIME_UNIT] = SIM_UNIT_SECONDS
+        self.status[SIM_STATUS_WORD_TIME_DECIMALS] = SIM_TIME_DECIMALS
+
+    # ------------------------------------------------------------
+    # Ohjelmat
+    # ------------------------------------------------------------
+
+    def get_program(self, program_id):
+        program = dict(SIM_DEFAULT_PROGRAM)
+        program.update(self.programs.get(program_id, {}))
+        return program
+
+    def _get_decay_unit(self, program):
+        if program.get("measurement_type") == "cc_min":
+            return SIM_UNIT_CC_MIN
+
+        return SIM_UNIT_PA
+
+    # ------------------------------------------------------------
+    # Testikierto
+    # ------------------------------------------------------------
+
+    def start_test(self, now):
+        if self.timeline:
+            return
+
+        program = self.get_program(self.program_number)
+        scale = self.time_scale
+        phases = (
+            (program.get("fill_time_s"), SIM_FORTEST_STATUS_TEST, SIM_FORTEST_PHASE_FILLING, "fill"),
+            (program.get("settle_time_s"), SIM_FORTEST_STATUS_TEST, SIM_FORTEST_PHASE_SETTLING, "settle"),
+            (program.get("test_time_s"), SIM_FORTEST_STATUS_TEST, SIM_FORTEST_PHASE_TEST, "test"),
+            (program.get("discharge_time_s"), SIM_FORTEST_STATUS_DISCHARGE, SIM_FORTEST_SUB_STATUS_DISCHARGE, "discharge"),
+        )
+
+        end = now
+        self.timeline = []
+
+        for duration_s, status, sub_status, phase_name in phases:
+            end += max(0.0, float(duration_s or 0)) * scale
+            self.timeline.append((end, status, sub_status, phase_name))
+
+        max_decay = float((program.get("max_decay") or {}).get("value") or 0) or 1.0
+
+        if self.rng.random() < self.fail_rate:
+            self.planned_result = SIM_FORTEST_RESULT_FAIL
+            self.planned_decay = max_decay * self.rng.uniform(1.1, 2.0)
+        else:
+            self.planned_result = SIM_FORTEST_RESULT_OK
+            self.planned_decay = max_decay * self.rng.uniform(0.05, 0.8)
+
+        self.test_started = now
+        self.test_program = program
+        self.results_written = False
+        self.tests_started += 1
+
+    def abort_test(self, now):
+        if not self.timeline:
+            return
+
+        self.planned_result = SIM_FORTEST_RESULT_NONE
+        self.planned_decay = 0.0
+        self.timeline = [(
+            now + SIM_ABORT_DISCHARGE_S * self.time_scale,
+            SIM_FORTEST_STATUS_DISCHARGE,
+            SIM_FORTEST_SUB_STATUS_DISCHARGE,
+            "discharge",
+        )]
+
+        self._write_results(now)
+
+    def _get_phase(self, now):
+        phase_started = self.test_started
+
+        for end, status, sub_status, phase_name in self.timeline:
+            if now < end:
+                return phase_started, end, status, sub_status, phase_name
+
+            phase_started = end
+
+        return None
+
+    def update(self, now):
+        if self.pending_program is not None and now >= self.pending_program_at:
+            self.program_number = self.pending_program
+            self.pending_program = None
+            self.status[FORTEST_STATUS_WORD_PROGRAM] = self.program_number
+
+        if not self.timeline:
+            return
+
+        phase = self._get_phase(now)
+
+        if phase is None:
+            # Purku päättyi.
+            if not self.results_written:
+                self._write_results(now)
+
+            self.timeline = []
+            self.tests_finished += 1
+            self._set_status_values(SIM_FORTEST_STATUS_WAITING, 0, 0, 0.0, 0.0, self.test_program)
+            return
+
+        phase_started, phase_end, status, sub_status, phase_name = phase
+        program = self.test_program
+        target = float(program.get("pressure_mbar") or 0)
+        progress = (now - phase_started) / max(0.001, phase_end - phase_started)
+        time_remaining_s = (self.timeline[-1][0] - now) / self.time_scale
+
+        decay = 0.0
+
+        if phase_name == "fill":
+            pressure = target * progress
+        elif phase_name == "settle":
+            pressure = target * (1.0 - 0.002 * progress)
+        elif phase_name == "test":
+            decay = self.planned_decay * progress
+            pressure = target * 0.998 - decay / 100.0
+        else:
+            if not self.results_written:
+                self._write_results(now)
+
+            pressure = target * (1.0 - progress) * 0.998
+            decay = self.planned_decay
+
+        pressure += self.rng.uniform(-0.001, 0.001) * target
+        self._set_status_values(status, sub_status, time_remaining_s, pressure, decay, program)
+
+    def _set_status_values(self, status, sub_status, time_remaining_s, pressure, decay, program):
+        words = self.status
+
+        words[FORTEST_STATUS_WORD_STATUS] = status
+        words[FORTEST_STATUS_WORD_SUB_STATUS] = sub_status
+
+        high, low = _split_u32(round(max(0.0, time_remaining_s) * 10 ** SIM_TIME_DECIMALS))
+        words[FORTEST_STATUS_WORD_TIME_REMAINING_HIGH] = high
+        words[FORTEST_STATUS_WORD_TIME_REMAINING_LOW] = low
+
+        words[FORTEST_STATUS_WORD_PRESSURE_SIGN] = FORTEST_NEGATIVE_SIGN if pressure < 0 else 0
+        high, low = _split_u32(round(abs(pressure) * 10 ** SIM_PRESSURE_DECIMALS))
+        words[FORTEST_STATUS_WORD_PRESSURE_HIGH] = high
+        words[FORTEST_STATUS_WORD_PRESSURE_LOW] = low
+
+        words[FORTEST_STATUS_WORD_DECAY_SIGN] = FORTEST_NEGATIVE_SIGN if decay < 0 else 0
+        high, low = _split_u32(round(abs(decay) * 10 ** SIM_DECAY_DECIMALS))
+        words[FORTEST_STATUS_WORD_DECAY_HIGH] = high
+        words[FORTEST_STATUS_WORD_DECAY_LOW] = low
+        words[FORTEST_STATUS_WORD_DECAY_UNIT] = self._get_decay_unit(program or {})
+
+    def _write_results(self, now):
+        program = self.test_program or self.get_program(self.program_number)
+        stamp = datetime.now()
+        words = [0] * FORTEST_RESULTS_REGISTER_COUNT
+
+        words[0] = stamp.hour
+        words[1] = stamp.minute
+        words[2] = stamp.second
+        words[3] = stamp.day
+        words[4] = stamp.month
+        words[5] = stamp.year
+        words[SIM_RESULT_WORD_PROGRAM] = self.program_number
+        words[SIM_RESULT_WORD_KIND_OF_TEST] = 7 if program.get("kind_of_test") == "absolute" else 0
+        words[SIM_RESULT_WORD_RESULT] = self.planned_result
+        words[SIM_RESULT_WORD_PHASE] = SIM_FORTEST_PHASE_TEST
+
+        test_time = round((now - self.test_started) / self.time_scale * 10 ** SIM_TIME_DECIMALS)
+        words[SIM_RESULT_WORD_TEST_TIME_HIGH], words[SIM_RESULT_WORD_TEST_TIME_LOW] = _split_u32(test_time)
+        words[SIM_RESULT_WORD_TIME_UNIT] = SIM_UNIT_SECONDS
+        words[SIM_RESULT_WORD_TIME_DECIMALS] = SIM_TIME_DECIMALS
+
+        pressure = round(float(program.get("pressure_mbar") or 0) * 0.998 * 10 ** SIM_PRESSURE_DECIMALS)
+        words[SIM_RESULT_WORD_PRESSURE_SIGN] = 0
+        words[SIM_RESULT_WORD_PRESSURE_HIGH], words[SIM_RESULT_WORD_PRESSURE_LOW] = _split_u32(pressure)
+        words[SIM_RESULT_WORD_PRESSURE_UNIT] = SIM_UNIT_MBAR
+        words[SIM_RESULT_WORD_PRESSURE_DECIMALS] = SIM_PRESSURE_DECIMALS
+
+        words[SIM_RESULT_WORD_DECAY_SIGN] = 0
+        words[SIM_RESULT_WORD_DECAY] = min(0xFFFF, round(self.planned_decay * 10 ** SIM_DECAY_DECIMALS))
+        words[SIM_RESULT_WORD_DECAY_UNIT] = self._get_decay_unit(program)
+        words[SIM_RESULT_WORD_DECAY_DECIMALS] = SIM_DECAY_DECIMALS
+
+        self.results = words
+        self.results_written = True
+
+    # ------------------------------------------------------------
+    # Modbus
+    # ------------------------------------------------------------
+
+    def read_registers(self, address, count):
+        if address == FORTEST_STATUS_REGISTER and count <= FORTEST_STATUS_REGISTER_COUNT:
+            return self.status[:count]
+
+        if address == FORTEST_RESULTS_REGISTER and count <= FORTEST_RESULTS_REGISTER_COUNT:
+            return self.results[:count]
+
+        if address == FORTEST_PROGRAM_REGISTER and count == 1:
+            return [self.program_number]
+
+        name_offset = address - FORTEST_PROGRAM_NAME_BASE
+
+        if 0 <= name_offset <= FORTEST_PROGRAM_LAST_ID and count <= FORTEST_PROGRAM_NAME_REGISTER_COUNT:
+            program = self.programs.get(name_offset, {})
+            return encode_program_name(program.get("name", ""))[:count]
+
+        param_offset = address - FORTEST_PROGRAM_PARAM_BASE
+
+        if 0 <= param_offset and param_offset + count <= SIM_FORTEST_PARAM_AREA_COUNT:
+            return self._read_param_area(address, count)
+
+        raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS)
+
+    def _read_param_area(self, address, count):
+        values = []
+
+        for register in range(address, address + count):
+            program_id, offset = divmod(register - FORTEST_PROGRAM_PARAM_BASE, FORTEST_PROGRAM_PARAM_STRIDE)
+            program = self.programs.get(program_id)
+
+            if program is None:
+                values.append(0)
+                continue
+
+            words = self.param_words.get(program_id)
+
+            if words is None:
+                words = encode_program(program, self.program_convention)
+                self.param_words[program_id] = words
+
+            values.append(words[offset] if offset < len(words) else 0)
+
+        return values
+
+    def write_registers(self, address, values):
+        if address != FORTEST_PROGRAM_REGISTER or len(values) != 1:
+            raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS)
+
+        program_number = values[0]
+
+        if not 0 <= program_number <= FORTEST_PROGRAM_LAST_ID:
+            raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_VALUE)
+
+        if self.timeline:
+            raise ModbusSlaveError(MODBUS_EXCEPTION_SLAVE_DEVICE_BUSY)
+
+        self.pending_program = program_number
+        self.pending_program_at = time.monotonic() + SIM_PROGRAM_SWITCH_DELAY_S
+
+    def read_coils(self, address, count):
+        return [False] * count
+
+    def write_coil(self, address, value):
+        if not value:
+            return
+
+        now = time.monotonic()
+
+        if address == FORTEST_START_TEST_COIL:
+            self.start_test(now)
+        elif address == FORTEST_ABORT_TEST_COIL:
+            self.abort_test(now)
+        else:
+            raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS)
+
+
+# ------------------------------------------------------------
+# Opta-malli
+# ------------------------------------------------------------
+
+# Jig-sekvenssin askelmäärät käskyittäin.
+SIM_JIG_SEQUENCE_STEPS = {
+    JIG_SEQUENCE_COMMAND_PART_CLAMP: 3,
+    JIG_SEQUENCE_COMMAND_PART_CHANGE: 6,
+    JIG_SEQUENCE_COMMAND_PART_RELEASE: 2,
+    JIG_SEQUENCE_COMMAND_PART_REMOVE: 4,
+    JIG_SEQUENCE_COMMAND_AUTO_PART_CHANGE: 8,
+}
+
+SIM_JIG_STEP_S = 0.5
+
+# Optan oma rekisteritaulu kattaa koko 16-bittisen osoiteavaruuden.
+# Pollerin yhdistämät lohkot voivat sisältää välirekistereitä, jotka
+# palautetaan nollina.
+SIM_OPTA_REGISTER_COUNT = 0x10000
+
+
+class OptaSimulator(ModbusSlaveDevice):
+    """
+    Arduino Optan rekisterikartta: hätäseispiiri, testiventtiilit,
+    releet ja jig-sekvenssit.
+    """
+
+    def __init__(self, time_scale=1.0, verbose=False):
+        self.time_scale = max(0.001, float(time_scale))
+        self.verbose = verbose
+
+        self.registers = {}
+
+        self.emergency_pressed = False
+        self.emergency_tripped = False
+
+        self.jig_command = 0
+        self.jig_started = 0.0
+        self.jig_steps = 0
+
+        self.registers[EMERGENCY_STATUS_REGISTER] = 1
+        self.registers[JIG_SEQUENCE_STATUS_REGISTER] = JIG_SEQUENCE_STATUS_IDLE
+
+    # ------------------------------------------------------------
+    # Hätäseis
+    # ------------------------------------------------------------
+
+    def press_emergency_stop(self):
+        self.emergency_pressed = True
+        self.emergency_tripped = True
+        self.registers[EMERGENCY_STATUS_REGISTER] = 0
+
+        if self.registers.get(JIG_SEQUENCE_STATUS_REGISTER) == JIG_SEQUENCE_STATUS_RUNNING:
+            self._finish_jig_sequence(JIG_SEQUENCE_STATUS_ERROR, JIG_SEQUENCE_ERROR_EMERGENCY_STOP)
+
+        print("Simulaattori Opta: HÄTÄSEIS PAINETTU")
+
+    def release_emergency_stop(self):
+        self.emergency_pressed = False
+        print("Simulaattori Opta: hätäseis vapautettu, odotetaan kuittausta")
+
+    def _reset_emergency_stop(self):
+        if self.emergency_pressed:
+            return
+
+        if self.emergency_tripped:
+            print("Simulaattori Opta: hätäseis kuitattu")
+
+        self.emergency_tripped = False
+        self.registers[EMERGENCY_STATUS_REGISTER] = 1
+
+    # ------------------------------------------------------------
+    # Jig-sekvenssit
+    # ------------------------------------------------------------
+
+    def _start_jig_sequence(self, command):
+        self.registers[JIG_SEQUENCE_START_REGISTER] = 0
+
+        if self.emergency_tripped:
+            self._finish_jig_sequence(JIG_SEQUENCE_STATUS_ERROR, JIG_SEQUENCE_ERROR_EMERGENCY_STOP)
+            return
+
+        steps = SIM_JIG_SEQUENCE_STEPS.get(command)
+
+        if steps is None:
+            self._finish_jig_sequence(JIG_SEQUENCE_STATUS_ERROR, JIG_SEQUENCE_ERROR_UNKNOWN_COMMAND)
+            return
+
+        self.jig_command = command
+        self.jig_steps = steps
+        self.jig_started = time.monotonic()
+        self.registers[JIG_SEQUENCE_STATUS_REGISTER] = JIG_SEQUENCE_STATUS_RUNNING
+        self.registers[JIG_SEQUENCE_STEP_REGISTER] = 1
+        self.registers[JIG_SEQUENCE_ERROR_REGISTER] = JIG_SEQUENCE_ERROR_NONE
+
+    def _finish_jig_sequence(self, status, error):
+        self.jig_command = 0
+        self.registers[JIG_SEQUENCE_STATUS_REGISTER] = status
+        self.registers[JIG_SEQUENCE_STEP_REGISTER] = 0
+        self.registers[JIG_SEQUENCE_ERROR_REGISTER] = error
+
+    def update(self, now):
+        if not self.jig_command:
+            return
+
+        step = int((now - self.jig_started) / (SIM_JIG_STEP_S * self.time_scale)) + 1
+
+        if step > self.jig_steps:
+            self._finish_jig_sequence(JIG_SEQUENCE_STATUS_DONE, JIG_SEQUENCE_ERROR_NONE)
+            return
+
+        self.registers[JIG_SEQUENCE_STEP_REGISTER] = step
+
+    # ------------------------------------------------------------
+    # Modbus
+    # ------------------------------------------------------------
+
+    def read_registers(self, address, count):
+        if address + count > SIM_OPTA_REGISTER_COUNT:
+            raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS)
+
+        return [self.registers.get(register, 0) for register in range(address, address + count)]
+
+    def write_registers(self, address, values):
+        if address + len(values) > SIM_OPTA_REGISTER_COUNT:
+            raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS)
+
+        # Arvot käsitellään osoitejärjestyksessä, joten FC16-kirjoituksen
+        # käsky (19200) on paikallaan ennen käynnistystä (19201).
+        for register, value in enumerate(values, start=address):
+            previous = self.registers.get(register, 0)
+            self.registers[register] = value
+            self._handle_write(register, previous, value)
+
+    def _handle_write(self, register, previous, value):
+        if register == EMERGENCY_RESET_REGISTER:
+            if value and not previous:
+                self._reset_emergency_stop()
+
+        elif register == JIG_SEQUENCE_START_REGISTER:
+            if value:
+                self._start_jig_sequence(self.registers.get(JIG_SEQUENCE_COMMAND_REGISTER, 0))
+
+        elif register == JIG_SEQUENCE_STOP_REGISTER:
+            self.registers[JIG_SEQUENCE_STOP_REGISTER] = 0
+
+            if value:
+                self._finish_jig_sequence(JIG_SEQUENCE_STATUS_IDLE, JIG_SEQUENCE_ERROR_NONE)
+
+        elif register == SHUTDOWN_REQUEST_REGISTER:
+            if value:
+                print("Simulaattori Opta: sammutuspyyntö vastaanotettu")
+
+        elif register in (FORTEST1_TEST_VALVE_REGISTER, FORTEST2_TEST_VALVE_REGISTER):
+            if self.verbose and value != previous:
+                station_id = 1 if register == FORTEST1_TEST_VALVE_REGISTER else 2
+                print(f"Simulaattori Opta: ForTest {station_id} testiventtiili {'KIINNI' if value else 'AUKI'}")
+
+        elif self.verbose and value != previous:
+            print(f"Simulaattori Opta: rekisteri {register} = {value}")
+
+
+# ------------------------------------------------------------
+# Ajo
+# ------------------------------------------------------------
+
+def create_simulators(args):
+    rng = random.Random(args.seed)
+
+    opta = OptaSimulator(time_scale=args.time_scale, verbose=args.verbose)
+    fortests = {
+        station_id: ForTestSimulator(
+            f"fortest{station_id}",
+            programs=load_simulator_programs(programs_path),
+            time_scale=args.time_scale,
+            fail_rate=args.fail_rate,
+            rng=random.Random(rng.random()),
+        )
+        for station_id, programs_path in ((1, args.programs1), (2, args.programs2))
+    }
+
+    return opta, fortests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opta- ja ForTest-laitteiden Modbus RTU -simulaattori")
+    parser.add_argument("--link-dir", default=SIMULATOR_DEFAULT_LINK_DIR)
+    parser.add_argument("--programs1", default="config/programs1.json")
+    parser.add_argument("--programs2", default="config/programs2.json")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="testiaikojen kerroin, esim. 0.1")
+    parser.add_argument("--fail-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--turnaround-ms", type=float, default=5.0)
+    parser.add_argument("--no-bus-delay", action="store_true", help="ei baudinopeuden mukaista viivettä")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    opta, fortests = create_simulators(args)
+
+    slaves = [
+        PtyModbusSlave(
+            opta,
+            link_path=os.path.join(args.link_dir, "opta"),
+            name="opta",
+            baudrate=None if args.no_bus_delay else OPTA_MODBUS_BAUDRATE,
+            turnaround_ms=args.turnaround_ms,
+        )
+    ]
+
+    for station_id, fortest in fortests.items():
+        slaves.append(
+            PtyModbusSlave(
+                fortest,
+                link_path=os.path.join(args.link_dir, f"fortest{station_id}"),
+                name=fortest.name,
+                baudrate=None if args.no_bus_delay else FORTEST_BAUDRATE,
+                turnaround_ms=args.turnaround_ms,
+            )
+        )
+
+    for slave in slaves:
+        slave.start()
+        print(f"{slave.name:<9} {slave.link_path} -> {slave.port}")
+
+    print()
+    print(f"DUALTESTER_OPTA_PORT={slaves[0].link_path} \\")
+    print(f"DUALTESTER_FORTEST1_PORT={slaves[1].link_path} \\")
+    print(f"DUALTESTER_FORTEST2_PORT={slaves[2].link_path} \\")
+    print("python main.py")
+    print()
+    print(f"Hätäseis: kill -USR1 {os.getpid()} (paina), kill -USR2 {os.getpid()} (vapauta)")
+
+    signal.signal(signal.SIGUSR1, lambda _signum, _frame: opta.press_emergency_stop())
+    signal.signal(signal.SIGUSR2, lambda _signum, _frame: opta.release_emergency_stop())
+
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for slave in slaves:
+            slave.close()
+
+        for fortest in fortests.values():
+            print(f"{fortest.name}: {fortest.tests_started} testiä aloitettu, {fortest.tests_finished} valmista")
+
+        for slave in slaves:
+            print(f"{slave.name}: {slave.statistics}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,525 @@
+# tools/replay_bus_trace.py
+"""
+Väylätallenteen tarkastelu ja toisto.
+
+Ajetaan dualtester-hakemistosta:
+
+    python -m tools.replay_bus_trace bus_trace.rec --dump
+    python -m tools.replay_bus_trace bus_trace.rec
+    python -m tools.replay_bus_trace bus_trace.rec --port /dev/ttyUSB1=1 --output replay.json
+
+Tallenne syntyy, kun main_window.BUS_RECORDER_ENABLED on päällä
+(utils/bus_recorder.py).
+
+--dump tulostaa kehykset sellaisenaan. Toisto luo MainWindow'n
+offscreen-alustalla dev-tilassa (ei laitteita) ja syöttää ForTest-
+porttien kehykset tallennusjärjestyksessä:
+
+- statusluku (+ samaan kutsuun ketjutettu tulosluku) ja tulosluku
+  ForTestResultController.handle_result()-kutsuina samoilla
+  operaatiokoodeilla kuin ForTestManager
+- ohjelmarekisterin kirjoitus StationController.set_program()-kutsuna
+- START-coil StationController.start_test()-kutsuna
+- STOP-coil StationController.stop_test()-kutsuna
+
+Kehykset käsitellään heti peräkkäin; vain START odottaa aseman oman
+200 ms viiveen. Aseman pollaus- ja jig-ajastimet pysäytetään, joten
+sama tallenne tuottaa aina saman tuloksen.
+
+Raportti listaa hyväksytyt tulokset ja testin päättymiset, joille
+tulosta ei hyväksytty, syyn arvion kanssa (esim. last_result_id-
+suodatus). Optan kehykset näkyvät --dump-tulosteessa, mutta niitä ei
+toisteta.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from config.fortest_config import (
+    FORTEST_START_TEST_COIL,
+    FORTEST_ABORT_TEST_COIL,
+    FORTEST_STATUS_REGISTER,
+    FORTEST_RESULTS_REGISTER,
+    FORTEST_PROGRAM_REGISTER,
+)
+from utils.bus_recorder import read_bus_recording, BUS_RECORD_FLAG_NO_RESPONSE
+
+
+# START-kutsun jälkeen odotetaan aseman käynnistysviivettä enintään näin kauan.
+REPLAY_START_TIMEOUT_S = 1.0
+
+# ForTestin testin aikaiset tilat (testi, autozero, purku).
+REPLAY_ACTIVE_STATUSES = (1, 2, 3)
+
+
+class ReplayResponse:
+    """
+    pymodbus-vastauksen korvike: registers ja isError().
+
+    Poikkeusvastauksella ei ole registers-attribuuttia, kuten
+    pymodbusin ExceptionResponse-oliollakaan.
+    """
+
+    def __init__(self, registers=None, exception_code=0):
+        self.exception_code = exception_code
+
+        if registers is not None:
+            self.registers = list(registers)
+
+    def isError(self):
+        return self.exception_code != 0
+
+
+def make_replay_response(record):
+    if record.flags & BUS_RECORD_FLAG_NO_RESPONSE:
+        return None
+
+    if not record.ok:
+        return ReplayResponse(exception_code=record.exception_code or 1)
+
+    return ReplayResponse(registers=record.payload)
+
+
+class BusTraceReplayer:
+    """
+    Syöttää tallenteen ForTest-kehykset asemille ja kirjaa, mitkä
+    testin päättymiset tuottivat hyväksytyn tuloksen.
+    """
+
+    def __init__(self, main_window, port_stations, bundle_class, process_events):
+        self.main_window = main_window
+        self.result_controller = main_window.fortest_result_controller
+        self.stations = main_window.station_controllers
+        self.program_managers = {
+            1: getattr(main_window, "program_manager_1", None),
+            2: getattr(main_window, "program_manager_2", None),
+        }
+        self.port_stations = port_stations
+        self.bundle_class = bundle_class
+        self.process_events = process_events
+
+        self.statistics = {
+            station_id: {
+                "frames": 0,
+                "status_reads": 0,
+                "result_reads": 0,
+                "program_changes": 0,
+                "starts": 0,
+                "starts_refused": 0,
+                "stops": 0,
+                "test_ends": 0,
+                "accepted": 0,
+                "dropped": 0,
+            }
+            for station_id in self.stations
+        }
+        self.skipped_frames = 0
+
+        self.accepted = []
+        self.drops = []
+
+        self.last_status = {}
+        self.last_results = {}
+        self.pending_end = {}
+        self.current_record = None
+
+        for station_id, station in self.stations.items():
+            self._capture_results(station_id, station)
+
+    def _capture_results(self, station_id, station):
+        handler = station.result_handler
+        original = handler.update_test_results
+
+        def capture(result):
+            test_result = original(result)
+
+            if test_result is not None:
+                self._handle_accepted(station_id, result, test_result)
+
+            return test_result
+
+        handler.update_test_results = capture
+
+    # ------------------------------------------------------------
+    # Toisto
+    # ------------------------------------------------------------
+
+    def replay(self, records):
+        consumed = set()
+
+        for position, record in enumerate(records):
+            if position in consumed:
+                continue
+
+            station_id = self.port_stations.get(record.port)
+
+            if station_id not in self.stations:
+                self.skipped_frames += 1
+                continue
+
+            self.current_record = record
+            self.statistics[station_id]["frames"] += 1
+
+            if record.function == 3 and record.address == FORTEST_STATUS_REGISTER:
+                partner = self._find_chained_partner(records, position)
+
+                if partner is not None:
+                    consumed.add(partner)
+                    self.statistics[station_id]["frames"] += 1
+                    self._replay_status(station_id, record, records[partner])
+                else:
+                    self._replay_status(station_id, record, None)
+
+            elif record.function == 3 and record.address == FORTEST_RESULTS_REGISTER:
+                self._replay_results(station_id, record)
+
+            elif record.function in (6, 16) and record.address == FORTEST_PROGRAM_REGISTER:
+                self._replay_program_change(station_id, record)
+
+            elif record.function == 5 and record.address == FORTEST_START_TEST_COIL:
+                self._replay_start(station_id, record)
+
+            elif record.function == 5 and record.address == FORTEST_ABORT_TEST_COIL:
+                self.statistics[station_id]["stops"] += 1
+                self._close_pending_end(station_id, "testi pysäytettiin ennen tulosta")
+                self.stations[station_id].stop_test()
+
+            self.process_events()
+
+        for station_id in list(self.pending_end):
+            self._close_pending_end(station_id, None)
+
+    def _find_chained_partner(self, records, position):
+        port = records[position].port
+
+        for index in range(position + 1, len(records)):
+            if records[index].port != port:
+                continue
+
+            if records[index].chained and records[index].address == FORTEST_RESULTS_REGISTER:
+                return index
+
+            return None
+
+        return None
+
+    def _replay_status(self, station_id, status_record, results_record):
+        statistics = self.statistics[station_id]
+        statistics["status_reads"] += 1
+        status = make_replay_response(status_record)
+
+        self._track_status(station_id, status_record)
+
+        if results_record is None:
+            self.result_controller.handle_result(
+                station_id,
+                status,
+                self.result_controller.OP_STATUS_READ,
+                "",
+            )
+            return
+
+        statistics["result_reads"] += 1
+        results = make_replay_response(results_record)
+        self._track_results(station_id, results_record)
+
+        self.result_controller.handle_result(
+            station_id,
+            self.bundle_class(status=status, results=results),
+            self.result_controller.OP_STATUS_AND_RESULTS_READ,
+            "",
+        )
+
+    def _replay_results(self, station_id, record):
+        self.statistics[station_id]["result_reads"] += 1
+        self._track_results(station_id, record)
+
+        self.result_controller.handle_result(
+            station_id,
+            make_replay_response(record),
+            self.result_controller.OP_RESULTS_READ,
+            "",
+        )
+
+    def _replay_program_change(self, station_id, record):
+        if not record.ok or not record.payload:
+            return
+
+        self.statistics[station_id]["program_changes"] += 1
+        program_number = record.payload[0]
+        manager = self.program_managers.get(station_id)
+        program = manager.get_program_by_id(program_number) if manager else None
+
+        self.stations[station_id].set_program(
+            program or {"id": program_number, "name": f"Ohjelma {program_number}"}
+        )
+
+    def _replay_start(self, station_id, record):
+        if not record.ok:
+            return
+
+        station = self.stations[station_id]
+        self.statistics[station_id]["starts"] += 1
+        self._close_pending_end(station_id, None)
+
+        station.start_test()
+        deadline = time.monotonic() + REPLAY_START_TIMEOUT_S
+
+        # start_test() jatkaa QTimer.singleShot(200)-viiveen jälkeen.
+        while not station.is_running and time.monotonic() < deadline:
+            self.process_events()
+            time.sleep(0.005)
+
+        if not station.is_running:
+            self.statistics[station_id]["starts_refused"] += 1
+
+    # ------------------------------------------------------------
+    # Tulosten seuranta
+    # ------------------------------------------------------------
+
+    def _track_status(self, station_id, record):
+        if not record.ok or len(record.payload) < 2:
+            return
+
+        status = record.payload[1]
+        previous = self.last_status.get(station_id)
+        self.last_status[station_id] = status
+
+        if previous in REPLAY_ACTIVE_STATUSES and status == 0:
+            self._close_pending_end(station_id, None)
+            self.statistics[station_id]["test_ends"] += 1
+            self.last_results.pop(station_id, None)
+            self.pending_end[station_id] = {
+                "index": record.index,
+                "timestamp": record.timestamp,
+                "program": self.stations[station_id].program_number,
+            }
+
+    def _track_results(self, station_id, record):
+        if record.ok and len(record.payload) >= 25:
+            self.last_results[station_id] = list(record.payload)
+
+    def _handle_accepted(self, station_id, result, test_result):
+        from controllers.station_result_handler import StationResultHandler
+
+        registers = list(result.registers)
+        record = self.current_record
+        pending = self.pending_end.pop(station_id, None)
+
+        self.statistics[station_id]["accepted"] += 1
+        self.accepted.append({
+            "station_id": station_id,
+            "index": record.index if record else None,
+            "test_end_index": pending["index"] if pending else None,
+            "program": registers[6],
+            "result_code": test_result,
+            "result_id": StationResultHandler.get_result_id(registers),
+        })
+
+    def _close_pending_end(self, station_id, reason):
+        pending = self.pending_end.pop(station_id, None)
+
+        if pending is None:
+            return
+
+        registers = self.last_results.get(station_id)
+        station = self.stations[station_id]
+
+        self.statistics[station_id]["dropped"] += 1
+        self.drops.append({
+            "station_id": station_id,
+            "test_end_index": pending["index"],
+            "program": pending["program"],
+            "reason": reason or self._diagnose_drop(station, pending, registers),
+            "result_registers": registers[:25] if registers else None,
+        })
+
+    def _diagnose_drop(self, station, pending, registers):
+        from controllers.station_result_handler import StationResultHandler
+
+        if registers is None:
+            return "tulosaluetta ei luettu päättymisen jälkeen"
+
+        if registers[9] in (0, 99):
+            return f"tulos ei valmis (sana 9 = {registers[9]})"
+
+        if registers[6] != pending["program"]:
+            return f"ohjelma ei täsmää (tulos {registers[6]}, asema {pending['program']})"
+
+        if StationResultHandler.get_result_id(registers) == station.result_handler.last_result_id:
+            return "sama tulos-id kuin edellisellä (last_result_id-suodatus)"
+
+        return "tulosta ei hyväksytty (testin aktiivitilaa ei nähty tai tulosta ei odotettu)"
+
+    def get_report(self):
+        return {
+            "stations": {str(station_id): statistics for station_id, statistics in self.statistics.items()},
+            "skipped_frames": self.skipped_frames,
+            "accepted": self.accepted,
+            "drops": self.drops,
+        }
+
+
+def parse_args():
+    dualtester_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    project_config_dir = os.path.join(dualtester_dir, "..", "config")
+
+    parser = argparse.ArgumentParser(description="Väylätallenteen tarkastelu ja toisto")
+    parser.add_argument("path", help="tallennetiedosto")
+    parser.add_argument("--dump", action="store_true", help="tulosta kehykset, ei toistoa")
+    parser.add_argument(
+        "--port",
+        action="append",
+        default=[],
+        help="portti=asema, esim. /dev/ttyUSB1=1 (oletus port_configin ForTest-portit)",
+    )
+    parser.add_argument("--programs1", default=os.path.join(project_config_dir, "programs1.json"))
+    parser.add_argument("--programs2", default=os.path.join(project_config_dir, "programs2.json"))
+    parser.add_argument("--output", default=None, help="raportti JSON-tiedostoon")
+    args = parser.parse_args()
+
+    args.path = os.path.abspath(args.path)
+    args.dualtester_dir = dualtester_dir
+
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    return args
+
+
+def get_port_stations(args):
+    from config.port_config import FORTEST_1_PORT, FORTEST_2_PORT
+
+    port_stations = {
+        FORTEST_1_PORT: 1,
+        FORTEST_2_PORT: 2,
+    }
+
+    for item in args.port:
+        port, _, station_id = item.rpartition("=")
+
+        if port and station_id.isdigit():
+            port_stations[port] = int(station_id)
+
+    return port_stations
+
+
+def prepare_environment(args):
+    """
+    Toisto ajetaan väliaikaisessa työhakemistossa: tulostietokanta ja
+    tapahtumaloki eivät sekoitu tuotannon tiedostoihin.
+    """
+    work_dir = tempfile.mkdtemp(prefix="dualtester-replay-")
+    config_dir = os.path.join(work_dir, "config")
+    os.makedirs(config_dir, exist_ok=True)
+
+    for station_id, source in ((1, args.programs1), (2, args.programs2)):
+        if source and os.path.exists(source):
+            shutil.copyfile(source, os.path.join(config_dir, f"programs{station_id}.json"))
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ["DUALTESTER_DATA_DIR"] = os.path.join(work_dir, "data")
+    os.environ["DUALTESTER_LOG_DIR"] = os.path.join(work_dir, "logs")
+
+    if args.dualtester_dir not in sys.path:
+        sys.path.insert(0, args.dualtester_dir)
+
+    os.chdir(work_dir)
+    return work_dir
+
+
+def run_replay(records, port_stations):
+    # Sovellusmoduulit vasta ympäristön asettamisen jälkeen.
+    from PyQt5.QtWidgets import QApplication
+
+    import ui.main_window as main_window_module
+    from utils.fortest_handler import ForTestStatusAndResults
+
+    main_window_module.DEV_MODE_FORTEST = True
+    main_window_module.DEV_MODE_MODBUS = True
+    main_window_module.DEV_MODE_GPIO = True
+    main_window_module.BUS_RECORDER_ENABLED = False
+
+    app = QApplication(sys.argv[:1])
+    main_window = main_window_module.MainWindow()
+
+    for station in main_window.station_controllers.values():
+        station.fortest_timer.stop()
+        station.auto_jig_timer.stop()
+
+    replayer = BusTraceReplayer(
+        main_window,
+        port_stations,
+        ForTestStatusAndResults,
+        app.processEvents,
+    )
+
+    started = time.monotonic()
+    replayer.replay(records)
+    duration_s = time.monotonic() - started
+
+    main_window.close()
+
+    report = replayer.get_report()
+    report["replay_duration_s"] = round(duration_s, 3)
+    return report
+
+
+def main():
+    args = parse_args()
+    started_at, records = read_bus_recording(args.path)
+
+    if args.dump:
+        for record in records:
+            print(record.format())
+
+        return 0
+
+    port_stations = get_port_stations(args)
+    work_dir = prepare_environment(args)
+
+    report = run_replay(records, port_stations)
+    report["recording"] = {
+        "path": args.path,
+        "started_at": started_at,
+        "frames": len(records),
+        "span_s": round(records[-1].timestamp - records[0].timestamp, 3) if records else 0.0,
+        "port_stations": port_stations,
+    }
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(
+        f"{len(records)} kehystä ({report['recording']['span_s']:.0f} s tallennetta) "
+        f"toistettu {report['replay_duration_s']:.1f} s:ssa"
+    )
+
+    for station_id, statistics in report["stations"].items():
+        print(
+            f"Asema {station_id}: testejä {statistics['test_ends']}, "
+            f"hyväksyttyjä tuloksia {statistics['accepted']}, "
+            f"pudonneita {statistics['dropped']}, "
+            f"START {statistics['starts']} (hylätty {statistics['starts_refused']})"
+        )
+
+    for drop in report["drops"]:
+        print(
+            f"  PUDONNUT asema {drop['station_id']} kehys {drop['test_end_index']} "
+            f"ohjelma {drop['program']}: {drop['reason']}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        print(f"Raportti: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,449 @@
+# ui/components/decay_trend_chart.py
+import math
+from array import array
+
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QColor, QFont, QPainter, QPainterPath, QPen, QTransform
+
+
+# ------------------------------------------------------------
+# Trendikaavion asetukset
+# ------------------------------------------------------------
+
+# Kaavion leveys sarakkeina. Jokainen sarake on yhden tai useamman
+# tuloksen min/max. Kun sarakkeet loppuvat, vierekkäiset sarakkeet
+# yhdistetään ja sarakkeen tulosmäärä kaksinkertaistuu, joten koko
+# vuoro mahtuu aina kaavioon.
+TREND_COLUMNS = 256
+
+# Liukuva keskiarvo viimeisistä tuloksista ryömintävaroitukseen.
+TREND_ROLLING_WINDOW = 20
+
+# Varoitus, kun liukuva keskiarvo ylittää tämän osuuden vuotorajasta.
+TREND_DRIFT_WARNING_RATIO = 0.8
+
+TREND_MARGIN_LEFT = 10
+TREND_MARGIN_RIGHT = 10
+TREND_MARGIN_TOP = 30
+TREND_MARGIN_BOTTOM = 10
+
+TREND_DECAY_COLOR = "#33CCFF"
+TREND_TEMPERATURE_COLOR = "#C8A000"
+TREND_LIMIT_COLOR = "red"
+TREND_WARNING_COLOR = "orange"
+TREND_TEXT_COLOR = "#888888"
+
+FONT_TREND = ("Consolas", 11)
+
+# Puuttuva arvo. Sarja saa silti pisteen, jotta kaikki sarjat pysyvät
+# samassa tahdissa; aukon kohdalle ei piirretä viivaa.
+TREND_GAP = float("nan")
+
+
+def _is_gap(value):
+    return math.isnan(value)
+
+
+def _gap_min(a, b):
+    if _is_gap(a):
+        return b
+
+    if _is_gap(b):
+        return a
+
+    return min(a, b)
+
+
+def _gap_max(a, b):
+    if _is_gap(a):
+        return b
+
+    if _is_gap(b):
+        return a
+
+    return max(a, b)
+
+
+class TrendRingBuffer:
+    """
+    Kiinteän kokoinen float-rengaspuskuri juoksevalla summalla.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self.values = array("d", [0.0] * self.capacity)
+        self.head = 0
+        self.count = 0
+        self.total = 0.0
+
+    def append(self, value):
+        if self.count == self.capacity:
+            self.total -= self.values[self.head]
+        else:
+            self.count += 1
+
+        self.values[self.head] = value
+        self.total += value
+        self.head = (self.head + 1) % self.capacity
+
+    def get_mean(self):
+        if self.count == 0:
+            return None
+
+        return self.total / self.count
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+        self.total = 0.0
+
+
+class MinMaxDecimator:
+    """
+    Inkrementaalinen min/max-harvennus kiinteään sarakemäärään.
+
+    TREND_GAP lasketaan pisteeksi mutta ei min/max-arvoksi. Sarake,
+    jossa on pelkkiä aukkoja, on itsekin aukko (NaN).
+
+    add() palauttaa:
+    - DECIMATION_UPDATED: viimeinen (avoin) sarake muuttui
+    - DECIMATION_APPENDED: edellinen sarake sulkeutui ja uusi alkoi
+    - DECIMATION_REBUILT: sarakkeet yhdistettiin pareittain
+    """
+
+    DECIMATION_UPDATED = 0
+    DECIMATION_APPENDED = 1
+    DECIMATION_REBUILT = 2
+
+    def __init__(self, columns=TREND_COLUMNS):
+        self.columns = max(2, int(columns) // 2 * 2)
+        self.mins = array("d", [0.0] * self.columns)
+        self.maxs = array("d", [0.0] * self.columns)
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.points_per_column = 1
+        self.points_in_last = 0
+        self.minimum = None
+        self.maximum = None
+
+    def _merge_pairs(self):
+        half = self.columns // 2
+
+        for index in range(half):
+            left = 2 * index
+            right = left + 1
+            self.mins[index] = _gap_min(self.mins[left], self.mins[right])
+            self.maxs[index] = _gap_max(self.maxs[left], self.maxs[right])
+
+        self.count = half
+        self.points_per_column *= 2
+
+    def add(self, value):
+        if not _is_gap(value):
+            if self.minimum is None or value < self.minimum:
+                self.minimum = value
+
+            if self.maximum is None or value > self.maximum:
+                self.maximum = value
+
+        if self.count > 0 and self.points_in_last < self.points_per_column:
+            last = self.count - 1
+            self.mins[last] = _gap_min(self.mins[last], value)
+            self.maxs[last] = _gap_max(self.maxs[last], value)
+            self.points_in_last += 1
+            return self.DECIMATION_UPDATED
+
+        result = self.DECIMATION_APPENDED
+
+        if self.count == self.columns:
+            self._merge_pairs()
+            result = self.DECIMATION_REBUILT
+
+        self.mins[self.count] = value
+        self.maxs[self.count] = value
+        self.count += 1
+        self.points_in_last = 1
+        return result
+
+
+class TrendSeries:
+    """
+    Yksi kaavion sarja: harvennus ja valmiiksi rakennettu polku.
+
+    Polku on datakoordinaateissa (x = sarake, y = arvo), joten
+    skaalan muutos ei vaadi polun uudelleenrakennusta. Suljetut
+    sarakkeet lisätään polkuun kerran; avoin viimeinen sarake
+    piirretään erikseen. Aukkosarakkeen kohdalla viiva katkeaa.
+    """
+
+    def __init__(self, columns=TREND_COLUMNS):
+        self.decimator = MinMaxDecimator(columns)
+        self.closed_path = QPainterPath()
+        self.closed_count = 0
+
+    def _append_column(self, path, index):
+        decimator = self.decimator
+
+        if _is_gap(decimator.mins[index]):
+            return
+
+        if path.elementCount() == 0 or _is_gap(decimator.mins[index - 1]):
+            path.moveTo(index, decimator.mins[index])
+        else:
+            path.lineTo(index, decimator.mins[index])
+
+        if decimator.maxs[index] != decimator.mins[index]:
+            path.lineTo(index, decimator.maxs[index])
+
+    def _rebuild_closed_path(self):
+        self.closed_path = QPainterPath()
+        self.closed_count = self.decimator.count - 1
+
+        for index in range(self.closed_count):
+            self._append_column(self.closed_path, index)
+
+    def add(self, value):
+        result = self.decimator.add(value)
+
+        if result == MinMaxDecimator.DECIMATION_REBUILT:
+            self._rebuild_closed_path()
+        elif result == MinMaxDecimator.DECIMATION_APPENDED and self.decimator.count > 1:
+            self._append_column(self.closed_path, self.decimator.count - 2)
+            self.closed_count = self.decimator.count - 1
+
+    def get_open_path(self):
+        """
+        Viimeinen avoin sarake ja sen liitos suljettuun polkuun.
+        """
+        path = QPainterPath()
+        decimator = self.decimator
+        last = decimator.count - 1
+
+        if last < 0 or _is_gap(decimator.mins[last]):
+            return path
+
+        previous = self.closed_count - 1
+
+        if previous >= 0 and not _is_gap(decimator.mins[previous]):
+            path.moveTo(previous, decimator.maxs[previous])
+            path.lineTo(last, decimator.mins[last])
+        else:
+            path.moveTo(last, decimator.mins[last])
+
+        path.lineTo(last, decimator.maxs[last])
+        return path
+
+    def clear(self):
+        self.decimator.clear()
+        self.closed_path = QPainterPath()
+        self.closed_count = 0
+
+
+class DecayTrendChart(QWidget):
+    """
+    Aseman vuotoarvon ja kappaleen lämpötilan trendi vuoron ajalta.
+
+    Uusi tulos päivittää vain harvennuksen viimeisen sarakkeen ja
+    tarvittaessa lisää yhden sarakkeen polkuun. Piirto käy läpi
+    enintään TREND_COLUMNS saraketta riippumatta tulosten määrästä.
+
+    Vaakaviivat: vuotoraja (punainen) ja varoitusraja
+    TREND_DRIFT_WARNING_RATIO * raja (oranssi). Liukuva keskiarvo
+    näytetään oranssina, kun se ylittää varoitusrajan.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.decay_series = TrendSeries()
+        self.temperature_series = TrendSeries()
+        self.recent_decay = TrendRingBuffer(TREND_ROLLING_WINDOW)
+        self.result_count = 0
+        self.last_temperature = None
+        self.decay_limit = None
+
+        self.decay_pen = QPen(QColor(TREND_DECAY_COLOR), 2)
+        self.decay_pen.setCosmetic(True)
+        self.temperature_pen = QPen(QColor(TREND_TEMPERATURE_COLOR), 1)
+        self.temperature_pen.setCosmetic(True)
+        self.limit_pen = QPen(QColor(TREND_LIMIT_COLOR), 1, Qt.DashLine)
+        self.warning_pen = QPen(QColor(TREND_WARNING_COLOR), 1, Qt.DotLine)
+
+        self.setFont(QFont(FONT_TREND[0], FONT_TREND[1]))
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    # ------------------------------------------------------------
+    # Data
+    # ------------------------------------------------------------
+
+    def add_point(self, decay_value, part_temperature=None):
+        if decay_value is None:
+            return
+
+        self.decay_series.add(decay_value)
+        self.recent_decay.append(decay_value)
+        self.result_count += 1
+
+        # Lämpötilasarja saa pisteen jokaisesta tuloksesta, jotta
+        # sarakkeet vastaavat samoja tuloksia. Puuttuva lämpötila on
+        # aukko, myös ennen ensimmäistä mitattua lämpötilaa.
+        if part_temperature is None:
+            self.temperature_series.add(TREND_GAP)
+        else:
+            self.last_temperature = part_temperature
+            self.temperature_series.add(part_temperature)
+
+        self.update()
+
+    def set_decay_limit(self, decay_limit):
+        self.decay_limit = decay_limit
+        self.update()
+
+    def clear(self):
+        self.decay_series.clear()
+        self.temperature_series.clear()
+        self.recent_decay.clear()
+        self.result_count = 0
+        self.last_temperature = None
+        self.update()
+
+    def is_drift_warning(self):
+        mean = self.recent_decay.get_mean()
+
+        if mean is None or not self.decay_limit:
+            return False
+
+        return mean >= self.decay_limit * TREND_DRIFT_WARNING_RATIO
+
+    # ------------------------------------------------------------
+    # Piirto
+    # ------------------------------------------------------------
+
+    def _get_decay_range(self):
+        decimator = self.decay_series.decimator
+        low = 0.0
+        high = decimator.maximum if decimator.maximum is not None else 1.0
+
+        if decimator.minimum is not None:
+            low = min(low, decimator.minimum)
+
+        if self.decay_limit:
+            high = max(high, self.decay_limit)
+
+        high = high * 1.1 if high > 0 else 1.0
+        return low, high
+
+    def _get_temperature_range(self):
+        decimator = self.temperature_series.decimator
+
+        if decimator.minimum is None:
+            return None
+
+        return decimator.minimum - 1.0, decimator.maximum + 1.0
+
+    def _create_transform(self, plot_rect, columns, low, high):
+        x_scale = plot_rect.width() / max(1, columns - 1)
+        y_scale = plot_rect.height() / (high - low)
+
+        return QTransform(
+            x_scale, 0.0,
+            0.0, -y_scale,
+            plot_rect.left(), plot_rect.bottom() + low * y_scale,
+        )
+
+    def _draw_series(self, painter, series, pen, plot_rect, low, high):
+        if series.decimator.count == 0:
+            return
+
+        painter.save()
+        painter.setTransform(
+            self._create_transform(plot_rect, series.decimator.columns, low, high)
+        )
+        painter.setPen(pen)
+        painter.drawPath(series.closed_path)
+        painter.drawPath(series.get_open_path())
+        painter.restore()
+
+    def _draw_limit_line(self, painter, pen, plot_rect, value, low, high):
+        if value is None or not (low <= value <= high):
+            return
+
+        y = plot_rect.bottom() - (value - low) / (high - low) * plot_rect.height()
+        painter.setPen(pen)
+        painter.drawLine(QPointF(plot_rect.left(), y), QPointF(plot_rect.right(), y))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.black)
+        painter.setPen(QColor("#444444"))
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+        plot_rect = QRectF(
+            TREND_MARGIN_LEFT,
+            TREND_MARGIN_TOP,
+            self.width() - TREND_MARGIN_LEFT - TREND_MARGIN_RIGHT,
+            self.height() - TREND_MARGIN_TOP - TREND_MARGIN_BOTTOM,
+        )
+
+        if plot_rect.width() <= 0 or plot_rect.height() <= 0:
+            return
+
+        low, high = self._get_decay_range()
+
+        if self.decay_limit:
+            self._draw_limit_line(painter, self.limit_pen, plot_rect, self.decay_limit, low, high)
+            self._draw_limit_line(
+                painter,
+                self.warning_pen,
+                plot_rect,
+                self.decay_limit * TREND_DRIFT_WARNING_RATIO,
+                low,
+                high,
+            )
+
+        painter.setRenderHint(QPainter.Antialiasing, True)
+
+        temperature_range = self._get_temperature_range()
+
+        if temperature_range is not None:
+            self._draw_series(
+                painter,
+                self.temperature_series,
+                self.temperature_pen,
+                plot_rect,
+                temperature_range[0],
+                temperature_range[1],
+            )
+
+        self._draw_series(painter, self.decay_series, self.decay_pen, plot_rect, low, high)
+
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        self._draw_legend(painter, temperature_range)
+
+    def _draw_legend(self, painter, temperature_range):
+        text_y = TREND_MARGIN_TOP - 10
+
+        painter.setPen(QColor(TREND_TEXT_COLOR))
+        painter.drawText(TREND_MARGIN_LEFT, text_y, f"TRENDI  n={self.result_count}")
+
+        mean = self.recent_decay.get_mean()
+
+        if mean is not None:
+            color = TREND_WARNING_COLOR if self.is_drift_warning() else TREND_DECAY_COLOR
+            painter.setPen(QColor(color))
+            painter.drawText(
+                TREND_MARGIN_LEFT + 180,
+                text_y,
+                f"VUOTO KA{self.recent_decay.count}: {mean:.2f}",
+            )
+
+        if temperature_range is not None and self.last_temperature is not None:
+            painter.setPen(QColor(TREND_TEMPERATURE_COLOR))
+            painter.drawText(
+                TREND_MARGIN_LEFT + 420,
+                text_y,
+                f"KAPPALE: {self.last_temperature:.1f}°C",
+            )
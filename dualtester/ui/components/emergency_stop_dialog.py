@@ -97,7 +97,15 @@ class EmergencyStopDialog(QDialog):
             return
 
         self.hardware_service.reset_emergency_stop()
-        QTimer.singleShot(500, self.check_status_after_reset)
+        QTimer.singleShot(500, self.request_status_after_reset)
+
+    def request_status_after_reset(self):
+        if not self.hardware_service:
+            return
+
+        # Tila luetaan taustalla, joten tarkistus odottaa tuoreen luvun.
+        self.hardware_service.request_emergency_stop_status()
+        QTimer.singleShot(300, self.check_status_after_reset)
 
     def check_status_after_reset(self):
         if not self.hardware_service:
@@ -1,8 +1,11 @@
 # ui/components/fortest_station.py
-from PyQt5.QtWidgets import QFrame, QLabel, QPushButton
+from PyQt5.QtWidgets import QFrame, QLabel, QPushButton, QTableView
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 
+from ui.components.results_table_model import ResultsTableModel, configure_results_view
+from ui.components.decay_trend_chart import DecayTrendChart
+
 
 PROGRAM_BOX_X = 20
 PROGRAM_BOX_Y = 15
@@ -47,12 +50,35 @@ STATUS_VALUE_H = 40
 RESULTS_BOX_X = 20
 RESULTS_BOX_Y = 310
 RESULTS_BOX_W = 880
-RESULTS_BOX_H = 490
+RESULTS_BOX_H = 330
+
+# Tulosalueen alareunan nauha TYHJENNÄ- ja HISTORIA-napeille.
+# Taulukko päättyy nauhan yläpuolelle, joten napit eivät peitä
+# vieritettäviä rivejä.
+RESULTS_BUTTON_STRIP_H = 48
+RESULTS_TABLE_H = RESULTS_BOX_H - RESULTS_BUTTON_STRIP_H
+
+TREND_CHART_X = 20
+TREND_CHART_Y = 650
+TREND_CHART_W = 880
+TREND_CHART_H = 150
+
+# Sarakkeiden leveydet; viimeinen sarake venyy loppuun.
+RESULTS_COLUMN_WIDTHS = (110, 250, 160, 140, 100)
+
+# Montako tulosta taulukossa säilytetään. Lisäyksen hinta ei riipu
+# tästä, joten historia voi olla satoja rivejä.
+RESULTS_HISTORY_DEPTH = 200
 
-CLEAR_RESULTS_X = RESULTS_BOX_X + RESULTS_BOX_W - 150
-CLEAR_RESULTS_Y = RESULTS_BOX_Y + RESULTS_BOX_H - 52
 CLEAR_RESULTS_W = 125
 CLEAR_RESULTS_H = 38
+CLEAR_RESULTS_X = RESULTS_BOX_X + RESULTS_BOX_W - CLEAR_RESULTS_W
+CLEAR_RESULTS_Y = RESULTS_BOX_Y + RESULTS_TABLE_H + RESULTS_BUTTON_STRIP_H - CLEAR_RESULTS_H
+
+HISTORY_BUTTON_X = CLEAR_RESULTS_X - 145
+HISTORY_BUTTON_Y = CLEAR_RESULTS_Y
+HISTORY_BUTTON_W = 125
+HISTORY_BUTTON_H = 38
 
 JIG_PART_RELEASE_X = 245
 JIG_PART_RELEASE_Y = 815
@@ -113,7 +139,6 @@ class ForTestStation(QFrame):
         super().__init__(parent)
 
         self.station_id = station_id
-        self.results_history = []
         self.part_temperature_enabled = False
 
         self.init_ui()
@@ -236,21 +261,24 @@ class ForTestStation(QFrame):
         )
         self.status_label.setAlignment(Qt.AlignCenter)
 
-        self.results_box = QLabel("", self)
-        self.results_box.setGeometry(RESULTS_BOX_X, RESULTS_BOX_Y, RESULTS_BOX_W, RESULTS_BOX_H)
-        self.results_box.setFont(QFont(FONT_RESULTS[0], FONT_RESULTS[1]))
-        self.results_box.setAlignment(Qt.AlignTop | Qt.AlignLeft)
-        self.results_box.setTextFormat(Qt.RichText)
-        self.results_box.setStyleSheet("""
-            QLabel {
-                background-color: black;
-                color: white;
-                border: 1px solid #444444;
-                border-radius: 10px;
-                padding: 12px;
-            }
-        """)
-        self._refresh_results_table()
+        results_font = QFont(FONT_RESULTS[0], FONT_RESULTS[1])
+        self.results_model = ResultsTableModel(
+            depth=RESULTS_HISTORY_DEPTH,
+            font=results_font,
+            parent=self,
+        )
+
+        self.results_box = QTableView(self)
+        self.results_box.setGeometry(RESULTS_BOX_X, RESULTS_BOX_Y, RESULTS_BOX_W, RESULTS_TABLE_H)
+        configure_results_view(
+            self.results_box,
+            self.results_model,
+            results_font,
+            RESULTS_COLUMN_WIDTHS,
+        )
+
+        self.trend_chart = DecayTrendChart(self)
+        self.trend_chart.setGeometry(TREND_CHART_X, TREND_CHART_Y, TREND_CHART_W, TREND_CHART_H)
 
         self.clear_results_button = QPushButton("TYHJENNÄ", self)
         self.clear_results_button.setGeometry(
@@ -278,6 +306,18 @@ class ForTestStation(QFrame):
         """)
         self.clear_results_button.clicked.connect(self.clear_results)
 
+        self.history_button = QPushButton("HISTORIA", self)
+        self.history_button.setGeometry(
+            HISTORY_BUTTON_X,
+            HISTORY_BUTTON_Y,
+            HISTORY_BUTTON_W,
+            HISTORY_BUTTON_H,
+        )
+        self.history_button.setFont(
+            QFont(FONT_CLEAR_BUTTON[0], FONT_CLEAR_BUTTON[1], QFont.Bold)
+        )
+        self.history_button.setStyleSheet(self.clear_results_button.styleSheet())
+
         jig_button_style = """
             QPushButton {
                 background-color: #6A3D9A;
@@ -592,68 +632,14 @@ class ForTestStation(QFrame):
             "part_temp_text": part_temp_text,
         }
 
-        self.results_history.insert(0, new_result)
+        self.results_model.add_result(new_result)
 
-        if len(self.results_history) > 12:
-            self.results_history.pop()
+    def add_trend_point(self, decay_value, part_temperature=None):
+        self.trend_chart.add_point(decay_value, part_temperature)
 
-        self._refresh_results_table()
+    def set_trend_decay_limit(self, decay_limit):
+        self.trend_chart.set_decay_limit(decay_limit)
 
     def clear_results(self):
-        self.results_history.clear()
-        self._refresh_results_table()
-
-    def _build_result_row(self, result, is_latest):
-        display_time = result["display_time"]
-        program_text = result["program_text"]
-        decay_text = result["decay_text"]
-        result_text = result["result_text"]
-        result_color = result["result_color"]
-        room_temp_text = result["room_temp_text"]
-        part_temp_text = result["part_temp_text"]
-
-        if is_latest:
-            cell_style = " bgcolor=\"#303030\""
-            return f"""
-            <tr>
-                <td{cell_style}><b>{display_time}</b></td>
-                <td{cell_style}><b>{program_text}</b></td>
-                <td{cell_style}><b><span style="color:{result_color};">{decay_text}</span></b></td>
-                <td{cell_style}><b><span style="color:{result_color};">{result_text}</span></b></td>
-                <td{cell_style}><b>{room_temp_text}</b></td>
-                <td{cell_style}><b>{part_temp_text}</b></td>
-            </tr>
-            """
-
-        return f"""
-        <tr>
-            <td>{display_time}</td>
-            <td>{program_text}</td>
-            <td><span style="color:{result_color};">{decay_text}</span></td>
-            <td><span style="color:{result_color};">{result_text}</span></td>
-            <td>{room_temp_text}</td>
-            <td>{part_temp_text}</td>
-        </tr>
-        """
-
-    def _refresh_results_table(self):
-        result_rows = []
-
-        for index, result in enumerate(self.results_history):
-            result_rows.append(self._build_result_row(result, index == 0))
-
-        display_html = f"""
-        <table width="100%" cellspacing="0" cellpadding="6">
-            <tr style="color:#888888; font-size:18px;">
-                <td>AIKA</td>
-                <td>OHJELMA</td>
-                <td>VUOTO</td>
-                <td>TULOS</td>
-                <td>HUONE</td>
-                <td>KAPPALE</td>
-            </tr>
-            {''.join(result_rows)}
-        </table>
-        """
-
-        self.results_box.setText(display_html)
+        self.results_model.clear()
+        self.trend_chart.clear()
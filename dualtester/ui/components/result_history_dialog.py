@@ -0,0 +1,99 @@
+# ui/components/result_history_dialog.py
+from PyQt5.QtWidgets import QDialog, QLabel, QPushButton, QTableView, QVBoxLayout, QHBoxLayout
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+
+from ui.components.results_table_model import ResultHistoryModel, configure_results_view
+
+
+HISTORY_DIALOG_W = 1000
+HISTORY_DIALOG_H = 900
+
+# Aikasarakkeessa on myös päivä.
+HISTORY_COLUMN_WIDTHS = (170, 280, 160, 140, 100)
+
+FONT_HISTORY_TITLE = ("Consolas", 18)
+FONT_HISTORY_RESULTS = ("Consolas", 15)
+
+
+class ResultHistoryDialog(QDialog):
+    """
+    Aseman tuloshistoria tietokannasta.
+
+    Taulukko hakee rivejä sivu kerrallaan vieritettäessä taustasäikeessä
+    (ResultHistoryModel), joten pitkäkin historia aukeaa heti eikä
+    vieritys odota tietokantaa.
+    """
+
+    def __init__(self, station_id, query_service, row_formatter, parent=None):
+        super().__init__(parent)
+
+        self.station_id = station_id
+
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
+        self.setModal(True)
+        self.setFixedSize(HISTORY_DIALOG_W, HISTORY_DIALOG_H)
+        self.setStyleSheet("QDialog { background-color: #050505; border: 1px solid #444444; }")
+
+        if parent:
+            self.move(
+                parent.width() // 2 - self.width() // 2,
+                parent.height() // 2 - self.height() // 2,
+            )
+
+        results_font = QFont(FONT_HISTORY_RESULTS[0], FONT_HISTORY_RESULTS[1])
+
+        self.history_model = ResultHistoryModel(
+            query_service=query_service,
+            station_id=station_id,
+            row_formatter=row_formatter,
+            font=results_font,
+            parent=self,
+        )
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
+
+        title_layout = QHBoxLayout()
+
+        self.title_label = QLabel(f"FORTEST {station_id} – HISTORIA", self)
+        self.title_label.setFont(
+            QFont(FONT_HISTORY_TITLE[0], FONT_HISTORY_TITLE[1], QFont.Bold)
+        )
+        self.title_label.setStyleSheet("color: white; background: transparent; border: none;")
+        title_layout.addWidget(self.title_label)
+        title_layout.addStretch()
+
+        self.close_button = QPushButton("SULJE", self)
+        self.close_button.setFixedSize(160, 60)
+        self.close_button.setFont(QFont("Arial", 16, QFont.Bold))
+        self.close_button.setStyleSheet("""
+            QPushButton {
+                background-color: #303030;
+                color: #DDDDDD;
+                border-radius: 10px;
+                border: 1px solid #666666;
+            }
+            QPushButton:pressed {
+                background-color: #777777;
+            }
+        """)
+        self.close_button.clicked.connect(self.accept)
+        title_layout.addWidget(self.close_button)
+
+        layout.addLayout(title_layout)
+
+        self.history_view = QTableView(self)
+        configure_results_view(
+            self.history_view,
+            self.history_model,
+            results_font,
+            HISTORY_COLUMN_WIDTHS,
+        )
+        layout.addWidget(self.history_view)
+
+    def done(self, result):
+        # Sivujen hakusäie pysäytetään, kun dialogi suljetaan.
+        self.history_model.cleanup()
+        super().done(result)
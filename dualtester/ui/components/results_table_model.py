@@ -0,0 +1,469 @@
+# ui/components/results_table_model.py
+from collections import OrderedDict
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QThread, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QBrush, QColor, QFont
+from PyQt5.QtWidgets import QAbstractItemView, QHeaderView
+
+from utils.event_log import event_log, EVENT_SUBSYSTEM_UI
+
+
+# ------------------------------------------------------------
+# Tulostaulukon sarakkeet
+# ------------------------------------------------------------
+
+# (otsikko, tuloksen avain)
+RESULT_COLUMNS = (
+    ("AIKA", "display_time"),
+    ("OHJELMA", "program_text"),
+    ("VUOTO", "decay_text"),
+    ("TULOS", "result_text"),
+    ("HUONE", "room_temp_text"),
+    ("KAPPALE", "part_temp_text"),
+)
+
+# Sarakkeet, jotka väritetään tuloksen värillä.
+RESULT_COLORED_COLUMNS = (2, 3)
+
+RESULT_TEXT_COLOR = "#ffffff"
+RESULT_HEADER_COLOR = "#888888"
+RESULT_LATEST_BACKGROUND = "#303030"
+
+DEFAULT_RESULT_HISTORY_DEPTH = 200
+
+RESULTS_ROW_H = 36
+RESULTS_HEADER_H = 40
+
+# Tietokantahistorian sivukoko ja välimuistissa pidettävien sivujen määrä.
+RESULT_HISTORY_PAGE_SIZE = 50
+RESULT_HISTORY_CACHE_PAGES = 8
+
+RESULTS_VIEW_STYLE = """
+    QTableView {
+        background-color: black;
+        color: white;
+        border: 1px solid #444444;
+        border-radius: 10px;
+        padding: 12px;
+    }
+    QHeaderView::section {
+        background-color: black;
+        color: #888888;
+        border: none;
+        padding-left: 6px;
+        font-size: 18px;
+    }
+    QScrollBar:vertical {
+        background: #111111;
+        width: 14px;
+    }
+    QScrollBar::handle:vertical {
+        background: #444444;
+        border-radius: 6px;
+    }
+"""
+
+
+def configure_results_view(view, model, font, column_widths):
+    """
+    Tulostaulukon yhteiset näkymäasetukset.
+
+    Rivikorkeus on kiinteä, joten näkymän ei tarvitse mitata rivejä.
+    Viimeinen sarake venyy loppuun.
+    """
+    view.setModel(model)
+    view.setFont(font)
+    view.setShowGrid(False)
+    view.setWordWrap(False)
+    view.setFocusPolicy(Qt.NoFocus)
+    view.setSelectionMode(QAbstractItemView.NoSelection)
+    view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    view.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+    view.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+
+    vertical_header = view.verticalHeader()
+    vertical_header.hide()
+    vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+    vertical_header.setDefaultSectionSize(RESULTS_ROW_H)
+
+    horizontal_header = view.horizontalHeader()
+    horizontal_header.setFixedHeight(RESULTS_HEADER_H)
+    horizontal_header.setHighlightSections(False)
+    horizontal_header.setSectionResizeMode(QHeaderView.Fixed)
+    horizontal_header.setStretchLastSection(True)
+
+    for column, width in enumerate(column_widths):
+        horizontal_header.resizeSection(column, width)
+
+    view.setStyleSheet(RESULTS_VIEW_STYLE)
+
+
+class ResultRowsModel(QAbstractTableModel):
+    """
+    Tulostaulukon yhteinen esitys: sarakkeet, värit ja uusimman rivin
+    korostus.
+
+    Värit ja lihavointi annetaan rooleina (ForegroundRole,
+    BackgroundRole, FontRole), jotka näkymän oletusdelegaatti piirtää.
+
+    Aliluokka pitää rivit, rivimäärän self.countissa ja toteuttaa
+    get_result(row). Rivi, jota ei vielä ole saatavilla (None), piirretään
+    placeholder_text-tekstillä.
+    """
+
+    highlight_latest = True
+    placeholder_text = ""
+
+    def __init__(self, font=None, parent=None):
+        super().__init__(parent)
+
+        self.count = 0
+
+        self.font = font or QFont()
+        self.latest_font = QFont(self.font)
+        self.latest_font.setBold(True)
+
+        self.header_brush = QBrush(QColor(RESULT_HEADER_COLOR))
+        self.text_brush = QBrush(QColor(RESULT_TEXT_COLOR))
+        self.latest_background = QBrush(QColor(RESULT_LATEST_BACKGROUND))
+        self.color_brushes = {}
+
+    # ------------------------------------------------------------
+    # QAbstractTableModel
+    # ------------------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return self.count
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(RESULT_COLUMNS)
+
+    def _get_color_brush(self, color):
+        brush = self.color_brushes.get(color)
+
+        if brush is None:
+            brush = QBrush(QColor(color))
+            self.color_brushes[color] = brush
+
+        return brush
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        result = self.get_result(index.row())
+        column = index.column()
+
+        if result is None:
+            if role == Qt.DisplayRole and column == 0:
+                return self.placeholder_text
+
+            if role == Qt.ForegroundRole:
+                return self.header_brush
+
+            if role == Qt.FontRole:
+                return self.font
+
+            return None
+
+        is_latest = self.highlight_latest and index.row() == 0
+
+        if role == Qt.DisplayRole:
+            return result.get(RESULT_COLUMNS[column][1], "")
+
+        if role == Qt.ForegroundRole:
+            if column in RESULT_COLORED_COLUMNS and result.get("result_color"):
+                return self._get_color_brush(result["result_color"])
+
+            return self.text_brush
+
+        if role == Qt.BackgroundRole and is_latest:
+            return self.latest_background
+
+        if role == Qt.FontRole:
+            return self.latest_font if is_latest else self.font
+
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation != Qt.Horizontal:
+            return None
+
+        if role == Qt.DisplayRole:
+            return RESULT_COLUMNS[section][0]
+
+        if role == Qt.ForegroundRole:
+            return self.header_brush
+
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignLeft | Qt.AlignVCenter)
+
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+
+        return Qt.ItemIsEnabled
+
+
+class ResultsTableModel(ResultRowsModel):
+    """
+    Aseman viimeisimmät tulokset rengaspuskurissa, uusin rivillä 0.
+
+    Uusi tulos lisää yhden rivin alkuun, poistaa tarvittaessa vanhimman
+    ja päivittää edellisen uusimman rivin korostuksen. Näkymä piirtää
+    siis vain muuttuneet rivit, eikä lisäyksen hinta kasva historian
+    syvyyden mukana.
+    """
+
+    def __init__(self, depth=DEFAULT_RESULT_HISTORY_DEPTH, font=None, parent=None):
+        super().__init__(font=font, parent=parent)
+
+        self.depth = max(1, int(depth))
+        self.rows = [None] * self.depth
+        self.head = -1
+
+    # ------------------------------------------------------------
+    # Rengaspuskuri
+    # ------------------------------------------------------------
+
+    def get_result(self, row):
+        """
+        Palauttaa rivin tuloksen (0 = uusin) tai None.
+        """
+        if row < 0 or row >= self.count:
+            return None
+
+        return self.rows[(self.head - row) % self.depth]
+
+    def add_result(self, result):
+        if self.count == self.depth:
+            self.beginRemoveRows(QModelIndex(), self.count - 1, self.count - 1)
+            self.count -= 1
+            self.endRemoveRows()
+
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.head = (self.head + 1) % self.depth
+        self.rows[self.head] = result
+        self.count += 1
+        self.endInsertRows()
+
+        # Edellinen uusin rivi menettää korostuksen.
+        if self.count > 1:
+            self.dataChanged.emit(
+                self.index(1, 0),
+                self.index(1, len(RESULT_COLUMNS) - 1),
+            )
+
+    def clear(self):
+        if self.count == 0:
+            return
+
+        self.beginResetModel()
+        self.rows = [None] * self.depth
+        self.head = -1
+        self.count = 0
+        self.endResetModel()
+
+
+class ResultHistoryPageLoader(QObject):
+    """
+    Hakee historiasivuja ResultQueryServicestä taustasäikeessä.
+    """
+
+    loaded = pyqtSignal(int, int, object, object, str)  # sukupolvi, sivu, rivit, next_cursor, virheviesti
+
+    def __init__(self, query_service, station_id, page_size):
+        super().__init__()
+
+        self.query_service = query_service
+        self.station_id = station_id
+        self.page_size = page_size
+
+    @pyqtSlot(int, int, object)
+    def load(self, generation, page_index, cursor):
+        try:
+            page = self.query_service.get_history_page(
+                page_size=self.page_size,
+                cursor=cursor,
+                station_id=self.station_id,
+            )
+            self.loaded.emit(generation, page_index, page["rows"], page["next_cursor"], "")
+
+        except Exception as e:
+            self.loaded.emit(generation, page_index, [], None, f"Historiasivun haku epäonnistui: {e}")
+
+
+class ResultHistoryModel(ResultRowsModel):
+    """
+    Aseman tulokset tietokannasta, uusin ensin.
+
+    Rivit haetaan ResultQueryServicen avainsivutuksella sivu kerrallaan,
+    kun näkymä vierittää loppuun (canFetchMore / fetchMore). Muistissa
+    pidetään vain RESULT_HISTORY_CACHE_PAGES viimeksi käytettyä sivua.
+    Poistunut sivu haetaan uudelleen tallennetulla kursorilla, joten
+    koko vuoron selaus ei kasvata muistia.
+
+    Kaikki kyselyt ajetaan ResultHistoryPageLoaderilla taustasäikeessä,
+    joten data() ei koskaan odota tietokantaa. Puuttuvan sivun rivit
+    näkyvät placeholder-rivinä, kunnes sivu saapuu, ja viereiset sivut
+    haetaan valmiiksi.
+
+    row_formatter muuntaa tietokantarivin taulukon riviksi
+    (display_time, program_text, ...).
+    """
+
+    highlight_latest = False
+    placeholder_text = "…"
+
+    page_requested = pyqtSignal(int, int, object)  # sukupolvi, sivu, kursori
+
+    def __init__(
+        self,
+        query_service,
+        station_id,
+        row_formatter,
+        page_size=RESULT_HISTORY_PAGE_SIZE,
+        cache_pages=RESULT_HISTORY_CACHE_PAGES,
+        font=None,
+        parent=None,
+    ):
+        super().__init__(font=font, parent=parent)
+
+        self.row_formatter = row_formatter
+        self.page_size = max(1, int(page_size))
+        self.cache_pages = max(1, int(cache_pages))
+
+        # page_cursors[n] = kursori, jolla sivu n haetaan.
+        self.page_cursors = [None]
+        self.pages = OrderedDict()
+        self.pending_pages = set()
+        self.has_more = True
+
+        # clear() kasvattaa sukupolvea; vanhan sukupolven sivut hylätään.
+        self.generation = 0
+
+        self.loader_thread = QThread()
+        self.loader = ResultHistoryPageLoader(query_service, station_id, self.page_size)
+        self.loader.moveToThread(self.loader_thread)
+        self.page_requested.connect(self.loader.load)
+        self.loader.loaded.connect(self._apply_page)
+        self.loader_thread.start()
+
+    # ------------------------------------------------------------
+    # Sivut
+    # ------------------------------------------------------------
+
+    def _request_page(self, page_index):
+        if page_index < 0 or page_index >= len(self.page_cursors):
+            return
+
+        if page_index in self.pages or page_index in self.pending_pages:
+            return
+
+        self.pending_pages.add(page_index)
+        self.page_requested.emit(self.generation, page_index, self.page_cursors[page_index])
+
+    def _apply_page(self, generation, page_index, rows, next_cursor, error_msg):
+        if generation != self.generation:
+            return
+
+        self.pending_pages.discard(page_index)
+
+        if error_msg:
+            event_log.warning(EVENT_SUBSYSTEM_UI, error_msg)
+            return
+
+        rows = [self.row_formatter(row) for row in rows]
+        first_row = page_index * self.page_size
+
+        # Uusi sivu historian loppuun (fetchMore).
+        if page_index == len(self.page_cursors) - 1 and first_row >= self.count:
+            if next_cursor is None:
+                self.has_more = False
+            else:
+                self.page_cursors.append(next_cursor)
+
+            if not rows:
+                return
+
+            self._cache_page(page_index, rows)
+
+            self.beginInsertRows(QModelIndex(), self.count, self.count + len(rows) - 1)
+            self.count += len(rows)
+            self.endInsertRows()
+            return
+
+        # Välimuistista poistunut sivu palasi: placeholder-rivit uusiksi.
+        self._cache_page(page_index, rows)
+
+        last_row = min(self.count, first_row + self.page_size) - 1
+
+        if last_row >= first_row:
+            self.dataChanged.emit(
+                self.index(first_row, 0),
+                self.index(last_row, len(RESULT_COLUMNS) - 1),
+            )
+
+    def _cache_page(self, page_index, rows):
+        self.pages[page_index] = rows
+
+        while len(self.pages) > self.cache_pages:
+            self.pages.popitem(last=False)
+
+    def get_result(self, row):
+        if row < 0 or row >= self.count:
+            return None
+
+        page_index = row // self.page_size
+        rows = self.pages.get(page_index)
+
+        if rows is None:
+            self._request_page(page_index)
+            return None
+
+        self.pages.move_to_end(page_index)
+
+        # Viereiset sivut valmiiksi, jotta vieritys ei osu placeholderiin.
+        self._request_page(page_index - 1)
+        self._request_page(page_index + 1)
+
+        offset = row % self.page_size
+
+        if offset >= len(rows):
+            return None
+
+        return rows[offset]
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+
+        return self.has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self.has_more:
+            return
+
+        self._request_page(len(self.page_cursors) - 1)
+
+    def clear(self):
+        self.beginResetModel()
+        self.generation += 1
+        self.page_cursors = [None]
+        self.pages.clear()
+        self.pending_pages.clear()
+        self.has_more = True
+        self.count = 0
+        self.endResetModel()
+
+    def cleanup(self):
+        self.loader_thread.quit()
+        self.loader_thread.wait()
@@ -0,0 +1,206 @@
+# ui/components/search_keypad_dialog.py
+from PyQt5.QtWidgets import QDialog, QGridLayout, QHBoxLayout, QLabel, QPushButton, QVBoxLayout
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QFont
+
+
+# Näppäinrivit. Haku ei erottele kirjainkokoa, joten isot kirjaimet
+# riittävät. Numerorivi on ylimpänä: paineet ja ohjelmanumerot ovat
+# yleisimmät hakusanat.
+SEARCH_KEYPAD_ROWS = (
+    "1234567890",
+    "QWERTYUIOPÅ",
+    "ASDFGHJKLÖÄ",
+    "ZXCVBNM/.,-",
+)
+
+# Pikahakunappeja näytetään enintään näin monta.
+SEARCH_KEYPAD_MAX_QUICK_TERMS = 6
+
+SEARCH_KEYPAD_MAX_LENGTH = 40
+
+SEARCH_KEYPAD_KEY_W = 70
+SEARCH_KEYPAD_KEY_H = 70
+
+SEARCH_KEYPAD_KEY_STYLE = """
+    QPushButton {
+        background-color: #f0f0f0;
+        color: #222222;
+        border-radius: 8px;
+        border: 1px solid #cccccc;
+        font-size: 22px;
+        font-weight: bold;
+    }
+    QPushButton:pressed {
+        background-color: #D8ECFF;
+        border: 1px solid #1976D2;
+    }
+"""
+
+SEARCH_KEYPAD_ACTION_STYLE = """
+    QPushButton {
+        background-color: #2196F3;
+        color: white;
+        border-radius: 8px;
+        font-size: 20px;
+        font-weight: bold;
+    }
+    QPushButton:pressed {
+        background-color: #1976D2;
+    }
+"""
+
+
+class SearchKeypadDialog(QDialog):
+    """
+    Kosketusnäppäimistö ohjelmahakuun.
+
+    Kioskinäytössä ei ole virtuaalinäppäimistöä, joten hakukenttä avaa
+    tämän dialogin. Jokainen painallus lähettää text_edited-signaalin,
+    joten ohjelmalista suodattuu jo kirjoitettaessa. PERUUTA palauttaa
+    alkuperäisen hakutekstin.
+
+    quick_terms = pikahakunapit (esim. vuotoyksiköt ja yleisimmät
+    paineet), jotka lisäävät kokonaisen hakusanan yhdellä painalluksella.
+    """
+
+    text_edited = pyqtSignal(str)
+
+    def __init__(self, parent=None, text="", quick_terms=()):
+        super().__init__(parent)
+
+        self.original_text = text or ""
+        self.text = self.original_text
+        self.quick_terms = list(quick_terms)[:SEARCH_KEYPAD_MAX_QUICK_TERMS]
+
+        self.setWindowTitle("Haku")
+        self.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
+        self.setModal(True)
+        self.setFixedSize(900, 600)
+
+        self.init_ui()
+
+        if parent:
+            self.move(
+                parent.mapToGlobal(parent.rect().center()).x() - self.width() // 2,
+                parent.mapToGlobal(parent.rect().bottomLeft()).y() - self.height() - 20,
+            )
+
+    def init_ui(self):
+        self.setStyleSheet("""
+            QDialog {
+                background-color: white;
+                border: 2px solid #1976D2;
+                border-radius: 10px;
+            }
+        """)
+
+        layout = QVBoxLayout(self)
+        layout.setSpacing(12)
+        layout.setContentsMargins(20, 20, 20, 20)
+
+        self.text_label = QLabel(self)
+        self.text_label.setFixedHeight(60)
+        self.text_label.setFont(QFont("Arial", 22))
+        self.text_label.setStyleSheet("""
+            QLabel {
+                background-color: #101010;
+                color: white;
+                border-radius: 8px;
+                padding-left: 12px;
+            }
+        """)
+        layout.addWidget(self.text_label)
+
+        keys_layout = QGridLayout()
+        keys_layout.setSpacing(6)
+
+        for row_index, keys in enumerate(SEARCH_KEYPAD_ROWS):
+            for column_index, key in enumerate(keys):
+                button = self._create_button(key, SEARCH_KEYPAD_KEY_STYLE, SEARCH_KEYPAD_KEY_W)
+                button.clicked.connect(lambda checked=False, k=key: self.insert_text(k))
+                keys_layout.addWidget(button, row_index, column_index)
+
+        layout.addLayout(keys_layout)
+
+        quick_layout = QHBoxLayout()
+        quick_layout.setSpacing(6)
+
+        for term in self.quick_terms:
+            button = self._create_button(term, SEARCH_KEYPAD_KEY_STYLE, 130)
+            button.clicked.connect(lambda checked=False, t=term: self.insert_term(t))
+            quick_layout.addWidget(button)
+
+        quick_layout.addStretch()
+        layout.addLayout(quick_layout)
+
+        actions_layout = QHBoxLayout()
+        actions_layout.setSpacing(12)
+
+        backspace_button = self._create_button("← POISTA", SEARCH_KEYPAD_ACTION_STYLE, 150)
+        backspace_button.clicked.connect(self.backspace)
+        actions_layout.addWidget(backspace_button)
+
+        clear_button = self._create_button("TYHJENNÄ", SEARCH_KEYPAD_ACTION_STYLE, 150)
+        clear_button.clicked.connect(self.clear_text)
+        actions_layout.addWidget(clear_button)
+
+        space_button = self._create_button("VÄLI", SEARCH_KEYPAD_KEY_STYLE, 150)
+        space_button.clicked.connect(lambda: self.insert_text(" "))
+        actions_layout.addWidget(space_button)
+
+        actions_layout.addStretch()
+
+        cancel_button = self._create_button("PERUUTA", SEARCH_KEYPAD_ACTION_STYLE, 150)
+        cancel_button.clicked.connect(self.reject)
+        actions_layout.addWidget(cancel_button)
+
+        ok_button = self._create_button("OK", SEARCH_KEYPAD_ACTION_STYLE, 150)
+        ok_button.clicked.connect(self.accept)
+        actions_layout.addWidget(ok_button)
+
+        layout.addLayout(actions_layout)
+
+        self._update_label()
+
+    def _create_button(self, text, style, width):
+        button = QPushButton(text, self)
+        button.setFixedSize(width, SEARCH_KEYPAD_KEY_H)
+        button.setFocusPolicy(Qt.NoFocus)
+        button.setStyleSheet(style)
+        return button
+
+    def _set_text(self, text):
+        text = text[:SEARCH_KEYPAD_MAX_LENGTH]
+
+        if text == self.text:
+            return
+
+        self.text = text
+        self._update_label()
+        self.text_edited.emit(self.text)
+
+    def _update_label(self):
+        self.text_label.setText(self.text or "HAE...")
+
+    def insert_text(self, text):
+        self._set_text(self.text + text)
+
+    def insert_term(self, term):
+        """Lisää kokonainen hakusana omaksi sanakseen."""
+        prefix = self.text
+
+        if prefix and not prefix.endswith(" "):
+            prefix += " "
+
+        self._set_text(prefix + term + " ")
+
+    def backspace(self):
+        self._set_text(self.text[:-1])
+
+    def clear_text(self):
+        self._set_text("")
+
+    def reject(self):
+        self._set_text(self.original_text)
+        super().reject()
@@ -1,18 +1,24 @@
 # ui/main_window.py
 from PyQt5.QtWidgets import QWidget, QApplication
 from PyQt5.QtGui import QKeyEvent
+from PyQt5.QtCore import QTimer
 
 from ui.screens.main_screen import MainScreen
 from ui.screens.manual_screen import ManualScreen
 from ui.screens.settings_screen import SettingsScreen
 from ui.screens.program_selection_screen import ProgramSelectionScreen
+from ui.screens.diagnostics_screen import DiagnosticsScreen
 from ui.components.environment_status_bar import EnvironmentStatusBar
 
 from utils.program_manager import ProgramManager
+from utils.gui_stall_watchdog import GuiStallWatchdog
+from utils.event_log import event_log
+from utils.bus_recorder import bus_recorder
 
 from services.hardware_service import HardwareService
 from services.fortest_service import ForTestService
 from services.result_storage_service import ResultStorageService
+from services.result_query_service import ResultQueryService
 
 from controllers.station_controller import StationController
 from controllers.program_selection_controller import ProgramSelectionController
@@ -41,17 +47,40 @@ DEV_MODE_FORTEST = False
 DEV_MODE_MODBUS = False
 DEV_MODE_GPIO = False
 
+# ------------------------------------------------------------
+# Diagnostiikka
+# ------------------------------------------------------------
+
+# GUI-jumien vahtikoira. Kevyt, joten pidetään päällä myös tuotannossa.
+GUI_STALL_WATCHDOG_ENABLED = True
+
+# Modbus-kehysten tallennus rengastiedostoon (utils/bus_recorder.py).
+# Kytketään päälle vikojen selvitystä varten; tallenne toistetaan
+# työkalulla tools/replay_bus_trace.py.
+BUS_RECORDER_ENABLED = False
+
 
 class MainWindow(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
 
+        # Tapahtumaloki ensin, jotta alustusten viestit päätyvät tiedostoon.
+        self.event_log = event_log
+        self.event_log.start()
+
+        # Tallennin ennen servicejä, jotta ensimmäisetkin kehykset tallentuvat.
+        self.bus_recorder = bus_recorder
+
+        if BUS_RECORDER_ENABLED:
+            self.bus_recorder.start()
+
         self.setup_window()
         self.create_managers()
         self.create_screens()
         self.create_services()
         self.create_station_controllers()
         self.create_controllers()
+        self.create_diagnostics()
 
     def setup_window(self):
         self.setWindowTitle("Painetestaus")
@@ -93,6 +122,10 @@ class MainWindow(QWidget):
         self.program_selection_screen.setGeometry(0, 0, self.screen_width, self.screen_height)
         self.program_selection_screen.hide()
 
+        self.diagnostics_screen = DiagnosticsScreen(self)
+        self.diagnostics_screen.setGeometry(0, 0, self.screen_width, self.screen_height)
+        self.diagnostics_screen.hide()
+
         self.environment_status_bar = EnvironmentStatusBar(self)
         self.environment_status_bar.setGeometry(265, 50, 750, 40)
         self.environment_status_bar.hide()
@@ -112,6 +145,9 @@ class MainWindow(QWidget):
 
         ResultStorageService:
         - SQLite-tulostallennus
+
+        ResultQueryService:
+        - historian, saannon ja vuotojakauman kyselyt
         """
         self.hardware_service = HardwareService(
             parent=self,
@@ -132,6 +168,10 @@ class MainWindow(QWidget):
         )
 
         self.result_storage_service = ResultStorageService(parent=self)
+        self.result_query_service = ResultQueryService(
+            parent=self,
+            partition_layout=self.result_storage_service.partition_layout,
+        )
 
     def create_station_controllers(self):
         self.station_controllers = {
@@ -170,6 +210,7 @@ class MainWindow(QWidget):
             program_selection_screen=self.program_selection_screen,
             environment_status_bar=self.environment_status_bar,
             program_selection_controller=self.program_selection_controller,
+            diagnostics_screen=self.diagnostics_screen,
         )
 
         self.emergency_stop_controller = EmergencyStopController(
@@ -190,6 +231,11 @@ class MainWindow(QWidget):
 
         self.fortest_result_controller = ForTestResultController(
             station_controllers=self.station_controllers,
+            program_managers={
+                1: self.program_manager_1,
+                2: self.program_manager_2,
+            },
+            settings_screen=self.settings_screen,
         )
 
         self.top_bar_controller = TopBarController(
@@ -209,6 +255,16 @@ class MainWindow(QWidget):
             main_window=self,
         )
 
+    def create_diagnostics(self):
+        self.gui_stall_watchdog = None
+
+        if GUI_STALL_WATCHDOG_ENABLED:
+            self.gui_stall_watchdog = GuiStallWatchdog(parent=self)
+
+            # Käynnistys vasta tapahtumasilmukassa, jottei ikkunan
+            # luonti näy jumina.
+            QTimer.singleShot(0, self.gui_stall_watchdog.start)
+
     def register_test_activity(self):
         """Nollaa automaattisen sammutuksen ajastin testitoiminnasta."""
         if hasattr(self, "idle_shutdown_controller") and self.idle_shutdown_controller:
@@ -291,6 +347,15 @@ class MainWindow(QWidget):
         if hasattr(self, "navigation_controller") and self.navigation_controller:
             self.navigation_controller.show_settings()
 
+    def show_diagnostics(self):
+        """
+        Diagnostiikkasivun avaaminen.
+        Varsinainen logiikka on NavigationControllerissa.
+        """
+
+        if hasattr(self, "navigation_controller") and self.navigation_controller:
+            self.navigation_controller.show_diagnostics()
+
     def show_program_selection(self, station_id=None):
         """
         Ohjelmanvalinnan avaaminen.
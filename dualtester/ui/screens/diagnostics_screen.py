@@ -0,0 +1,227 @@
+# ui/screens/diagnostics_screen.py
+from PyQt5.QtWidgets import QPushButton, QLabel
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont
+
+from ui.screens.base_screen import BaseScreen
+
+
+DIAGNOSTICS_REFRESH_MS = 1000
+
+
+class DiagnosticsScreen(BaseScreen):
+    """
+    Diagnostiikkasivu.
+
+    Näyttää asemittain testikierron vaiheiden ajat (viimeisten kiertojen
+    keskiarvo, mediaani, P95 ja maksimi), kappalemäärän tunnissa,
+    ForTest-pollauksen tahdin, tulostallennuksen mittarit sekä GUI-jumien
+    määrän ja pahimman kutsupaikan.
+    Sivu päivittyy kerran sekunnissa, kun se on näkyvissä.
+    """
+
+    PANEL_STYLE = """
+        QLabel {
+            color: #33FF33;
+            background-color: #050505;
+            border: 2px solid #333333;
+            border-radius: 10px;
+            padding: 12px;
+        }
+    """
+
+    STATUS_STYLE = """
+        QLabel {
+            color: #CCCCCC;
+            background-color: #101010;
+            border: 2px solid #333333;
+            border-radius: 10px;
+        }
+    """
+
+    TITLE_STYLE = """
+        color: white;
+        background: transparent;
+        border: none;
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+    def init_ui(self):
+        self.setStyleSheet("background-color: black;")
+
+        screen_w = self.parent().screen_width if self.parent() else 1920
+        screen_h = self.parent().screen_height if self.parent() else 1080
+
+        self.back_button = QPushButton("← TAKAISIN", self)
+        self.back_button.setGeometry(20, 20, 180, 65)
+        self.back_button.setFont(QFont("Arial", 16, QFont.Bold))
+        self.back_button.setStyleSheet("""
+            QPushButton {
+                background-color: #2196F3;
+                color: white;
+                border-radius: 10px;
+                border: none;
+            }
+            QPushButton:hover {
+                background-color: #1976D2;
+            }
+        """)
+        self.back_button.clicked.connect(self.go_back)
+
+        self.title_label = QLabel("DIAGNOSTIIKKA", self)
+        self.title_label.setGeometry(230, 20, screen_w - 460, 65)
+        self.title_label.setAlignment(Qt.AlignCenter)
+        self.title_label.setFont(QFont("Arial", 32, QFont.Bold))
+        self.title_label.setStyleSheet(self.TITLE_STYLE)
+
+        panel_y = 110
+        panel_w = (screen_w - 60) // 2
+        panel_h = screen_h - panel_y - 130
+
+        self.station_labels = {}
+
+        for index, station_id in enumerate((1, 2)):
+            label = QLabel("", self)
+            label.setGeometry(20 + index * (panel_w + 20), panel_y, panel_w, panel_h)
+            label.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+            label.setFont(QFont("Consolas", 13))
+            label.setStyleSheet(self.PANEL_STYLE)
+            self.station_labels[station_id] = label
+
+        self.storage_label = QLabel("", self)
+        self.storage_label.setGeometry(20, screen_h - 110, screen_w - 40, 70)
+        self.storage_label.setAlignment(Qt.AlignCenter)
+        self.storage_label.setFont(QFont("Consolas", 15))
+        self.storage_label.setStyleSheet(self.STATUS_STYLE)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(DIAGNOSTICS_REFRESH_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    # ------------------------------------------------------------
+    # Päivitys
+    # ------------------------------------------------------------
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        for station_id, label in self.station_labels.items():
+            label.setText(self._get_station_text(station_id))
+
+        self.storage_label.setText(
+            self._get_storage_text() + "\n" + self._get_stall_text()
+        )
+
+    def _get_station_controller(self, station_id):
+        parent = self.parent()
+
+        if not parent or not hasattr(parent, "station_controllers"):
+            return None
+
+        return parent.station_controllers.get(station_id)
+
+    def _get_station_text(self, station_id):
+        station = self._get_station_controller(station_id)
+
+        if station is None or not hasattr(station, "get_cycle_timing_summary"):
+            return f"ASEMA {station_id}\n\nAjoitustiedot eivät käytettävissä"
+
+        summary = station.get_cycle_timing_summary()
+        lines = [f"ASEMA {station_id}", ""]
+
+        estimate = summary.get("parts_per_hour_estimate")
+        estimate_text = f"{estimate:.1f}" if estimate else "--"
+        lines.append(
+            f"Kpl viim. 60 min: {summary.get('parts_last_hour', 0)}"
+            f"    Arvio kpl/h: {estimate_text}"
+        )
+
+        if hasattr(station, "get_fortest_poll_rate"):
+            poll_rate = station.get_fortest_poll_rate() or {}
+            achieved_hz = poll_rate.get("achieved_hz")
+            achieved_text = f"{achieved_hz:.1f} Hz" if achieved_hz else "--"
+            lines.append(
+                f"ForTest-pollaus: {poll_rate.get('mode', '--')}"
+                f" {poll_rate.get('interval_ms', '--')} ms, toteutunut {achieved_text}"
+            )
+
+        lines.append("")
+        lines.append(f"{'VAIHE':<28}{'N':>5}{'KA':>8}{'P50':>8}{'P95':>8}{'MAX':>8}")
+
+        intervals = summary.get("intervals", [])
+
+        if not intervals:
+            lines.append("Ei mitattuja kiertoja")
+
+        for _key, label, stats in intervals:
+            lines.append(
+                f"{label[:27]:<28}{stats['count']:>5}"
+                f"{self._format_seconds(stats['mean_ms']):>8}"
+                f"{self._format_seconds(stats['p50_ms']):>8}"
+                f"{self._format_seconds(stats['p95_ms']):>8}"
+                f"{self._format_seconds(stats['max_ms']):>8}"
+            )
+
+        return "\n".join(lines)
+
+    def _format_seconds(self, value_ms):
+        if value_ms is None:
+            return "--"
+
+        return f"{value_ms / 1000.0:.2f}"
+
+    def _get_storage_text(self):
+        parent = self.parent()
+        storage_service = getattr(parent, "result_storage_service", None) if parent else None
+
+        if storage_service is None or not hasattr(storage_service, "get_metrics"):
+            return "Tulostallennus: ei palvelua"
+
+        metrics = storage_service.get_metrics()
+
+        return (
+            f"Tallennus: jono {metrics.get('queue_length', 0)}"
+            f" (max {metrics.get('max_queue_length', 0)})"
+            f"    commit {metrics.get('avg_commit_ms', 0.0):.1f} ms"
+            f" (max {metrics.get('max_commit_ms', 0.0):.1f})"
+            f"    tallennettu {metrics.get('committed', 0)}"
+            f"    spool {metrics.get('spooled', 0)}"
+            f"    hylätty {metrics.get('dropped', 0)}"
+        )
+
+    def _get_stall_text(self):
+        watchdog = getattr(self.parent(), "gui_stall_watchdog", None) if self.parent() else None
+
+        if watchdog is None:
+            return "GUI-jumit: vahtikoira ei käytössä"
+
+        summary = watchdog.get_summary()
+        text = (
+            f"GUI-jumit: {summary['stalls']}"
+            f" ({summary['stalled_ms'] / 1000.0:.1f} s, max {summary['max_stall_ms']:.0f} ms)"
+        )
+
+        call_sites = summary.get("call_sites", [])
+
+        if call_sites:
+            worst = call_sites[0]
+            text += f"    pahin: {worst['call_site']} ({worst['stalls']} kpl)"
+
+        return text
+
+    def go_back(self):
+        if hasattr(self.parent(), "show_settings"):
+            self.parent().show_settings()
+
+    def cleanup(self):
+        if hasattr(self, "refresh_timer"):
+            self.refresh_timer.stop()
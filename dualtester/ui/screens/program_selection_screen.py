@@ -1,6 +1,7 @@
-from PyQt5.QtWidgets import QPushButton, QLabel, QGridLayout, QVBoxLayout, QHBoxLayout, QWidget
+from PyQt5.QtWidgets import QPushButton, QLabel, QGridLayout, QVBoxLayout, QHBoxLayout, QWidget, QLineEdit
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
+from ui.components.search_keypad_dialog import SearchKeypadDialog
 from ui.screens.base_screen import BaseScreen
 
 
@@ -11,6 +12,108 @@ PROGRAMS_PER_PAGE = PROGRAM_COLUMNS * PROGRAM_ROWS
 PROGRAM_CARD_W = 420
 PROGRAM_CARD_H = 165
 
+PROGRAM_CARD_STYLE = """
+    QPushButton {
+        background-color: white;
+        border-radius: 10px;
+        border: 1px solid #dddddd;
+        text-align: left;
+        padding: 0px;
+    }
+    QPushButton:hover {
+        background-color: #f0f0f0;
+        border: 1px solid #bbbbbb;
+    }
+    QPushButton:pressed {
+        background-color: #D8ECFF;
+        border: 1px solid #1976D2;
+    }
+"""
+
+
+class ProgramCard(QPushButton):
+    """
+    Yksi ohjelmakortti. Kortit luodaan kerran, ja sivua vaihdettaessa
+    niihin sidotaan vain uudet tekstit (bind).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.program_data = None
+
+        self.setFixedSize(PROGRAM_CARD_W, PROGRAM_CARD_H)
+        self.setStyleSheet(PROGRAM_CARD_STYLE)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(14, 10, 14, 10)
+        layout.setSpacing(4)
+
+        self.title_label = QLabel(self)
+        self.title_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        self.title_label.setStyleSheet(
+            "color: #1976D2; font-size: 21px; font-weight: bold; background-color: transparent;"
+        )
+        self.title_label.setWordWrap(True)
+        layout.addWidget(self.title_label)
+
+        self.desc_label = QLabel(self)
+        self.desc_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+        self.desc_label.setStyleSheet(
+            "color: #555555; font-size: 13px; background-color: transparent;"
+        )
+        self.desc_label.setWordWrap(True)
+        layout.addWidget(self.desc_label)
+
+        self.info_labels = []
+
+        for word_wrap in (False, False, True):
+            info_label = QLabel(self)
+            info_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+            info_label.setStyleSheet(
+                "color: #222222; font-size: 14px; background-color: transparent;"
+            )
+            info_label.setWordWrap(word_wrap)
+            layout.addWidget(info_label)
+            self.info_labels.append(info_label)
+
+    def bind(self, program_data, card_texts):
+        """
+        Sido kortti ohjelmaan. card_texts = (otsikko, kuvaus, info 1-3).
+        """
+        self.program_data = program_data
+
+        title, description, *info_texts = card_texts
+
+        self.title_label.setText(title)
+        self.desc_label.setText(description)
+        self.desc_label.setVisible(bool(description))
+
+        for info_label, text in zip(self.info_labels, info_texts):
+            info_label.setText(text)
+
+
+class TouchSearchInput(QLineEdit):
+    """
+    Hakukenttä kosketusnäytölle. Kenttä on vain luku -tilassa, eikä se
+    ota fokusta, koska näppäimistöä ei ole; painallus avaa
+    SearchKeypadDialogin (pressed-signaali).
+    """
+
+    pressed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.setReadOnly(True)
+        self.setFocusPolicy(Qt.NoFocus)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.pressed.emit()
+
+        event.accept()
+
 
 class ProgramSelectionScreen(BaseScreen):
     program_selected = pyqtSignal(dict)  # Signaali valitulle ohjelmalle
@@ -20,6 +123,10 @@ class ProgramSelectionScreen(BaseScreen):
         self.current_page = 0
         self.items_per_page = PROGRAMS_PER_PAGE
         self.max_pages = 0
+        self.search_text = ""
+
+        # (id(program_manager), indeksi) -> (ohjelma-dict, kortin tekstit)
+        self.card_text_cache = {}
         super().__init__(parent)
 
     def init_ui(self):
@@ -54,9 +161,22 @@ class ProgramSelectionScreen(BaseScreen):
         title.setAlignment(Qt.AlignCenter)
         top_bar.addWidget(title, 1)
 
-        spacer = QWidget()
-        spacer.setFixedSize(150, 60)
-        top_bar.addWidget(spacer)
+        self.search_input = TouchSearchInput(self)
+        self.search_input.setFixedSize(260, 80)
+        self.search_input.setPlaceholderText("HAE...")
+        self.search_input.setFont(QFont("Arial", 18))
+        self.search_input.setStyleSheet("""
+            QLineEdit {
+                background-color: #101010;
+                color: white;
+                border: 1px solid #444444;
+                border-radius: 10px;
+                padding-left: 12px;
+            }
+        """)
+        self.search_input.textChanged.connect(self.set_search_text)
+        self.search_input.pressed.connect(self.open_search_keypad)
+        top_bar.addWidget(self.search_input)
 
         self.main_layout.addLayout(top_bar)
 
@@ -69,6 +189,8 @@ class ProgramSelectionScreen(BaseScreen):
 
         self.main_layout.addWidget(self.grid_container, 1)
 
+        self._create_card_pool()
+
         nav_bar = QHBoxLayout()
         nav_bar.setAlignment(Qt.AlignCenter)
 
@@ -168,10 +290,9 @@ class ProgramSelectionScreen(BaseScreen):
 
         return text
 
-    def _create_program_card(self, program_data, fallback_name):
+    def _format_card_texts(self, program_data, fallback_name):
         program_id = program_data.get("id", "--")
         program_name = program_data.get("name", fallback_name)
-        description = program_data.get("description", "")
 
         pressure = self._format_value(program_data.get("pressure_mbar", "--"), " mbar")
         volume = self._format_value(program_data.get("piece_volume_ml", "--"), " ml")
@@ -180,75 +301,43 @@ class ProgramSelectionScreen(BaseScreen):
         test_time = self._format_value(program_data.get("test_time_s", "--"), "s")
         decay_text = self._format_decay_text(program_data)
 
-        button = QPushButton(self.grid_container)
-        button.setFixedSize(PROGRAM_CARD_W, PROGRAM_CARD_H)
-        button.setStyleSheet("""
-            QPushButton {
-                background-color: white;
-                border-radius: 10px;
-                border: 1px solid #dddddd;
-                text-align: left;
-                padding: 0px;
-            }
-            QPushButton:hover {
-                background-color: #f0f0f0;
-                border: 1px solid #bbbbbb;
-            }
-            QPushButton:pressed {
-                background-color: #D8ECFF;
-                border: 1px solid #1976D2;
-            }
-        """)
+        return (
+            f"{program_id}. {program_name}",
+            program_data.get("description", ""),
+            f"PAINE: {pressure}     TILAVUUS: {volume}",
+            f"TÄYTTÖ: {fill_time}     TASAUS: {settle_time}     TESTI: {test_time}",
+            f"RAJA: {decay_text}",
+        )
 
-        button_layout = QVBoxLayout(button)
-        button_layout.setContentsMargins(14, 10, 14, 10)
-        button_layout.setSpacing(4)
+    def _get_card_texts(self, program_index, program_data, fallback_name):
+        """
+        Kortin tekstit välimuistista. Välimuisti on ohjelmalistakohtainen:
+        uudelleenladattu ohjelma on uusi dict, joten vanha rivi hylätään.
+        """
+        cache_key = (id(self.program_manager), program_index)
+        cached = self.card_text_cache.get(cache_key)
 
-        title_label = QLabel(f"{program_id}. {program_name}", button)
-        title_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        title_label.setStyleSheet(
-            "color: #1976D2; font-size: 21px; font-weight: bold; background-color: transparent;"
-        )
-        title_label.setWordWrap(True)
-        button_layout.addWidget(title_label)
-
-        if description:
-            desc_label = QLabel(description, button)
-            desc_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-            desc_label.setStyleSheet(
-                "color: #555555; font-size: 13px; background-color: transparent;"
-            )
-            desc_label.setWordWrap(True)
-            button_layout.addWidget(desc_label)
+        if cached is not None and cached[0] is program_data:
+            return cached[1]
 
-        info_1 = QLabel(f"PAINE: {pressure}     TILAVUUS: {volume}", button)
-        info_1.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        info_1.setStyleSheet(
-            "color: #222222; font-size: 14px; background-color: transparent;"
-        )
-        button_layout.addWidget(info_1)
+        card_texts = self._format_card_texts(program_data, fallback_name)
+        self.card_text_cache[cache_key] = (program_data, card_texts)
+        return card_texts
 
-        info_2 = QLabel(
-            f"TÄYTTÖ: {fill_time}     TASAUS: {settle_time}     TESTI: {test_time}",
-            button,
-        )
-        info_2.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        info_2.setStyleSheet(
-            "color: #222222; font-size: 14px; background-color: transparent;"
-        )
-        button_layout.addWidget(info_2)
+    def _create_card_pool(self):
+        self.program_cards = []
 
-        info_3 = QLabel(f"RAJA: {decay_text}", button)
-        info_3.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-        info_3.setStyleSheet(
-            "color: #222222; font-size: 14px; background-color: transparent;"
-        )
-        info_3.setWordWrap(True)
-        button_layout.addWidget(info_3)
+        for i in range(self.items_per_page):
+            card = ProgramCard(self.grid_container)
+            card.clicked.connect(lambda checked=False, c=card: self._on_card_clicked(c))
+            card.hide()
 
-        button.clicked.connect(lambda checked, prog=program_data: self.select_program(prog))
+            self.grid_layout.addWidget(card, i // PROGRAM_COLUMNS, i % PROGRAM_COLUMNS)
+            self.program_cards.append(card)
 
-        return button
+    def _on_card_clicked(self, card):
+        if card.program_data is not None:
+            self.select_program(card.program_data)
 
     def update_program_list(self, program_list=None):
         """Päivitä ohjelmalista dynaamisesti."""
@@ -257,23 +346,29 @@ class ProgramSelectionScreen(BaseScreen):
         elif program_list is None:
             program_list = [f"Ohjelma {i}" for i in range(1, 51)]
 
-        self.clear_grid()
-        self.program_buttons = []
+        # Haku käyttää ProgramManagerin hakuindeksiä; None = kaikki.
+        program_indexes = None
+
+        if self.search_text and self.program_manager and hasattr(self.program_manager, "search_programs"):
+            program_indexes = self.program_manager.search_programs(self.search_text)
+
+        if program_indexes is None:
+            program_indexes = range(len(program_list))
 
         self.max_pages = max(
             1,
-            (len(program_list) + self.items_per_page - 1) // self.items_per_page,
+            (len(program_indexes) + self.items_per_page - 1) // self.items_per_page,
         )
 
         if self.current_page >= self.max_pages:
             self.current_page = max(0, self.max_pages - 1)
 
         start_idx = self.current_page * self.items_per_page
-        end_idx = min(start_idx + self.items_per_page, len(program_list))
-        displayed_programs = program_list[start_idx:end_idx]
+        end_idx = min(start_idx + self.items_per_page, len(program_indexes))
+        displayed_indexes = program_indexes[start_idx:end_idx]
 
-        for i, program_name in enumerate(displayed_programs):
-            program_index = start_idx + i
+        for card, program_index in zip(self.program_cards, displayed_indexes):
+            program_name = program_list[program_index]
             program_data = None
 
             if self.program_manager:
@@ -281,29 +376,53 @@ class ProgramSelectionScreen(BaseScreen):
 
             if program_data is None:
                 program_data = {
-                    "id": start_idx + i + 1,
+                    "id": program_index + 1,
                     "name": program_name,
                     "description": "",
                 }
 
-            button = self._create_program_card(program_data, program_name)
-
-            row = i // PROGRAM_COLUMNS
-            col = i % PROGRAM_COLUMNS
+            card.bind(
+                program_data,
+                self._get_card_texts(program_index, program_data, program_name),
+            )
+            card.show()
 
-            self.grid_layout.addWidget(button, row, col)
-            self.program_buttons.append(button)
+        for card in self.program_cards[len(displayed_indexes):]:
+            card.hide()
+            card.program_data = None
 
         self.page_label.setText(f"Sivu {self.current_page + 1}/{self.max_pages}")
         self.prev_button.setEnabled(self.current_page > 0)
         self.next_button.setEnabled(self.current_page < self.max_pages - 1)
 
-    def clear_grid(self):
-        """Tyhjennä grid-layout kaikista widgeteistä."""
-        for i in reversed(range(self.grid_layout.count())):
-            widget = self.grid_layout.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
+    def set_search_text(self, text):
+        """Suodata ohjelmat hakusanoilla ja palaa ensimmäiselle sivulle."""
+        text = text.strip()
+
+        if text == self.search_text:
+            return
+
+        self.search_text = text
+        self.current_page = 0
+        self.update_program_list()
+
+    def open_search_keypad(self):
+        """Avaa kosketusnäppäimistö; lista suodattuu kirjoitettaessa."""
+        quick_terms = []
+
+        if self.program_manager and hasattr(self.program_manager, "get_quick_search_terms"):
+            quick_terms = self.program_manager.get_quick_search_terms()
+
+        dialog = SearchKeypadDialog(self, self.search_input.text(), quick_terms)
+        dialog.text_edited.connect(self.search_input.setText)
+        dialog.exec_()
+
+    def clear_search(self):
+        """Tyhjennä haku päivittämättä listaa."""
+        self.search_input.blockSignals(True)
+        self.search_input.clear()
+        self.search_input.blockSignals(False)
+        self.search_text = ""
 
     def show_prev_page(self):
         """Näytä edellinen sivu."""
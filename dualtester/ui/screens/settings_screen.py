@@ -58,6 +58,12 @@ class SettingsScreen(BaseScreen):
         self.title_label.setFont(QFont("Arial", 32, QFont.Bold))
         self.title_label.setStyleSheet(self.TITLE_STYLE)
 
+        self.diagnostics_button = QPushButton("DIAGNOSTIIKKA", self)
+        self.diagnostics_button.setGeometry(screen_w - 200, 20, 180, 65)
+        self.diagnostics_button.setFont(QFont("Arial", 15, QFont.Bold))
+        self.diagnostics_button.setStyleSheet(self._button_style("#555555", "#1976D2"))
+        self.diagnostics_button.clicked.connect(self.show_diagnostics)
+
         self.connection_status_label = QLabel("", self)
         self.connection_status_label.setGeometry(20, 100, screen_w - 40, 70)
         self.connection_status_label.setAlignment(Qt.AlignCenter)
@@ -135,7 +141,7 @@ class SettingsScreen(BaseScreen):
             y=start_y,
             w=button_w,
             h=button_h,
-            callback=lambda checked=False, sid=station_id: self.fetch_programs_placeholder(sid),
+            callback=lambda checked=False, sid=station_id: self.fetch_programs(sid),
         )
 
         self._create_button(
@@ -254,12 +260,56 @@ class SettingsScreen(BaseScreen):
         if self.fortest2_connection_label:
             self.fortest2_connection_label.setText(self._get_connection_text(2))
 
-    def fetch_programs_placeholder(self, station_id):
-        self._set_status(
-            f"ForTest {station_id}: ohjelmien haku lisätään seuraavassa vaiheessa",
-            "orange",
+    def _is_station_running(self, station_id):
+        parent = self.parent()
+
+        if not parent or not hasattr(parent, "station_controllers"):
+            return False
+
+        station = parent.station_controllers.get(station_id)
+        return bool(station and getattr(station, "is_running", False))
+
+    def fetch_programs(self, station_id):
+        fortest_service = self._get_fortest_service()
+
+        if not fortest_service or not hasattr(fortest_service, "read_program_table"):
+            self._set_status("VIRHE: ForTestService ei ole käytössä", "red")
+            return
+
+        # Haku kestää kymmeniä sekunteja; testin käynnistys keskeyttäisi sen heti.
+        if self._is_station_running(station_id):
+            self._set_status(
+                f"ForTest {station_id}: ohjelmia ei voi hakea testin aikana",
+                "orange",
+            )
+            return
+
+        if not fortest_service.read_program_table(station_id):
+            self._set_status(f"ForTest {station_id}: ei yhteyttä testeriin", "red")
+            return
+
+        self._set_status(f"ForTest {station_id}: haetaan ohjelmia testeriltä...", "#CCCCCC")
+
+    def show_program_import_result(self, station_id, program_table, changed_ids, error_msg):
+        if error_msg:
+            self._set_status(f"ForTest {station_id}: {error_msg}", "red")
+            return
+
+        text = (
+            f"ForTest {station_id}: luettu {len(program_table.programs)} ohjelmaa, "
+            f"muuttunut {len(changed_ids)}"
         )
 
+        if program_table.failed_ids:
+            text += f", lukuvirhe {len(program_table.failed_ids)}"
+            self._set_status(text, "orange")
+            return
+
+        if program_table.missing_names:
+            text += f", nimi puuttuu {len(program_table.missing_names)}"
+
+        self._set_status(text, "#33FF33")
+
     def read_active_program_placeholder(self, station_id):
         fortest_service = self._get_fortest_service()
 
@@ -286,6 +336,10 @@ class SettingsScreen(BaseScreen):
         self.status_label.setText(message)
         self.status_label.setStyleSheet(self.STATUS_STYLE.format(color=color))
 
+    def show_diagnostics(self):
+        if hasattr(self.parent(), "show_diagnostics"):
+            self.parent().show_diagnostics()
+
     def go_back(self):
         if hasattr(self.parent(), "show_testing"):
             self.parent().show_testing()
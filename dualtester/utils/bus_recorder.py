@@ -0,0 +1,328 @@
+# utils/bus_recorder.py
+import json
+import os
+import struct
+import threading
+import time
+
+from utils.event_log import event_log, EVENT_LOG_DIRECTORY, EVENT_SUBSYSTEM_BUS
+
+
+# ------------------------------------------------------------
+# Väylätallennin
+# ------------------------------------------------------------
+
+# Tallennetiedosto. DUALTESTER_BUS_RECORD_PATH ohittaa oletuksen.
+BUS_RECORDER_PATH = os.environ.get(
+    "DUALTESTER_BUS_RECORD_PATH",
+    os.path.join(EVENT_LOG_DIRECTORY, "bus_trace.rec"),
+)
+
+# Rengaspuskurin paikat. Noin 25 kehystä / s -> 100 000 paikkaa
+# riittää runsaaseen tuntiin, tiedosto on noin 15 MB.
+BUS_RECORDER_SLOT_COUNT = 100000
+
+# Kehyksen hyötykuorman enimmäispituus (16-bit sanoja). Pidemmät
+# (ohjelmataulukon lohkot) katkaistaan ja merkitään.
+BUS_RECORDER_MAX_WORDS = 64
+
+BUS_RECORDER_MAGIC = b"DTBUSREC"
+BUS_RECORDER_VERSION = 1
+
+# Otsikko: magic, versio, paikan koko, paikkojen määrä,
+# kirjoitettujen tietueiden määrä, aloitusaika. Perässä porttilista
+# JSON-muodossa nollilla täytettynä.
+BUS_RECORDER_HEADER = struct.Struct("<8sHHIQd")
+BUS_RECORDER_HEADER_SIZE = 512
+BUS_RECORDER_WRITE_INDEX_OFFSET = 16
+
+# Tietue: aika (epoch), kesto ms, portin indeksi, funktiokoodi, liput,
+# poikkeuskoodi, osoite, määrä, hyötykuorman sanamäärä.
+BUS_RECORDER_RECORD = struct.Struct("<dfBBBBHHH")
+
+BUS_RECORD_FLAG_CHAINED = 0x01
+BUS_RECORD_FLAG_NO_RESPONSE = 0x02
+BUS_RECORD_FLAG_EXCEPTION = 0x04
+BUS_RECORD_FLAG_TRUNCATED = 0x08
+
+BUS_FUNCTION_CODES = {
+    "read_holding_registers": 0x03,
+    "write_coil": 0x05,
+    "write_register": 0x06,
+    "write_registers": 0x10,
+}
+
+
+def get_bus_recorder_slot_size(max_words=BUS_RECORDER_MAX_WORDS):
+    return BUS_RECORDER_RECORD.size + 2 * max_words
+
+
+class BusRecord:
+    """
+    Yksi tallennettu kehys.
+
+    payload: lukujen vastausrekisterit tai kirjoitusten arvot
+    (coil: 0xFF00 / 0x0000).
+    """
+
+    def __init__(self, index, timestamp, latency_ms, port, function, flags,
+                 exception_code, address, count, payload):
+        self.index = index
+        self.timestamp = timestamp
+        self.latency_ms = latency_ms
+        self.port = port
+        self.function = function
+        self.flags = flags
+        self.exception_code = exception_code
+        self.address = address
+        self.count = count
+        self.payload = payload
+
+    @property
+    def ok(self):
+        return not self.flags & (BUS_RECORD_FLAG_NO_RESPONSE | BUS_RECORD_FLAG_EXCEPTION)
+
+    @property
+    def chained(self):
+        return bool(self.flags & BUS_RECORD_FLAG_CHAINED)
+
+    def format(self):
+        if self.flags & BUS_RECORD_FLAG_NO_RESPONSE:
+            outcome = "EI VASTAUSTA"
+        elif self.flags & BUS_RECORD_FLAG_EXCEPTION:
+            outcome = f"POIKKEUS {self.exception_code}"
+        else:
+            outcome = "OK"
+
+        words = " ".join(str(value) for value in self.payload)
+
+        if self.flags & BUS_RECORD_FLAG_TRUNCATED:
+            words += " ..."
+
+        return (
+            f"{self.index:>8} {time.strftime('%H:%M:%S', time.localtime(self.timestamp))}"
+            f".{int(self.timestamp * 1000) % 1000:03d} {self.port:<14} "
+            f"FC{self.function:02d}{'+' if self.chained else ' '} "
+            f"0x{self.address:04X} n={self.count:<3} {self.latency_ms:>7.1f} ms "
+            f"{outcome:<12} {words}"
+        )
+
+
+class BusRecorder:
+    """
+    Modbus-kehysten tallennin rengastiedostoon.
+
+    Tiedosto varataan kerralla (otsikko + slot_count kiinteän kokoista
+    paikkaa), joten koko ei kasva. Tietue n menee paikkaan
+    n % slot_count ja otsikon laskuri kertoo, mistä vanhin tietue
+    alkaa. Kirjoitus on yksi pwrite tietueelle ja yksi laskurille,
+    ilman fsynciä.
+
+    ModbusHandler kutsuu record()-metodia jokaisesta kehyksestä, kun
+    tallennin on käynnissä. Oletuksena tallennin ei ole käytössä.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.fd = None
+        self.path = None
+        self.slot_count = BUS_RECORDER_SLOT_COUNT
+        self.max_words = BUS_RECORDER_MAX_WORDS
+        self.slot_size = get_bus_recorder_slot_size(self.max_words)
+        self.write_index = 0
+        self.started_at = 0.0
+        self.ports = []
+        self.port_indexes = {}
+
+    @property
+    def is_active(self):
+        return self.fd is not None
+
+    # ------------------------------------------------------------
+    # Käynnistys
+    # ------------------------------------------------------------
+
+    def start(self, path=None, slot_count=None):
+        """
+        Aloittaa uuden tallenteen. Vanha samanniminen tiedosto
+        korvataan.
+        """
+        if self.fd is not None:
+            return True
+
+        self.path = path or BUS_RECORDER_PATH
+        self.slot_count = int(slot_count or BUS_RECORDER_SLOT_COUNT)
+        self.write_index = 0
+        self.ports = []
+        self.port_indexes = {}
+
+        try:
+            directory = os.path.dirname(self.path)
+
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+            os.ftruncate(fd, BUS_RECORDER_HEADER_SIZE + self.slot_count * self.slot_size)
+
+        except Exception as e:
+            event_log.error(EVENT_SUBSYSTEM_BUS, f"Väylätallenteen avaus epäonnistui ({self.path}): {e}")
+            return False
+
+        self.fd = fd
+        self.started_at = time.time()
+        self._write_header()
+
+        event_log.info(
+            EVENT_SUBSYSTEM_BUS,
+            f"Väylätallennus käynnissä: {self.path} ({self.slot_count} kehystä)",
+            path=self.path,
+        )
+        return True
+
+    def stop(self):
+        with self.lock:
+            if self.fd is None:
+                return
+
+            try:
+                os.close(self.fd)
+            except Exception:
+                pass
+
+            self.fd = None
+
+    def cleanup(self):
+        self.stop()
+
+    # ------------------------------------------------------------
+    # Tallennus
+    # ------------------------------------------------------------
+
+    def record(self, port, function, address, count, latency_ms, flags=0, exception_code=0, payload=None):
+        if self.fd is None:
+            return
+
+        payload = list(payload or [])
+
+        if len(payload) > self.max_words:
+            payload = payload[:self.max_words]
+            flags |= BUS_RECORD_FLAG_TRUNCATED
+
+        timestamp = time.time()
+        function_code = BUS_FUNCTION_CODES.get(function, 0) if isinstance(function, str) else function
+        words = struct.pack(f"<{len(payload)}H", *[value & 0xFFFF for value in payload])
+
+        with self.lock:
+            if self.fd is None:
+                return
+
+            port_index = self.port_indexes.get(port)
+
+            if port_index is None:
+                port_index = len(self.ports)
+                self.ports.append(port)
+                self.port_indexes[port] = port_index
+                self._write_header()
+
+            data = BUS_RECORDER_RECORD.pack(
+                timestamp,
+                latency_ms,
+                port_index & 0xFF,
+                function_code,
+                flags,
+                (exception_code or 0) & 0xFF,
+                address & 0xFFFF,
+                (count or 0) & 0xFFFF,
+                len(payload),
+            )
+
+            slot = self.write_index % self.slot_count
+
+            try:
+                os.pwrite(self.fd, data + words, BUS_RECORDER_HEADER_SIZE + slot * self.slot_size)
+                self.write_index += 1
+                os.pwrite(self.fd, struct.pack("<Q", self.write_index), BUS_RECORDER_WRITE_INDEX_OFFSET)
+
+            except Exception as e:
+                event_log.error(EVENT_SUBSYSTEM_BUS, f"Väylätallenteen kirjoitus epäonnistui, tallennus pysäytetty: {e}")
+
+                try:
+                    os.close(self.fd)
+                except Exception:
+                    pass
+
+                self.fd = None
+
+    def _write_header(self):
+        header = BUS_RECORDER_HEADER.pack(
+            BUS_RECORDER_MAGIC,
+            BUS_RECORDER_VERSION,
+            self.slot_size,
+            self.slot_count,
+            self.write_index,
+            self.started_at,
+        )
+        ports = json.dumps(self.ports).encode("utf-8")
+        block = (header + ports)[:BUS_RECORDER_HEADER_SIZE]
+        os.pwrite(self.fd, block.ljust(BUS_RECORDER_HEADER_SIZE, b"\0"), 0)
+
+
+def read_bus_recording(path):
+    """
+    Lue tallenne. Palauttaa (started_at, [BusRecord, ...]) vanhimmasta
+    uusimpaan.
+    """
+    with open(path, "rb") as f:
+        header = f.read(BUS_RECORDER_HEADER_SIZE)
+        magic, version, slot_size, slot_count, write_index, started_at = BUS_RECORDER_HEADER.unpack_from(header)
+
+        if magic != BUS_RECORDER_MAGIC:
+            raise ValueError(f"{path} ei ole väylätallenne")
+
+        if version != BUS_RECORDER_VERSION:
+            raise ValueError(f"tuntematon tallenneversio {version}")
+
+        ports = json.loads(header[BUS_RECORDER_HEADER.size:].rstrip(b"\0").decode("utf-8") or "[]")
+
+        first_index = max(0, write_index - slot_count)
+        records = []
+
+        for index in range(first_index, write_index):
+            f.seek(BUS_RECORDER_HEADER_SIZE + (index % slot_count) * slot_size)
+            data = f.read(slot_size)
+
+            (
+                timestamp,
+                latency_ms,
+                port_index,
+                function,
+                flags,
+                exception_code,
+                address,
+                count,
+                word_count,
+            ) = BUS_RECORDER_RECORD.unpack_from(data)
+
+            payload = list(struct.unpack_from(f"<{word_count}H", data, BUS_RECORDER_RECORD.size))
+            port = ports[port_index] if port_index < len(ports) else f"#{port_index}"
+
+            records.append(BusRecord(
+                index,
+                timestamp,
+                latency_ms,
+                port,
+                function,
+                flags,
+                exception_code,
+                address,
+                count,
+                payload,
+            ))
+
+    return started_at, records
+
+
+# Sovelluksen yhteinen tallennin. MainWindow käynnistää sen, kun
+# BUS_RECORDER_ENABLED on päällä.
+bus_recorder = BusRecorder()
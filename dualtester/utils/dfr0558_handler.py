@@ -4,6 +4,7 @@ import time
 
 import smbus
 from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from utils.event_log import event_log, EVENT_SUBSYSTEM_SENSORS
 
 
 DFR0558_TEMPERATURE_OFFSET_C = -1.9
@@ -52,7 +53,7 @@ class DFR0558Handler(QObject):
             self.connected = True
             self.error_reported = False
             self.consecutive_error_count = 0
-            print("DFR0558 kappalelämpötila-anturi yhdistetty onnistuneesti")
+            event_log.info(EVENT_SUBSYSTEM_SENSORS, "DFR0558 kappalelämpötila-anturi yhdistetty onnistuneesti")
 
         except Exception as e:
             self.connected = False
@@ -66,7 +67,7 @@ class DFR0558Handler(QObject):
             return
 
         if not self.error_reported:
-            print(message)
+            event_log.warning(EVENT_SUBSYSTEM_SENSORS, message)
             self.sensor_error.emit(message)
             self.error_reported = True
 
@@ -0,0 +1,424 @@
+# utils/event_log.py
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+# ------------------------------------------------------------
+# Tapahtumaloki
+# ------------------------------------------------------------
+
+# Lokihakemisto. DUALTESTER_LOG_DIR ohittaa oletuksen.
+EVENT_LOG_DIRECTORY = os.environ.get("DUALTESTER_LOG_DIR", "/home/akiriik/painetesteri_hmi/logs")
+EVENT_LOG_FILE_NAME = "events.jsonl"
+
+# Tiedosto kierrätetään, kun se kasvaa yli rajan:
+# events.jsonl -> events.1.jsonl -> ... -> events.<N>.jsonl
+EVENT_LOG_MAX_BYTES = 10 * 1024 * 1024
+EVENT_LOG_BACKUP_COUNT = 5
+
+# Kirjoitussäie herää tällä välillä tai heti ERROR-tasoisesta
+# tapahtumasta.
+EVENT_LOG_FLUSH_INTERVAL_S = 0.5
+
+# Jonoon mahtuvien kirjoittamattomien tapahtumien enimmäismäärä.
+# Ylimenevät tapahtumat hylätään ja lasketaan.
+EVENT_LOG_QUEUE_MAX_SIZE = 20000
+
+# Rivit kirjoitetaan enintään tämän kokoisina erinä; kierrätysraja
+# tarkistetaan jokaisen erän jälkeen.
+EVENT_LOG_WRITE_BATCH_LINES = 500
+
+# Avaamatonta lokitiedostoa yritetään uudelleen enintään näin usein.
+EVENT_LOG_REOPEN_INTERVAL_S = 60.0
+
+EVENT_LEVEL_DEBUG = 10
+EVENT_LEVEL_INFO = 20
+EVENT_LEVEL_WARNING = 30
+EVENT_LEVEL_ERROR = 40
+
+EVENT_LEVEL_NAMES = {
+    EVENT_LEVEL_DEBUG: "DEBUG",
+    EVENT_LEVEL_INFO: "INFO",
+    EVENT_LEVEL_WARNING: "WARNING",
+    EVENT_LEVEL_ERROR: "ERROR",
+}
+
+EVENT_SUBSYSTEM_APP = "app"
+EVENT_SUBSYSTEM_BUS = "bus"
+EVENT_SUBSYSTEM_FORTEST = "fortest"
+EVENT_SUBSYSTEM_HARDWARE = "hardware"
+EVENT_SUBSYSTEM_SENSORS = "sensors"
+EVENT_SUBSYSTEM_STORAGE = "storage"
+EVENT_SUBSYSTEM_STATION = "station"
+EVENT_SUBSYSTEM_JIG = "jig"
+EVENT_SUBSYSTEM_PROGRAMS = "programs"
+EVENT_SUBSYSTEM_UI = "ui"
+
+EVENT_TYPE_MESSAGE = "message"
+EVENT_TYPE_BUS_TRANSACTION = "bus_transaction"
+EVENT_TYPE_STATUS_TRANSITION = "status_transition"
+EVENT_TYPE_RESULT = "result"
+EVENT_TYPE_JIG_PHASE = "jig_phase"
+
+EVENT_LOG_DEFAULT_LEVEL = EVENT_LEVEL_INFO
+
+# Väylätapahtumat ovat DEBUG-tasoa (virheet WARNING). Jatkuva jäljitys
+# kytketään päälle esim. DUALTESTER_LOG_LEVELS="bus=debug".
+EVENT_LOG_DEFAULT_LEVELS = {
+    EVENT_SUBSYSTEM_BUS: EVENT_LEVEL_INFO,
+}
+
+# Konsoliin tulostetaan viestit tältä tasolta alkaen ja tyypitetyt
+# tapahtumat WARNING-tasolta alkaen.
+EVENT_LOG_CONSOLE_LEVEL = EVENT_LEVEL_INFO
+
+
+def parse_event_levels(text):
+    """
+    "bus=debug,storage=warning" -> {"bus": 10, "storage": 30}
+    Tuntemattomat tasot ohitetaan.
+    """
+    levels = {}
+    names = {name.lower(): level for level, name in EVENT_LEVEL_NAMES.items()}
+
+    for item in (text or "").split(","):
+        if "=" not in item:
+            continue
+
+        subsystem, level_name = item.split("=", 1)
+        level = names.get(level_name.strip().lower())
+
+        if subsystem.strip() and level is not None:
+            levels[subsystem.strip()] = level
+
+    return levels
+
+
+class EventLog:
+    """
+    Rakenteinen tapahtumaloki (JSON Lines).
+
+    - emit() tarkistaa alijärjestelmän tason ja lisää tapahtuman
+      deque-jonoon; append ja popleft ovat säieturvallisia ilman lukkoa,
+      joten kutsuja ei koskaan odota levyä tai konsolia
+    - kirjoitussäie muuntaa tapahtumat JSON-riveiksi, kirjoittaa ne
+      erissä ja kierrättää tiedoston koon mukaan
+    - viestit tulostetaan lisäksi konsoliin kirjoitussäikeestä
+
+    Ennen start()-kutsua (työkalut, testiskriptit) viestit ja
+    WARNING-tasoiset tapahtumat tulostetaan suoraan konsoliin, muut
+    tapahtumat ohitetaan.
+    """
+
+    def __init__(self):
+        self.queue = deque()
+        self.levels = dict(EVENT_LOG_DEFAULT_LEVELS)
+        self.levels.update(parse_event_levels(os.environ.get("DUALTESTER_LOG_LEVELS")))
+        self.default_level = EVENT_LOG_DEFAULT_LEVEL
+        self.console_level = EVENT_LOG_CONSOLE_LEVEL
+
+        self.directory = EVENT_LOG_DIRECTORY
+        self.file = None
+        self.file_size = 0
+        self.open_failed_at = None
+
+        self.thread = None
+        self.wake_event = threading.Event()
+        self.stop_event = threading.Event()
+
+        self.statistics = {
+            "written": 0,
+            "dropped": 0,
+            "rotations": 0,
+            "write_errors": 0,
+        }
+
+    # ------------------------------------------------------------
+    # Asetukset
+    # ------------------------------------------------------------
+
+    def set_level(self, subsystem, level):
+        self.levels[subsystem] = level
+
+    def is_enabled(self, subsystem, level):
+        return level >= self.levels.get(subsystem, self.default_level)
+
+    def get_path(self):
+        return os.path.join(self.directory, EVENT_LOG_FILE_NAME)
+
+    # ------------------------------------------------------------
+    # Käynnistys
+    # ------------------------------------------------------------
+
+    def start(self, directory=None):
+        if self.thread is not None:
+            return
+
+        if directory:
+            self.directory = directory
+
+        self.stop_event.clear()
+        self.thread = threading.Thread(
+            target=self._run,
+            name="event-log-writer",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+
+        self.stop_event.set()
+        self.wake_event.set()
+        self.thread.join(timeout=5.0)
+        self.thread = None
+
+        # Pysäytyksen aikana jonoon ehtineet tapahtumat.
+        self._write_pending()
+        self._close_file()
+
+    def cleanup(self):
+        self.stop()
+
+    # ------------------------------------------------------------
+    # Tapahtumat
+    # ------------------------------------------------------------
+
+    def emit(self, subsystem, event_type, level, fields):
+        if level < self.levels.get(subsystem, self.default_level):
+            return
+
+        if self.thread is None:
+            if self._is_console_event(event_type, level):
+                self._print_console(None, subsystem, event_type, fields)
+            return
+
+        if len(self.queue) >= EVENT_LOG_QUEUE_MAX_SIZE:
+            self.statistics["dropped"] += 1
+            return
+
+        self.queue.append((time.time(), subsystem, event_type, level, fields))
+
+        if level >= EVENT_LEVEL_ERROR:
+            self.wake_event.set()
+
+    def message(self, subsystem, level, text, **fields):
+        if level < self.levels.get(subsystem, self.default_level):
+            return
+
+        fields["text"] = text
+        self.emit(subsystem, EVENT_TYPE_MESSAGE, level, fields)
+
+    def debug(self, subsystem, text, **fields):
+        self.message(subsystem, EVENT_LEVEL_DEBUG, text, **fields)
+
+    def info(self, subsystem, text, **fields):
+        self.message(subsystem, EVENT_LEVEL_INFO, text, **fields)
+
+    def warning(self, subsystem, text, **fields):
+        self.message(subsystem, EVENT_LEVEL_WARNING, text, **fields)
+
+    def error(self, subsystem, text, **fields):
+        self.message(subsystem, EVENT_LEVEL_ERROR, text, **fields)
+
+    def bus_transaction(self, port, function, address, count=None, duration_ms=None, ok=True, error=None):
+        """
+        Yksi Modbus-kehys. Onnistuneet DEBUG-, epäonnistuneet
+        WARNING-tasolla.
+        """
+        level = EVENT_LEVEL_DEBUG if ok else EVENT_LEVEL_WARNING
+
+        if level < self.levels.get(EVENT_SUBSYSTEM_BUS, self.default_level):
+            return
+
+        fields = {
+            "port": port,
+            "function": function,
+            "address": address,
+            "count": count,
+            "duration_ms": round(duration_ms, 2) if duration_ms is not None else None,
+            "ok": ok,
+        }
+
+        if error:
+            fields["error"] = error
+
+        self.emit(EVENT_SUBSYSTEM_BUS, EVENT_TYPE_BUS_TRANSACTION, level, fields)
+
+    def status_transition(self, station_id, previous_status, status, **fields):
+        fields["station_id"] = station_id
+        fields["previous"] = previous_status
+        fields["status"] = status
+        self.emit(EVENT_SUBSYSTEM_STATION, EVENT_TYPE_STATUS_TRANSITION, EVENT_LEVEL_INFO, fields)
+
+    def result(self, station_id, **fields):
+        fields["station_id"] = station_id
+        self.emit(EVENT_SUBSYSTEM_STATION, EVENT_TYPE_RESULT, EVENT_LEVEL_INFO, fields)
+
+    def jig_phase(self, station_id, previous_phase, phase, **fields):
+        fields["station_id"] = station_id
+        fields["previous"] = previous_phase
+        fields["phase"] = phase
+        self.emit(EVENT_SUBSYSTEM_JIG, EVENT_TYPE_JIG_PHASE, EVENT_LEVEL_INFO, fields)
+
+    def get_statistics(self):
+        statistics = dict(self.statistics)
+        statistics["queue_length"] = len(self.queue)
+        statistics["path"] = self.get_path()
+        statistics["file_size"] = self.file_size
+        return statistics
+
+    # ------------------------------------------------------------
+    # Kirjoitussäie
+    # ------------------------------------------------------------
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self.wake_event.wait(EVENT_LOG_FLUSH_INTERVAL_S)
+            self.wake_event.clear()
+            self._write_pending()
+
+        self._write_pending()
+
+    def _write_pending(self):
+        lines = []
+
+        while self.queue:
+            try:
+                timestamp, subsystem, event_type, level, fields = self.queue.popleft()
+            except IndexError:
+                break
+
+            time_text = datetime.fromtimestamp(timestamp).isoformat(timespec="milliseconds")
+            level_name = EVENT_LEVEL_NAMES.get(level, str(level))
+
+            record = {
+                "time": time_text,
+                "level": level_name,
+                "subsystem": subsystem,
+                "type": event_type,
+            }
+            record.update(fields)
+
+            try:
+                lines.append(json.dumps(record, ensure_ascii=False, default=str))
+            except Exception as e:
+                lines.append(json.dumps({
+                    "time": time_text,
+                    "level": level_name,
+                    "subsystem": subsystem,
+                    "type": event_type,
+                    "error": f"tapahtuman muunto epäonnistui: {e}",
+                }))
+
+            if self._is_console_event(event_type, level):
+                self._print_console(time_text, subsystem, event_type, fields)
+
+            if len(lines) >= EVENT_LOG_WRITE_BATCH_LINES:
+                self._write_lines(lines)
+                lines = []
+
+        if lines:
+            self._write_lines(lines)
+
+    def _is_console_event(self, event_type, level):
+        if level < self.console_level:
+            return False
+
+        return event_type == EVENT_TYPE_MESSAGE or level >= EVENT_LEVEL_WARNING
+
+    def _print_console(self, time_text, subsystem, event_type, fields):
+        if event_type == EVENT_TYPE_MESSAGE:
+            text = fields.get("text", "")
+        else:
+            text = f"{event_type} {fields}"
+
+        # Ennen start()-kutsua tulostetaan kuten ennenkin, ilman etuliitettä.
+        if time_text is None:
+            print(text)
+            return
+
+        print(f"{time_text[11:]} [{subsystem}] {text}")
+
+    def _write_lines(self, lines):
+        if not self._ensure_file():
+            self.statistics["dropped"] += len(lines)
+            return
+
+        data = "\n".join(lines) + "\n"
+
+        try:
+            self.file.write(data)
+            self.file.flush()
+        except Exception as e:
+            self.statistics["write_errors"] += 1
+            print(f"Tapahtumalokin kirjoitus epäonnistui: {e}")
+            self._close_file()
+            self.open_failed_at = time.monotonic()
+            return
+
+        self.file_size += len(data.encode("utf-8"))
+        self.statistics["written"] += len(lines)
+
+        if self.file_size >= EVENT_LOG_MAX_BYTES:
+            self._rotate()
+
+    def _ensure_file(self):
+        if self.file is not None:
+            return True
+
+        if self.open_failed_at is not None and time.monotonic() - self.open_failed_at < EVENT_LOG_REOPEN_INTERVAL_S:
+            return False
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self.file = open(self.get_path(), "a", encoding="utf-8")
+            self.file_size = self.file.tell()
+            self.open_failed_at = None
+            return True
+
+        except Exception as e:
+            self.file = None
+            self.open_failed_at = time.monotonic()
+            print(f"Tapahtumalokin avaus epäonnistui ({self.get_path()}): {e}")
+            return False
+
+    def _close_file(self):
+        if self.file is None:
+            return
+
+        try:
+            self.file.close()
+        except Exception:
+            pass
+
+        self.file = None
+
+    def _rotate(self):
+        self._close_file()
+
+        base, extension = os.path.splitext(self.get_path())
+
+        try:
+            for index in range(EVENT_LOG_BACKUP_COUNT - 1, 0, -1):
+                source = f"{base}.{index}{extension}"
+
+                if os.path.exists(source):
+                    os.replace(source, f"{base}.{index + 1}{extension}")
+
+            os.replace(self.get_path(), f"{base}.1{extension}")
+            self.statistics["rotations"] += 1
+
+        except Exception as e:
+            print(f"Tapahtumalokin kierrätys epäonnistui: {e}")
+
+        self.file_size = 0
+
+
+# Sovelluksen yhteinen loki. MainWindow käynnistää ja sulkee sen.
+event_log = EventLog()
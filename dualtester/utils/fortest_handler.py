@@ -1,4 +1,6 @@
 # utils/fortest_handler.py
+import time
+
 from config.fortest_config import (
     FORTEST_START_TEST_COIL,
     FORTEST_ABORT_TEST_COIL,
@@ -7,9 +9,58 @@ from config.fortest_config import (
     FORTEST_RESULTS_REGISTER,
     FORTEST_RESULTS_REGISTER_COUNT,
     FORTEST_PROGRAM_REGISTER,
+    FORTEST_PROGRAM_VERIFY_ATTEMPTS,
+    FORTEST_PROGRAM_VERIFY_INTERVAL_S,
+    FORTEST_STATUS_WORD_PROGRAM,
+    FORTEST_PROGRAM_PARAM_READ_COUNT,
+    FORTEST_PROGRAM_NAME_REGISTER_COUNT,
+    FORTEST_PROGRAM_FIRST_ID,
+    FORTEST_PROGRAM_LAST_ID,
 )
 
 from utils.modbus_handler import ModbusHandler
+from utils.fortest_program_table import (
+    decode_program_name,
+    get_program_name_address,
+    get_program_param_address,
+    plan_program_param_reads,
+    read_program_raw,
+)
+from utils.event_log import event_log, EVENT_SUBSYSTEM_FORTEST
+
+
+class ForTestStatusAndResults:
+    """
+    Samalla worker-kutsulla luetut status- ja tulosalueet.
+
+    status ja results ovat pymodbus-vastauksia tai None, kuten
+    read_status()- ja read_results()-metodeilla erikseen luettuna.
+    """
+
+    def __init__(self, status=None, results=None):
+        self.status = status
+        self.results = results
+
+
+class ForTestProgramChange:
+    """
+    Ohjelmanvaihdon tulos.
+
+    requested: kirjoitettu ohjelma
+    confirmed: statusalueesta luettu ohjelma tai None
+    latency_ms: kirjoituksesta vahvistukseen (tai luopumiseen)
+    """
+
+    def __init__(self, requested, written=False, confirmed=None, attempts=0, latency_ms=0.0):
+        self.requested = requested
+        self.written = written
+        self.confirmed = confirmed
+        self.attempts = attempts
+        self.latency_ms = latency_ms
+
+    @property
+    def is_confirmed(self):
+        return self.written and self.confirmed == self.requested
 
 
 class ForTestHandler:
@@ -23,6 +74,42 @@ class ForTestHandler:
         """Vaihda ForTestin aktiivinen ohjelma."""
         return self.modbus.write_register(FORTEST_PROGRAM_REGISTER, program_number)
 
+    def write_and_verify_program(self, program_number):
+        """
+        Vaihda ohjelma ja odota, että statusalue näyttää uuden ohjelman.
+
+        Kirjoitus ja vahvistusluvut tehdään samassa worker-kutsussa, joten
+        väliin ei jonoudu muita ForTest-operaatioita.
+        """
+        started = time.monotonic()
+        change = ForTestProgramChange(program_number)
+
+        response = self.write_program(program_number)
+        change.written = bool(response) and not (
+            hasattr(response, "isError") and response.isError()
+        )
+
+        while change.written and change.attempts < FORTEST_PROGRAM_VERIFY_ATTEMPTS:
+            if change.attempts:
+                time.sleep(FORTEST_PROGRAM_VERIFY_INTERVAL_S)
+
+            change.attempts += 1
+            registers = self._read_registers(
+                FORTEST_STATUS_REGISTER,
+                FORTEST_STATUS_REGISTER_COUNT,
+            )
+
+            if registers is None:
+                continue
+
+            change.confirmed = registers[FORTEST_STATUS_WORD_PROGRAM]
+
+            if change.confirmed == program_number:
+                break
+
+        change.latency_ms = (time.monotonic() - started) * 1000.0
+        return change
+
     def start_test(self):
         """Käynnistä ForTest-testi."""
         return self.modbus.write_coil(FORTEST_START_TEST_COIL, True)
@@ -38,25 +125,103 @@ class ForTestHandler:
             FORTEST_STATUS_REGISTER_COUNT,
         )
 
-    def read_results(self):
+    def read_results(self, chained=False):
         """Lue ForTest-testitulosten alue."""
         return self.modbus.read_holding_registers(
             FORTEST_RESULTS_REGISTER,
             FORTEST_RESULTS_REGISTER_COUNT,
+            chained=chained,
+        )
+
+    def read_status_and_results(self):
+        """
+        Lue status- ja tulosalue peräkkäin samassa worker-kutsussa.
+
+        0x0030 ja 0x0040 ovat ForTestin erillisiä komento-osoitteita,
+        eivät yhtenäistä muistia, joten niitä ei voi lukea yhdellä
+        0x0030-0x005F-luvulla. Tulosalue luetaan heti statuksen perään,
+        jotta tulos on käytettävissä samalla kierroksella, jolla testin
+        päättyminen huomataan.
+        """
+        status = self.read_status()
+
+        if status is None or (hasattr(status, "isError") and status.isError()):
+            return ForTestStatusAndResults(status=status)
+
+        # chained: väylätallenteen toisto tunnistaa parin yhdeksi kutsuksi.
+        return ForTestStatusAndResults(
+            status=status,
+            results=self.read_results(chained=True),
         )
 
+    def _read_registers(self, address, count):
+        response = self.modbus.read_holding_registers(address, count)
+
+        if response is None or (hasattr(response, "isError") and response.isError()):
+            return None
+
+        registers = getattr(response, "registers", None)
+
+        if not registers or len(registers) < count:
+            return None
+
+        return registers
+
+    def plan_program_table(self, program_ids=None):
+        """
+        Ohjelmataulukon haun parametrilohkot (address, count, [program_id, ...]).
+        """
+        if program_ids is None:
+            program_ids = range(FORTEST_PROGRAM_FIRST_ID, FORTEST_PROGRAM_LAST_ID + 1)
+
+        return plan_program_param_reads(program_ids)
+
+    def read_program_block(self, address, count, block_ids, program_table):
+        """
+        Lue yhden parametrilohkon ohjelmat nimineen program_tableen.
+
+        Nimet luetaan yksi ohjelma kerrallaan. Epäonnistunut lohko ei
+        keskeytä hakua; sen ohjelmat lisätään failed_ids-listaan.
+        """
+        registers = self._read_registers(address, count)
+
+        if registers is None:
+            program_table.failed_ids.extend(block_ids)
+            return
+
+        for program_id in block_ids:
+            offset = get_program_param_address(program_id) - address
+            words = registers[offset:offset + FORTEST_PROGRAM_PARAM_READ_COUNT]
+
+            program = {"id": program_id, "raw": read_program_raw(words)}
+
+            name_registers = self._read_registers(
+                get_program_name_address(program_id),
+                FORTEST_PROGRAM_NAME_REGISTER_COUNT,
+            )
+
+            if name_registers is None:
+                program_table.missing_names.append(program_id)
+            else:
+                program["name"] = decode_program_name(name_registers)
+
+            program_table.programs.append(program)
+
 
 class DummyForTestHandler:
     def write_program(self, program_number):
-        print(f"DummyForTest: Ohjelma vaihdettu {program_number} (ei oikeaa laitetta)")
+        event_log.info(EVENT_SUBSYSTEM_FORTEST, f"DummyForTest: Ohjelma vaihdettu {program_number} (ei oikeaa laitetta)")
         return True
 
+    def write_and_verify_program(self, program_number):
+        return ForTestProgramChange(program_number)
+
     def start_test(self):
-        print("DummyForTest: Testi käynnistetty (ei oikeaa laitetta)")
+        event_log.info(EVENT_SUBSYSTEM_FORTEST, "DummyForTest: Testi käynnistetty (ei oikeaa laitetta)")
         return True
 
     def abort_test(self):
-        print("DummyForTest: Testi pysäytetty (ei oikeaa laitetta)")
+        event_log.info(EVENT_SUBSYSTEM_FORTEST, "DummyForTest: Testi pysäytetty (ei oikeaa laitetta)")
         return True
 
     def read_status(self):
@@ -64,3 +229,12 @@ class DummyForTestHandler:
 
     def read_results(self):
         return None
+
+    def read_status_and_results(self):
+        return None
+
+    def plan_program_table(self, program_ids=None):
+        return None
+
+    def read_program_block(self, address, count, block_ids, program_table):
+        pass
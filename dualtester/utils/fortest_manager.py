@@ -1,6 +1,13 @@
 # utils/fortest_manager.py
 from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot, QMetaObject, Qt, Q_ARG, QTimer
-from utils.fortest_handler import ForTestHandler
+from config.fortest_config import (
+    FORTEST_STATUS_WORD_STATUS,
+    FORTEST_PROGRAM_TABLE_BLOCKS_PER_CHUNK,
+    FORTEST_PROGRAM_TABLE_ABORT_STATUSES,
+)
+from utils.fortest_handler import ForTestHandler, ForTestProgramChange
+from utils.fortest_program_table import ForTestProgramTable
+from utils.event_log import event_log, EVENT_SUBSYSTEM_FORTEST
 
 
 class ForTestWorker(QObject):
@@ -8,26 +15,42 @@ class ForTestWorker(QObject):
 
     def __init__(self, port='/dev/ttyUSB1', baudrate=19200):
         super().__init__()
+
+        # Kesken oleva ohjelmataulukon haku: lukematta olevat lohkot ja
+        # tähän mennessä luetut ohjelmat. None = ei hakua.
+        self.program_table_reads = None
+        self.program_table = None
+
+        # Jonossa on enintään yksi palan lukukutsu, myös keskeytetyn
+        # haun jäljiltä.
+        self.program_table_chunk_queued = False
+
         try:
             self.fortest = ForTestHandler(port=port, baudrate=baudrate)
         except Exception as e:
-            print(f"ForTest-yhteys epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_FORTEST, f"ForTest-yhteys epäonnistui: {e}")
             from utils.fortest_handler import DummyForTestHandler
             self.fortest = DummyForTestHandler()
             QTimer.singleShot(0, lambda: self.resultReady.emit(False, 999, "ForTest-yhteys epäonnistui - laite ei kytkettynä"))
 
     @pyqtSlot(int)
     def write_program(self, program_number):
-        """Vaihda ForTest-ohjelma taustasäikeessä."""
+        """Vaihda ForTest-ohjelma ja vahvista vaihto taustasäikeessä."""
         try:
-            result = self.fortest.write_program(program_number)
+            result = self.fortest.write_and_verify_program(program_number)
             self.resultReady.emit(result, 5, "")  # 5 = ohjelmanvaihto
         except Exception as e:
-            self.resultReady.emit(False, 5, f"Virhe ohjelman vaihdossa: {str(e)}")
+            self.resultReady.emit(
+                ForTestProgramChange(program_number),
+                5,
+                f"Virhe ohjelman vaihdossa: {str(e)}",
+            )
 
     @pyqtSlot()
     def start_test(self):
         """Käynnistä testi taustasäikeessä."""
+        self._abort_program_table("testi käynnistettiin")
+
         try:
             result = self.fortest.start_test()
             self.resultReady.emit(result, 1, "")  # 1 = käynnistys
@@ -48,6 +71,7 @@ class ForTestWorker(QObject):
         """Lue testin tila taustasäikeessä."""
         try:
             result = self.fortest.read_status()
+            self._check_program_table_status(result)
             self.resultReady.emit(result, 3, "")  # 3 = tilan luku
         except Exception as e:
             self.resultReady.emit(None, 3, f"Virhe testin tilan lukemisessa: {str(e)}")
@@ -61,13 +85,117 @@ class ForTestWorker(QObject):
         except Exception as e:
             self.resultReady.emit(None, 4, f"Virhe testin tulosten lukemisessa: {str(e)}")
 
+    @pyqtSlot()
+    def read_status_and_results(self):
+        """Lue tila ja tulokset samassa taustasäikeen kutsussa."""
+        try:
+            result = self.fortest.read_status_and_results()
+            self._check_program_table_status(getattr(result, "status", None))
+            self.resultReady.emit(result, 6, "")  # 6 = tila + tulokset
+        except Exception as e:
+            self.resultReady.emit(None, 6, f"Virhe testin tilan lukemisessa: {str(e)}")
+
+    @pyqtSlot()
+    def read_program_table(self):
+        """
+        Aloita laitteen ohjelmataulukon haku.
+
+        Haku luetaan FORTEST_PROGRAM_TABLE_BLOCKS_PER_CHUNK lohkon
+        paloina. Jokainen pala jonotetaan workerin jonon perään, joten
+        aseman statusluvut ja START/STOP eivät odota koko hakua. Testin
+        käynnistys tai aktiivinen tila statusluvussa keskeyttää haun.
+        """
+        if self.program_table_reads is not None:
+            return
+
+        try:
+            reads = self.fortest.plan_program_table()
+        except Exception as e:
+            self.resultReady.emit(None, 7, f"Virhe ohjelmien haussa: {str(e)}")
+            return
+
+        if reads is None:
+            self.resultReady.emit(None, 7, "")  # 7 = ohjelmataulukon luku
+            return
+
+        self.program_table_reads = list(reads)
+        self.program_table = ForTestProgramTable()
+        self._queue_program_table_chunk()
+
+    @pyqtSlot()
+    def read_program_table_chunk(self):
+        """Lue ohjelmataulukon seuraava pala."""
+        self.program_table_chunk_queued = False
+
+        if self.program_table_reads is None:
+            return
+
+        chunk = self.program_table_reads[:FORTEST_PROGRAM_TABLE_BLOCKS_PER_CHUNK]
+        del self.program_table_reads[:FORTEST_PROGRAM_TABLE_BLOCKS_PER_CHUNK]
+
+        try:
+            for address, count, block_ids in chunk:
+                self.fortest.read_program_block(address, count, block_ids, self.program_table)
+        except Exception as e:
+            self._finish_program_table(None, f"Virhe ohjelmien haussa: {str(e)}")
+            return
+
+        if self.program_table_reads:
+            self._queue_program_table_chunk()
+            return
+
+        self._finish_program_table(self.program_table, "")
+
+    def _queue_program_table_chunk(self):
+        if self.program_table_chunk_queued:
+            return
+
+        self.program_table_chunk_queued = True
+        QMetaObject.invokeMethod(
+            self,
+            "read_program_table_chunk",
+            Qt.QueuedConnection,
+        )
+
+    def _finish_program_table(self, program_table, error_msg):
+        self.program_table_reads = None
+        self.program_table = None
+        self.resultReady.emit(program_table, 7, error_msg)  # 7 = ohjelmataulukon luku
+
+    def _abort_program_table(self, reason):
+        if self.program_table_reads is None:
+            return
+
+        event_log.warning(EVENT_SUBSYSTEM_FORTEST, f"Ohjelmien haku keskeytettiin: {reason}")
+        self._finish_program_table(None, f"ohjelmien haku keskeytettiin: {reason}")
+
+    def _check_program_table_status(self, status):
+        if self.program_table_reads is None:
+            return
+
+        registers = getattr(status, "registers", None)
+
+        if registers and len(registers) > FORTEST_STATUS_WORD_STATUS:
+            if registers[FORTEST_STATUS_WORD_STATUS] in FORTEST_PROGRAM_TABLE_ABORT_STATUSES:
+                self._abort_program_table("testi on käynnissä")
+
 
 class ForTestManager(QObject):
+    """
+    ForTest-laitteen taustasäiemanageri.
+
+    Status- ja tuloslukuja ei jonoteta uudelleen, ennen kuin edellinen
+    saman tyypin luku on valmis. Näin tiheä pollaus ei kasvata
+    worker-säikeen jonoa, jos laite vastaa hitaasti.
+    """
+
     resultReady = pyqtSignal(object, int, str)  # tulos, operaatiokoodi, virheviesti
 
     def __init__(self, port='/dev/ttyUSB1', baudrate=19200):
         super().__init__()
 
+        self.pending_reads = set()
+
         self.thread = QThread()
         self.worker = ForTestWorker(port, baudrate)
 
@@ -78,6 +206,7 @@ class ForTestManager(QObject):
 
     def handle_result(self, result, op_code, error_msg):
         """Välitä tulos eteenpäin."""
+        self.pending_reads.discard(op_code)
         self.resultReady.emit(result, op_code, error_msg)
 
     def write_program(self, program_number):
@@ -107,6 +236,10 @@ class ForTestManager(QObject):
 
     def read_status(self):
         """Lue testin tila taustasäikeessä."""
+        if 3 in self.pending_reads:
+            return
+
+        self.pending_reads.add(3)
         QMetaObject.invokeMethod(
             self.worker,
             "read_status",
@@ -115,12 +248,40 @@ class ForTestManager(QObject):
 
     def read_results(self):
         """Lue testin tulokset taustasäikeessä."""
+        if 4 in self.pending_reads:
+            return
+
+        self.pending_reads.add(4)
         QMetaObject.invokeMethod(
             self.worker,
             "read_results",
             Qt.QueuedConnection,
         )
 
+    def read_status_and_results(self):
+        """Lue testin tila ja tulokset yhdellä taustasäikeen kutsulla."""
+        if 6 in self.pending_reads:
+            return
+
+        self.pending_reads.add(6)
+        QMetaObject.invokeMethod(
+            self.worker,
+            "read_status_and_results",
+            Qt.QueuedConnection,
+        )
+
+    def read_program_table(self):
+        """Lue laitteen ohjelmataulukko taustasäikeessä."""
+        if 7 in self.pending_reads:
+            return
+
+        self.pending_reads.add(7)
+        QMetaObject.invokeMethod(
+            self.worker,
+            "read_program_table",
+            Qt.QueuedConnection,
+        )
+
     def cleanup(self):
         """Siivoa resurssit."""
         self.thread.quit()
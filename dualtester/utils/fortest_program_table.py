@@ -0,0 +1,410 @@
+# utils/fortest_program_table.py
+from collections import Counter
+
+from config.fortest_config import (
+    FORTEST_PROGRAM_PARAM_BASE,
+    FORTEST_PROGRAM_PARAM_STRIDE,
+    FORTEST_PROGRAM_PARAM_WORDS,
+    FORTEST_PROGRAM_PARAM_READ_COUNT,
+    FORTEST_PARAM_KIND_OF_TEST,
+    FORTEST_PARAM_FILLING_PRESSURE,
+    FORTEST_PARAM_PRESSURE_TOLERANCE,
+    FORTEST_PARAM_KIND_OF_FILLING,
+    FORTEST_PARAM_FILLING_TIME,
+    FORTEST_PARAM_SETTLING_TIME,
+    FORTEST_PARAM_TEST_TIME,
+    FORTEST_PARAM_DISCHARGE_TIME,
+    FORTEST_PARAM_MEASUREMENT_TYPE,
+    FORTEST_PARAM_MAXIMUM_DECAY,
+    FORTEST_PARAM_PIECE_VOLUME,
+    FORTEST_PARAM_DECAY_OFFSET,
+    FORTEST_PROGRAM_NAME_BASE,
+    FORTEST_PROGRAM_NAME_REGISTER_COUNT,
+    FORTEST_MAX_READ_REGISTERS,
+)
+
+from utils.opta_register_poller import merge_register_ranges
+
+
+# ------------------------------------------------------------
+# Ohjelmataulukon koodaus
+# ------------------------------------------------------------
+
+# Ohjelmatiedostojen esitystavat asemittain. Asemien tiedostot on
+# tuotu eri työkaluilla, joten sama raakakoodi näkyy niissä eri tavoin:
+# - asema 1 (ForTest-dump): paine x10 mbar, Kind of test 0 ilman nimeä,
+#   mittaustapa 1 = cc/min
+# - asema 2 (PT8990): paine mbar sellaisenaan, Kind of test 0 = decay,
+#   mittaustapa 1 = paine/aika
+# Nämä ovat vain oletuksia tyhjälle välimuistille; olemassa olevasta
+# tiedostosta esitystapa päätellään infer_program_convention()-funktiolla.
+FORTEST_STATION_PROGRAM_CONVENTIONS = {
+    1: {
+        "pressure_divisor": 10,
+        "kind_of_test_names": {
+            7: "absolute",
+        },
+        "measurement_types": {
+            0: ("pressure", "Pa", "decay"),
+            1: ("cc_min", "cc/min", "flow"),
+        },
+    },
+    2: {
+        "pressure_divisor": 1,
+        "kind_of_test_names": {
+            0: "decay",
+            7: "absolute",
+        },
+        "measurement_types": {
+            0: ("pressure", "Pa", "decay"),
+            1: ("pressure_time", "Pa/s", "pressure/time"),
+        },
+    },
+}
+
+# raw-avain -> parametrin rekisterisiirtymä
+FORTEST_PROGRAM_RAW_FIELDS = (
+    ("kind_of_test", FORTEST_PARAM_KIND_OF_TEST),
+    ("filling_pressure", FORTEST_PARAM_FILLING_PRESSURE),
+    ("pressure_tolerance_percent", FORTEST_PARAM_PRESSURE_TOLERANCE),
+    ("filling_attempts", FORTEST_PARAM_KIND_OF_FILLING),
+    ("filling_time_x10_s", FORTEST_PARAM_FILLING_TIME),
+    ("settling_time_x10_s", FORTEST_PARAM_SETTLING_TIME),
+    ("test_time_x10_s", FORTEST_PARAM_TEST_TIME),
+    ("discharge_time_x10_s", FORTEST_PARAM_DISCHARGE_TIME),
+    ("measurement_type", FORTEST_PARAM_MEASUREMENT_TYPE),
+    ("maximum_decay_x10", FORTEST_PARAM_MAXIMUM_DECAY),
+    ("piece_volume_x10_cc", FORTEST_PARAM_PIECE_VOLUME),
+    ("decay_offset_x10", FORTEST_PARAM_DECAY_OFFSET),
+)
+
+
+def get_program_param_address(program_id):
+    return FORTEST_PROGRAM_PARAM_BASE + program_id * FORTEST_PROGRAM_PARAM_STRIDE
+
+
+def get_program_name_address(program_id):
+    return FORTEST_PROGRAM_NAME_BASE + program_id
+
+
+def plan_program_param_reads(program_ids, max_count=FORTEST_MAX_READ_REGISTERS):
+    """
+    Jakaa ohjelmien parametrialueet mahdollisimman pitkiksi luvuiksi.
+
+    Ohjelmien väliin jäävät rekisterit ovat saman ohjelman muita
+    TST-parametreja, joten ne voidaan lukea mukana. 125 rekisterin
+    rajalla yhteen lukuun mahtuu kahden ohjelman parametrit.
+
+    Palauttaa listan (address, count, [program_id, ...]).
+    """
+    program_ids = sorted(set(program_ids))
+
+    blocks = merge_register_ranges(
+        (
+            (get_program_param_address(program_id), FORTEST_PROGRAM_PARAM_READ_COUNT, 0)
+            for program_id in program_ids
+        ),
+        max_gap=FORTEST_PROGRAM_PARAM_STRIDE,
+        max_count=max_count,
+    )
+
+    reads = []
+
+    for address, count, _priority in blocks:
+        block_ids = [
+            program_id
+            for program_id in program_ids
+            if address <= get_program_param_address(program_id) < address + count
+        ]
+        reads.append((address, count, block_ids))
+
+    return reads
+
+
+def read_param_value(words, offset):
+    """
+    Parametri kahdesta rekisteristä (HIGH, LOW) etumerkillisenä.
+    """
+    value = (words[offset] << 16) | words[offset + FORTEST_PROGRAM_PARAM_WORDS - 1]
+
+    if value & 0x80000000:
+        value -= 0x100000000
+
+    return value
+
+
+def decode_program_name(registers):
+    """
+    Merkkijonorekisterit -> nimi. Kaksi merkkiä rekisterissä,
+    ensimmäinen ylemmässä tavussa. Nimi päättyy NUL-merkkiin.
+    """
+    data = bytearray()
+
+    for register in registers:
+        data.append((register >> 8) & 0xFF)
+        data.append(register & 0xFF)
+
+    return bytes(data).split(b"\x00", 1)[0].decode("latin-1").strip()
+
+
+def write_param_value(words, offset, value):
+    """
+    read_param_value()-funktion vastapari: etumerkillinen arvo kahteen
+    rekisteriin (HIGH, LOW).
+    """
+    value = int(value) & 0xFFFFFFFF
+    words[offset] = value >> 16
+    words[offset + FORTEST_PROGRAM_PARAM_WORDS - 1] = value & 0xFFFF
+
+
+def encode_program_name(name, register_count=FORTEST_PROGRAM_NAME_REGISTER_COUNT):
+    """
+    Nimi -> merkkijonorekisterit (decode_program_name()-funktion
+    vastapari). Liian pitkä nimi katkaistaan, loppu täytetään NULilla.
+    """
+    data = (name or "").encode("latin-1", "replace")[:register_count * 2]
+    data = data.ljust(register_count * 2, b"\x00")
+
+    return [(data[index] << 8) | data[index + 1] for index in range(0, len(data), 2)]
+
+
+class ForTestProgramConvention:
+    """
+    Ohjelmatiedoston tapa esittää laitteen raakakoodit.
+
+    pressure_divisor: pressure_mbar = raw filling_pressure / pressure_divisor
+    kind_of_test_names: Kind of test -koodi -> teksti
+    measurement_types: mittaustapakoodi -> (measurement_type, yksikkö,
+    max_decay.mode)
+
+    Tuntematon koodi esitetään muodossa "raw_<koodi>".
+    """
+
+    def __init__(self, pressure_divisor=10, kind_of_test_names=None, measurement_types=None):
+        self.pressure_divisor = pressure_divisor
+        self.kind_of_test_names = dict(kind_of_test_names or {})
+        self.measurement_types = dict(measurement_types or {})
+
+    def decode_pressure(self, raw_value):
+        if self.pressure_divisor == 1:
+            return raw_value
+
+        return raw_value / self.pressure_divisor
+
+    def encode_pressure(self, pressure):
+        return round(float(pressure or 0) * self.pressure_divisor)
+
+    def decode_kind_of_test(self, code):
+        return self.kind_of_test_names.get(code, f"raw_{code}")
+
+    def encode_kind_of_test(self, name):
+        for code, code_name in self.kind_of_test_names.items():
+            if code_name == name:
+                return code
+
+        return _parse_raw_code(name)
+
+    def decode_measurement(self, code):
+        return self.measurement_types.get(
+            code,
+            (f"raw_{code}", "", f"raw_{code}"),
+        )
+
+    def encode_measurement(self, measurement_type):
+        for code, (code_type, _unit, _mode) in self.measurement_types.items():
+            if code_type == measurement_type:
+                return code
+
+        return _parse_raw_code(measurement_type)
+
+
+def _parse_raw_code(text):
+    text = str(text or "")
+
+    if text.startswith("raw_") and text[4:].lstrip("-").isdigit():
+        return int(text[4:])
+
+    return 0
+
+
+def get_station_program_convention(station_id):
+    return ForTestProgramConvention(**FORTEST_STATION_PROGRAM_CONVENTIONS.get(station_id, {}))
+
+
+def infer_program_convention(programs, base=None):
+    """
+    Päättele esitystapa ohjelmatiedoston raw-arvojen ja tekstiarvojen
+    pareista.
+
+    Jokaiselle koodille valitaan tiedoston yleisin esitys. Koodit, joita
+    tiedostossa ei ole, ja paineen jakaja ilman yhtään paineparia tulevat
+    base-esitystavasta.
+    """
+    base = base or ForTestProgramConvention()
+
+    divisors = Counter()
+    kind_names = {}
+    measurements = {}
+
+    for program in programs:
+        raw = program.get("raw") if isinstance(program, dict) else None
+
+        if not isinstance(raw, dict):
+            continue
+
+        raw_pressure = raw.get("filling_pressure")
+        pressure = program.get("pressure_mbar")
+
+        if raw_pressure and pressure:
+            ratio = raw_pressure / float(pressure)
+
+            if ratio >= 1 and abs(ratio - round(ratio)) < 1e-6:
+                divisors[int(round(ratio))] += 1
+
+        kind_code = raw.get("kind_of_test")
+
+        if isinstance(kind_code, int) and program.get("kind_of_test"):
+            kind_names.setdefault(kind_code, Counter())[program["kind_of_test"]] += 1
+
+        measurement_code = raw.get("measurement_type")
+        max_decay = program.get("max_decay") or {}
+
+        if isinstance(measurement_code, int) and program.get("measurement_type"):
+            measurement = (program["measurement_type"], max_decay.get("unit", ""), max_decay.get("mode", ""))
+            measurements.setdefault(measurement_code, Counter())[measurement] += 1
+
+    kind_of_test_names = dict(base.kind_of_test_names)
+    kind_of_test_names.update({
+        code: counts.most_common(1)[0][0]
+        for code, counts in kind_names.items()
+    })
+
+    measurement_types = dict(base.measurement_types)
+    measurement_types.update({
+        code: counts.most_common(1)[0][0]
+        for code, counts in measurements.items()
+    })
+
+    return ForTestProgramConvention(
+        pressure_divisor=divisors.most_common(1)[0][0] if divisors else base.pressure_divisor,
+        kind_of_test_names=kind_of_test_names,
+        measurement_types=measurement_types,
+    )
+
+
+def encode_program(program, convention=None):
+    """
+    Ohjelmatiedoston ohjelma -> parametrirekisterit (decode_program()-
+    funktion vastapari). Käyttää raw-arvoja, jos ne ovat tallessa.
+    """
+    convention = convention or ForTestProgramConvention()
+    raw = program.get("raw") or {}
+    max_decay = program.get("max_decay") or {}
+
+    values = {
+        "kind_of_test": convention.encode_kind_of_test(program.get("kind_of_test")),
+        "filling_pressure": convention.encode_pressure(program.get("pressure_mbar")),
+        "pressure_tolerance_percent": program.get("pressure_tolerance_percent") or 0,
+        "filling_attempts": program.get("filling_attempts") or 0,
+        "filling_time_x10_s": round(float(program.get("fill_time_s") or 0) * 10),
+        "settling_time_x10_s": round(float(program.get("settle_time_s") or 0) * 10),
+        "test_time_x10_s": round(float(program.get("test_time_s") or 0) * 10),
+        "discharge_time_x10_s": round(float(program.get("discharge_time_s") or 0) * 10),
+        "measurement_type": convention.encode_measurement(program.get("measurement_type")),
+        "maximum_decay_x10": round(float(max_decay.get("value") or 0) * 10),
+        "piece_volume_x10_cc": round(float(program.get("piece_volume_ml") or 0) * 10),
+        "decay_offset_x10": round(float(program.get("offset") or 0) * 10),
+    }
+
+    words = [0] * FORTEST_PROGRAM_PARAM_READ_COUNT
+
+    for key, offset in FORTEST_PROGRAM_RAW_FIELDS:
+        write_param_value(words, offset, raw.get(key, values[key]))
+
+    return words
+
+
+def read_program_raw(words):
+    """
+    Ohjelman parametrirekisterit raw-arvoiksi. words alkaa ohjelman
+    Kind of test -parametrista.
+    """
+    return {
+        key: read_param_value(words, offset)
+        for key, offset in FORTEST_PROGRAM_RAW_FIELDS
+    }
+
+
+def decode_program(program_id, raw, name=None, convention=None):
+    """
+    Raw-arvot ohjelmatiedoston muotoon.
+
+    Ilman nimeä palautettavassa ohjelmassa ei ole name-avainta, jolloin
+    välimuistin nimi säilyy.
+    """
+    convention = convention or ForTestProgramConvention()
+    measurement_type, unit, mode = convention.decode_measurement(raw["measurement_type"])
+
+    program = {"id": program_id}
+
+    if name is not None:
+        program["name"] = name
+
+    program.update({
+        "pressure_mbar": convention.decode_pressure(raw["filling_pressure"]),
+        "fill_time_s": raw["filling_time_x10_s"] / 10,
+        "settle_time_s": raw["settling_time_x10_s"] / 10,
+        "test_time_s": raw["test_time_x10_s"] / 10,
+        "discharge_time_s": raw["discharge_time_x10_s"] / 10,
+        "max_decay": {
+            "value": raw["maximum_decay_x10"] / 10,
+            "unit": unit,
+            "mode": mode,
+        },
+        "piece_volume_ml": raw["piece_volume_x10_cc"] / 10,
+        "kind_of_test": convention.decode_kind_of_test(raw["kind_of_test"]),
+        "pressure_tolerance_percent": raw["pressure_tolerance_percent"],
+        "filling_attempts": raw["filling_attempts"],
+        "measurement_type": measurement_type,
+        "offset": raw["decay_offset_x10"] / 10,
+        "offset_unit": unit,
+        "raw": dict(raw),
+    })
+
+    return program
+
+
+def program_differs(cached, downloaded):
+    """
+    Vertaa vain laitteelta luettuja kenttiä. Paikalliset kentät
+    (description, raw-osoitteet) eivät tee ohjelmasta muuttunutta.
+    """
+    for key, value in downloaded.items():
+        if key == "raw":
+            cached_raw = cached.get("raw") or {}
+
+            for raw_key, raw_value in value.items():
+                if cached_raw.get(raw_key) != raw_value:
+                    return True
+
+        elif cached.get(key) != value:
+            return True
+
+    return False
+
+
+class ForTestProgramTable:
+    """
+    Laitteelta luettu ohjelmataulukko.
+
+    programs: {"id", "raw", "name"} id-järjestyksessä; nimi puuttuu, jos
+              sitä ei saatu luettua. ProgramManager muuntaa raw-arvot
+              välimuistin esitystapaan decode_program()-funktiolla.
+    failed_ids: ohjelmat, joiden parametreja ei saatu luettua
+    missing_names: ohjelmat, joiden nimeä ei saatu luettua
+    """
+
+    def __init__(self, programs=None, failed_ids=None, missing_names=None):
+        self.programs = programs or []
+        self.failed_ids = failed_ids or []
+        self.missing_names = missing_names or []
@@ -0,0 +1,310 @@
+# utils/gui_stall_watchdog.py
+import os
+import sys
+import threading
+import time
+import traceback
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+from utils.event_log import event_log, EVENT_SUBSYSTEM_UI
+from utils.rolling_histogram import RollingHistogram
+
+
+# ------------------------------------------------------------
+# GUI-säikeen vahtikoira
+# ------------------------------------------------------------
+
+# GUI-säikeen sydämenlyönti. Ajastin ei tee muuta kuin kirjaa ajan.
+GUI_STALL_HEARTBEAT_INTERVAL_MS = 100
+
+# Sydämenlyönnin myöhästyminen, joka lasketaan jumiksi.
+GUI_STALL_THRESHOLD_MS = 250
+
+# Vahtisäikeen tarkistusväli. Jumin aikana GUI-säikeen pino otetaan
+# talteen jokaisella tarkistuksella (näytteistys).
+GUI_STALL_SAMPLE_INTERVAL_S = 0.05
+
+# Talteen otettavan pinon syvyys (sisimmät kehykset).
+GUI_STALL_STACK_DEPTH = 20
+
+# Saman kutsupaikan koko pino tulostetaan enintään näin usein.
+GUI_STALL_STACK_LOG_INTERVAL_S = 60.0
+
+GUI_STALL_HISTOGRAM_EDGES_MS = (
+    250,
+    500,
+    1000,
+    2000,
+    5000,
+    10000,
+    30000,
+)
+
+GUI_STALL_HISTOGRAM_WINDOW = 100
+
+# Kutsupaikkojen enimmäismäärä; loput kirjataan yhteen riviin.
+GUI_STALL_MAX_CALL_SITES = 50
+GUI_STALL_OTHER_CALL_SITE = "(muut)"
+
+# Kun GUI-säie on Qt:n omassa koodissa (asettelu, piirto), pinossa on
+# vain tapahtumasilmukan kutsu.
+GUI_STALL_EVENT_LOOP_CALL_SITE = "(Qt-tapahtumasilmukka)"
+
+GUI_STALL_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class GuiStallWatchdog(QObject):
+    """
+    Tunnistaa GUI-tapahtumasilmukan jumit ja kertoo, missä koodissa
+    GUI-säie oli jumin aikana.
+
+    - GUI-säikeen QTimer päivittää sydämenlyönnin aikaleiman
+    - erillinen säie tarkistaa aikaleiman GUI_STALL_SAMPLE_INTERVAL_S
+      välein; kun lyönti on myöhässä yli kynnyksen, GUI-säikeen pino
+      luetaan sys._current_frames():lla
+    - jumin päättyessä kesto kirjataan kutsupaikalle, jossa pino oli
+      useimmiten (sisin projektin oma kehys)
+
+    Normaalitilassa kustannus on 10 ajastinta / s GUI-säikeessä ja
+    20 lukon ottoa / s vahtisäikeessä. Pinoja luetaan vain jumin aikana.
+    """
+
+    def __init__(self, parent=None, threshold_ms=GUI_STALL_THRESHOLD_MS,
+                 heartbeat_interval_ms=GUI_STALL_HEARTBEAT_INTERVAL_MS):
+        super().__init__(parent)
+
+        self.threshold_s = threshold_ms / 1000.0
+        self.heartbeat_interval_s = heartbeat_interval_ms / 1000.0
+        self.gui_thread_id = threading.get_ident()
+
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        # Jaettu vahtisäikeen kanssa (lock).
+        self.last_beat = time.monotonic()
+        self.stall = None
+
+        # Vain vahtisäie.
+        self.stack_logged_at = {}
+
+        # Vain GUI-säie.
+        self.call_sites = {}
+        self.statistics = {
+            "stalls": 0,
+            "stalled_ms": 0.0,
+            "max_stall_ms": 0.0,
+            "samples": 0,
+        }
+
+        self.heartbeat_timer = QTimer(self)
+        self.heartbeat_timer.setTimerType(Qt.PreciseTimer)
+        self.heartbeat_timer.setInterval(heartbeat_interval_ms)
+        self.heartbeat_timer.timeout.connect(self.beat)
+
+    # ------------------------------------------------------------
+    # Käynnistys
+    # ------------------------------------------------------------
+
+    def start(self):
+        if self.thread is not None:
+            return
+
+        with self.lock:
+            self.last_beat = time.monotonic()
+            self.stall = None
+
+        self.stop_event.clear()
+        self.heartbeat_timer.start()
+
+        self.thread = threading.Thread(
+            target=self._watch,
+            name="gui-stall-watchdog",
+            daemon=True,
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.heartbeat_timer.stop()
+        self.stop_event.set()
+
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def cleanup(self):
+        self.stop()
+
+    # ------------------------------------------------------------
+    # GUI-säie
+    # ------------------------------------------------------------
+
+    def beat(self):
+        now = time.monotonic()
+
+        with self.lock:
+            previous_beat = self.last_beat
+            self.last_beat = now
+            stall = self.stall
+            self.stall = None
+
+        if stall is None or stall["beat"] != previous_beat:
+            return
+
+        stall_ms = max(0.0, (now - previous_beat - self.heartbeat_interval_s) * 1000.0)
+        self._record_stall(stall, stall_ms)
+
+    def _record_stall(self, stall, stall_ms):
+        samples = stall["samples"]
+        call_site = max(samples, key=samples.get)
+
+        self.statistics["stalls"] += 1
+        self.statistics["stalled_ms"] += stall_ms
+        self.statistics["max_stall_ms"] = max(self.statistics["max_stall_ms"], stall_ms)
+        self.statistics["samples"] += sum(samples.values())
+
+        entry = self.call_sites.get(call_site)
+
+        if entry is None:
+            if len(self.call_sites) >= GUI_STALL_MAX_CALL_SITES:
+                call_site = GUI_STALL_OTHER_CALL_SITE
+                entry = self.call_sites.get(call_site)
+
+            if entry is None:
+                entry = {
+                    "stalls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "histogram": RollingHistogram(
+                        window=GUI_STALL_HISTOGRAM_WINDOW,
+                        edges_ms=GUI_STALL_HISTOGRAM_EDGES_MS,
+                    ),
+                }
+                self.call_sites[call_site] = entry
+
+        entry["stalls"] += 1
+        entry["total_ms"] += stall_ms
+        entry["max_ms"] = max(entry["max_ms"], stall_ms)
+        entry["histogram"].add(stall_ms)
+
+        event_log.warning(
+            EVENT_SUBSYSTEM_UI,
+            f"GUI-jumi {stall_ms:.0f} ms: {call_site}",
+            call_site=call_site,
+            stall_ms=round(stall_ms, 1),
+        )
+
+    # ------------------------------------------------------------
+    # Vahtisäie
+    # ------------------------------------------------------------
+
+    def _watch(self):
+        while not self.stop_event.wait(GUI_STALL_SAMPLE_INTERVAL_S):
+            with self.lock:
+                last_beat = self.last_beat
+
+            late_s = time.monotonic() - last_beat - self.heartbeat_interval_s
+
+            if late_s < self.threshold_s:
+                continue
+
+            frame = sys._current_frames().get(self.gui_thread_id)
+
+            if frame is None:
+                continue
+
+            try:
+                stack = traceback.extract_stack(frame, limit=GUI_STALL_STACK_DEPTH)
+            finally:
+                del frame
+
+            call_site = self._get_call_site(stack)
+            started = False
+
+            with self.lock:
+                # Lyönti ehti tulla pinon lukemisen aikana.
+                if self.last_beat != last_beat:
+                    continue
+
+                if self.stall is None or self.stall["beat"] != last_beat:
+                    self.stall = {"beat": last_beat, "samples": {}}
+                    started = True
+
+                samples = self.stall["samples"]
+                samples[call_site] = samples.get(call_site, 0) + 1
+
+            if started:
+                self._log_stack(call_site, stack, late_s)
+
+    def _get_call_site(self, stack):
+        """
+        Sisin projektin oma kehys muodossa "polku:rivi funktio".
+        """
+        own_file = os.path.abspath(__file__)
+
+        for frame in reversed(stack):
+            filename = os.path.abspath(frame.filename)
+
+            if filename == own_file or not filename.startswith(GUI_STALL_PROJECT_ROOT):
+                continue
+
+            call_site = f"{os.path.relpath(filename, GUI_STALL_PROJECT_ROOT)}:{frame.lineno} {frame.name}"
+
+            # Sisin kehys on exec_()-kutsu: Python-koodia ei ajossa.
+            if frame is stack[-1] and "exec" in (frame.line or ""):
+                return f"{GUI_STALL_EVENT_LOOP_CALL_SITE} {call_site}"
+
+            return call_site
+
+        return GUI_STALL_EVENT_LOOP_CALL_SITE
+
+    def _log_stack(self, call_site, stack, late_s):
+        now = time.monotonic()
+        logged_at = self.stack_logged_at.get(call_site)
+
+        if logged_at is not None and now - logged_at < GUI_STALL_STACK_LOG_INTERVAL_S:
+            return
+
+        self.stack_logged_at[call_site] = now
+
+        event_log.warning(
+            EVENT_SUBSYSTEM_UI,
+            f"GUI-säie jumissa {late_s * 1000.0:.0f} ms, kohta {call_site}:\n"
+            + "".join(traceback.format_list(stack)).rstrip(),
+            call_site=call_site,
+        )
+
+    # ------------------------------------------------------------
+    # Yhteenveto
+    # ------------------------------------------------------------
+
+    def get_summary(self):
+        """
+        {"stalls", "stalled_ms", "max_stall_ms", "samples", "threshold_ms",
+         "call_sites": [{"call_site", "stalls", "total_ms", "max_ms",
+                         "p50_ms", "p95_ms", "buckets"}, ...]}
+
+        Kutsupaikat on järjestetty jumiajan mukaan, suurin ensin.
+        """
+        call_sites = []
+
+        for call_site, entry in self.call_sites.items():
+            histogram = entry["histogram"].get_summary()
+
+            call_sites.append({
+                "call_site": call_site,
+                "stalls": entry["stalls"],
+                "total_ms": entry["total_ms"],
+                "max_ms": entry["max_ms"],
+                "p50_ms": histogram["p50_ms"],
+                "p95_ms": histogram["p95_ms"],
+                "buckets": histogram["buckets"],
+            })
+
+        call_sites.sort(key=lambda item: item["total_ms"], reverse=True)
+
+        summary = dict(self.statistics)
+        summary["threshold_ms"] = self.threshold_s * 1000.0
+        summary["call_sites"] = call_sites
+        return summary
@@ -1,6 +1,17 @@
 # utils/modbus_handler.py
+import threading
+import time
+
 from pymodbus.client import ModbusSerialClient
 
+from utils.event_log import event_log, EVENT_SUBSYSTEM_BUS
+from utils.bus_recorder import (
+    bus_recorder,
+    BUS_RECORD_FLAG_CHAINED,
+    BUS_RECORD_FLAG_NO_RESPONSE,
+    BUS_RECORD_FLAG_EXCEPTION,
+)
+
 
 class ModbusHandler:
     """
@@ -12,6 +23,13 @@ class ModbusHandler:
     Laitekohtaiset osoitteet ja komennot kuuluvat ylemmille tasoille:
     - Opta: ModbusManager / HardwareService / config/modbus_config.py
     - ForTest: ForTestHandler / ForTestService / config/fortest_config.py
+
+    Kaikki väyläkutsut kulkevat saman lukon kautta, jotta yksi
+    pymodbus-client ei koskaan saa kahta samanaikaista kehystä.
+
+    Jokainen kehys kirjataan tapahtumalokiin bus_transaction-tapahtumana
+    (DEBUG, virheet WARNING) ja väylätallentimeen, kun se on käynnissä.
+    Aika mitataan lukon sisällä, joten se on pelkkä väyläaika.
     """
 
     def __init__(self, port=None, baudrate=19200):
@@ -22,6 +40,7 @@ class ModbusHandler:
         self.baudrate = baudrate
         self.client = None
         self.connected = False
+        self.lock = threading.Lock()
 
         self.setup_modbus()
 
@@ -37,11 +56,59 @@ class ModbusHandler:
             )
 
             self.connected = self.client.connect()
-            print(f"Modbus-yhteys ({self.port}): {'Onnistui' if self.connected else 'Epäonnistui'}")
+            event_log.info(
+                EVENT_SUBSYSTEM_BUS,
+                f"Modbus-yhteys ({self.port}): {'Onnistui' if self.connected else 'Epäonnistui'}",
+                port=self.port,
+                connected=self.connected,
+            )
 
         except Exception as e:
             self.connected = False
-            print(f"Modbus-virhe: {e}")
+            event_log.error(EVENT_SUBSYSTEM_BUS, f"Modbus-virhe: {e}", port=self.port)
+
+    def _trace(self, function, address, count, started, result, error=None, values=None, chained=False):
+        duration_ms = (time.monotonic() - started) * 1000.0
+        is_error = hasattr(result, "isError") and result.isError()
+
+        if error is None:
+            ok = bool(result) and not is_error
+        else:
+            ok = False
+
+        event_log.bus_transaction(
+            self.port,
+            function,
+            address,
+            count,
+            duration_ms,
+            ok,
+            error,
+        )
+
+        if not bus_recorder.is_active:
+            return
+
+        flags = BUS_RECORD_FLAG_CHAINED if chained else 0
+
+        if error is not None or result is None or result is False:
+            flags |= BUS_RECORD_FLAG_NO_RESPONSE
+        elif is_error:
+            flags |= BUS_RECORD_FLAG_EXCEPTION
+
+        if values is None:
+            values = getattr(result, "registers", None) if ok else None
+
+        bus_recorder.record(
+            self.port,
+            function,
+            address,
+            count,
+            duration_ms,
+            flags,
+            getattr(result, "exception_code", 0) if is_error else 0,
+            values,
+        )
 
     def write_register(self, address, value):
         """
@@ -53,37 +120,77 @@ class ModbusHandler:
         if not self.connected:
             return False
 
+        started = time.monotonic()
+
         try:
-            result = self.client.write_register(
-                address=address,
-                value=value,
-            )
+            with self.lock:
+                started = time.monotonic()
+                result = self.client.write_register(
+                    address=address,
+                    value=value,
+                )
+
+            self._trace("write_register", address, 1, started, result, values=[value])
+            return result
+
+        except Exception as e:
+            self._trace("write_register", address, 1, started, None, f"Rekisterin kirjoitusvirhe: {e}", values=[value])
+            return False
+
+    def write_registers(self, address, values):
+        """
+        Kirjoita peräkkäiset holding registerit yhdellä kehyksellä (FC16).
+
+        values = lista arvoja, ensimmäinen menee osoitteeseen address.
+        Palauttaa pymodbus-vastausobjektin tai False.
+        """
+        if not self.connected:
+            return False
+
+        values = list(values)
+        started = time.monotonic()
 
+        try:
+            with self.lock:
+                started = time.monotonic()
+                result = self.client.write_registers(
+                    address=address,
+                    values=values,
+                )
+
+            self._trace("write_registers", address, len(values), started, result, values=values)
             return result
 
         except Exception as e:
-            print(f"Rekisterin kirjoitusvirhe: {e}")
+            self._trace("write_registers", address, len(values), started, None, f"Rekisterien kirjoitusvirhe: {e}", values=values)
             return False
 
-    def read_holding_registers(self, address, count):
+    def read_holding_registers(self, address, count, chained=False):
         """
         Lue Modbus holding register -alue.
 
         Ylempi taso päättää, mitä osoite ja lukumäärä tarkoittavat.
+        chained=True merkitsee tallenteeseen, että luku on saman
+        kutsun jatko edelliselle kehykselle (ForTestin status + tulos).
         """
         if not self.connected:
             return None
 
-        try:
-            result = self.client.read_holding_registers(
-                address=address,
-                count=count,
-            )
+        started = time.monotonic()
 
+        try:
+            with self.lock:
+                started = time.monotonic()
+                result = self.client.read_holding_registers(
+                    address=address,
+                    count=count,
+                )
+
+            self._trace("read_holding_registers", address, count, started, result, chained=chained)
             return result
 
         except Exception as e:
-            print(f"Rekisterien lukuvirhe: {e}")
+            self._trace("read_holding_registers", address, count, started, None, f"Rekisterien lukuvirhe: {e}", chained=chained)
             return None
 
     def write_coil(self, address, value):
@@ -96,24 +203,30 @@ class ModbusHandler:
         if not self.connected:
             return False
 
+        started = time.monotonic()
+
         try:
             if value:
                 value_to_write = 0xFF00
             else:
                 value_to_write = 0x0000
 
-            result = self.client.write_coil(
-                address=address,
-                value=value_to_write,
-            )
+            with self.lock:
+                started = time.monotonic()
+                result = self.client.write_coil(
+                    address=address,
+                    value=value_to_write,
+                )
 
             success = not result.isError() if hasattr(result, "isError") else bool(result)
+            self._trace("write_coil", address, 1, started, result, values=[value_to_write])
             return success
 
         except Exception as e:
-            print(f"Coil-kirjoitusvirhe: {e}")
+            self._trace("write_coil", address, 1, started, None, f"Coil-kirjoitusvirhe: {e}", values=[0xFF00 if value else 0x0000])
             return False
 
     def close(self):
         if self.client:
-            self.client.close()
+            with self.lock:
+                self.client.close()
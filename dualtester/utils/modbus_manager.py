@@ -1,15 +1,38 @@
 # utils/modbus_manager.py
-from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot, QMetaObject, Qt, Q_ARG
+import heapq
+import itertools
+import threading
+import time
 
-from config.modbus_config import (
-    EMERGENCY_STATUS_REGISTER,
-    EMERGENCY_STATUS_REGISTER_COUNT,
-    OPTA_RELAY_REGISTER_BASE,
-)
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot, QMetaObject, Qt
+
+from config.modbus_config import OPTA_RELAY_REGISTER_BASE
 
 from utils.modbus_handler import ModbusHandler
 
 
+# ------------------------------------------------------------
+# Väyläpyyntöjen prioriteetit
+# ------------------------------------------------------------
+
+# Pienempi numero = ajetaan ensin.
+BUS_PRIORITY_EMERGENCY = 0
+BUS_PRIORITY_WRITE = 1
+BUS_PRIORITY_POLL = 2
+
+BUS_PRIORITY_NAMES = {
+    BUS_PRIORITY_EMERGENCY: "emergency",
+    BUS_PRIORITY_WRITE: "write",
+    BUS_PRIORITY_POLL: "poll",
+}
+
+# Operaatiokoodit ovat samat kuin resultReady-signaalissa aiemminkin.
+OP_READ_REGISTER = 1
+OP_WRITE_REGISTER = 2
+OP_TOGGLE_RELAY = 3
+OP_WRITE_REGISTERS = 4
+
+
 class ModbusResultWrapper:
     """
     Pieni wrapper Modbus-vastausobjektille.
@@ -46,12 +69,110 @@ class ModbusResultWrapper:
         return getattr(self.raw_result, name)
 
 
+class ModbusBusRequest:
+    """
+    Yksi Opta-väylälle jonotettu pyyntö.
+
+    Aikaleimat ovat time.monotonic()-arvoja:
+    - enqueued_at: pyyntö lisätty jonoon (GUI-säie)
+    - started_at: väyläkutsu alkoi (worker-säie)
+    - finished_at: väyläkutsu päättyi (worker-säie)
+    """
+
+    def __init__(
+        self,
+        priority,
+        op_code,
+        address,
+        value=0,
+        count=1,
+        tag="",
+        emit_result=True,
+        transaction_id="",
+    ):
+        self.priority = priority
+        self.op_code = op_code
+        self.address = address
+        self.value = value
+        self.count = count
+        self.tag = tag
+        self.emit_result = emit_result
+        self.transaction_id = transaction_id
+
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+    def get_wait_ms(self):
+        if self.started_at is None:
+            return None
+
+        return (self.started_at - self.enqueued_at) * 1000.0
+
+    def get_bus_ms(self):
+        if self.started_at is None or self.finished_at is None:
+            return None
+
+        return (self.finished_at - self.started_at) * 1000.0
+
+    def get_total_ms(self):
+        if self.finished_at is None:
+            return None
+
+        return (self.finished_at - self.enqueued_at) * 1000.0
+
+
+class ModbusBusQueue:
+    """
+    Säieturvallinen prioriteettijono Opta-väylän pyynnöille.
+
+    Saman prioriteetin pyynnöt ajetaan lisäysjärjestyksessä.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def put(self, request):
+        with self._lock:
+            heapq.heappush(
+                self._heap,
+                (request.priority, next(self._sequence), request),
+            )
+            return len(self._heap)
+
+    def pop(self):
+        with self._lock:
+            if not self._heap:
+                return None
+
+            return heapq.heappop(self._heap)[2]
+
+    def depth(self):
+        with self._lock:
+            return len(self._heap)
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+
+
 class ModbusWorker(QObject):
-    resultReady = pyqtSignal(object, int, str)  # tulos, operaatiokoodi, virheviesti
+    """
+    Opta-väylän ainoa omistaja.
+
+    Worker ajaa jonosta aina korkeimman prioriteetin pyynnön.
+    Jokaista jonoon lisättyä pyyntöä kohden ModbusManager kutsuu
+    process_next()-slottia kerran, joten jono tyhjenee ilman omaa silmukkaa.
+    """
+
+    requestFinished = pyqtSignal(object, object, str)  # pyyntö, tulos, virheviesti
 
-    def __init__(self, modbus_handler):
+    def __init__(self, modbus_handler, bus_queue):
         super().__init__()
         self.modbus = modbus_handler
+        self.bus_queue = bus_queue
 
     def _wrap_result(self, result, address=None):
         if result is None:
@@ -62,60 +183,52 @@ class ModbusWorker(QObject):
             address=address,
         )
 
-    @pyqtSlot(int, int)
-    def read_register(self, address, count=1):
-        if not self.modbus or not self.modbus.connected:
-            self.resultReady.emit(None, 1, "Modbus ei yhteydessä")
+    @pyqtSlot()
+    def process_next(self):
+        request = self.bus_queue.pop()
+
+        if request is None:
             return
 
-        try:
-            result = self.modbus.read_holding_registers(address, count)
-            wrapped_result = self._wrap_result(result, address)
+        request.started_at = time.monotonic()
+        result, error_msg = self._execute(request)
+        request.finished_at = time.monotonic()
 
-            self.resultReady.emit(wrapped_result, 1, "")
+        self.requestFinished.emit(request, result, error_msg)
 
-        except Exception as e:
-            self.resultReady.emit(None, 1, f"Virhe rekisterin lukemisessa: {str(e)}")
+    def _execute(self, request):
+        failed_result = None if request.op_code == OP_READ_REGISTER else False
 
-    @pyqtSlot(int, int)
-    def write_register(self, address, value):
-        """
-        Kirjoita rekisteri taustasäikeessä.
-        """
         if not self.modbus or not self.modbus.connected:
-            self.resultReady.emit(False, 2, "Modbus ei yhteydessä")
-            return
+            return failed_result, "Modbus ei yhteydessä"
 
         try:
-            result = self.modbus.write_register(address, value)
-            wrapped_result = self._wrap_result(result, address)
+            if request.op_code == OP_READ_REGISTER:
+                result = self.modbus.read_holding_registers(request.address, request.count)
+                return self._wrap_result(result, request.address), ""
 
-            self.resultReady.emit(wrapped_result, 2, "")
+            if request.op_code == OP_WRITE_REGISTER:
+                result = self.modbus.write_register(request.address, request.value)
+                return self._wrap_result(result, request.address), ""
 
-        except Exception as e:
-            self.resultReady.emit(False, 2, f"Virhe rekisterin kirjoittamisessa: {str(e)}")
+            if request.op_code == OP_TOGGLE_RELAY:
+                result = self.modbus.write_register(request.address, request.value)
+                return self._wrap_result(result, request.address), ""
 
-    @pyqtSlot(int, int)
-    def toggle_relay(self, relay_num, state):
-        """
-        Optan releen ohjaus taustasäikeessä.
+            if request.op_code == OP_WRITE_REGISTERS:
+                result = self.modbus.write_registers(request.address, request.value)
+                return self._wrap_result(result, request.address), ""
 
-        relay_num = 1...8
-        register = OPTA_RELAY_REGISTER_BASE + relay_num
-        """
-        if not self.modbus or not self.modbus.connected:
-            self.resultReady.emit(False, 3, "Modbus ei yhteydessä")
-            return
+            return failed_result, f"Tuntematon Modbus-operaatio {request.op_code}"
 
-        try:
-            register = OPTA_RELAY_REGISTER_BASE + relay_num
-            result = self.modbus.write_register(register, state)
-            wrapped_result = self._wrap_result(result, register)
+        except Exception as e:
+            if request.op_code == OP_READ_REGISTER:
+                return failed_result, f"Virhe rekisterin lukemisessa: {str(e)}"
 
-            self.resultReady.emit(wrapped_result, 3, "")
+            if request.op_code == OP_TOGGLE_RELAY:
+                return failed_result, f"Virhe releen ohjauksessa: {str(e)}"
 
-        except Exception as e:
-            self.resultReady.emit(False, 3, f"Virhe releen ohjauksessa: {str(e)}")
+            return failed_result, f"Virhe rekisterin kirjoittamisessa: {str(e)}"
 
 
 class ModbusManager(QObject):
@@ -124,16 +237,36 @@ class ModbusManager(QObject):
 
     Tämä manageri käyttää yleistä ModbusHandleria, mutta tämän luokan
     julkiset metodit ovat Opta-käyttöön sovitettuja:
-    - read_emergency_stop_status()
     - toggle_relay()
     - write_register()
     - read_register()
+    - submit_read()
+    - write_registers()
+    - pulse_register()
+
+    Kaikki väyläliikenne kulkee yhden prioriteettijonon ja worker-säikeen
+    kautta. GUI-säie ei koskaan odota sarjaväylää: kirjoitukset ja luvut
+    vain jonotetaan, ja tulokset tulevat signaaleilla.
+
+    Prioriteetit:
+    1. hätäseistila
+    2. venttiili-, rele- ja jig-kirjoitukset
+    3. tilapollaukset
+
+    Monirekisterikirjoitukset ja pulssit ovat transaktioita: niistä tulee
+    yksi writeFinished-signaali transaktiotunnisteella, kun koko
+    kirjoitus on valmis.
+
+    Optan tilarekisterien pollaus ja jaettu rekisterikuva ovat
+    OptaRegisterPollerissa.
 
     ForTest-laitteet eivät käytä tätä manageria, vaan ForTestService /
     ForTestHandler -polkua.
     """
 
     resultReady = pyqtSignal(object, int, str)  # tulos, operaatiokoodi, virheviesti
+    readFinished = pyqtSignal(str, object, str, float)  # tunniste, tulos, virheviesti, valmistumisaika
+    writeFinished = pyqtSignal(str, bool, str)  # transaktio, onnistui, virheviesti
 
     def __init__(self, port=None, baudrate=19200):
         super().__init__()
@@ -149,38 +282,231 @@ class ModbusManager(QObject):
             baudrate=self.baudrate,
         )
 
+        self.bus_queue = ModbusBusQueue()
+        self.pending_read_tags = set()
+
+        self.transaction_counter = itertools.count(1)
+        self.pending_pulses = {}
+
+        self.max_queue_depth = 0
+        self.bus_statistics = {
+            priority: self._create_empty_statistics()
+            for priority in BUS_PRIORITY_NAMES
+        }
+
         self.thread = QThread()
-        self.worker = ModbusWorker(self.modbus_handler)
+        self.worker = ModbusWorker(self.modbus_handler, self.bus_queue)
 
         self.worker.moveToThread(self.thread)
-        self.worker.resultReady.connect(self.handle_result)
+        self.worker.requestFinished.connect(self.handle_request_finished)
 
         self.thread.start()
 
-    def handle_result(self, result, op_code, error_msg):
+    # ------------------------------------------------------------
+    # Jonotus
+    # ------------------------------------------------------------
+
+    def _submit(self, request):
+        depth = self.bus_queue.put(request)
+
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+        QMetaObject.invokeMethod(
+            self.worker,
+            "process_next",
+            Qt.QueuedConnection,
+        )
+
+    def handle_request_finished(self, request, result, error_msg):
         """
-        Välitä tulos eteenpäin.
+        Worker-säikeen valmistunut pyyntö GUI-säikeessä.
         """
-        self.resultReady.emit(result, op_code, error_msg)
+        self._update_statistics(request, bool(error_msg) or not result)
+
+        if request.tag:
+            self.pending_read_tags.discard(request.tag)
+            self.readFinished.emit(
+                request.tag,
+                result,
+                error_msg,
+                request.finished_at or time.monotonic(),
+            )
+
+        if request.transaction_id:
+            self._handle_transaction_step(request, result, error_msg)
+
+        if request.emit_result:
+            self.resultReady.emit(result, request.op_code, error_msg)
+
+    def _is_write_ok(self, result, error_msg):
+        if error_msg or not result:
+            return False
+
+        return not result.isError() if hasattr(result, "isError") else True
+
+    def _handle_transaction_step(self, request, result, error_msg):
+        ok = self._is_write_ok(result, error_msg)
+
+        if not error_msg and not ok:
+            error_msg = f"Modbus-kirjoitus osoitteeseen {request.address} epäonnistui"
+
+        pulse = self.pending_pulses.pop(request.transaction_id, None)
+
+        if pulse is None:
+            self.writeFinished.emit(request.transaction_id, ok, error_msg)
+            return
+
+        # Pulssin ensimmäinen vaihe valmis. Paluukirjoitus tehdään aina,
+        # vaikka päällekirjoitus epäonnistuisi, ettei rekisteri jää päälle.
+        off_value, pulse_ms, priority = pulse
+
+        QTimer.singleShot(
+            pulse_ms,
+            lambda: self._submit_pulse_off(request, off_value, priority, ok, error_msg),
+        )
+
+    def _submit_pulse_off(self, on_request, off_value, priority, on_ok, on_error_msg):
+        transaction_id = on_request.transaction_id
+
+        if not on_ok:
+            # Päällekirjoituksen virhe raportoidaan, vaikka paluu onnistuisi.
+            self._submit(
+                ModbusBusRequest(
+                    priority=priority,
+                    op_code=OP_WRITE_REGISTER,
+                    address=on_request.address,
+                    value=off_value,
+                    emit_result=False,
+                )
+            )
+            self.writeFinished.emit(transaction_id, False, on_error_msg)
+            return
+
+        self._submit(
+            ModbusBusRequest(
+                priority=priority,
+                op_code=OP_WRITE_REGISTER,
+                address=on_request.address,
+                value=off_value,
+                emit_result=on_request.emit_result,
+                transaction_id=transaction_id,
+            )
+        )
+
+    def _next_transaction_id(self):
+        return f"opta_tx:{next(self.transaction_counter)}"
+
+    # ------------------------------------------------------------
+    # Viive- ja jonotilastot
+    # ------------------------------------------------------------
+
+    def _create_empty_statistics(self):
+        return {
+            "count": 0,
+            "errors": 0,
+            "last_wait_ms": 0.0,
+            "last_bus_ms": 0.0,
+            "last_total_ms": 0.0,
+            "avg_total_ms": 0.0,
+            "max_total_ms": 0.0,
+        }
+
+    def _update_statistics(self, request, failed):
+        statistics = self.bus_statistics.get(request.priority)
+
+        if statistics is None:
+            return
+
+        total_ms = request.get_total_ms() or 0.0
+
+        statistics["count"] += 1
+        statistics["last_wait_ms"] = request.get_wait_ms() or 0.0
+        statistics["last_bus_ms"] = request.get_bus_ms() or 0.0
+        statistics["last_total_ms"] = total_ms
+        statistics["avg_total_ms"] += (total_ms - statistics["avg_total_ms"]) / statistics["count"]
+        statistics["max_total_ms"] = max(statistics["max_total_ms"], total_ms)
+
+        if failed:
+            statistics["errors"] += 1
+
+    def get_queue_depth(self):
+        return self.bus_queue.depth()
+
+    def get_bus_statistics(self):
+        """
+        Palauttaa kopion väylätilastoista.
+
+        {
+            "queue_depth": nykyinen jonon pituus,
+            "max_queue_depth": suurin havaittu jonon pituus,
+            "emergency": {...},
+            "write": {...},
+            "poll": {...},
+        }
+        """
+        statistics = {
+            "queue_depth": self.get_queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+        for priority, name in BUS_PRIORITY_NAMES.items():
+            statistics[name] = dict(self.bus_statistics[priority])
+
+        return statistics
+
+    # ------------------------------------------------------------
+    # Julkinen Opta-rajapinta
+    # ------------------------------------------------------------
 
     def read_register(self, address, count=1):
         """
         Lue rekisteri taustasäikeessä.
 
-        Tätä käytetään vain Opta-väylän yleisiin lukuihin.
+        Tulos tulee resultReady-signaalilla operaatiokoodilla 1.
         """
         if not self.modbus_handler.connected:
-            self.resultReady.emit(None, 1, "Modbus ei yhteydessä")
+            self.resultReady.emit(None, OP_READ_REGISTER, "Modbus ei yhteydessä")
             return
 
-        QMetaObject.invokeMethod(
-            self.worker,
-            "read_register",
-            Qt.QueuedConnection,
-            Q_ARG(int, address),
-            Q_ARG(int, count),
+        self._submit(
+            ModbusBusRequest(
+                priority=BUS_PRIORITY_POLL,
+                op_code=OP_READ_REGISTER,
+                address=address,
+                count=count,
+            )
         )
 
+    def submit_read(self, tag, address, count=1, priority=BUS_PRIORITY_POLL):
+        """
+        Jonota tunnisteellinen taustaluku.
+
+        Tulos tulee readFinished-signaalilla samalla tunnisteella.
+        Valmistumisaika on time.monotonic()-arvo.
+        Samaa tunnistetta ei jonoteta uudelleen, ennen kuin edellinen luku
+        on valmis. Palauttaa True, jos luku jonotettiin.
+        """
+        if not self.modbus_handler.connected:
+            return False
+
+        if tag in self.pending_read_tags:
+            return False
+
+        self.pending_read_tags.add(tag)
+        self._submit(
+            ModbusBusRequest(
+                priority=priority,
+                op_code=OP_READ_REGISTER,
+                address=address,
+                count=count,
+                tag=tag,
+                emit_result=False,
+            )
+        )
+
+        return True
+
     def write_register(self, address, value):
         """
         Kirjoita rekisteri taustasäikeessä.
@@ -188,59 +514,99 @@ class ModbusManager(QObject):
         Tätä käytetään Opta-väylän yksittäisiin rekisterikirjoituksiin.
         """
         if not self.modbus_handler.connected:
-            self.resultReady.emit(False, 2, "Modbus ei yhteydessä")
+            self.resultReady.emit(False, OP_WRITE_REGISTER, "Modbus ei yhteydessä")
             return
 
-        QMetaObject.invokeMethod(
-            self.worker,
-            "write_register",
-            Qt.QueuedConnection,
-            Q_ARG(int, address),
-            Q_ARG(int, value),
+        self._submit(
+            ModbusBusRequest(
+                priority=BUS_PRIORITY_WRITE,
+                op_code=OP_WRITE_REGISTER,
+                address=address,
+                value=value,
+            )
         )
 
-    def read_emergency_stop_status(self):
+    def write_registers(self, address, values, priority=BUS_PRIORITY_WRITE):
         """
-        Lue hätäseispiirin tila Optan Modbus-väylältä.
+        Kirjoita peräkkäiset rekisterit yhtenä FC16-kehyksenä.
 
-        Palautus:
-        - 1 = hätäseis pois päältä
-        - 0 = hätäseistila
-        - None = ei yhteyttä / lukuvirhe
+        Opta näkee kaikki arvot samalla kertaa, joten esim. käsky ja
+        käynnistysbitti eivät voi jäädä puolitiehen.
+        Palauttaa transaktiotunnisteen; valmistuminen tulee
+        writeFinished-signaalilla. Ilman yhteyttä palauttaa None.
         """
         if not self.modbus_handler.connected:
+            self.resultReady.emit(False, OP_WRITE_REGISTERS, "Modbus ei yhteydessä")
             return None
 
-        try:
-            result = self.modbus_handler.read_holding_registers(
-                EMERGENCY_STATUS_REGISTER,
-                EMERGENCY_STATUS_REGISTER_COUNT,
+        transaction_id = self._next_transaction_id()
+
+        self._submit(
+            ModbusBusRequest(
+                priority=priority,
+                op_code=OP_WRITE_REGISTERS,
+                address=address,
+                value=list(values),
+                count=len(values),
+                transaction_id=transaction_id,
             )
+        )
 
-            if result and hasattr(result, "registers") and len(result.registers) > 0:
-                return result.registers[0]
+        return transaction_id
 
-            return None
+    def pulse_register(
+        self,
+        address,
+        on_value=1,
+        off_value=0,
+        pulse_ms=300,
+        priority=BUS_PRIORITY_WRITE,
+    ):
+        """
+        Kirjoita rekisteriin on_value ja pulse_ms myöhemmin off_value.
 
-        except Exception:
+        Paluukirjoitus jonotetaan vasta, kun päällekirjoitus on ajettu,
+        joten järjestys säilyy ruuhkaisellakin väylällä. Koko pulssista
+        tulee yksi writeFinished-signaali. Palauttaa transaktiotunnisteen
+        tai None, jos yhteyttä ei ole.
+        """
+        if not self.modbus_handler.connected:
+            self.resultReady.emit(False, OP_WRITE_REGISTER, "Modbus ei yhteydessä")
             return None
 
+        transaction_id = self._next_transaction_id()
+        self.pending_pulses[transaction_id] = (off_value, pulse_ms, priority)
+
+        self._submit(
+            ModbusBusRequest(
+                priority=priority,
+                op_code=OP_WRITE_REGISTER,
+                address=address,
+                value=on_value,
+                transaction_id=transaction_id,
+            )
+        )
+
+        return transaction_id
+
     def toggle_relay(self, relay_num, state):
         """
         Optan releen ohjaus taustasäikeessä.
 
         relay_num = 1...8
+        register = OPTA_RELAY_REGISTER_BASE + relay_num
         """
         if not self.modbus_handler.connected:
-            self.resultReady.emit(False, 3, "Modbus ei yhteydessä")
+            self.resultReady.emit(False, OP_TOGGLE_RELAY, "Modbus ei yhteydessä")
             return
 
-        QMetaObject.invokeMethod(
-            self.worker,
-            "toggle_relay",
-            Qt.QueuedConnection,
-            Q_ARG(int, relay_num),
-            Q_ARG(int, state),
+        self._submit(
+            ModbusBusRequest(
+                priority=BUS_PRIORITY_WRITE,
+                op_code=OP_TOGGLE_RELAY,
+                address=OPTA_RELAY_REGISTER_BASE + relay_num,
+                value=state,
+            )
         )
 
     def is_connected(self):
@@ -252,9 +618,15 @@ class ModbusManager(QObject):
     def cleanup(self):
         """
         Siivoa resurssit.
+
+        Jonossa odottavat pyynnöt hylätään; kesken oleva väyläkutsu
+        ajetaan loppuun ennen säikeen pysäytystä.
         """
+        self.bus_queue.clear()
+        self.pending_pulses.clear()
+
         self.thread.quit()
         self.thread.wait()
 
         if self.modbus_handler:
-            self.modbus_handler.close()
\ No newline at end of file
+            self.modbus_handler.close()
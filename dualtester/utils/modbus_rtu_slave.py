@@ -0,0 +1,445 @@
+# utils/modbus_rtu_slave.py
+import os
+import select
+import threading
+import time
+import tty
+
+
+# ------------------------------------------------------------
+# Modbus RTU -kehykset
+# ------------------------------------------------------------
+
+MODBUS_FC_READ_COILS = 0x01
+MODBUS_FC_READ_HOLDING_REGISTERS = 0x03
+MODBUS_FC_READ_INPUT_REGISTERS = 0x04
+MODBUS_FC_WRITE_SINGLE_COIL = 0x05
+MODBUS_FC_WRITE_SINGLE_REGISTER = 0x06
+MODBUS_FC_WRITE_MULTIPLE_COILS = 0x0F
+MODBUS_FC_WRITE_MULTIPLE_REGISTERS = 0x10
+
+MODBUS_EXCEPTION_ILLEGAL_FUNCTION = 0x01
+MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS = 0x02
+MODBUS_EXCEPTION_ILLEGAL_DATA_VALUE = 0x03
+MODBUS_EXCEPTION_SLAVE_DEVICE_BUSY = 0x06
+
+MODBUS_MAX_READ_REGISTERS = 125
+MODBUS_MAX_WRITE_REGISTERS = 123
+MODBUS_MAX_READ_COILS = 2000
+
+# Kiinteän mittaiset pyynnöt: osoite, FC, 4 tavua dataa, CRC.
+MODBUS_FIXED_REQUEST_LENGTH = 8
+
+# FC15/FC16: osoite, FC, alku, määrä, tavumäärä, data, CRC.
+MODBUS_MULTIPLE_WRITE_HEADER_LENGTH = 7
+
+# Keskeneräinen kehys hylätään, jos loppua ei kuulu tässä ajassa.
+MODBUS_FRAME_TIMEOUT_S = 0.05
+
+# Yhden merkin siirtoon kuluu 8N1-asetuksella 10 bittiä.
+MODBUS_BITS_PER_CHAR = 10
+
+
+def compute_crc16(data):
+    """
+    Modbus RTU CRC16 (polynomi 0xA001, alkuarvo 0xFFFF).
+    """
+    crc = 0xFFFF
+
+    for byte in data:
+        crc ^= byte
+
+        for _bit in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+
+    return crc
+
+
+def append_crc(frame):
+    """
+    Lisää CRC kehyksen loppuun, matala tavu ensin.
+    """
+    crc = compute_crc16(frame)
+    return bytes(frame) + bytes((crc & 0xFF, crc >> 8))
+
+
+def check_crc(frame):
+    if len(frame) < 4:
+        return False
+
+    crc = compute_crc16(frame[:-2])
+    return frame[-2] == (crc & 0xFF) and frame[-1] == (crc >> 8)
+
+
+def get_request_length(buffer):
+    """
+    Palauttaa pyyntökehyksen pituuden puskurin alusta.
+
+    None = pituutta ei vielä tiedetä (tavuja puuttuu)
+    0    = tuntematon funktiokoodi
+    """
+    if len(buffer) < 2:
+        return None
+
+    function_code = buffer[1]
+
+    if function_code in (
+        MODBUS_FC_READ_COILS,
+        MODBUS_FC_READ_HOLDING_REGISTERS,
+        MODBUS_FC_READ_INPUT_REGISTERS,
+        MODBUS_FC_WRITE_SINGLE_COIL,
+        MODBUS_FC_WRITE_SINGLE_REGISTER,
+    ):
+        return MODBUS_FIXED_REQUEST_LENGTH
+
+    if function_code in (MODBUS_FC_WRITE_MULTIPLE_COILS, MODBUS_FC_WRITE_MULTIPLE_REGISTERS):
+        if len(buffer) < MODBUS_MULTIPLE_WRITE_HEADER_LENGTH:
+            return None
+
+        return MODBUS_MULTIPLE_WRITE_HEADER_LENGTH + buffer[6] + 2
+
+    return 0
+
+
+class ModbusSlaveError(Exception):
+    """
+    Laitemallin nostama Modbus-poikkeus. code palautetaan
+    masterille poikkeusvastauksena (FC | 0x80).
+    """
+
+    def __init__(self, code, message=""):
+        super().__init__(message or f"Modbus-poikkeus {code}")
+        self.code = code
+
+
+class ModbusSlaveDevice:
+    """
+    Simuloidun laitteen rekisterikartta.
+
+    Aliluokka toteuttaa tarvitsemansa metodit. Toteuttamaton alue
+    vastaa kuten oikea laite: Illegal data address.
+    """
+
+    def update(self, now):
+        """Päivitä aikaan sidottu tila ennen pyynnön käsittelyä."""
+        pass
+
+    def read_registers(self, address, count):
+        raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS)
+
+    def write_registers(self, address, values):
+        raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS)
+
+    def read_coils(self, address, count):
+        raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS)
+
+    def write_coil(self, address, value):
+        raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_ADDRESS)
+
+
+def _pack_registers(values):
+    data = bytearray()
+
+    for value in values:
+        value = int(value) & 0xFFFF
+        data.append(value >> 8)
+        data.append(value & 0xFF)
+
+    return bytes(data)
+
+
+def _unpack_registers(data):
+    return [(data[index] << 8) | data[index + 1] for index in range(0, len(data) - 1, 2)]
+
+
+def _pack_coils(values):
+    data = bytearray((len(values) + 7) // 8)
+
+    for index, value in enumerate(values):
+        if value:
+            data[index // 8] |= 1 << (index % 8)
+
+    return bytes(data)
+
+
+def handle_request_pdu(device, pdu):
+    """
+    Käsittele yksi pyyntö-PDU (FC + data) ja palauta vastaus-PDU.
+    """
+    function_code = pdu[0]
+
+    try:
+        if function_code in (MODBUS_FC_READ_HOLDING_REGISTERS, MODBUS_FC_READ_INPUT_REGISTERS):
+            address = (pdu[1] << 8) | pdu[2]
+            count = (pdu[3] << 8) | pdu[4]
+
+            if not 1 <= count <= MODBUS_MAX_READ_REGISTERS:
+                raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_VALUE)
+
+            values = device.read_registers(address, count)
+            data = _pack_registers(values)
+            return bytes((function_code, len(data))) + data
+
+        if function_code == MODBUS_FC_READ_COILS:
+            address = (pdu[1] << 8) | pdu[2]
+            count = (pdu[3] << 8) | pdu[4]
+
+            if not 1 <= count <= MODBUS_MAX_READ_COILS:
+                raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_VALUE)
+
+            data = _pack_coils(device.read_coils(address, count))
+            return bytes((function_code, len(data))) + data
+
+        if function_code == MODBUS_FC_WRITE_SINGLE_REGISTER:
+            address = (pdu[1] << 8) | pdu[2]
+            value = (pdu[3] << 8) | pdu[4]
+            device.write_registers(address, [value])
+            return bytes(pdu[:5])
+
+        if function_code == MODBUS_FC_WRITE_MULTIPLE_REGISTERS:
+            address = (pdu[1] << 8) | pdu[2]
+            count = (pdu[3] << 8) | pdu[4]
+            values = _unpack_registers(pdu[6:6 + pdu[5]])
+
+            if not 1 <= count <= MODBUS_MAX_WRITE_REGISTERS or len(values) != count:
+                raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_VALUE)
+
+            device.write_registers(address, values)
+            return bytes(pdu[:5])
+
+        if function_code == MODBUS_FC_WRITE_SINGLE_COIL:
+            address = (pdu[1] << 8) | pdu[2]
+            value = (pdu[3] << 8) | pdu[4]
+
+            if value not in (0x0000, 0xFF00):
+                raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_DATA_VALUE)
+
+            device.write_coil(address, value == 0xFF00)
+            return bytes(pdu[:5])
+
+        if function_code == MODBUS_FC_WRITE_MULTIPLE_COILS:
+            address = (pdu[1] << 8) | pdu[2]
+            count = (pdu[3] << 8) | pdu[4]
+            data = pdu[6:6 + pdu[5]]
+
+            for index in range(count):
+                device.write_coil(address + index, bool(data[index // 8] & (1 << (index % 8))))
+
+            return bytes(pdu[:5])
+
+        raise ModbusSlaveError(MODBUS_EXCEPTION_ILLEGAL_FUNCTION)
+
+    except ModbusSlaveError as e:
+        return bytes((function_code | 0x80, e.code))
+
+
+class PtyModbusSlave:
+    """
+    Modbus RTU -slave pseudoterminaalin päässä.
+
+    open() luo pty-parin. Sovellus avaa slave-pään (port) kuten oikean
+    sarjaportin; tämä luokka lukee ja kirjoittaa master-päätä omassa
+    säikeessään. link_path-polkuun tehdään symlinkki porttiin, jotta
+    portin nimi pysyy samana ajosta toiseen.
+
+    baudrate-asetuksella vastausta viivästetään pyynnön ja vastauksen
+    siirtoajan verran, kuten oikealla väylällä. None = ei viivettä.
+    """
+
+    def __init__(
+        self,
+        device,
+        slave_id=1,
+        link_path=None,
+        name="",
+        baudrate=None,
+        turnaround_ms=0.0,
+    ):
+        self.device = device
+        self.slave_id = slave_id
+        self.link_path = link_path
+        self.name = name or (link_path or "modbus")
+        self.baudrate = baudrate
+        self.turnaround_ms = turnaround_ms
+
+        self.master_fd = None
+        self.slave_fd = None
+        self.port = None
+
+        self.running = False
+        self.thread = None
+
+        self.statistics = {
+            "requests": 0,
+            "responses": 0,
+            "exceptions": 0,
+            "crc_errors": 0,
+            "dropped_bytes": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+        }
+
+    def open(self):
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+
+        if self.link_path:
+            link_dir = os.path.dirname(self.link_path)
+
+            if link_dir:
+                os.makedirs(link_dir, exist_ok=True)
+
+            if os.path.islink(self.link_path):
+                os.remove(self.link_path)
+
+            os.symlink(self.port, self.link_path)
+
+        return self.link_path or self.port
+
+    def start(self):
+        if self.master_fd is None:
+            self.open()
+
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, name=f"modbus-sim-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+        if self.thread:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def close(self):
+        self.stop()
+
+        if self.link_path and os.path.islink(self.link_path):
+            try:
+                os.remove(self.link_path)
+            except OSError:
+                pass
+
+        # Slave-pää pidetään auki koko ajon ajan: muuten master-pään
+        # luku palauttaa EIO heti, kun sovellus sulkee portin.
+        for fd in (self.master_fd, self.slave_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+        self.master_fd = None
+        self.slave_fd = None
+
+    # ------------------------------------------------------------
+    # Väylä
+    # ------------------------------------------------------------
+
+    def _serve(self):
+        buffer = bytearray()
+        last_byte_at = 0.0
+
+        while self.running:
+            try:
+                readable, _, _ = select.select([self.master_fd], [], [], 0.1)
+            except (OSError, ValueError):
+                break
+
+            now = time.monotonic()
+
+            if buffer and now - last_byte_at > MODBUS_FRAME_TIMEOUT_S:
+                # RTU-kehysten väli on hiljaisuus; keskeneräinen kehys
+                # ei enää jatku.
+                self.statistics["dropped_bytes"] += len(buffer)
+                buffer.clear()
+
+            if not readable:
+                continue
+
+            try:
+                data = os.read(self.master_fd, 512)
+            except OSError:
+                time.sleep(0.05)
+                continue
+
+            if not data:
+                continue
+
+            buffer.extend(data)
+            last_byte_at = now
+
+            self._process_buffer(buffer)
+
+    def _process_buffer(self, buffer):
+        while buffer:
+            length = get_request_length(buffer)
+
+            if length is None or len(buffer) < (length or 0):
+                return
+
+            if length == 0:
+                # Tuntematon funktiokoodi: tahdistetaan tavu kerrallaan.
+                del buffer[0]
+                self.statistics["dropped_bytes"] += 1
+                continue
+
+            frame = bytes(buffer[:length])
+
+            if not check_crc(frame):
+                del buffer[0]
+                self.statistics["crc_errors"] += 1
+                continue
+
+            del buffer[:length]
+            self._handle_frame(frame)
+
+    def _handle_frame(self, frame):
+        slave_id = frame[0]
+
+        # 0 = broadcast: suoritetaan, mutta ei vastata.
+        if slave_id not in (0, self.slave_id):
+            return
+
+        self.statistics["requests"] += 1
+        self.statistics["bytes_in"] += len(frame)
+
+        self.device.update(time.monotonic())
+        response_pdu = handle_request_pdu(self.device, frame[1:-2])
+
+        if slave_id == 0:
+            return
+
+        if response_pdu[0] & 0x80:
+            self.statistics["exceptions"] += 1
+
+        response = append_crc(bytes((self.slave_id,)) + response_pdu)
+        self._wait_bus_time(len(frame) + len(response))
+
+        try:
+            os.write(self.master_fd, response)
+            self.statistics["responses"] += 1
+            self.statistics["bytes_out"] += len(response)
+        except OSError as e:
+            print(f"Simulaattori {self.name}: vastauksen kirjoitus epäonnistui: {e}")
+
+    def get_bus_time_s(self, baudrate):
+        """
+        Väylällä kulunut siirtoaika (pyynnöt + vastaukset) annetulla
+        baudinopeudella, vaikka viivettä ei simuloitaisi.
+        """
+        byte_count = self.statistics["bytes_in"] + self.statistics["bytes_out"]
+        return byte_count * MODBUS_BITS_PER_CHAR / float(baudrate)
+
+    def _wait_bus_time(self, byte_count):
+        delay_s = self.turnaround_ms / 1000.0
+
+        if self.baudrate:
+            delay_s += byte_count * MODBUS_BITS_PER_CHAR / float(self.baudrate)
+
+        if delay_s > 0:
+            time.sleep(delay_s)
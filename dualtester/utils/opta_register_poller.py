@@ -0,0 +1,263 @@
+# utils/opta_register_poller.py
+import time
+from types import MappingProxyType
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from utils.modbus_manager import BUS_PRIORITY_POLL
+
+
+# ------------------------------------------------------------
+# Pollauksen asetukset
+# ------------------------------------------------------------
+
+OPTA_POLL_INTERVAL_MS = 500
+
+# Kaksi aluetta yhdistetään yhdeksi luvuksi, jos niiden väliin jää
+# enintään tämän verran ylimääräisiä rekistereitä. 19200 baudilla
+# 16 ylimääräistä rekisteriä (32 tavua) on halvempi kuin uusi
+# RTU-kehys vastausviiveineen.
+OPTA_POLL_MAX_GAP_REGISTERS = 16
+
+# Modbus RTU sallii enintään 125 rekisteriä yhdessä luvussa.
+OPTA_POLL_MAX_BLOCK_REGISTERS = 120
+
+OPTA_POLL_TAG_PREFIX = "opta_poll:"
+
+
+def merge_register_ranges(
+    ranges,
+    max_gap=OPTA_POLL_MAX_GAP_REGISTERS,
+    max_count=OPTA_POLL_MAX_BLOCK_REGISTERS,
+):
+    """
+    Yhdistää rekisterialueet mahdollisimman harvoiksi lukulohkoiksi.
+
+    ranges: iteroitava (address, count, priority)
+    Palauttaa listan (address, count, priority), osoitejärjestyksessä.
+    Lohkon prioriteetti on sen kiireellisimmän alueen prioriteetti.
+    """
+    blocks = []
+
+    for address, count, priority in sorted(ranges):
+        if count <= 0:
+            continue
+
+        end = address + count
+
+        if blocks:
+            block_address, block_end, block_priority = blocks[-1]
+
+            if (
+                address - block_end <= max_gap
+                and max(end, block_end) - block_address <= max_count
+            ):
+                blocks[-1] = (
+                    block_address,
+                    max(end, block_end),
+                    min(priority, block_priority),
+                )
+                continue
+
+        blocks.append((address, end, priority))
+
+    return [
+        (block_address, block_end - block_address, block_priority)
+        for block_address, block_end, block_priority in blocks
+    ]
+
+
+class OptaRegisterSnapshot:
+    """
+    Muuttumaton kuva Optan pollatuista rekistereistä.
+
+    Jokaisella rekisterillä on oma aikaleima (time.monotonic()),
+    joten lukija voi itse päättää, kuinka vanhaa arvoa se hyväksyy.
+    Uusi luku tuottaa aina uuden snapshotin; vanhaa ei muuteta.
+    """
+
+    def __init__(self, values=None, created_at=None):
+        self._values = MappingProxyType(dict(values or {}))
+        self.created_at = time.monotonic() if created_at is None else created_at
+
+    def get(self, address, default=None, max_age_s=None):
+        entry = self._values.get(address)
+
+        if entry is None:
+            return default
+
+        value, updated_at = entry
+
+        if max_age_s is not None and time.monotonic() - updated_at > max_age_s:
+            return default
+
+        return value
+
+    def get_range(self, address, count, max_age_s=None):
+        """
+        Palauttaa listan arvoja tai None, jos yksikin puuttuu tai on vanha.
+        """
+        values = []
+
+        for register in range(address, address + count):
+            value = self.get(register, max_age_s=max_age_s)
+
+            if value is None:
+                return None
+
+            values.append(value)
+
+        return values
+
+    def get_timestamp(self, address):
+        entry = self._values.get(address)
+
+        if entry is None:
+            return None
+
+        return entry[1]
+
+    def get_age_s(self, address):
+        timestamp = self.get_timestamp(address)
+
+        if timestamp is None:
+            return None
+
+        return time.monotonic() - timestamp
+
+    def with_values(self, address, registers, updated_at):
+        values = dict(self._values)
+
+        for offset, value in enumerate(registers):
+            values[address + offset] = (value, updated_at)
+
+        return OptaRegisterSnapshot(values, created_at=updated_at)
+
+    def without_range(self, address, count):
+        values = dict(self._values)
+
+        for register in range(address, address + count):
+            values.pop(register, None)
+
+        return OptaRegisterSnapshot(values)
+
+
+class OptaRegisterPoller(QObject):
+    """
+    Optan tilarekisterien yhteinen pollaus.
+
+    Controllerit eivät lue Optan tilarekistereitä itse. Ne rekisteröivät
+    tarvitsemansa alueet tänne, ja jokainen pollauskierros lukee kaikki
+    alueet mahdollisimman harvoilla read_holding_registers-kutsuilla.
+    Tulokset julkaistaan muuttumattomana OptaRegisterSnapshotina.
+    """
+
+    snapshot_updated = pyqtSignal(object)
+
+    def __init__(self, modbus_manager, parent=None, interval_ms=OPTA_POLL_INTERVAL_MS):
+        super().__init__(parent)
+
+        self.modbus_manager = modbus_manager
+        self.snapshot = OptaRegisterSnapshot()
+
+        self.ranges = {}
+        self.blocks = []
+        self.block_generations = {}
+        self.inflight_generations = {}
+
+        self.modbus_manager.readFinished.connect(self.handle_read_finished)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.interval_ms = interval_ms
+
+    # ------------------------------------------------------------
+    # Alueet
+    # ------------------------------------------------------------
+
+    def add_range(self, name, address, count, priority=BUS_PRIORITY_POLL):
+        self.ranges[name] = (address, count, priority)
+        self._rebuild_blocks()
+
+    def remove_range(self, name):
+        if self.ranges.pop(name, None) is not None:
+            self._rebuild_blocks()
+
+    def _rebuild_blocks(self):
+        self.blocks = merge_register_ranges(self.ranges.values())
+
+    def _get_block_tag(self, address, count):
+        return f"{OPTA_POLL_TAG_PREFIX}{address}:{count}"
+
+    # ------------------------------------------------------------
+    # Pollaus
+    # ------------------------------------------------------------
+
+    def start(self):
+        self.timer.start(self.interval_ms)
+        self.poll()
+
+    def stop(self):
+        if self.timer:
+            self.timer.stop()
+
+    def poll(self):
+        """
+        Jonota yksi pollauskierros.
+
+        Jo kesken olevaa lohkoa ei jonoteta uudelleen, joten hidas väylä
+        ei kasvata jonoa.
+        """
+        for address, count, priority in self.blocks:
+            tag = self._get_block_tag(address, count)
+
+            if self.modbus_manager.submit_read(tag, address, count, priority):
+                self.inflight_generations[tag] = self.block_generations.get(tag, 0)
+
+    def poll_now(self):
+        self.poll()
+
+    def invalidate_range(self, address, count=1):
+        """
+        Poista alue rekisterikuvasta esim. käskykirjoituksen jälkeen.
+
+        Jo väylällä oleva, ennen invalidointia aloitettu luku ei palauta
+        vanhaa arvoa kuvaan.
+        """
+        end = address + count
+
+        for block_address, block_count, _priority in self.blocks:
+            if block_address < end and address < block_address + block_count:
+                tag = self._get_block_tag(block_address, block_count)
+                self.block_generations[tag] = self.block_generations.get(tag, 0) + 1
+
+        self.snapshot = self.snapshot.without_range(address, count)
+        self.snapshot_updated.emit(self.snapshot)
+
+    def handle_read_finished(self, tag, result, error_msg, finished_at):
+        if not tag.startswith(OPTA_POLL_TAG_PREFIX):
+            return
+
+        generation = self.inflight_generations.pop(tag, None)
+
+        if generation != self.block_generations.get(tag, 0):
+            # Luku jonotettiin ennen invalidointia.
+            return
+
+        if error_msg or not result or not hasattr(result, "registers"):
+            return
+
+        address_text, _count_text = tag[len(OPTA_POLL_TAG_PREFIX):].split(":")
+
+        self.snapshot = self.snapshot.with_values(
+            int(address_text),
+            list(result.registers),
+            finished_at,
+        )
+        self.snapshot_updated.emit(self.snapshot)
+
+    def get_snapshot(self):
+        return self.snapshot
+
+    def cleanup(self):
+        self.stop()
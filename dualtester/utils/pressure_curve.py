@@ -0,0 +1,211 @@
+# utils/pressure_curve.py
+import struct
+import sys
+import zlib
+from array import array
+
+from config.fortest_config import (
+    FORTEST_STATUS_REGISTER_COUNT,
+    FORTEST_STATUS_WORD_STATUS,
+    FORTEST_STATUS_WORD_SUB_STATUS,
+    FORTEST_STATUS_WORD_TIME_REMAINING_HIGH,
+    FORTEST_STATUS_WORD_TIME_REMAINING_LOW,
+    FORTEST_STATUS_WORD_PRESSURE_SIGN,
+    FORTEST_STATUS_WORD_PRESSURE_HIGH,
+    FORTEST_STATUS_WORD_PRESSURE_LOW,
+    FORTEST_STATUS_WORD_PRESSURE_UNIT,
+    FORTEST_STATUS_WORD_PRESSURE_DECIMALS,
+    FORTEST_STATUS_WORD_DECAY_SIGN,
+    FORTEST_STATUS_WORD_DECAY_HIGH,
+    FORTEST_STATUS_WORD_DECAY_LOW,
+    FORTEST_STATUS_WORD_DECAY_UNIT,
+    FORTEST_STATUS_WORD_DECAY_DECIMALS,
+    FORTEST_NEGATIVE_SIGN,
+)
+
+
+# ------------------------------------------------------------
+# Painekäyrä
+# ------------------------------------------------------------
+
+# 4000 näytettä = 200 s 50 ms välein. Täysi puskuri lopettaa
+# tallennuksen ja merkitsee käyrän katkaistuksi.
+PRESSURE_CURVE_MAX_SAMPLES = 4000
+
+# Näytteen sarakkeet. Arvot ovat kokonaislukuja; paine ja vuoto
+# skaalataan desimaalien mukaan vasta luettaessa.
+PRESSURE_CURVE_COLUMNS = (
+    "time_ms",
+    "status",
+    "sub_status",
+    "time_remaining",
+    "pressure",
+    "decay",
+)
+
+# BLOB-muoto:
+#   otsake <BBHHHHH: versio, liput, näytteiden määrä,
+#                    paineen yksikkö ja desimaalit, vuodon yksikkö ja desimaalit
+#   payload: sarakkeet peräkkäin int32 little endian, zlib-pakattuna
+PRESSURE_CURVE_BLOB_VERSION = 1
+PRESSURE_CURVE_FLAG_TRUNCATED = 0x01
+
+PRESSURE_CURVE_BLOB_HEADER = struct.Struct("<BBHHHHH")
+
+
+def _read_signed_value(registers, sign_word, high_word, low_word):
+    value = ((registers[high_word] << 16) | registers[low_word]) & 0x7FFFFFFF
+
+    if registers[sign_word] == FORTEST_NEGATIVE_SIGN:
+        value = -value
+
+    return value
+
+
+class PressureCurveBuffer:
+    """
+    Yhden testin painekäyrä ennalta varattuihin taulukoihin.
+
+    append_status() lisää näytteen ForTestin statusalueesta ilman
+    uusia muistivarauksia. pack() pakkaa käyrän BLOBiksi tallennusta
+    varten.
+    """
+
+    def __init__(self, capacity=PRESSURE_CURVE_MAX_SAMPLES):
+        self.capacity = capacity
+        self.columns = [array("i", [0] * capacity) for _ in PRESSURE_CURVE_COLUMNS]
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.truncated = False
+        self.pressure_unit = 0
+        self.pressure_decimals = 0
+        self.decay_unit = 0
+        self.decay_decimals = 0
+
+    def append_status(self, registers, time_ms):
+        """
+        Lisää näyte statusalueen rekistereistä. Palauttaa False, jos
+        näytettä ei voitu lisätä.
+        """
+        if len(registers) < FORTEST_STATUS_REGISTER_COUNT:
+            return False
+
+        if self.count >= self.capacity:
+            self.truncated = True
+            return False
+
+        index = self.count
+        time_ms_column, status, sub_status, time_remaining, pressure, decay = self.columns
+
+        time_ms_column[index] = int(time_ms)
+        status[index] = registers[FORTEST_STATUS_WORD_STATUS]
+        sub_status[index] = registers[FORTEST_STATUS_WORD_SUB_STATUS]
+        time_remaining[index] = (
+            (registers[FORTEST_STATUS_WORD_TIME_REMAINING_HIGH] << 16)
+            | registers[FORTEST_STATUS_WORD_TIME_REMAINING_LOW]
+        ) & 0x7FFFFFFF
+        pressure[index] = _read_signed_value(
+            registers,
+            FORTEST_STATUS_WORD_PRESSURE_SIGN,
+            FORTEST_STATUS_WORD_PRESSURE_HIGH,
+            FORTEST_STATUS_WORD_PRESSURE_LOW,
+        )
+        decay[index] = _read_signed_value(
+            registers,
+            FORTEST_STATUS_WORD_DECAY_SIGN,
+            FORTEST_STATUS_WORD_DECAY_HIGH,
+            FORTEST_STATUS_WORD_DECAY_LOW,
+        )
+
+        self.pressure_unit = registers[FORTEST_STATUS_WORD_PRESSURE_UNIT]
+        self.pressure_decimals = registers[FORTEST_STATUS_WORD_PRESSURE_DECIMALS]
+        self.decay_unit = registers[FORTEST_STATUS_WORD_DECAY_UNIT]
+        self.decay_decimals = registers[FORTEST_STATUS_WORD_DECAY_DECIMALS]
+
+        self.count += 1
+        return True
+
+    def pack(self):
+        """
+        Palauttaa käyrän BLOBina tai None, jos näytteitä ei ole.
+        """
+        if self.count == 0:
+            return None
+
+        payload = b""
+
+        for column in self.columns:
+            values = column[:self.count]
+
+            if sys.byteorder == "big":
+                values.byteswap()
+
+            payload += values.tobytes()
+
+        flags = PRESSURE_CURVE_FLAG_TRUNCATED if self.truncated else 0
+
+        return PRESSURE_CURVE_BLOB_HEADER.pack(
+            PRESSURE_CURVE_BLOB_VERSION,
+            flags,
+            self.count,
+            self.pressure_unit,
+            self.pressure_decimals,
+            self.decay_unit,
+            self.decay_decimals,
+        ) + zlib.compress(payload, 6)
+
+
+def unpack_pressure_curve(blob):
+    """
+    Pura PressureCurveBuffer.pack()-BLOB.
+
+    Palauttaa:
+    {
+        "truncated": bool,
+        "pressure_unit": yksikkökoodi,
+        "decay_unit": yksikkökoodi,
+        "time_ms": [...],
+        "status": [...],
+        "sub_status": [...],
+        "time_remaining": [...],
+        "pressure": [skaalattu float, ...],
+        "decay": [skaalattu float, ...],
+    }
+    """
+    (
+        version,
+        flags,
+        count,
+        pressure_unit,
+        pressure_decimals,
+        decay_unit,
+        decay_decimals,
+    ) = PRESSURE_CURVE_BLOB_HEADER.unpack_from(blob, 0)
+
+    if version != PRESSURE_CURVE_BLOB_VERSION:
+        raise ValueError(f"Tuntematon painekäyrän versio: {version}")
+
+    values = array("i")
+    values.frombytes(zlib.decompress(bytes(blob[PRESSURE_CURVE_BLOB_HEADER.size:])))
+
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    curve = {
+        "truncated": bool(flags & PRESSURE_CURVE_FLAG_TRUNCATED),
+        "pressure_unit": pressure_unit,
+        "decay_unit": decay_unit,
+    }
+
+    for column_index, name in enumerate(PRESSURE_CURVE_COLUMNS):
+        curve[name] = values[column_index * count:(column_index + 1) * count].tolist()
+
+    pressure_scale = 10 ** pressure_decimals
+    decay_scale = 10 ** decay_decimals
+
+    curve["pressure"] = [value / pressure_scale for value in curve["pressure"]]
+    curve["decay"] = [value / decay_scale for value in curve["decay"]]
+
+    return curve
@@ -1,11 +1,199 @@
 # utils/program_manager.py
 import os
+import re
 import json
-from PyQt5.QtCore import QObject, pyqtSignal
+from bisect import bisect_left
+from collections import Counter
+from datetime import date
+from PyQt5.QtCore import (
+    QObject,
+    QThread,
+    QTimer,
+    QFileSystemWatcher,
+    QMetaObject,
+    Qt,
+    Q_ARG,
+    pyqtSignal,
+    pyqtSlot,
+)
+from utils.event_log import event_log, EVENT_SUBSYSTEM_PROGRAMS
+from utils.fortest_program_table import decode_program, infer_program_convention, program_differs
+
+
+# Hakusanat pilkotaan kirjaimiin ja numeroihin; "HP-COO" löytyy
+# sekä hauilla "hp" ja "coo" että koko nimellä "hp-coo".
+SEARCH_TOKEN_PATTERN = re.compile(r"[0-9a-zåäö.]+")
+
+
+def _format_search_number(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    return str(value)
+
+
+def get_program_search_tokens(program):
+    """
+    Ohjelman hakusanat: id, nimi, kuvaus, paine, testiaika,
+    vuotorajan yksikkö, mittaustapa ja testityyppi.
+    """
+    tokens = set()
+
+    program_id = program.get("id")
+    if program_id is not None:
+        tokens.add(str(program_id))
+
+    for key in ("name", "description"):
+        text = str(program.get(key) or "").lower()
+
+        if text:
+            tokens.add(text)
+            tokens.update(SEARCH_TOKEN_PATTERN.findall(text))
+
+    for key, suffix in (("pressure_mbar", "mbar"), ("test_time_s", "s")):
+        value = program.get(key)
+
+        if value is None or value == "":
+            continue
+
+        number = _format_search_number(value)
+        tokens.add(number)
+        tokens.add(f"{number}{suffix}")
+
+    max_decay = program.get("max_decay")
+    if isinstance(max_decay, dict) and max_decay.get("unit"):
+        tokens.add(str(max_decay["unit"]).lower())
+
+    for key in ("measurement_type", "kind_of_test"):
+        if program.get(key):
+            tokens.add(str(program[key]).lower())
+
+    return tokens
+
+
+# Tiedostomuutosten kokoamisaika ennen uudelleenlatausta. Editori ja
+# os.replace voivat tuottaa useita muutosilmoituksia peräkkäin.
+PROGRAM_RELOAD_DELAY_MS = 300
+
+
+class ProgramIndex:
+    """
+    Ohjelmalistan id- ja hakuindeksi.
+
+    by_id: id -> indeksi ohjelmalistassa
+    search_keys / search_indexes: aakkosjärjestyksessä olevat
+    (hakusana, indeksi) -parit. Etuliitehaku on bisect + peräkkäisten
+    parien luku.
+    """
+
+    def __init__(self, programs=None):
+        self.by_id = {}
+        pairs = []
+
+        for index, program in enumerate(programs or []):
+            program_id = program.get('id')
+
+            if program_id is not None:
+                self.by_id.setdefault(program_id, index)
+
+            for token in get_program_search_tokens(program):
+                pairs.append((token, index))
+
+        pairs.sort()
+        self.search_keys = [token for token, _index in pairs]
+        self.search_indexes = [index for _token, index in pairs]
+
+    def find_prefix(self, prefix):
+        matches = set()
+        position = bisect_left(self.search_keys, prefix)
+
+        while position < len(self.search_keys) and self.search_keys[position].startswith(prefix):
+            matches.add(self.search_indexes[position])
+            position += 1
+
+        return matches
+
+
+def validate_program_data(data):
+    """
+    Tarkista ohjelmatiedoston rakenne. Nostaa ValueErrorin, jos
+    tiedostoa ei voi ottaa käyttöön.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('programs'), list):
+        raise ValueError("programs-lista puuttuu")
+
+    seen_ids = set()
+
+    for position, program in enumerate(data['programs']):
+        if not isinstance(program, dict):
+            raise ValueError(f"ohjelma {position + 1} ei ole objekti")
+
+        program_id = program.get('id')
+
+        if not isinstance(program_id, int) or isinstance(program_id, bool) or program_id <= 0:
+            raise ValueError(f"ohjelman {position + 1} id puuttuu tai on virheellinen")
+
+        if program_id in seen_ids:
+            raise ValueError(f"ohjelman id {program_id} on kahdesti")
+
+        seen_ids.add(program_id)
+
+        if not isinstance(program.get('name', ""), str):
+            raise ValueError(f"ohjelman {program_id} nimi ei ole tekstiä")
+
+
+def get_changed_program_ids(old_programs, new_programs):
+    """
+    Lisättyjen, poistettujen ja muuttuneiden ohjelmien id:t.
+    """
+    old_by_id = {program.get('id'): program for program in old_programs}
+    new_by_id = {program.get('id'): program for program in new_programs}
+
+    return sorted(
+        program_id
+        for program_id in set(old_by_id) | set(new_by_id)
+        if old_by_id.get(program_id) != new_by_id.get(program_id)
+    )
+
+
+class ProgramFileLoader(QObject):
+    """
+    Lukee, tarkistaa ja indeksoi ohjelmatiedoston taustasäikeessä.
+    """
+
+    loaded = pyqtSignal(object, object, str)  # data, ProgramIndex, virheviesti
+
+    @pyqtSlot(str)
+    def load(self, config_path):
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            validate_program_data(data)
+            self.loaded.emit(data, ProgramIndex(data['programs']), "")
+
+        except Exception as e:
+            self.loaded.emit(None, None, f"Ohjelmatiedostoa {config_path} ei ladattu: {e}")
+
 
 class ProgramManager(QObject):
-    """Hallinnoi testiohjelmia."""
+    """
+    Hallinnoi testiohjelmia.
+
+    Ohjelmatiedostoa seurataan QFileSystemWatcherilla. Muuttunut
+    tiedosto luetaan ja indeksoidaan taustasäikeessä, ja valmis data
+    vaihdetaan käyttöön kerralla GUI-säikeessä. Virheellinen tiedosto
+    ei korvaa toimivaa listaa.
+
+    Ohjelmat vaihdetaan uusina objekteina, joten asemalle jo valittu
+    ohjelma-dict pysyy ennallaan, vaikka tiedosto muuttuisi testin
+    aikana.
+    """
     program_list_updated = pyqtSignal(list)
+    programs_changed = pyqtSignal(list)  # lisättyjen / muuttuneiden / poistettujen id:t
+
+    # Laitteelta haetun taulukon lähde ohjelmatiedostossa
+    DEVICE_SOURCE = "fortest"
     
     def __init__(self, config_path=None):
         super().__init__()
@@ -20,11 +208,15 @@ class ProgramManager(QObject):
         else:
             self.config_path = config_path
 
-        print(f"Ohjelmalista ladataan tiedostosta: {self.config_path}")
+        event_log.info(EVENT_SUBSYSTEM_PROGRAMS, f"Ohjelmalista ladataan tiedostosta: {self.config_path}")
 
         self.programs = []
         self.program_data = {}  # Tallennetaan koko ohjelmatiedot
+
+        self.program_index = ProgramIndex()
+
         self.load_programs()
+        self._init_file_watcher()
     
     def load_programs(self):
         """Lataa ohjelmat konfiguraatiotiedostosta"""
@@ -47,10 +239,12 @@ class ProgramManager(QObject):
                 self.programs = [f"Ohjelma {i}" for i in range(1, 51)]
                 self._create_default_config()
             
+            self._rebuild_index()
             self.program_list_updated.emit(self.programs)
         except Exception as e:
-            print(f"Virhe ohjelmien latauksessa: {e}")
+            event_log.error(EVENT_SUBSYSTEM_PROGRAMS, f"Virhe ohjelmien latauksessa: {e}")
             self.programs = [f"Ohjelma {i}" for i in range(1, 51)]
+            self._rebuild_index()
             self.program_list_updated.emit(self.programs)
     
     def _create_default_config(self):
@@ -70,7 +264,7 @@ class ProgramManager(QObject):
                 json.dump(default_programs, f, ensure_ascii=False, indent=2)
             self.program_data = default_programs
         except Exception as e:
-            print(f"Virhe oletuskonfiguraation luonnissa: {e}")
+            event_log.error(EVENT_SUBSYSTEM_PROGRAMS, f"Virhe oletuskonfiguraation luonnissa: {e}")
     
     def get_program_list(self):
         """Palauta ohjelmien lista"""
@@ -98,4 +292,271 @@ class ProgramManager(QObject):
         """Palauta koko ohjelman tiedot indeksin perusteella"""
         if 'programs' in self.program_data and 0 <= index < len(self.program_data['programs']):
             return self.program_data['programs'][index]
-        return None
\ No newline at end of file
+        return None
+
+    # ------------------------------------------------------------
+    # Indeksit ja haku
+    # ------------------------------------------------------------
+
+    def _rebuild_index(self):
+        """
+        Rakenna id- ja hakuindeksi program_data['programs']-listasta.
+        Kutsutaan aina, kun ohjelmalista vaihtuu.
+        """
+        programs = self.program_data.get('programs')
+
+        if not isinstance(programs, list):
+            programs = []
+
+        self.program_index = ProgramIndex(programs)
+
+    def get_program_index(self, program_id):
+        """Palauta ohjelman indeksi id:n perusteella tai None"""
+        try:
+            return self.program_index.by_id.get(int(program_id))
+        except (TypeError, ValueError):
+            return None
+
+    def get_program_by_id(self, program_id):
+        """Palauta koko ohjelman tiedot id:n perusteella"""
+        index = self.get_program_index(program_id)
+
+        if index is None:
+            return None
+
+        return self.get_program_by_index(index)
+
+    def search_programs(self, query):
+        """
+        Palauta hakua vastaavien ohjelmien indeksit listajärjestyksessä.
+
+        Jokaisen hakusanan on oltava jonkin ohjelman hakusanan alku
+        ("hp 6000 pa" = nimessä hp, paine 6000 ja yksikkö Pa).
+        Tyhjä haku palauttaa None = kaikki ohjelmat.
+        """
+        terms = str(query or "").lower().split()
+
+        if not terms:
+            return None
+
+        matches = None
+
+        for term in sorted(terms, key=len, reverse=True):
+            term_matches = self.program_index.find_prefix(term)
+            matches = term_matches if matches is None else matches & term_matches
+
+            if not matches:
+                return []
+
+        return sorted(matches)
+
+    def get_quick_search_terms(self, limit=6):
+        """
+        Pikahakusanat kosketusnäppäimistöön: vuotorajan yksiköt ja
+        yleisimmät paineet ("1000mbar") yleisyysjärjestyksessä.
+        Jokainen sana on jonkin ohjelman hakusana.
+        """
+        programs = self.program_data.get('programs')
+
+        if not isinstance(programs, list):
+            return []
+
+        units = Counter()
+        pressures = Counter()
+
+        for program in programs:
+            if not isinstance(program, dict):
+                continue
+
+            max_decay = program.get('max_decay')
+            if isinstance(max_decay, dict) and max_decay.get('unit'):
+                units[str(max_decay['unit'])] += 1
+
+            pressure = program.get('pressure_mbar')
+            if pressure is not None and pressure != "":
+                pressures[f"{_format_search_number(pressure)}mbar"] += 1
+
+        terms = [unit for unit, _count in units.most_common()]
+        terms += [pressure for pressure, _count in pressures.most_common()]
+        return terms[:limit]
+
+    # ------------------------------------------------------------
+    # Laitteelta haetut ohjelmat
+    # ------------------------------------------------------------
+
+    def apply_downloaded_programs(self, downloaded_programs, convention=None):
+        """
+        Päivitä välimuistitiedosto laitteelta haetuilla ohjelmilla.
+
+        downloaded_programs ovat ForTestProgramTable.programs-muotoa
+        (id, raw, name). Raw-arvot muunnetaan samalla esitystavalla kuin
+        välimuistissa: ensin ohjelman omista raw-pareista, sitten koko
+        tiedostosta ja viimeisenä convention-oletuksesta. Näin laitteella
+        muuttumaton ohjelma ei näy muuttuneena.
+
+        Vain muuttuneet ohjelmat korvataan; muut ohjelmat ja paikalliset
+        kentät säilyvät ennallaan. Tiedosto kirjoitetaan vain, jos jokin
+        ohjelma muuttui. Palauttaa muuttuneiden ohjelmien id:t.
+        """
+        data = self.program_data if isinstance(self.program_data.get("programs"), list) else {}
+        programs_by_id = {
+            program.get("id"): program
+            for program in data.get("programs", [])
+        }
+
+        file_convention = infer_program_convention(programs_by_id.values(), convention)
+        changed_ids = []
+
+        for entry in downloaded_programs:
+            program_id = entry["id"]
+            cached = programs_by_id.get(program_id)
+
+            program_convention = file_convention
+
+            if cached is not None:
+                program_convention = infer_program_convention([cached], file_convention)
+
+            downloaded = decode_program(program_id, entry["raw"], entry.get("name"), program_convention)
+
+            if cached is None:
+                merged = {"id": program_id, "name": f"Ohjelma {program_id}", "description": ""}
+            elif program_differs(cached, downloaded):
+                merged = dict(cached)
+            else:
+                continue
+
+            merged.update(downloaded)
+
+            if cached is not None and "raw" in cached:
+                merged["raw"] = dict(cached["raw"], **downloaded.get("raw", {}))
+
+            programs_by_id[program_id] = merged
+            changed_ids.append(program_id)
+
+        if not changed_ids:
+            return changed_ids
+
+        new_data = dict(data)
+        new_data["programs"] = [programs_by_id[key] for key in sorted(programs_by_id)]
+        new_data["last_updated"] = date.today().isoformat()
+        new_data["source"] = self.DEVICE_SOURCE
+        new_data.setdefault("version", "1.0.0")
+
+        if not self._write_config(new_data):
+            return []
+
+        self.program_data = new_data
+        self.programs = [
+            program.get("name", f"Ohjelma {program.get('id', 0)}")
+            for program in new_data["programs"]
+        ]
+        self._rebuild_index()
+        self.programs_changed.emit(changed_ids)
+        self.program_list_updated.emit(self.programs)
+
+        return changed_ids
+
+    def _write_config(self, data):
+        """
+        Kirjoita ohjelmatiedosto väliaikaistiedoston kautta, jotta
+        keskeytynyt kirjoitus ei jätä tiedostoa puolikkaaksi.
+        """
+        temp_path = f"{self.config_path}.tmp"
+
+        try:
+            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
+
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(temp_path, self.config_path)
+            return True
+
+        except Exception as e:
+            event_log.error(EVENT_SUBSYSTEM_PROGRAMS, f"Virhe ohjelmatiedoston kirjoituksessa: {e}")
+
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+            return False
+
+    # ------------------------------------------------------------
+    # Tiedoston seuranta
+    # ------------------------------------------------------------
+
+    def _init_file_watcher(self):
+        self.loader_thread = QThread()
+        self.loader = ProgramFileLoader()
+        self.loader.moveToThread(self.loader_thread)
+        self.loader.loaded.connect(self._apply_loaded_programs)
+        self.loader_thread.start()
+
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(PROGRAM_RELOAD_DELAY_MS)
+        self.reload_timer.timeout.connect(self.reload_programs)
+
+        # Hakemistoa seurataan myös, koska os.replace vaihtaa tiedoston
+        # inodin ja tiedoston seuranta katkeaa.
+        self.file_watcher = QFileSystemWatcher(self)
+        self.file_watcher.fileChanged.connect(self._on_config_changed)
+        self.file_watcher.directoryChanged.connect(self._on_config_changed)
+
+        config_directory = os.path.dirname(os.path.abspath(self.config_path))
+
+        if os.path.isdir(config_directory):
+            self.file_watcher.addPath(config_directory)
+
+        self._watch_config_file()
+
+    def _watch_config_file(self):
+        if os.path.exists(self.config_path) and self.config_path not in self.file_watcher.files():
+            self.file_watcher.addPath(self.config_path)
+
+    def _on_config_changed(self, _path):
+        self._watch_config_file()
+        self.reload_timer.start()
+
+    def reload_programs(self):
+        """Lue ohjelmatiedosto uudelleen taustasäikeessä."""
+        if not os.path.exists(self.config_path):
+            return
+
+        QMetaObject.invokeMethod(
+            self.loader,
+            "load",
+            Qt.QueuedConnection,
+            Q_ARG(str, self.config_path),
+        )
+
+    def _apply_loaded_programs(self, data, program_index, error_msg):
+        if error_msg:
+            event_log.warning(EVENT_SUBSYSTEM_PROGRAMS, error_msg)
+            return
+
+        old_programs = self.program_data.get('programs') or []
+        changed_ids = get_changed_program_ids(old_programs, data['programs'])
+
+        if not changed_ids:
+            return
+
+        self.program_data = data
+        self.programs = [
+            program.get('name', f"Ohjelma {program.get('id', 0)}")
+            for program in data['programs']
+        ]
+        self.program_index = program_index
+
+        event_log.info(EVENT_SUBSYSTEM_PROGRAMS, f"Ohjelmatiedosto {self.config_path} ladattu uudelleen, muuttuneet: {len(changed_ids)}")
+
+        self.programs_changed.emit(changed_ids)
+        self.program_list_updated.emit(self.programs)
+
+    def cleanup(self):
+        """Pysäytä tiedoston seuranta ja latausäie."""
+        self.reload_timer.stop()
+        self.file_watcher.removePaths(self.file_watcher.files() + self.file_watcher.directories())
+        self.loader_thread.quit()
+        self.loader_thread.wait()
@@ -0,0 +1,123 @@
+# utils/raw_result_codec.py
+import json
+import struct
+import sys
+import zlib
+from array import array
+
+from utils.event_log import event_log, EVENT_SUBSYSTEM_STORAGE
+
+
+# ------------------------------------------------------------
+# Pakattu raakatulos
+# ------------------------------------------------------------
+
+# BLOB-muoto:
+#   1 tavu   versio
+#   1 tavu   liput (RAW_RESULT_FLAG_ZLIB)
+#   N tavua  uint16-taulukko little endian, tarvittaessa zlib-pakattuna
+#
+# 25 tulosrekisteriä = 52 tavua, kun JSON-teksti on tyypillisesti
+# 100-130 tavua.
+RAW_RESULT_BLOB_VERSION = 1
+RAW_RESULT_FLAG_ZLIB = 0x01
+
+RAW_RESULT_BLOB_HEADER = struct.Struct("<BB")
+
+
+def pack_raw_registers(registers, compress=False):
+    """
+    Pakkaa rekisterilistan uint16-BLOBiksi.
+
+    compress=True kokeilee zlibiä ja käyttää sitä vain, jos tulos on
+    pienempi. Palauttaa None, jos jokin arvo ei mahdu uint16:een.
+    """
+    try:
+        values = array("H", [int(value) for value in registers])
+    except (OverflowError, TypeError, ValueError):
+        return None
+
+    if values.itemsize != 2:
+        return None
+
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    payload = values.tobytes()
+    flags = 0
+
+    if compress:
+        compressed = zlib.compress(payload, 9)
+
+        if len(compressed) < len(payload):
+            payload = compressed
+            flags |= RAW_RESULT_FLAG_ZLIB
+
+    return RAW_RESULT_BLOB_HEADER.pack(RAW_RESULT_BLOB_VERSION, flags) + payload
+
+
+def unpack_raw_registers(blob):
+    """
+    Pura pack_raw_registers()-BLOB rekisterilistaksi.
+    """
+    version, flags = RAW_RESULT_BLOB_HEADER.unpack_from(blob, 0)
+
+    if version != RAW_RESULT_BLOB_VERSION:
+        raise ValueError(f"Tuntematon raakatuloksen versio: {version}")
+
+    payload = bytes(blob[RAW_RESULT_BLOB_HEADER.size:])
+
+    if flags & RAW_RESULT_FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+
+    values = array("H")
+    values.frombytes(payload)
+
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    return values.tolist()
+
+
+def encode_raw_result(raw_result, use_blob=True, compress=False):
+    """
+    Muunna raw_result tallennettavaksi.
+
+    Palauttaa (raw_result_json, raw_result_blob), joista toinen on None.
+    BLOBiksi pakataan vain muoto {"registers": [...]}; muut muodot
+    tallennetaan JSONina kuten ennenkin.
+    """
+    if (
+        use_blob
+        and isinstance(raw_result, dict)
+        and set(raw_result.keys()) == {"registers"}
+    ):
+        blob = pack_raw_registers(raw_result["registers"], compress=compress)
+
+        if blob is not None:
+            return None, blob
+
+    try:
+        return json.dumps(raw_result, ensure_ascii=False), None
+    except Exception:
+        return None, None
+
+
+def decode_raw_result(raw_result_json=None, raw_result_blob=None):
+    """
+    Palauttaa tallennetun raw_resultin riippumatta tallennusmuodosta.
+    """
+    if raw_result_blob is not None:
+        try:
+            return {"registers": unpack_raw_registers(raw_result_blob)}
+        except Exception as e:
+            event_log.warning(EVENT_SUBSYSTEM_STORAGE, f"Raakatuloksen purku epäonnistui: {e}")
+            return None
+
+    if raw_result_json:
+        try:
+            return json.loads(raw_result_json)
+        except Exception:
+            return None
+
+    return None
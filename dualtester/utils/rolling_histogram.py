@@ -0,0 +1,98 @@
+# utils/rolling_histogram.py
+from bisect import bisect_right
+from collections import deque
+
+
+# ------------------------------------------------------------
+# Liukuva histogrammi
+# ------------------------------------------------------------
+
+# Lokerorajat millisekunteina. Viimeinen lokero on "yli 120 s".
+CYCLE_HISTOGRAM_EDGES_MS = (
+    100,
+    200,
+    500,
+    1000,
+    2000,
+    5000,
+    10000,
+    20000,
+    30000,
+    60000,
+    120000,
+)
+
+CYCLE_HISTOGRAM_WINDOW = 200
+
+
+class RollingHistogram:
+    """
+    Viimeisten window näytteen jakauma.
+
+    Lokeromäärät ja summa päivitetään lisäyksen ja poistuvan näytteen
+    mukaan, joten add() ei käy historiaa läpi. Persentiilit lasketaan
+    yhteenvetoa pyydettäessä järjestetystä kopiosta (enintään window
+    näytettä).
+    """
+
+    def __init__(self, window=CYCLE_HISTOGRAM_WINDOW, edges_ms=CYCLE_HISTOGRAM_EDGES_MS):
+        self.window = max(1, int(window))
+        self.edges_ms = tuple(edges_ms)
+        self.samples = deque()
+        self.counts = [0] * (len(self.edges_ms) + 1)
+        self.total_ms = 0.0
+
+    def add(self, value_ms):
+        if value_ms is None or value_ms < 0:
+            return
+
+        if len(self.samples) >= self.window:
+            removed = self.samples.popleft()
+            self.counts[bisect_right(self.edges_ms, removed)] -= 1
+            self.total_ms -= removed
+
+        self.samples.append(value_ms)
+        self.counts[bisect_right(self.edges_ms, value_ms)] += 1
+        self.total_ms += value_ms
+
+    def clear(self):
+        self.samples.clear()
+        self.counts = [0] * (len(self.edges_ms) + 1)
+        self.total_ms = 0.0
+
+    def get_mean_ms(self):
+        if not self.samples:
+            return None
+
+        return self.total_ms / len(self.samples)
+
+    def get_summary(self):
+        """
+        {"count", "mean_ms", "min_ms", "p50_ms", "p95_ms", "max_ms",
+         "buckets": [(yläraja_ms tai None, määrä), ...]}
+        """
+        count = len(self.samples)
+        buckets = list(zip(self.edges_ms + (None,), self.counts))
+
+        if not count:
+            return {
+                "count": 0,
+                "mean_ms": None,
+                "min_ms": None,
+                "p50_ms": None,
+                "p95_ms": None,
+                "max_ms": None,
+                "buckets": buckets,
+            }
+
+        ordered = sorted(self.samples)
+
+        return {
+            "count": count,
+            "mean_ms": self.total_ms / count,
+            "min_ms": ordered[0],
+            "p50_ms": ordered[(count - 1) // 2],
+            "p95_ms": ordered[min(count - 1, int(round(0.95 * (count - 1))))],
+            "max_ms": ordered[-1],
+            "buckets": buckets,
+        }
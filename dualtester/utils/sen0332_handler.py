@@ -3,6 +3,7 @@ import time
 
 import smbus
 from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from utils.event_log import event_log, EVENT_SUBSYSTEM_SENSORS
 
 
 class SEN0332Handler(QObject):
@@ -40,7 +41,7 @@ class SEN0332Handler(QObject):
             self.connected = True
             self.error_reported = False
             self.consecutive_error_count = 0
-            print("SEN0332 huoneanturi yhdistetty onnistuneesti")
+            event_log.info(EVENT_SUBSYSTEM_SENSORS, "SEN0332 huoneanturi yhdistetty onnistuneesti")
 
         except Exception as e:
             self.connected = False
@@ -68,7 +69,7 @@ class SEN0332Handler(QObject):
             return
 
         if not self.error_reported:
-            print(message)
+            event_log.warning(EVENT_SUBSYSTEM_SENSORS, message)
             self.sensor_error.emit(message)
             self.error_reported = True
 
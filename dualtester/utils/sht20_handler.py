@@ -2,6 +2,7 @@
 import time
 import smbus
 from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from utils.event_log import event_log, EVENT_SUBSYSTEM_SENSORS
 
 class SHT20Handler(QObject):
     """SHT20 lämpötila- ja kosteus-anturin käsittelijä"""
@@ -25,10 +26,10 @@ class SHT20Handler(QObject):
             time.sleep(0.1)
             self.bus.read_byte(self.address)
             self.connected = True
-            print("SHT20 anturi yhdistetty onnistuneesti")
+            event_log.info(EVENT_SUBSYSTEM_SENSORS, "SHT20 anturi yhdistetty onnistuneesti")
         except Exception as e:
             self.connected = False
-            print(f"SHT20 yhteyden muodostus epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_SENSORS, f"SHT20 yhteyden muodostus epäonnistui: {e}")
     
     def trigger_temperature_measurement(self):
         """Käynnistää lämpötilamittauksen (no hold master)"""
@@ -38,7 +39,7 @@ class SHT20Handler(QObject):
             self.bus.write_byte(self.address, 0xF3)  # Trigger T measurement (no hold master)
             return True
         except Exception as e:
-            print(f"Lämpötilamittauksen käynnistys epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_SENSORS, f"Lämpötilamittauksen käynnistys epäonnistui: {e}")
             return False
     
     def trigger_humidity_measurement(self):
@@ -49,7 +50,7 @@ class SHT20Handler(QObject):
             self.bus.write_byte(self.address, 0xF5)  # Trigger RH measurement (no hold master)
             return True
         except Exception as e:
-            print(f"Kosteusmittauksen käynnistys epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_SENSORS, f"Kosteusmittauksen käynnistys epäonnistui: {e}")
             return False
     
     def read_measurement_result(self):
@@ -74,10 +75,10 @@ class SHT20Handler(QObject):
                 # Mittaus ei ole vielä valmis, odota hieman
                 time.sleep(0.01)
                 return None
-            print(f"I2C-lukuvirhe: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_SENSORS, f"I2C-lukuvirhe: {e}")
             return None
         except Exception as e:
-            print(f"Mittauksen lukeminen epäonnistui: {e}")
+            event_log.warning(EVENT_SUBSYSTEM_SENSORS, f"Mittauksen lukeminen epäonnistui: {e}")
             return None
     
     def convert_temperature(self, raw_temp):